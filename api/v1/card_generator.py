@@ -9,6 +9,32 @@ from typing import Optional
 from datetime import datetime
 
 
+FONT_BOLD_PATH = "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"
+FONT_REGULAR_PATH = "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"
+
+# Шрифты загружаются один раз на процесс
+_fonts = None
+
+
+def load_fonts() -> dict:
+    """Загрузить шрифты карточки (кешируется на уровне процесса)."""
+    global _fonts
+    if _fonts is None:
+        try:
+            _fonts = {
+                'bold': ImageFont.truetype(FONT_BOLD_PATH, 32),
+                'regular': ImageFont.truetype(FONT_REGULAR_PATH, 24),
+                'small': ImageFont.truetype(FONT_REGULAR_PATH, 18),
+                'large': ImageFont.truetype(FONT_BOLD_PATH, 48),
+                'title': ImageFont.truetype(FONT_BOLD_PATH, 28),
+            }
+        except Exception:
+            # Fallback to default
+            default = ImageFont.load_default()
+            _fonts = {name: default for name in ('bold', 'regular', 'small', 'large', 'title')}
+    return _fonts
+
+
 class CardGenerator:
     """Генератор карточек оценки недвижимости."""
 
@@ -26,19 +52,12 @@ class CardGenerator:
         self.light_gray = (229, 231, 235)  # #e5e7eb
 
         # Шрифты
-        try:
-            self.font_bold = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", 32)
-            self.font_regular = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", 24)
-            self.font_small = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", 18)
-            self.font_large = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", 48)
-            self.font_title = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", 28)
-        except:
-            # Fallback to default
-            self.font_bold = ImageFont.load_default()
-            self.font_regular = ImageFont.load_default()
-            self.font_small = ImageFont.load_default()
-            self.font_large = ImageFont.load_default()
-            self.font_title = ImageFont.load_default()
+        fonts = load_fonts()
+        self.font_bold = fonts['bold']
+        self.font_regular = fonts['regular']
+        self.font_small = fonts['small']
+        self.font_large = fonts['large']
+        self.font_title = fonts['title']
 
     def format_price(self, price: float) -> str:
         """Форматирование цены."""
@@ -178,9 +197,20 @@ class CardGenerator:
         return buffer.getvalue()
 
 
+_generator = None
+
+
+def get_card_generator() -> CardGenerator:
+    """Get singleton card generator instance."""
+    global _generator
+    if _generator is None:
+        _generator = CardGenerator()
+    return _generator
+
+
 def generate_telegram_card(valuation_data: dict) -> bytes:
     """Удобная функция для генерации карточки из данных оценки."""
-    generator = CardGenerator()
+    generator = get_card_generator()
 
     # Извлекаем данные
     sale_price = valuation_data.get('bottom3_price') or valuation_data.get('estimated_price', 0)
@@ -0,0 +1,292 @@
+"""
+Background writer for valuation history.
+
+/estimate used to insert into valuation_history and then every comparable
+into valuation_comparables one row at a time before responding. Records
+are now queued and a worker thread writes them in batches: one multi-row
+INSERT ... RETURNING valuation_id for the valuations and one multi-row
+INSERT for all their comparables.
+
+Address normalization (a DaData call) happens before a record is queued:
+on the caller's thread for save(), in a small thread pool for submit().
+The writer thread only talks to PostgreSQL, so a request waiting for its
+valuation_id never queues behind other records' DaData calls.
+
+Usage:
+    writer = ValuationHistoryWriter(address_normalizer=normalize_address)
+    writer.submit(record, comparables)            # fire and forget
+    valuation_id = writer.save(record, comparables)  # wait for the id
+    writer.close()                                # flush on shutdown
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from psycopg2.extras import execute_values
+
+from etl.valuation.db_pool import pooled_connection
+
+
+HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "1000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "100"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5"))
+HISTORY_SAVE_TIMEOUT = 10.0
+HISTORY_NORMALIZE_WORKERS = int(os.getenv("HISTORY_NORMALIZE_WORKERS", "4"))
+
+HISTORY_COLUMNS = (
+    'address', 'address_normalized', 'lat', 'lon', 'district_id',
+    'area_total', 'rooms', 'floor', 'total_floors',
+    'building_type', 'building_type_source',
+    'estimated_price', 'estimated_price_per_sqm',
+    'price_range_low', 'price_range_high',
+    'confidence', 'method_used',
+    'comparables_count',
+    'interest_price', 'interest_price_per_sqm',
+    'expected_profit', 'profit_rate',
+    'investment_breakdown',
+)
+COMPARABLE_COLUMNS = (
+    'listing_id', 'url',
+    'price', 'price_per_sqm', 'area_total', 'rooms', 'building_type',
+    'distance_km', 'similarity_score', 'weight', 'rank',
+)
+
+_STOP = object()
+
+
+class _PendingValuation:
+    __slots__ = ('record', 'comparables', 'future')
+
+    def __init__(self, record: Dict[str, Any], comparables: List[Dict[str, Any]], future: Optional[Future]):
+        self.record = record
+        self.comparables = comparables
+        self.future = future
+
+
+class ValuationHistoryWriter:
+    """Bounded queue of valuation records drained by one batching worker."""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        address_normalizer: Optional[Callable[[str], str]] = None,
+        queue_size: int = HISTORY_QUEUE_SIZE,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        normalize_workers: int = HISTORY_NORMALIZE_WORKERS
+    ):
+        self.dsn = dsn
+        self.address_normalizer = address_normalizer
+        self.normalize_workers = normalize_workers
+        self._normalizer: Optional[ThreadPoolExecutor] = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counters = {
+            'written': 0,
+            'batches': 0,
+            'failed': 0,
+            'written_inline': 0,
+        }
+
+    # --- public API ---
+
+    def submit(
+        self,
+        record: Dict[str, Any],
+        comparables: Optional[List[Dict[str, Any]]] = None,
+        want_id: bool = False
+    ) -> Optional[Future]:
+        """
+        Queue a valuation for writing.
+
+        Returns a Future resolving to valuation_id when want_id is set.
+        The address is normalized in the normalizer pool first. When the
+        queue is full the record is written inline (backpressure) instead
+        of being dropped.
+        """
+        item = _PendingValuation(record, comparables or [], Future() if want_id else None)
+        if self._needs_normalization(record):
+            self._ensure_normalizer().submit(self._normalize_and_enqueue, item)
+        else:
+            self._enqueue(item)
+        return item.future
+
+    def save(self, record: Dict[str, Any], comparables: Optional[List[Dict[str, Any]]] = None) -> Optional[int]:
+        """Queue a valuation and wait for its valuation_id (None on failure)."""
+        # The caller waits anyway: normalize here instead of behind other records
+        self._normalize(record)
+        future = self.submit(record, comparables, want_id=True)
+        try:
+            return future.result(timeout=HISTORY_SAVE_TIMEOUT)
+        except Exception as e:
+            print(f"❌ Failed to save valuation history: {e}")
+            return None
+
+    def close(self, timeout: float = 30.0):
+        """Flush queued records and stop the worker."""
+        with self._worker_lock:
+            normalizer, self._normalizer = self._normalizer, None
+        if normalizer is not None:
+            normalizer.shutdown(wait=True)  # everything normalized is queued
+        with self._worker_lock:
+            worker = self._worker
+            if worker is None:
+                return
+            self._queue.put(_STOP)
+            worker.join(timeout)
+            self._worker = None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._counters)
+        stats['queue_depth'] = self.queue_depth()
+        stats['queue_size'] = self._queue.maxsize
+        return stats
+
+    def render_prometheus(self) -> str:
+        """Queue depth and counters in Prometheus text format."""
+        stats = self.stats()
+        lines = [
+            "# HELP valuation_history_queue_depth Valuations waiting to be written",
+            "# TYPE valuation_history_queue_depth gauge",
+            f"valuation_history_queue_depth {stats['queue_depth']}",
+        ]
+        for key in ('written', 'batches', 'failed', 'written_inline'):
+            name = f"valuation_history_{key}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {stats[key]}")
+        return "\n".join(lines) + "\n"
+
+    # --- normalization ---
+
+    def _needs_normalization(self, record: Dict[str, Any]) -> bool:
+        return self.address_normalizer is not None and record.get('address_normalized') is None
+
+    def _normalize(self, record: Dict[str, Any]):
+        if not self._needs_normalization(record):
+            return
+        try:
+            record['address_normalized'] = self.address_normalizer(record.get('address') or "")
+        except Exception as e:
+            print(f"⚠️  Address normalization failed, saving without it: {e}")
+
+    def _normalize_and_enqueue(self, item: _PendingValuation):
+        self._normalize(item.record)
+        self._enqueue(item)
+
+    def _ensure_normalizer(self) -> ThreadPoolExecutor:
+        with self._worker_lock:
+            if self._normalizer is None:
+                self._normalizer = ThreadPoolExecutor(
+                    max_workers=self.normalize_workers, thread_name_prefix="valuation-history-normalizer"
+                )
+            return self._normalizer
+
+    # --- worker ---
+
+    def _enqueue(self, item: _PendingValuation):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._write_items([item])
+            self._count('written_inline', 1)
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="valuation-history-writer", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write_items(batch)
+            if stop:
+                return
+
+    def _write_items(self, items: List[_PendingValuation]):
+        """Write a batch; on failure retry one by one so a bad row doesn't sink the rest."""
+        try:
+            ids = self._write_batch(items)
+        except Exception as e:
+            if len(items) == 1:
+                print(f"❌ Failed to save valuation history: {e}")
+                self._count('failed', 1)
+                if items[0].future is not None:
+                    items[0].future.set_exception(e)
+                return
+            print(f"⚠️  History batch of {len(items)} failed ({e}), retrying one by one")
+            for item in items:
+                self._write_items([item])
+            return
+
+        for item, valuation_id in zip(items, ids):
+            if item.future is not None:
+                item.future.set_result(valuation_id)
+        self._count('written', len(items))
+        self._count('batches', 1)
+
+    def _write_batch(self, items: List[_PendingValuation]) -> List[int]:
+        with pooled_connection(self.dsn) as conn:
+            cur = conn.cursor()
+            # VALUES order is preserved in RETURNING for a single INSERT
+            rows = execute_values(
+                cur,
+                f"INSERT INTO valuation_history ({', '.join(HISTORY_COLUMNS)}) VALUES %s RETURNING valuation_id",
+                [tuple(item.record.get(col) for col in HISTORY_COLUMNS) for item in items],
+                page_size=len(items),
+                fetch=True
+            )
+            ids = [row['valuation_id'] if isinstance(row, dict) else row[0] for row in rows]
+
+            comparable_rows = [
+                (valuation_id,) + tuple(comp.get(col) for col in COMPARABLE_COLUMNS)
+                for item, valuation_id in zip(items, ids)
+                for comp in item.comparables
+            ]
+            if comparable_rows:
+                execute_values(
+                    cur,
+                    f"INSERT INTO valuation_comparables (valuation_id, {', '.join(COMPARABLE_COLUMNS)}) VALUES %s",
+                    comparable_rows,
+                    page_size=1000
+                )
+            conn.commit()
+            cur.close()
+        return ids
+
+    def _count(self, key: str, n: int):
+        with self._stats_lock:
+            self._counters[key] += n
@@ -6,9 +6,14 @@ HTML Report Generator Module
 import os
 import uuid
 import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
@@ -17,6 +22,13 @@ from psycopg2.extras import RealDictCursor
 BASE_URL = os.getenv("REPORT_BASE_URL", "https://rating.ourdocs.org")
 REPORTS_DIR = os.getenv("REPORTS_DIR", "/home/ubuntu/realestate/web/static/reports")
 REPORT_EXPIRY_DAYS = int(os.getenv("REPORT_EXPIRY_DAYS", "5"))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+
+TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'web', 'templates', 'reports'
+)
+TEMPLATE_NAME = 'valuation_report.html'
 
 
 # Database connection
@@ -66,25 +78,103 @@ def ensure_reports_table():
     conn.close()
 
 
+# Compiled template (one per process)
+_template: Optional[Template] = None
+_template_lock = threading.Lock()
+
+
+def get_report_template() -> Template:
+    """
+    Get compiled report template.
+
+    Template is compiled once per process; auto_reload is disabled so
+    rendering never stats the template file on the hot path.
+    """
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                env = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    autoescape=True,
+                    auto_reload=False,
+                )
+                _template = env.get_template(TEMPLATE_NAME)
+    return _template
+
+
+@dataclass
+class RenderedReport:
+    """Rendered report HTML with HTTP cache validators."""
+    report_uuid: str
+    html: str
+    etag: str
+    last_modified: datetime
+
+
+class RenderedReportCache:
+    """
+    In-process LRU cache of rendered reports keyed on report UUID.
+
+    Reports are immutable once generated, so entries never need
+    invalidation - only eviction by size.
+    """
+
+    def __init__(self, max_size: int = REPORT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, RenderedReport]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, report_uuid: str) -> Optional[RenderedReport]:
+        key = str(report_uuid).lower()
+        with self._lock:
+            report = self._items.get(key)
+            if report is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return report
+
+    def put(self, report_uuid: str, html: str, last_modified: Optional[datetime] = None) -> RenderedReport:
+        key = str(report_uuid).lower()
+        report = RenderedReport(
+            report_uuid=key,
+            html=html,
+            etag=f'"{hashlib.sha1(html.encode("utf-8")).hexdigest()}"',
+            last_modified=(last_modified or datetime.now()).replace(microsecond=0),
+        )
+        with self._lock:
+            self._items[key] = report
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return report
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
 class HTMLReportGenerator:
     """Generator for branded HTML valuation reports."""
 
-    def __init__(self):
-        # Template directory
-        template_dir = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
-            'web', 'templates', 'reports'
-        )
-        self.env = Environment(
-            loader=FileSystemLoader(template_dir),
-            autoescape=True
-        )
+    def __init__(self, ensure_table: bool = True):
+        self.template = get_report_template()
+        self.cache = RenderedReportCache()
 
         # Ensure table exists
-        try:
-            ensure_reports_table()
-        except Exception as e:
-            print(f"Warning: Could not create reports table: {e}")
+        if ensure_table:
+            try:
+                ensure_reports_table()
+            except Exception as e:
+                print(f"Warning: Could not create reports table: {e}")
 
     def generate_report(
         self,
@@ -169,10 +259,16 @@ class HTMLReportGenerator:
         # Telegram info
         telegram_user_id: Optional[int] = None,
         telegram_chat_id: Optional[int] = None,
+
+        # Persistence
+        save: bool = True,
     ) -> Dict[str, Any]:
         """
         Generate HTML report and save to database.
 
+        With save=False the report is only rendered; the returned dict
+        carries everything save_reports() needs to persist it later.
+
         Returns:
             Dict with report_uuid, report_url, html_content
         """
@@ -254,8 +350,7 @@ class HTMLReportGenerator:
             ]
 
         # Render template
-        template = self.env.get_template('valuation_report.html')
-        html_content = template.render(
+        html_content = self.template.render(
             # Meta
             report_id=report_uuid[:8].upper(),
             report_date=report_date,
@@ -375,66 +470,89 @@ class HTMLReportGenerator:
             "filter_criteria": filter_criteria,
         }
 
+        report = {
+            "report_uuid": report_uuid,
+            "report_id": None,
+            "report_url": report_url,
+            "report_url_full": report_url_full,
+            "html_file_path": None,
+            "html_content": html_content,
+            "expires_at": expires_at.isoformat(),
+            "created_at": datetime.now().isoformat(),
+            "row": (
+                report_uuid, cian_id, address, area_total, rooms, floor, total_floors,
+                seller_price, interest_price, interest_price_per_sqm,
+                market_price_low, market_price_high,
+                json.dumps(report_data, ensure_ascii=False, default=str),
+                html_content,
+                expires_at,
+                telegram_user_id, telegram_chat_id
+            ),
+        }
+
+        if save:
+            self.save_reports([report])
+        return report
+
+    def save_reports(self, reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Persist rendered reports to disk and database, and warm the cache.
+
+        All reports are written in one transaction. Sets report_id and
+        html_file_path on each report dict.
+        """
         # Save HTML to disk
-        html_file_path = None
         try:
             os.makedirs(REPORTS_DIR, exist_ok=True)
-            html_filename = f"{report_uuid}.html"
-            html_file_path = os.path.join(REPORTS_DIR, html_filename)
-            with open(html_file_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            print(f"Report saved to: {html_file_path}")
         except Exception as e:
             print(f"Error saving report to disk: {e}")
+        for report in reports:
+            try:
+                html_file_path = os.path.join(REPORTS_DIR, f"{report['report_uuid']}.html")
+                with open(html_file_path, 'w', encoding='utf-8') as f:
+                    f.write(report['html_content'])
+                report['html_file_path'] = html_file_path
+                print(f"Report saved to: {html_file_path}")
+            except Exception as e:
+                print(f"Error saving report to disk: {e}")
 
         # Save to database
         try:
             conn = get_db_connection()
             cur = conn.cursor()
 
-            cur.execute("""
-                INSERT INTO valuation_reports (
-                    report_uuid, cian_id, address, area_total, rooms, floor, total_floors,
-                    seller_price, interest_price, interest_price_per_sqm,
-                    market_price_low, market_price_high,
-                    report_data, html_content,
-                    expires_at,
-                    telegram_user_id, telegram_chat_id
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s
-                )
-                RETURNING id
-            """, (
-                report_uuid, cian_id, address, area_total, rooms, floor, total_floors,
-                seller_price, interest_price, interest_price_per_sqm,
-                market_price_low, market_price_high,
-                json.dumps(report_data, ensure_ascii=False, default=str),
-                html_content,
-                expires_at,
-                telegram_user_id, telegram_chat_id
-            ))
+            for report in reports:
+                cur.execute("""
+                    INSERT INTO valuation_reports (
+                        report_uuid, cian_id, address, area_total, rooms, floor, total_floors,
+                        seller_price, interest_price, interest_price_per_sqm,
+                        market_price_low, market_price_high,
+                        report_data, html_content,
+                        expires_at,
+                        telegram_user_id, telegram_chat_id
+                    ) VALUES (
+                        %s, %s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s, %s
+                    )
+                    RETURNING id
+                """, report['row'])
+                report['report_id'] = cur.fetchone()['id']
 
-            report_id = cur.fetchone()['id']
             conn.commit()
             cur.close()
             conn.close()
 
         except Exception as e:
             print(f"Error saving report to database: {e}")
-            report_id = None
+            for report in reports:
+                report['report_id'] = None
 
-        return {
-            "report_uuid": report_uuid,
-            "report_id": report_id,
-            "report_url": report_url,
-            "report_url_full": report_url_full,
-            "html_file_path": html_file_path,
-            "html_content": html_content,
-            "expires_at": expires_at.isoformat(),
-            "created_at": datetime.now().isoformat(),
-        }
+        for report in reports:
+            self.cache.put(report['report_uuid'], report['html_content'])
+            report.pop('row', None)
+
+        return reports
 
     def get_report_by_uuid(self, report_uuid: str) -> Optional[Dict]:
         """Get report by UUID."""
@@ -461,10 +579,36 @@ class HTMLReportGenerator:
 
     def get_report_html(self, report_uuid: str) -> Optional[str]:
         """Get HTML content by UUID."""
-        report = self.get_report_by_uuid(report_uuid)
-        if report:
-            return report.get('html_content')
-        return None
+        rendered = self.get_rendered_report(report_uuid)
+        return rendered.html if rendered else None
+
+    def get_rendered_report(self, report_uuid: str) -> Optional[RenderedReport]:
+        """
+        Get rendered report from cache, loading it from the database on miss.
+
+        Returns RenderedReport with ETag/Last-Modified validators, or None.
+        """
+        rendered = self.cache.get(report_uuid)
+        if rendered:
+            return rendered
+
+        try:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT html_content, created_at FROM valuation_reports
+                WHERE report_uuid = %s
+            """, (report_uuid,))
+            result = cur.fetchone()
+            cur.close()
+            conn.close()
+        except Exception as e:
+            print(f"Error getting report: {e}")
+            return None
+
+        if not result or not result['html_content']:
+            return None
+        return self.cache.put(report_uuid, result['html_content'], result['created_at'])
 
 
 # Singleton instance
@@ -493,6 +637,49 @@ def get_report_html(report_uuid: str) -> Optional[str]:
     return get_generator().get_report_html(report_uuid)
 
 
+def get_rendered_report(report_uuid: str) -> Optional[RenderedReport]:
+    """Convenience function to get cached report HTML with validators."""
+    return get_generator().get_rendered_report(report_uuid)
+
+
+# Worker-side generator for bulk rendering (no DB access in workers)
+_worker_generator = None
+
+
+def _init_render_worker():
+    """Process pool initializer: compile the template once per worker."""
+    global _worker_generator
+    _worker_generator = HTMLReportGenerator(ensure_table=False)
+
+
+def _render_report_worker(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one report inside a pool worker without persisting it."""
+    return _worker_generator.generate_report(**params, save=False)
+
+
+def generate_reports_bulk(
+    reports_params: List[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    chunksize: int = 8,
+) -> List[Dict[str, Any]]:
+    """
+    Render many reports in a process pool and save them in one transaction.
+
+    Intended for nightly digests. Each item of reports_params holds the
+    keyword arguments of HTMLReportGenerator.generate_report().
+
+    Returns:
+        List of report dicts in the same order as reports_params
+    """
+    if not reports_params:
+        return []
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker) as pool:
+        rendered = list(pool.map(_render_report_worker, reports_params, chunksize=chunksize))
+
+    return get_generator().save_reports(rendered)
+
+
 def generate_combined_report(
     lat: float,
     lon: float,
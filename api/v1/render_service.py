@@ -0,0 +1,200 @@
+"""
+Rendering Service
+Рендеринг PNG-карточек и PDF-отчётов в пуле процессов.
+
+Fonts and static assets are loaded once per worker process, outputs are
+cached by valuation id, and render latency is tracked per output kind.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any
+
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "512"))
+LATENCY_WINDOW = 1000  # Last N renders used for percentiles
+
+
+# === Worker side ===
+
+def _init_worker():
+    """Preload fonts and generators once per worker process."""
+    try:
+        from .card_generator import get_card_generator
+        get_card_generator()
+    except ImportError as e:
+        print(f"⚠️  Card generator not available in render worker: {e}")
+
+    try:
+        from .report_generator import get_report_generator  # registers PDF fonts on import
+        get_report_generator()
+    except ImportError as e:
+        print(f"⚠️  PDF generator not available in render worker: {e}")
+
+
+def _render_card(valuation_data: Dict[str, Any]) -> bytes:
+    from .card_generator import generate_telegram_card
+    return generate_telegram_card(valuation_data)
+
+
+def _render_pdf(valuation_data: Dict[str, Any]) -> bytes:
+    from .report_generator import generate_report_bytes
+    return generate_report_bytes(valuation_data)
+
+
+_RENDERERS = {
+    "card": _render_card,
+    "pdf": _render_pdf,
+}
+
+
+# === Service ===
+
+class RenderService:
+    """
+    Process-pool renderer for Telegram cards (PNG) and valuation reports (PDF).
+
+    Usage from sync endpoints (already running in FastAPI's threadpool):
+        png = get_render_service().render_card(valuation_id, data)
+
+    The calling thread waits for the result; rendering itself runs in
+    the worker processes, so fonts and CPU stay off the API process.
+    """
+
+    def __init__(self, max_workers: int = RENDER_WORKERS, cache_size: int = RENDER_CACHE_SIZE):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._cache: "OrderedDict[tuple[str, Any], tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._latencies = {kind: deque(maxlen=LATENCY_WINDOW) for kind in _RENDERERS}
+        self._counters = {kind: {"renders": 0, "cache_hits": 0, "errors": 0} for kind in _RENDERERS}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        initializer=_init_worker
+                    )
+        return self._pool
+
+    def start(self):
+        """Spin up workers so the first request doesn't pay font loading."""
+        for _ in range(self.max_workers):
+            self.pool.submit(int)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    # --- cache ---
+
+    @staticmethod
+    def _digest(valuation_data: Dict[str, Any]) -> str:
+        payload = json.dumps(valuation_data, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, kind: str, valuation_id, digest: str) -> Optional[bytes]:
+        if valuation_id is None:
+            return None
+        with self._lock:
+            entry = self._cache.get((kind, valuation_id))
+            # Valuation may have been updated (e.g. investment params) - re-render
+            if entry is None or entry[0] != digest:
+                return None
+            self._cache.move_to_end((kind, valuation_id))
+            self._counters[kind]["cache_hits"] += 1
+            return entry[1]
+
+    def _cache_put(self, kind: str, valuation_id, digest: str, output: bytes):
+        if valuation_id is None:
+            return
+        with self._lock:
+            self._cache[(kind, valuation_id)] = (digest, output)
+            self._cache.move_to_end((kind, valuation_id))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, valuation_id):
+        """Drop cached outputs for a valuation."""
+        with self._lock:
+            for kind in _RENDERERS:
+                self._cache.pop((kind, valuation_id), None)
+
+    # --- rendering ---
+
+    def _record(self, kind: str, started: float, ok: bool):
+        with self._lock:
+            if ok:
+                self._counters[kind]["renders"] += 1
+                self._latencies[kind].append(time.perf_counter() - started)
+            else:
+                self._counters[kind]["errors"] += 1
+
+    def render(self, kind: str, valuation_id, valuation_data: Dict[str, Any]) -> bytes:
+        """Render synchronously (blocks the calling thread, not the worker pool)."""
+        digest = self._digest(valuation_data)
+        cached = self._cache_get(kind, valuation_id, digest)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        try:
+            output = self.pool.submit(_RENDERERS[kind], valuation_data).result()
+        except Exception:
+            self._record(kind, started, ok=False)
+            raise
+        self._record(kind, started, ok=True)
+        self._cache_put(kind, valuation_id, digest, output)
+        return output
+
+    def render_card(self, valuation_id, valuation_data: Dict[str, Any]) -> bytes:
+        return self.render("card", valuation_id, valuation_data)
+
+    def render_pdf(self, valuation_id, valuation_data: Dict[str, Any]) -> bytes:
+        return self.render("pdf", valuation_id, valuation_data)
+
+    # --- metrics ---
+
+    def metrics(self) -> Dict[str, Any]:
+        """Render latency (ms) and cache counters per output kind."""
+        result = {}
+        with self._lock:
+            for kind in _RENDERERS:
+                samples = sorted(self._latencies[kind])
+                n = len(samples)
+                result[kind] = {
+                    **self._counters[kind],
+                    "latency_ms": {
+                        "avg": round(sum(samples) / n * 1000, 1) if n else None,
+                        "p50": round(samples[n // 2] * 1000, 1) if n else None,
+                        "p95": round(samples[min(n - 1, int(n * 0.95))] * 1000, 1) if n else None,
+                        "max": round(samples[-1] * 1000, 1) if n else None,
+                    },
+                }
+            result["cache_size"] = len(self._cache)
+        return result
+
+
+# Singleton instance
+_service = None
+
+
+def get_render_service() -> RenderService:
+    """Get singleton render service instance."""
+    global _service
+    if _service is None:
+        _service = RenderService()
+    return _service
@@ -262,6 +262,17 @@ class ReportGenerator:
         return pdf_bytes
 
 
+_generator = None
+
+
+def get_report_generator() -> ReportGenerator:
+    """Get singleton report generator instance."""
+    global _generator
+    if _generator is None:
+        _generator = ReportGenerator()
+    return _generator
+
+
 def generate_report_bytes(valuation_data: Dict) -> bytes:
     """
     Удобная функция для генерации отчета из словаря с данными оценки.
@@ -272,7 +283,7 @@ def generate_report_bytes(valuation_data: Dict) -> bytes:
     Returns:
         bytes: PDF контент
     """
-    generator = ReportGenerator()
+    generator = get_report_generator()
     
     return generator.generate_valuation_report(
         address=valuation_data.get('address', 'Не указан'),
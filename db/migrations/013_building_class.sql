@@ -0,0 +1,57 @@
+-- Migration 013: Building class codes
+-- Precomputed small-int building class (year band × floors band) used to
+-- filter comparables in SQL. Must match etl/valuation/building_class.py:
+--   code = year_band * 5 + floors_band
+--   year_band:   0 unknown, 1 <1990, 2 1990-1999, 3 2000-2009, 4 2010+
+--   floors_band: 0 unknown, 1 <=5, 2 6-8, 3 9-16, 4 17+
+
+CREATE OR REPLACE FUNCTION building_class_code(year INTEGER, floors INTEGER)
+RETURNS SMALLINT AS $$
+    SELECT (
+        CASE
+            WHEN year IS NULL OR year = 0 THEN 0
+            WHEN year < 1990 THEN 1
+            WHEN year < 2000 THEN 2
+            WHEN year < 2010 THEN 3
+            ELSE 4
+        END * 5
+        +
+        CASE
+            WHEN floors IS NULL OR floors = 0 THEN 0
+            WHEN floors <= 5 THEN 1
+            WHEN floors <= 8 THEN 2
+            WHEN floors <= 16 THEN 3
+            ELSE 4
+        END
+    )::SMALLINT
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Listings: class from house_year and total_floors
+ALTER TABLE listings
+ADD COLUMN IF NOT EXISTS building_class SMALLINT
+GENERATED ALWAYS AS (building_class_code(house_year, total_floors)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_listings_building_class
+ON listings(building_class)
+WHERE is_active = TRUE;
+
+COMMENT ON COLUMN listings.building_class IS 'Building class code (year band * 5 + floors band), see building_class_code()';
+
+-- Rosreestr deals: no building height, an apartment on floor 9+ proves a 9+ floor building
+DO $$
+BEGIN
+    IF to_regclass('rosreestr_deals') IS NOT NULL THEN
+        ALTER TABLE rosreestr_deals
+        ADD COLUMN IF NOT EXISTS building_class SMALLINT
+        GENERATED ALWAYS AS (
+            building_class_code(year_build, CASE WHEN floor >= 9 THEN floor END)
+        ) STORED;
+
+        CREATE INDEX IF NOT EXISTS idx_rosreestr_deals_building_class
+        ON rosreestr_deals(building_class, deal_date);
+
+        COMMENT ON COLUMN rosreestr_deals.building_class IS 'Building class code (year band * 5 + floors band), see building_class_code()';
+    END IF;
+END $$;
+
+SELECT '✅ Migration 013 completed' as status;
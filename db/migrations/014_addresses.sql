@@ -0,0 +1,40 @@
+-- Migration 014: Address dictionary for autocomplete
+-- One row per distinct listings.address with coordinates and listing count.
+-- Maintained by etl/upsert.py (upsert_listing -> etl/addresses.record_listing_address);
+-- populate / resync with scripts/rebuild_addresses.py.
+-- address_normalized must be produced by etl/addresses.normalize_address_key().
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE IF NOT EXISTS addresses (
+    id BIGSERIAL PRIMARY KEY,
+    address TEXT NOT NULL UNIQUE,
+    address_normalized TEXT NOT NULL,
+    lat DOUBLE PRECISION,
+    lon DOUBLE PRECISION,
+    listing_count INTEGER NOT NULL DEFAULT 0,
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', address_normalized)) STORED,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Prefix match: address_normalized LIKE 'тверская 1%'
+CREATE INDEX IF NOT EXISTS idx_addresses_normalized_prefix
+ON addresses(address_normalized text_pattern_ops);
+
+-- Fuzzy match (typos, partial words)
+CREATE INDEX IF NOT EXISTS idx_addresses_normalized_trgm
+ON addresses USING gin(address_normalized gin_trgm_ops);
+
+-- Word-prefix match in any order: 'тверская:* & 1:*'
+CREATE INDEX IF NOT EXISTS idx_addresses_search_vector
+ON addresses USING gin(search_vector);
+
+COMMENT ON TABLE addresses IS 'Distinct listing addresses for autocomplete, see etl/addresses.py';
+
+-- Exact address -> listing lookups (smart-estimate fallback)
+CREATE INDEX IF NOT EXISTS idx_listings_address
+ON listings(address);
+
+-- /history/streets search (per-word substring match)
+CREATE INDEX IF NOT EXISTS idx_valuation_history_address_trgm
+ON valuation_history USING gin(lower(address) gin_trgm_ops);
@@ -0,0 +1,94 @@
+-- Migration 015: Incremental aggregation
+-- Change log of (district, segment) cells touched by listing changes, and a
+-- run log used as the watermark by scripts/aggregate_multidimensional.py and
+-- scripts/aggregate_districts.py --incremental (see etl/incremental_aggregation.py).
+
+CREATE TABLE IF NOT EXISTS aggregate_changes (
+    change_id BIGSERIAL PRIMARY KEY,
+    district_id INTEGER NOT NULL,
+    property_segment_id INTEGER,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_aggregate_changes_changed_at
+ON aggregate_changes(changed_at);
+
+COMMENT ON TABLE aggregate_changes IS 'Cells (district x segment) whose aggregates are stale; consumed by incremental aggregation';
+
+CREATE TABLE IF NOT EXISTS aggregation_runs (
+    run_id SERIAL PRIMARY KEY,
+    job TEXT NOT NULL,                -- 'multidim' or 'district'
+    mode TEXT NOT NULL,               -- 'full' or 'incremental'
+    started_at TIMESTAMPTZ NOT NULL,
+    finished_at TIMESTAMPTZ,
+    last_change_id BIGINT NOT NULL DEFAULT 0,  -- aggregate_changes consumed up to here
+    cells_recomputed INTEGER,
+    districts_recomputed INTEGER,
+    duration_ms INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_aggregation_runs_job
+ON aggregation_runs(job, finished_at DESC);
+
+COMMENT ON TABLE aggregation_runs IS 'Aggregation run log; the last finished run of a job is its watermark';
+
+-- Listings: log old and new cell when anything the aggregates depend on changes
+CREATE OR REPLACE FUNCTION log_listing_aggregate_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.district_id IS NOT NULL THEN
+        INSERT INTO aggregate_changes (district_id, property_segment_id)
+        VALUES (OLD.district_id, OLD.property_segment_id);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.district_id IS NOT NULL AND (
+        TG_OP = 'INSERT'
+        OR NEW.district_id IS DISTINCT FROM OLD.district_id
+        OR NEW.property_segment_id IS DISTINCT FROM OLD.property_segment_id
+    ) THEN
+        INSERT INTO aggregate_changes (district_id, property_segment_id)
+        VALUES (NEW.district_id, NEW.property_segment_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_listings_aggregate_change_ins_del ON listings;
+CREATE TRIGGER trg_listings_aggregate_change_ins_del
+AFTER INSERT OR DELETE ON listings
+FOR EACH ROW EXECUTE FUNCTION log_listing_aggregate_change();
+
+-- Upserts touch every row on every scrape: only log real changes.
+-- A listing coming back into the 90-day window is logged here; listings
+-- falling out of it are found by the aggregation run itself.
+DROP TRIGGER IF EXISTS trg_listings_aggregate_change_upd ON listings;
+CREATE TRIGGER trg_listings_aggregate_change_upd
+AFTER UPDATE ON listings
+FOR EACH ROW
+WHEN (
+    OLD.district_id IS DISTINCT FROM NEW.district_id
+    OR OLD.property_segment_id IS DISTINCT FROM NEW.property_segment_id
+    OR OLD.is_active IS DISTINCT FROM NEW.is_active
+    OR OLD.area_total IS DISTINCT FROM NEW.area_total
+    OR OLD.rooms IS DISTINCT FROM NEW.rooms
+    OR (OLD.last_seen < CURRENT_DATE - INTERVAL '90 days' AND NEW.last_seen >= CURRENT_DATE - INTERVAL '90 days')
+)
+EXECUTE FUNCTION log_listing_aggregate_change();
+
+-- Prices: a new price row changes the listing's cell
+CREATE OR REPLACE FUNCTION log_price_aggregate_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO aggregate_changes (district_id, property_segment_id)
+    SELECT district_id, property_segment_id
+    FROM listings
+    WHERE id = NEW.id AND district_id IS NOT NULL;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_listing_prices_aggregate_change ON listing_prices;
+CREATE TRIGGER trg_listing_prices_aggregate_change
+AFTER INSERT ON listing_prices
+FOR EACH ROW EXECUTE FUNCTION log_price_aggregate_change();
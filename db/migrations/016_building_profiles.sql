@@ -0,0 +1,29 @@
+-- Migration 016: Building profiles
+-- Consensus building info (floors, year, type) per house, precomputed from
+-- listings so valuation-time building detection is one indexed lookup.
+-- house_key is addresses.address_normalized (etl/addresses.normalize_address_key()).
+-- Maintained by etl/upsert.py (update_listing_details -> etl/building_profiles.refresh_building_profile);
+-- populate / resync with scripts/rebuild_building_profiles.py.
+
+CREATE TABLE IF NOT EXISTS building_profiles (
+    house_key TEXT PRIMARY KEY,
+    lat DOUBLE PRECISION NOT NULL,
+    lon DOUBLE PRECISION NOT NULL,
+    geog GEOGRAPHY(Point, 4326) NOT NULL,
+    total_floors INTEGER,
+    total_floors_votes INTEGER NOT NULL DEFAULT 0,
+    house_year INTEGER,
+    house_year_votes INTEGER NOT NULL DEFAULT 0,
+    building_type TEXT,
+    building_type_votes INTEGER NOT NULL DEFAULT 0,
+    sources_count INTEGER NOT NULL DEFAULT 0,
+    confidence TEXT NOT NULL,           -- 'high' (3+ listings) / 'medium'
+    type_sources JSONB,                 -- up to 3 listings with the consensus type: id, url, address, lat, lon
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Nearest profile to a point (KNN + ST_DWithin)
+CREATE INDEX IF NOT EXISTS idx_building_profiles_geog
+ON building_profiles USING gist(geog);
+
+COMMENT ON TABLE building_profiles IS 'Consensus building info per house for valuation-time detection, see etl/building_profiles.py';
@@ -0,0 +1,16 @@
+-- Migration 017: DaData response cache
+-- Persistent cache shared by the API and ETL (etl/dadata_client.py).
+-- cache_key is "<endpoint>:<normalized query>"; empty answers are cached
+-- as negative entries with a shorter TTL. Errors are never cached.
+
+CREATE TABLE IF NOT EXISTS dadata_cache (
+    cache_key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,             -- 'suggest_address' or 'clean_address'
+    query TEXT NOT NULL,
+    response JSONB,
+    is_negative BOOLEAN NOT NULL DEFAULT FALSE,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+COMMENT ON TABLE dadata_cache IS 'DaData responses keyed by endpoint + normalized query, see etl/dadata_client.py';
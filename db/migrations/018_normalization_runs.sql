@@ -0,0 +1,22 @@
+-- Migration 018: FIAS normalization runs
+-- Checkpoints of etl/normalize_addresses.py: listings are normalized in id
+-- order and last_listing_id is committed together with each written batch,
+-- so an interrupted run resumes after the last committed batch.
+
+CREATE TABLE IF NOT EXISTS normalization_runs (
+    run_id SERIAL PRIMARY KEY,
+    skip_existing BOOLEAN NOT NULL,     -- only listings without fias_id
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMPTZ,
+    last_listing_id BIGINT NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    success INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_normalization_runs_unfinished
+ON normalization_runs(skip_existing, run_id DESC)
+WHERE finished_at IS NULL;
+
+COMMENT ON TABLE normalization_runs IS 'FIAS normalization checkpoints; an unfinished run is resumed from last_listing_id';
@@ -0,0 +1,24 @@
+-- Migration 019: Photo fingerprints and AI analysis cache
+-- Perceptual hashes (64-bit dHash, hex) of listing photos, and AI vision
+-- results keyed by photo hash, so a photo reposted under another URL or in
+-- a duplicate listing is not sent to the paid API again
+-- (see etl/ai_evaluator/photo_fingerprints.py).
+
+CREATE TABLE IF NOT EXISTS photo_fingerprints (
+    url TEXT PRIMARY KEY,
+    phash TEXT NOT NULL,                -- 16 hex chars
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS photo_analysis_cache (
+    kind TEXT NOT NULL,                 -- 'condition' (one photo) or 'renovation' (photo set)
+    photo_key TEXT NOT NULL,            -- phash, or sorted phashes joined with '-'
+    result JSONB NOT NULL,
+    ai_model TEXT,
+    cost_usd NUMERIC(10, 5) NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (kind, photo_key)
+);
+
+COMMENT ON TABLE photo_fingerprints IS 'Perceptual hash per photo URL, see etl/ai_evaluator/photo_fingerprints.py';
+COMMENT ON TABLE photo_analysis_cache IS 'AI vision results by photo hash, reused across reposts and duplicate listings';
@@ -0,0 +1,14 @@
+-- Migration 020: One market comparison per auction lot
+-- Apply to the AUCTIONS database (AUCTIONS_DATABASE_URL), not the main one.
+-- Comparisons are upserted ON CONFLICT (lot_id) by the bulk comparison
+-- (etl/auctions/market_comparison.py), which needs a unique constraint.
+
+-- Keep the latest comparison of each lot
+DELETE FROM auction_market_comparison c
+USING auction_market_comparison newer
+WHERE newer.lot_id = c.lot_id
+  AND (COALESCE(newer.calculated_at, '-infinity'), newer.id)
+    > (COALESCE(c.calculated_at, '-infinity'), c.id);
+
+ALTER TABLE auction_market_comparison
+    ADD CONSTRAINT unique_comparison_per_lot UNIQUE (lot_id);
@@ -0,0 +1,19 @@
+-- Migration 021: Page cursors for streaming auction collection
+-- Apply to the AUCTIONS database (AUCTIONS_DATABASE_URL), not the main one.
+-- Streaming collection (LotStream / collect_source in etl/auctions/collector.py)
+-- reads the cursor with db.get_collect_cursor and saves the first page not
+-- yet fully written with db.save_collect_cursor together with each batch of
+-- lots, so a crawl that fails on page 80 resumes there instead of at page 0.
+
+CREATE TABLE IF NOT EXISTS auction_collect_cursors (
+    source_type auction_source NOT NULL,
+    city VARCHAR(255) NOT NULL DEFAULT '',
+    next_page INTEGER NOT NULL DEFAULT 0,    -- first page not fully saved yet
+    lots_written INTEGER NOT NULL DEFAULT 0, -- in the current crawl
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    finished_at TIMESTAMPTZ,                 -- NULL while a crawl is incomplete
+    PRIMARY KEY (source_type, city)
+);
+
+COMMENT ON TABLE auction_collect_cursors IS 'Resume point of streaming auction crawls per source and city';
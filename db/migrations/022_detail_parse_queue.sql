@@ -0,0 +1,26 @@
+-- Migration 022: Detail re-parse queue
+-- Listings whose detail page is most worth (re)parsing, scored by
+-- etl/collector_cian/detail_scheduler.py from missing fields, price changes
+-- since the last parse, parse age and use as valuation comparables.
+-- Workers claim the highest priority rows (scripts/parse_detail_queue.py).
+
+ALTER TABLE listings
+    ADD COLUMN IF NOT EXISTS details_parsed_at TIMESTAMPTZ;  -- set by update_listing_details()
+
+CREATE TABLE IF NOT EXISTS listing_detail_queue (
+    listing_id BIGINT PRIMARY KEY REFERENCES listings(id) ON DELETE CASCADE,
+    priority NUMERIC(8, 2) NOT NULL,
+    reasons TEXT[] NOT NULL DEFAULT '{}',   -- e.g. {house_year,photos,price_changed,comparable}
+    scored_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    available_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),  -- claim lease / retry backoff
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_listing_detail_queue_priority
+ON listing_detail_queue(priority DESC, available_at);
+
+CREATE INDEX IF NOT EXISTS idx_valuation_comparables_created_at
+ON valuation_comparables(created_at DESC);
+
+COMMENT ON TABLE listing_detail_queue IS 'Detail pages to (re)parse by priority, see etl/collector_cian/detail_scheduler.py';
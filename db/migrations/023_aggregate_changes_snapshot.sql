@@ -0,0 +1,17 @@
+-- Migration 023: Snapshot watermark for incremental aggregation
+-- change_id comes from a sequence and is assigned before commit, so a
+-- transaction committing after an aggregation run could log a change_id
+-- below that run's MAX(change_id) and never be aggregated. Each change now
+-- records its transaction id, and each run the snapshot it started with:
+-- a run consumes exactly the changes that were not yet committed in the
+-- previous run's snapshot (see etl/incremental_aggregation.py).
+-- aggregation_runs.last_change_id is no longer used.
+
+ALTER TABLE aggregate_changes
+    ADD COLUMN IF NOT EXISTS xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS idx_aggregate_changes_xid
+ON aggregate_changes(xid);
+
+ALTER TABLE aggregation_runs
+    ADD COLUMN IF NOT EXISTS snapshot pg_snapshot;  -- NULL for runs before this migration: next run is full
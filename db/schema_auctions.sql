@@ -191,7 +191,10 @@ CREATE TABLE auction_market_comparison (
     -- Comparable listings count
     comparables_count INTEGER,
 
-    calculated_at TIMESTAMPTZ DEFAULT NOW()
+    calculated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    -- One current comparison per lot (upserted ON CONFLICT (lot_id))
+    CONSTRAINT unique_comparison_per_lot UNIQUE (lot_id)
 );
 
 -- =============================================================================
@@ -394,6 +397,18 @@ FROM auction_scrape_stats s
 JOIN auction_platforms p ON s.platform_id = p.id
 ORDER BY s.scrape_date DESC, p.source_type;
 
+-- Page cursors of streaming collection runs (resume after a failure)
+CREATE TABLE auction_collect_cursors (
+    source_type auction_source NOT NULL,
+    city VARCHAR(255) NOT NULL DEFAULT '',
+    next_page INTEGER NOT NULL DEFAULT 0,    -- first page not fully saved yet
+    lots_written INTEGER NOT NULL DEFAULT 0, -- in the current crawl
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    finished_at TIMESTAMPTZ,                 -- NULL while a crawl is incomplete
+    PRIMARY KEY (source_type, city)
+);
+
 -- =============================================================================
 -- PERMISSIONS (adjust as needed)
 -- =============================================================================
@@ -1,5 +1,5 @@
 """
-Парсер адресов CIAN без внешних API.
+Парсер и канонизация адресов CIAN без внешних API.
 
 Извлекает компоненты адреса из строки CIAN:
 - Округ (САО, ЮАО, и т.д.)
@@ -7,12 +7,27 @@
 - Улица
 - Дом, корпус, строение
 
+Единый движок для всех мест, где адрес разбирается регулярками:
+- parse_address / parse_many — компоненты адреса
+- canonical_address / normalize_many — строка для сравнения (fallback без DaData)
+- clean_address_text — очистка сырого текста адреса со страницы CIAN
+- street_name, extract_district_name — улица и район для группировки
+
+Все паттерны скомпилированы один раз при импорте, результаты мемоизируются
+(ограниченный LRU), поэтому массовые задачи (дедупликация, назначение
+районов) не платят за разбор одного и того же адреса повторно.
+
 Для внутреннего сравнения и аналитики.
 Для юридической проверки - использовать DaData/ФИАС.
 """
+import os
 import re
-from typing import Dict, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+
+ADDRESS_CACHE_SIZE = int(os.getenv("ADDRESS_PARSE_CACHE_SIZE", "65536"))
 
 
 @dataclass
@@ -90,6 +105,112 @@ STREET_TYPES = [
 ]
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# Скомпилированные паттерны
+# ═══════════════════════════════════════════════════════════════════════════
+
+_STREET_TYPE_RES = [(re.compile(pattern, re.IGNORECASE), short) for pattern, short in STREET_TYPES]
+
+# Длинные коды раньше коротких: "ЮЗАО" не должен распознаться как "ЗАО"
+_OKRUG_RE = re.compile(
+    r'(?<![А-ЯЁа-яё])(' + '|'.join(sorted(OKRUGS, key=len, reverse=True)) + r')(?![А-ЯЁа-яё])'
+)
+
+# Район: "р-н Братеево" или "р-н Чертаново Южное" (до запятой или улицы)
+_DISTRICT_RE = re.compile(r'р-н\s+([А-Яа-яёЁ\-\s]+?)(?:,|\s+ул|\s+пр|\s+пер|\s+ш\.|$)')
+_RAION_RE = re.compile(r'район\s+([А-Яа-яёЁ\-\s]+?)(?:,|$)')
+# Поселок/деревня как район (для НАО, ТАО)
+_SETTLEMENT_RE = re.compile(r'([\w\-]+)\s+(поселок|деревня|посёлок|село)', re.IGNORECASE)
+
+# Улица: "Братеевская ул." / "Название улица", затем "улица Название" / "ул. Название"
+_STREET_BEFORE_TYPE_RE = re.compile(
+    r'([А-Яа-яёЁ0-9\-]+(?:\s+[А-Яа-яёЁ0-9\-]+)?)\s+(ул\.?|улица|пр-т|проспект|пер\.?|переулок|ш\.?|шоссе|б-р|бульвар)',
+    re.IGNORECASE
+)
+_STREET_AFTER_TYPE_RE = re.compile(
+    r'(ул\.?|улица|пр-т|проспект|пер\.?|переулок)\s+([А-Яа-яёЁ0-9\-]+(?:\s+[А-Яа-яёЁ0-9\-]+)?)',
+    re.IGNORECASE
+)
+
+# Зеленоград: "мкр. 7-й, к704" - корпус как дом
+_ZELENOGRAD_RE = re.compile(r'мкр\.?\s*(\d+)[\-й]*,?\s*к(\d+)', re.IGNORECASE)
+# Дом в конце адреса: число + опционально К/к + число или /число
+_HOUSE_RE = re.compile(r'[,\s](\d+)\s*[/]?\s*([КкKk](\d+))?([СсCc](\d+))?(?:\s*$|,)')
+_HOUSE_WORD_RE = re.compile(r'(?:д\.?|дом)\s*(\d+)', re.IGNORECASE)
+_BUILDING_RE = re.compile(r'[КкKk]\.?\s*(\d+)')
+_STRUCTURE_RE = re.compile(r'[СсCc]\.?\s*(\d+)')
+
+# Канонизация: служебные слова - только целым словом ("пер" не трогает "Перовская")
+_WORD_START = r'(?<![\w-])'
+_WORD_END = r'(?:\.|(?![\w-]))'
+_CANON_DROP_RE = re.compile(
+    _WORD_START
+    + r'(?:россия|москва|г|ул|улица|пр-?т|проспект|пр|пер|переулок|бул|бульвар|б-р'
+    + r'|ш|шоссе|наб|набережная|д|дом)'
+    + _WORD_END + r'\s*'
+)
+_CANON_BUILDING_RE = re.compile(_WORD_START + r'корп(?:ус)?' + _WORD_END + r'\s*')
+_CANON_STRUCTURE_RE = re.compile(_WORD_START + r'стр(?:оение)?' + _WORD_END + r'\s*')
+_CANON_FLAT_RE = re.compile(_WORD_START + r'кв(?:артира)?\.?\s*\d+')
+_SPACES_RE = re.compile(r'\s+')
+_COMMAS_RE = re.compile(r'\s*,(?:\s*,)*\s*')
+
+# Улица для группировки истории оценок
+_STREET_NAME_RE = re.compile(
+    r'^([^,\d]+(?:улица|проспект|переулок|бульвар|шоссе|набережная)?)\s*,?\s*(?:д\.?\s*)?(\d+)?',
+    re.IGNORECASE
+)
+_STREET_SPLIT_RE = re.compile(r'[,\d]')
+# "к2", "с1" - часть дома, а не слово улицы
+_BUILDING_PART_RE = re.compile(r'^[кс]\d')
+
+# Название района для поиска в districts (по приоритету)
+_DISTRICT_NAME_RES = [
+    re.compile(r'р-н\s+([А-ЯЁа-яё\-]+(?:\s+[А-ЯЁа-яё\-]+)?)', re.IGNORECASE),
+    re.compile(r'район\s+([А-ЯЁа-яё\-]+(?:\s+[А-ЯЁа-яё\-]+)?)', re.IGNORECASE),
+    _OKRUG_RE,
+    re.compile(r'мкр\.\s+([А-ЯЁа-яё\-]+)', re.IGNORECASE),
+    re.compile(r'микрорайон\s+([А-ЯЁа-яё\-]+)', re.IGNORECASE),
+]
+
+# Очистка сырого текста адреса со страницы CIAN
+HOUSE_NUMBER_PATTERN = re.compile(r"\b\d{1,4}[кК]?\d?(?:[-/]\d+)?\b")
+METRO_SEGMENT_PATTERN = re.compile(
+    r"(?:,\s*)?(?:м\.|метро|станция)\s+[А-ЯЁ0-9][^,\.]*?(?:\d+\s*мин\.?(?:\s+[пп]ешком)?)?",
+    re.IGNORECASE,
+)
+MINUTES_SEGMENT_PATTERN = re.compile(
+    r"\b[А-ЯЁA-Z][^,]*?\d+\s*мин\.?(?:\s+[пп]ешком)?", re.IGNORECASE
+)
+ON_MAP_PATTERN = re.compile(r"\s*На\s+карте.*", re.IGNORECASE)
+KM_FROM_MKAD_PATTERN = re.compile(r"\d+\s*км\s+от\s+МКАД", re.IGNORECASE)
+HOUSE_EXTRA_PATTERN = re.compile(
+    r"(?:дом|д\.|корпус|корп\.?|строение|стр\.?|лит\.?|литера|владение|вл\.?|секция|сек\.?|с\.?|к\.?|зд\.?|строит\.)\s*\d+[А-ЯA-Za-z0-9/-]*",
+    re.IGNORECASE,
+)
+_ON_MAP_SPLIT_RE = re.compile(r"[Нн]а\s+[Кк]арте")
+_METRO_MINUTES_RE = re.compile(r"\s*м\.\s*[А-ЯЁ][^,]*?,\s*\d+\s*мин\.?\s*", re.IGNORECASE)
+_METRO_WORD_MINUTES_RE = re.compile(r"\s*метро\s+[А-ЯЁ][^,]*?,\s*\d+\s*мин\.?\s*", re.IGNORECASE)
+_STATION_MINUTES_RE = re.compile(r"\s+([А-ЯЁ][а-яё]+)\s+\d+\s*мин\.?(?:\s+пешком)?", re.IGNORECASE)
+_STATIONS_MINUTES_RE = re.compile(
+    r"\s+[А-ЯЁ][а-яё]+(?:ская|ский|ая|яя|ий)?\s+\d+\s*мин\.?(?:\s+пешком)?(?:\s+[А-ЯЁ][а-яё]+\s+\d+\s*мин\.?)?",
+    re.IGNORECASE
+)
+_ON_FOOT_RE = re.compile(r"\s+пешком\s*", re.IGNORECASE)
+_MINUTES_RE = re.compile(r"\s+\d+\s*мин\.?\s*", re.IGNORECASE)
+_REPEATED_COMMAS_RE = re.compile(r"(,\s*){2,}")
+_SPACED_COMMA_RE = re.compile(r"\s*,\s*")
+_NOISE_MINUTES_RE = re.compile(r"\b\d+\s*мин")
+_NOISE_METRO_RE = re.compile(r"^(?:м\.|метро|станция)\b")
+_NOISE_STATION_RE = re.compile(r"^[А-ЯЁ][а-яё]+\s+\d+")
+_DIGIT_RE = re.compile(r"\d")
+_SEGMENT_KEY_RE = re.compile(r"[^0-9a-zа-яё]+")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Разбор адреса
+# ═══════════════════════════════════════════════════════════════════════════
+
 def parse_address(address: str) -> ParsedAddress:
     """
     Парсит адрес CIAN в структурированный формат.
@@ -99,77 +220,60 @@ def parse_address(address: str) -> ParsedAddress:
         "Москва, ВАО, р-н Вешняки, Снайперская ул., 11"
         "Москва, НАО (Новомосковский), Марьино поселок, 5"
     """
-    result = ParsedAddress(raw=address)
-
     if not address:
-        return result
+        return ParsedAddress(raw=address)
+    # Копия: результат из кэша общий, вызывающий может его менять
+    return replace(_parse_cached(address))
+
+
+def parse_many(addresses: Iterable[str]) -> List[ParsedAddress]:
+    """parse_address() для списка адресов (повторы разбираются один раз)."""
+    return [parse_address(address) for address in addresses]
+
 
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _parse_cached(address: str) -> ParsedAddress:
+    result = ParsedAddress(raw=address)
     addr = address.strip()
 
     # 1. Извлечь округ
-    for okrug_code in OKRUGS:
-        if okrug_code in addr:
-            result.okrug = okrug_code
-            break
+    okrug_match = _OKRUG_RE.search(addr)
+    if okrug_match:
+        result.okrug = okrug_match.group(1)
 
     # 2. Извлечь район
-    # Паттерн: "р-н Братеево" или "р-н Чертаново Южное" (до запятой или улицы)
-    district_match = re.search(r'р-н\s+([А-Яа-яёЁ\-\s]+?)(?:,|\s+ул|\s+пр|\s+пер|\s+ш\.|$)', addr)
+    district_match = _DISTRICT_RE.search(addr)
     if district_match:
         result.district = district_match.group(1).strip()
     else:
         # Попробовать "район X"
-        district_match = re.search(r'район\s+([А-Яа-яёЁ\-\s]+?)(?:,|$)', addr)
+        district_match = _RAION_RE.search(addr)
         if district_match:
             result.district = district_match.group(1).strip()
         else:
-            # Поселок/деревня как район (для НАО, ТАО)
-            settlement_match = re.search(r'([\w\-]+)\s+(поселок|деревня|посёлок|село)', addr, re.IGNORECASE)
+            settlement_match = _SETTLEMENT_RE.search(addr)
             if settlement_match:
                 result.district = settlement_match.group(1).strip()
 
     # 3. Извлечь улицу и тип
-    # Паттерны: "Братеевская ул." или "улица Братеевская" или "ул. Братеевская"
-
-    # Паттерн 1: "Название ул." или "Название улица"
-    street_match = re.search(
-        r'([А-Яа-яёЁ0-9\-]+(?:\s+[А-Яа-яёЁ0-9\-]+)?)\s+(ул\.?|улица|пр-т|проспект|пер\.?|переулок|ш\.?|шоссе|б-р|бульвар)',
-        addr, re.IGNORECASE
-    )
+    street_match = _STREET_BEFORE_TYPE_RE.search(addr)
     if street_match:
         result.street = street_match.group(1).strip()
-        for pattern, short in STREET_TYPES:
-            if re.search(pattern, street_match.group(2), re.IGNORECASE):
-                result.street_type = short
-                break
+        result.street_type = _street_type(street_match.group(2))
     else:
-        # Паттерн 2: "улица Название" или "ул. Название"
-        street_match = re.search(
-            r'(ул\.?|улица|пр-т|проспект|пер\.?|переулок)\s+([А-Яа-яёЁ0-9\-]+(?:\s+[А-Яа-яёЁ0-9\-]+)?)',
-            addr, re.IGNORECASE
-        )
+        street_match = _STREET_AFTER_TYPE_RE.search(addr)
         if street_match:
-            for pattern, short in STREET_TYPES:
-                if re.search(pattern, street_match.group(1), re.IGNORECASE):
-                    result.street_type = short
-                    break
+            result.street_type = _street_type(street_match.group(1))
             result.street = street_match.group(2).strip()
 
     # 4. Извлечь дом, корпус, строение
     # Паттерны: "8К4", "8к4", "8 к4", "д. 8", "дом 8", "8/2", "8с1", "к704" (Зеленоград)
-
-    # Сначала попробовать Зеленоград: "мкр. 7-й, к704" - корпус как дом
-    zelenograd_match = re.search(r'мкр\.?\s*(\d+)[\-й]*,?\s*к(\d+)', addr, re.IGNORECASE)
+    zelenograd_match = _ZELENOGRAD_RE.search(addr)
     if zelenograd_match:
         result.street = f"мкр. {zelenograd_match.group(1)}"
         result.house = zelenograd_match.group(2)
     else:
-        # Ищем в конце адреса
-        # Паттерн: число + опционально К/к + число или /число
-        house_match = re.search(
-            r'[,\s](\d+)\s*[/]?\s*([КкKk](\d+))?([СсCc](\d+))?(?:\s*$|,)',
-            addr
-        )
+        house_match = _HOUSE_RE.search(addr)
         if house_match:
             result.house = house_match.group(1)
             if house_match.group(3):
@@ -177,33 +281,271 @@ def parse_address(address: str) -> ParsedAddress:
             if house_match.group(5):
                 result.structure = house_match.group(5)
         else:
-            # Попробовать "д. 8" или "дом 8"
-            house_match = re.search(r'(?:д\.?|дом)\s*(\d+)', addr, re.IGNORECASE)
+            house_match = _HOUSE_WORD_RE.search(addr)
             if house_match:
                 result.house = house_match.group(1)
 
     # Если корпус не найден, ищем отдельно
     if not result.building:
-        building_match = re.search(r'[КкKk]\.?\s*(\d+)', addr)
+        building_match = _BUILDING_RE.search(addr)
         if building_match:
             result.building = building_match.group(1)
 
     # Если строение не найдено
     if not result.structure:
-        structure_match = re.search(r'[СсCc]\.?\s*(\d+)', addr)
+        structure_match = _STRUCTURE_RE.search(addr)
         if structure_match:
             result.structure = structure_match.group(1)
 
     return result
 
 
+def _street_type(marker: str) -> Optional[str]:
+    for pattern, short in _STREET_TYPE_RES:
+        if pattern.search(marker):
+            return short
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Канонизация для сравнения
+# ═══════════════════════════════════════════════════════════════════════════
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def canonical_address(address: str) -> str:
+    """
+    Адрес для сравнения без DaData.
+
+    Удаляет город, типы улиц, "д."/"дом" и квартиру, корпус/строение
+    сокращает до "к"/"с", приводит к нижнему регистру:
+    "Москва, ул. Тверская, д. 1, корп. 2, кв. 5" -> "тверская, 1, к2"
+    """
+    if not address:
+        return ""
+
+    addr = address.lower().strip()
+    addr = _CANON_FLAT_RE.sub('', addr)
+    addr = _CANON_DROP_RE.sub('', addr)
+    addr = _CANON_BUILDING_RE.sub(' к', addr)
+    addr = _CANON_STRUCTURE_RE.sub(' с', addr)
+
+    addr = _SPACES_RE.sub(' ', addr)
+    addr = _COMMAS_RE.sub(', ', addr)
+    return addr.strip(' ,')
+
+
+def normalize_many(addresses: Iterable[str]) -> List[str]:
+    """canonical_address() для списка адресов."""
+    return [canonical_address(address) for address in addresses]
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def street_name(address: str) -> str:
+    """Улица (часть до номера дома) для группировки адресов; "" если не найдена."""
+    street_match = _STREET_NAME_RE.match(address)
+    if street_match:
+        return street_match.group(1).strip()
+    # Fallback - первая часть до запятой или числа
+    parts = _STREET_SPLIT_RE.split(address)
+    return parts[0].strip() if parts else address
+
+
+def is_building_part(word: str) -> bool:
+    """Слово ключа адреса - корпус/строение ("к2", "с1")."""
+    return bool(_BUILDING_PART_RE.match(word))
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def extract_district_name(address: str, with_okrug: bool = True) -> Optional[str]:
+    """
+    Название района из адреса: "р-н X", "район X", код округа, "мкр. X".
+
+    with_okrug=False - не возвращать код округа (САО и т.д.) вместо района.
+    """
+    if not address:
+        return None
+    for pattern in _DISTRICT_NAME_RES:
+        if pattern is _OKRUG_RE and not with_okrug:
+            continue
+        match = pattern.search(address)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def address_cache_info() -> Dict[str, Dict[str, int]]:
+    """Статистика мемоизации (hits/misses/size) по функциям движка."""
+    return {
+        func.__name__: func.cache_info()._asdict()
+        for func in (_parse_cached, canonical_address, street_name, extract_district_name)
+    }
+
+
+def clear_address_caches():
+    for func in (_parse_cached, canonical_address, street_name, extract_district_name):
+        func.cache_clear()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Очистка сырого текста со страницы CIAN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def clean_address_text(raw: Optional[str]) -> str:
+    """Remove metro info, 'На карте' fragments and normalize whitespace/commas.
+
+    More aggressive cleaning to handle various CIAN address formats.
+    """
+    if not raw:
+        return ""
+    return _clean_address_text_cached(raw)
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _clean_address_text_cached(raw: str) -> str:
+    text = raw.replace("\xa0", " ").replace("\n", " ").replace("\r", " ").strip()
+    if not text:
+        return ""
+
+    # Step 1: Remove "На карте" and everything after (most aggressive)
+    if "На карте" in text or "на карте" in text:
+        parts = _ON_MAP_SPLIT_RE.split(text, maxsplit=1)
+        text = parts[0].strip() if parts else text
+
+    # Remove explicit "На карте" fragments regardless of position (fallback)
+    text = ON_MAP_PATTERN.sub("", text)
+
+    # Step 2: Remove metro segments (м. ..., метро ...) - VERY aggressive
+    text = METRO_SEGMENT_PATTERN.sub("", text)
+
+    # Remove patterns like "м. Сокольники, 14 мин."
+    text = _METRO_MINUTES_RE.sub(" ", text)
+    text = _METRO_WORD_MINUTES_RE.sub(" ", text)
+
+    # Remove standalone metro station names followed by time (e.g., "Сокольники 14 мин.")
+    # but not district names: only long words and only before "р-н"
+    before = text
+    text = _STATION_MINUTES_RE.sub(
+        lambda m: "" if len(m.group(1)) > 4 and "р-н" not in before[:m.start()] else m.group(0),
+        text
+    )
+
+    # Remove patterns like "Сокольники 14 мин. Электрозаводская 15 мин."
+    text = _STATIONS_MINUTES_RE.sub("", text)
+
+    # Remove "[Station] 14 мин." fragments - more patterns
+    text = MINUTES_SEGMENT_PATTERN.sub("", text)
+
+    # Step 3: Remove distance markers like "20 км от МКАД"
+    text = KM_FROM_MKAD_PATTERN.sub("", text)
+
+    # Step 4: Remove "пешком" (on foot) mentions
+    text = _ON_FOOT_RE.sub(" ", text)
+
+    # Step 5: Remove any remaining time patterns (X мин.)
+    text = _MINUTES_RE.sub(" ", text)
+
+    # Step 6: Normalize whitespace prior to segment filtering
+    text = _SPACES_RE.sub(" ", text)
+
+    segments = [segment.strip(" ,;-") for segment in text.split(",") if segment.strip(" .;-")]
+    if segments:
+        filtered = filter_address_segments(segments)
+        if filtered:
+            segments = filtered
+        text = ", ".join(segments)
+
+    # Collapse whitespace and redundant commas
+    text = _SPACES_RE.sub(" ", text)
+    text = _SPACED_COMMA_RE.sub(", ", text)
+    text = _REPEATED_COMMAS_RE.sub(", ", text)
+    text = text.strip(" ,;.-")
+
+    return text
+
+
+def is_noise_segment(segment: str) -> bool:
+    """Return True if segment is clearly not part of the postal address."""
+    if not segment:
+        return True
+    lowered = segment.lower()
+    if "на карте" in lowered:
+        return True
+    if lowered.startswith(("посмотреть", "показать")):
+        return True
+    if _NOISE_MINUTES_RE.search(lowered):
+        return True
+    if _NOISE_METRO_RE.match(lowered):
+        return True
+    if "пешком" in lowered:
+        return True
+    if "км от мкад" in lowered:
+        return True
+    # Check for metro station names followed by numbers (likely time)
+    if _NOISE_STATION_RE.search(segment):
+        return True
+    if len(segment) <= 2 and not _DIGIT_RE.search(lowered):
+        return True
+    return False
+
+
+def _normalize_segment_key(segment: str) -> str:
+    return _SEGMENT_KEY_RE.sub(" ", segment.lower()).strip()
+
+
+def _segment_is_redundant(candidate_key: str, seen_keys: List[str]) -> bool:
+    if not candidate_key:
+        return False
+    for key in seen_keys:
+        if len(candidate_key) >= 4 and candidate_key in key:
+            return True
+        if len(key) >= 4 and key in candidate_key:
+            return True
+    return False
+
+
+def _segment_contains_house(segment: str) -> bool:
+    if HOUSE_NUMBER_PATTERN.search(segment):
+        return True
+    if HOUSE_EXTRA_PATTERN.search(segment):
+        return True
+    return False
+
+
+def filter_address_segments(segments: List[str]) -> List[str]:
+    """Drop noise and duplicate segments; stop after the house segment."""
+    filtered: List[str] = []
+    seen_keys: List[str] = []
+    house_found = False
+
+    for raw_segment in segments:
+        segment = raw_segment.strip(" ,;-")
+        if not segment:
+            continue
+        if is_noise_segment(segment):
+            continue
+
+        key = _normalize_segment_key(segment)
+        if _segment_is_redundant(key, seen_keys):
+            continue
+
+        is_house = _segment_contains_house(segment)
+        if house_found and not is_house:
+            break
+
+        filtered.append(segment)
+        if key:
+            seen_keys.append(key)
+
+        if is_house:
+            house_found = True
+
+    return filtered
+
+
 def addresses_same_house(addr1: str, addr2: str) -> bool:
     """Проверить, относятся ли адреса к одному дому."""
-    p1 = parse_address(addr1)
-    p2 = parse_address(addr2)
-
-    key1 = p1.house_key()
-    key2 = p2.house_key()
+    key1 = parse_address(addr1).house_key()
+    key2 = parse_address(addr2).house_key()
 
     if not key1 or not key2:
         return False
@@ -246,3 +588,4 @@ if __name__ == "__main__":
         print(f"  Дом:     {parsed.house} К{parsed.building or '-'} С{parsed.structure or '-'}")
         print(f"  Ключ:    {parsed.house_key()}")
         print(f"  Норм:    {parsed.normalized()}")
+        print(f"  Канон:   {canonical_address(addr)}")
@@ -0,0 +1,315 @@
+"""
+Address dictionary for autocomplete.
+
+The `addresses` table (db/migrations/014_addresses.sql) holds one row per
+distinct listings.address with coordinates and a listing count. It is kept
+up to date by upsert_listing() and searched by prefix / word prefixes /
+trigram similarity instead of ILIKE scans over listings.
+
+Usage:
+    from etl.addresses import get_address_autocomplete
+    results = get_address_autocomplete().search("тверская 1", limit=10)
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+AUTOCOMPLETE_CACHE_SIZE = int(os.getenv("ADDRESS_AUTOCOMPLETE_CACHE_SIZE", "2048"))
+AUTOCOMPLETE_CACHE_TTL = float(os.getenv("ADDRESS_AUTOCOMPLETE_CACHE_TTL", "300"))
+
+# Tokens that carry no search value (city, street types, "дом")
+_DROP_TOKENS = {
+    'россия', 'москва', 'г', 'город',
+    'ул', 'улица', 'пр-т', 'прт', 'пр-кт', 'проспект', 'пр',
+    'пер', 'переулок', 'бул', 'б-р', 'бульвар', 'ш', 'шоссе',
+    'наб', 'набережная', 'пр-д', 'проезд', 'пл', 'площадь',
+    'д', 'дом',
+}
+# Building part markers: "корп. 2" -> "к2", "стр. 1" -> "с1"
+_PART_TOKENS = {
+    'к': 'к', 'корп': 'к', 'корпус': 'к',
+    'с': 'с', 'стр': 'с', 'строение': 'с',
+}
+# Apartment markers: dropped together with the following number
+_APARTMENT_TOKENS = {'кв', 'квартира'}
+
+_SEPARATORS_RE = re.compile(r'[^0-9a-zа-я/\-]+')
+_TSQUERY_SPLIT_RE = re.compile(r'[^0-9a-zа-я]+')
+
+
+def normalize_address_key(address: Optional[str]) -> str:
+    """
+    Search key for an address.
+
+    "Москва, ул. Тверская, д. 1, корп. 2" -> "тверская 1 к2"
+
+    Used both for stored rows and for user queries, so a query is a prefix
+    of the key of the address the user is typing.
+    """
+    if not address:
+        return ""
+
+    tokens = _SEPARATORS_RE.sub(' ', address.lower().replace('ё', 'е')).split()
+    result: List[str] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in _APARTMENT_TOKENS:
+            i += 2
+            continue
+        if token in _PART_TOKENS and i + 1 < len(tokens) and tokens[i + 1][0].isdigit():
+            result.append(_PART_TOKENS[token] + tokens[i + 1])
+            i += 2
+            continue
+        if token not in _DROP_TOKENS:
+            result.append(token)
+        i += 1
+    return ' '.join(result)
+
+
+def build_tsquery(key: str) -> str:
+    """Word-prefix tsquery for a normalized key: "тверская 1" -> "тверская:* & 1:*"."""
+    words = [w for w in _TSQUERY_SPLIT_RE.split(key) if w]
+    return ' & '.join(f"{w}:*" for w in words)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Maintenance (called from etl/upsert.py)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def record_listing_address(
+    cur,
+    address: Optional[str],
+    lat: Optional[float],
+    lon: Optional[float],
+    previous_address: Optional[str] = None,
+    is_new: bool = False
+) -> None:
+    """
+    Reflect one listing upsert in the addresses table.
+
+    Args:
+        cur: Cursor in the upsert transaction
+        address: Listing address after the upsert
+        lat, lon: Listing coordinates
+        previous_address: Address before the upsert (None for a new listing)
+        is_new: Listing row was just inserted
+    """
+    if previous_address and previous_address != address:
+        cur.execute(
+            """
+            UPDATE addresses
+            SET listing_count = GREATEST(listing_count - 1, 0), updated_at = NOW()
+            WHERE address = %s
+            """,
+            (previous_address,)
+        )
+
+    if not address:
+        return
+
+    added = 1 if is_new or (previous_address and previous_address != address) else 0
+    cur.execute(
+        """
+        INSERT INTO addresses (address, address_normalized, lat, lon, listing_count)
+        VALUES (%s, %s, %s, %s, GREATEST(%s, 1))
+        ON CONFLICT (address) DO UPDATE
+        SET
+            lat = COALESCE(EXCLUDED.lat, addresses.lat),
+            lon = COALESCE(EXCLUDED.lon, addresses.lon),
+            listing_count = addresses.listing_count + %s,
+            updated_at = NOW()
+        """,
+        (address, normalize_address_key(address), lat, lon, added, added)
+    )
+
+
+def rebuild_addresses(conn, batch_size: int = 5000) -> int:
+    """
+    Rebuild the addresses table from listings (initial fill / resync).
+
+    Returns:
+        Number of addresses written
+    """
+    from psycopg2.extras import execute_values
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT DISTINCT ON (address)
+                address,
+                lat,
+                lon,
+                COUNT(*) OVER (PARTITION BY address) AS listing_count
+            FROM listings
+            WHERE address IS NOT NULL AND address != ''
+            ORDER BY address, (lat IS NOT NULL AND lon IS NOT NULL) DESC, last_seen DESC
+        """)
+        rows = cur.fetchall()
+
+    written = 0
+    with conn.cursor() as cur:
+        cur.execute("UPDATE addresses SET listing_count = 0")
+        for start in range(0, len(rows), batch_size):
+            batch = [
+                (r[0], normalize_address_key(r[0]), r[1], r[2], r[3])
+                for r in rows[start:start + batch_size]
+            ]
+            execute_values(cur, """
+                INSERT INTO addresses (address, address_normalized, lat, lon, listing_count)
+                VALUES %s
+                ON CONFLICT (address) DO UPDATE
+                SET
+                    address_normalized = EXCLUDED.address_normalized,
+                    lat = COALESCE(EXCLUDED.lat, addresses.lat),
+                    lon = COALESCE(EXCLUDED.lon, addresses.lon),
+                    listing_count = EXCLUDED.listing_count,
+                    updated_at = NOW()
+            """, batch)
+            written += len(batch)
+        cur.execute("DELETE FROM addresses WHERE listing_count = 0")
+    conn.commit()
+    return written
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Autocomplete
+# ═══════════════════════════════════════════════════════════════════════════
+
+class AddressAutocomplete:
+    """
+    Ranked address autocomplete with an in-process LRU for hot prefixes.
+
+    Ranking: key prefix matches first, then all query words matched as word
+    prefixes, then trigram similarity, then number of listings.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        cache_size: int = AUTOCOMPLETE_CACHE_SIZE,
+        cache_ttl: float = AUTOCOMPLETE_CACHE_TTL
+    ):
+        self.dsn = dsn
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: "OrderedDict[Tuple[str, int, bool], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def search(self, query: str, limit: int = 10, with_coords: bool = True) -> List[Dict[str, Any]]:
+        """
+        Find addresses matching a (partial) user query.
+
+        Returns:
+            List of dicts: address, lat, lon, listing_count
+        """
+        key = normalize_address_key(query)
+        if not key:
+            return []
+
+        cache_key = (key, limit, with_coords)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        results = self._query(key, limit, with_coords)
+        self._cache_put(cache_key, results)
+        return results
+
+    def _query(self, key: str, limit: int, with_coords: bool) -> List[Dict[str, Any]]:
+        from etl.valuation.db_pool import pooled_connection
+        from etl.valuation.timing import span
+
+        with span("address_autocomplete"), pooled_connection(self.dsn) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT
+                    address,
+                    lat,
+                    lon,
+                    listing_count,
+                    address_normalized LIKE %(prefix)s AS prefix_match,
+                    search_vector @@ to_tsquery('simple', %(tsquery)s) AS words_match,
+                    similarity(address_normalized, %(key)s) AS score
+                FROM addresses
+                WHERE (NOT %(with_coords)s OR (lat IS NOT NULL AND lon IS NOT NULL))
+                  AND listing_count > 0
+                  AND (
+                      address_normalized LIKE %(prefix)s
+                      OR search_vector @@ to_tsquery('simple', %(tsquery)s)
+                      OR address_normalized %% %(key)s
+                  )
+                ORDER BY prefix_match DESC, words_match DESC, score DESC, listing_count DESC
+                LIMIT %(limit)s
+            """, {
+                'prefix': key + '%',
+                'tsquery': build_tsquery(key) or key,
+                'key': key,
+                'with_coords': with_coords,
+                'limit': limit,
+            })
+            rows = cur.fetchall()
+            cur.close()
+
+        return [
+            {
+                'address': r['address'],
+                'lat': float(r['lat']) if r['lat'] is not None else None,
+                'lon': float(r['lon']) if r['lon'] is not None else None,
+                'listing_count': r['listing_count'],
+            }
+            for r in rows
+        ]
+
+    # --- cache ---
+
+    def _cache_get(self, cache_key) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is None or time.monotonic() - entry[0] > self.cache_ttl:
+                self._misses += 1
+                return None
+            self._cache.move_to_end(cache_key)
+            self._hits += 1
+            return entry[1]
+
+    def _cache_put(self, cache_key, results: List[Dict[str, Any]]):
+        with self._lock:
+            self._cache[cache_key] = (time.monotonic(), results)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'cached_queries': len(self._cache),
+                'cache_hits': self._hits,
+                'cache_misses': self._misses,
+                'hit_rate': round(self._hits / total, 3) if total else 0.0,
+            }
+
+
+_autocomplete: Optional[AddressAutocomplete] = None
+_autocomplete_lock = threading.Lock()
+
+
+def get_address_autocomplete(dsn: Optional[str] = None) -> AddressAutocomplete:
+    """Get the process-wide autocomplete (shared LRU)."""
+    global _autocomplete
+    if _autocomplete is None:
+        with _autocomplete_lock:
+            if _autocomplete is None:
+                _autocomplete = AddressAutocomplete(dsn=dsn)
+    return _autocomplete
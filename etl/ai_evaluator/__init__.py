@@ -4,16 +4,24 @@ Integrates with GPT-4 Vision and Claude to analyze photos
 and assign condition ratings (1-5 scale).
 """
 
-from .photo_analyzer import PhotoAnalyzer, ConditionRating
-from .batch_processor import BatchProcessor, BatchStats
+from .photo_analyzer import PhotoAnalyzer, ConditionRating, AIProvider, ProviderThrottled
+from .batch_processor import BatchProcessor, BatchStats, save_condition_ratings
+from .rate_limiter import AdaptiveLimiter
 from .cost_optimizer import CostOptimizer, AnalysisStrategy
+from .photo_fingerprints import PhotoFingerprintStore, get_photo_fingerprints
 
 __all__ = [
     "PhotoAnalyzer",
     "ConditionRating",
+    "AIProvider",
+    "ProviderThrottled",
     "BatchProcessor",
     "BatchStats",
+    "save_condition_ratings",
+    "AdaptiveLimiter",
     "CostOptimizer",
     "AnalysisStrategy",
+    "PhotoFingerprintStore",
+    "get_photo_fingerprints",
 ]
 
@@ -1,23 +1,42 @@
-"""Batch processing for cost-effective AI analysis."""
+"""Batch processing for cost-effective AI analysis.
+
+Provider calls are native async on one shared httpx.AsyncClient (pooled
+keep-alive connections) behind one AdaptiveLimiter for the whole run, so
+concurrency adapts to 429/Retry-After instead of being reset per batch.
+Ratings are handed to ``rating_sink`` in small groups as they complete
+(e.g. save_condition_ratings), not at the end of the run.
+"""
 from __future__ import annotations
 
 import asyncio
 import logging
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
 
-from .photo_analyzer import PhotoAnalyzer, ConditionRating, AIProvider
+from .photo_analyzer import PhotoAnalyzer, ConditionRating, AIProvider, ProviderThrottled
+from .photo_fingerprints import PIL_AVAILABLE, PhotoFingerprintStore, get_photo_fingerprints
+from .rate_limiter import AdaptiveLimiter
 
 LOGGER = logging.getLogger(__name__)
 
+# Ratings per sink call and max delay before a partial group is written
+SINK_FLUSH_SIZE = 50
+SINK_FLUSH_INTERVAL = 2.0
+
 
 @dataclass
 class BatchStats:
     """Statistics for batch processing."""
     
-    total_analyzed: int = 0
+    total_analyzed: int = 0  # paid API calls
     total_cost_usd: float = 0.0
     total_time_sec: float = 0.0
+    cache_hits: int = 0  # listings rated from an already analyzed photo
+    cost_saved_usd: float = 0.0
+    throttled: int = 0  # 429 answers (retried)
+    ratings_written: int = 0
     errors: List[str] = field(default_factory=list)
     
     def avg_cost(self) -> float:
@@ -25,6 +44,51 @@ class BatchStats:
     
     def avg_time(self) -> float:
         return self.total_time_sec / self.total_analyzed if self.total_analyzed > 0 else 0
+    
+    def hit_rate(self) -> float:
+        rated = self.cache_hits + self.total_analyzed
+        return self.cache_hits / rated if rated > 0 else 0
+
+
+def save_condition_ratings(conn, ratings: List[ConditionRating]) -> None:
+    """Upsert ratings into listing_condition_ratings (one per listing)."""
+    from psycopg2.extras import execute_values
+
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            """
+            INSERT INTO listing_condition_ratings (
+                listing_id, condition_score, condition_label, ai_model, ai_analysis,
+                confidence, repair_quality, cleanliness, modern_design, needs_renovation,
+                cost_usd, processing_time_sec
+            )
+            VALUES %s
+            ON CONFLICT (listing_id) DO UPDATE
+            SET
+                condition_score = EXCLUDED.condition_score,
+                condition_label = EXCLUDED.condition_label,
+                ai_model = EXCLUDED.ai_model,
+                ai_analysis = EXCLUDED.ai_analysis,
+                confidence = EXCLUDED.confidence,
+                repair_quality = EXCLUDED.repair_quality,
+                cleanliness = EXCLUDED.cleanliness,
+                modern_design = EXCLUDED.modern_design,
+                needs_renovation = EXCLUDED.needs_renovation,
+                cost_usd = EXCLUDED.cost_usd,
+                processing_time_sec = EXCLUDED.processing_time_sec,
+                analyzed_at = NOW()
+            """,
+            [
+                (
+                    r.listing_id, r.condition_score, r.condition_label, r.ai_model, r.ai_analysis,
+                    r.confidence, r.repair_quality, r.cleanliness, r.modern_design, r.needs_renovation,
+                    r.cost_usd, r.processing_time_sec,
+                )
+                for r in ratings
+            ],
+        )
+    conn.commit()
 
 
 class BatchProcessor:
@@ -37,6 +101,10 @@ class BatchProcessor:
         batch_size: int = 50,
         concurrency: int = 10,
         detail: str = "low",
+        fingerprints: Optional[PhotoFingerprintStore] = None,
+        use_photo_cache: bool = True,
+        rating_sink: Optional[Callable[[List[ConditionRating]], None]] = None,
+        max_retries: int = 3,
     ):
         """Initialize batch processor.
         
@@ -47,15 +115,34 @@ class BatchProcessor:
         batch_size : int
             Number of listings to process per batch
         concurrency : int
-            Number of parallel API calls
+            Max parallel API calls (lowered automatically on 429)
         detail : str
             Detail level for images ("low" or "high")
+        fingerprints : PhotoFingerprintStore, optional
+            Photo hash store (defaults to the shared one)
+        use_photo_cache : bool
+            Reuse ratings of already analyzed (identical or near-identical) photos
+        rating_sink : callable, optional
+            Called (in a worker thread) with groups of completed ratings,
+            e.g. ``lambda r: save_condition_ratings(conn, r)``
+        max_retries : int
+            Retries of a throttled (429) call
         """
         self.analyzer = PhotoAnalyzer(provider)
         self.batch_size = batch_size
         self.concurrency = concurrency
         self.detail = detail
+        self.rating_sink = rating_sink
+        self.max_retries = max_retries
         self.stats = BatchStats()
+        self.ratings: List[ConditionRating] = []
+        self.limiter = AdaptiveLimiter(concurrency)
+        self.fingerprints = None
+        if use_photo_cache and PIL_AVAILABLE:
+            self.fingerprints = fingerprints or get_photo_fingerprints()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._downloads: Optional[asyncio.Semaphore] = None
+        self._pending: Optional[asyncio.Queue] = None
     
     async def process_listings(
         self,
@@ -80,70 +167,166 @@ class BatchProcessor:
         total = len(listings_with_photos)
         LOGGER.info(f"Starting batch processing: {total} listings")
         
-        # Process in batches
-        for batch_start in range(0, total, self.batch_size):
-            batch_end = min(batch_start + self.batch_size, total)
-            batch = listings_with_photos[batch_start:batch_end]
-            
-            LOGGER.info(
-                f"Processing batch {batch_start // self.batch_size + 1}: "
-                f"listings {batch_start + 1}-{batch_end}"
-            )
-            
-            # Process batch with concurrency limit
-            await self._process_batch(batch)
-            
-            # Progress callback
-            if progress_callback:
-                progress_callback(batch_end, total, self.stats)
-            
-            # Log progress
-            LOGGER.info(
-                f"Progress: {self.stats.total_analyzed}/{total} "
-                f"(${self.stats.total_cost_usd:.2f}, "
-                f"{self.stats.total_time_sec:.0f}s)"
-            )
-            
-            # Rate limit between batches
-            if batch_end < total:
-                await asyncio.sleep(1)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self._downloads = asyncio.Semaphore(self.concurrency)
+        self._pending = asyncio.Queue()
+        writer = asyncio.create_task(self._write_ratings())
+        
+        try:
+            async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+                self._client = client
+                
+                # Process in batches
+                for batch_start in range(0, total, self.batch_size):
+                    batch_end = min(batch_start + self.batch_size, total)
+                    batch = listings_with_photos[batch_start:batch_end]
+                    
+                    LOGGER.info(
+                        f"Processing batch {batch_start // self.batch_size + 1}: "
+                        f"listings {batch_start + 1}-{batch_end}"
+                    )
+                    
+                    await self._process_batch(batch)
+                    
+                    # Progress callback
+                    if progress_callback:
+                        progress_callback(batch_end, total, self.stats)
+                    
+                    # Log progress
+                    LOGGER.info(
+                        f"Progress: {self.stats.total_analyzed}/{total} "
+                        f"(${self.stats.total_cost_usd:.2f}, "
+                        f"{self.stats.total_time_sec:.0f}s, "
+                        f"cache hit rate {self.stats.hit_rate():.0%}, "
+                        f"concurrency {int(self.limiter.limit)})"
+                    )
+        finally:
+            self._client = None
+            await self._pending.put(None)
+            await writer
         
         LOGGER.info(
             f"Batch processing complete: {self.stats.total_analyzed} analyzed, "
-            f"${self.stats.total_cost_usd:.2f} total cost"
+            f"${self.stats.total_cost_usd:.2f} total cost, "
+            f"{self.stats.cache_hits} from photo cache (${self.stats.cost_saved_usd:.2f} saved), "
+            f"{self.stats.throttled} throttled"
         )
         
         return self.stats
     
     async def _process_batch(self, batch: List[tuple[int, str]]) -> None:
-        """Process a single batch with concurrency limit."""
-        semaphore = asyncio.Semaphore(self.concurrency)
-        
-        async def analyze_one(listing_id: int, photo_url: str):
-            async with semaphore:
+        """Process a single batch.
+
+        Listings whose photos have the same fingerprint (or the same URL when
+        fingerprints are unavailable) share one analysis; photos rated in
+        earlier runs are not analyzed again.
+        """
+        async def fingerprint(photo_url: str) -> Optional[int]:
+            async with self._downloads:
+                return await asyncio.to_thread(self.fingerprints.fingerprint, photo_url)
+
+        if self.fingerprints:
+            hashes = await asyncio.gather(*[fingerprint(url) for _, url in batch])
+        else:
+            hashes = [None] * len(batch)
+
+        groups: Dict[Union[int, str], List[Tuple[int, str]]] = {}
+        for (listing_id, photo_url), phash in zip(batch, hashes):
+            groups.setdefault(phash if phash is not None else photo_url, []).append((listing_id, photo_url))
+
+        async def analyze_group(key: Union[int, str], members: List[Tuple[int, str]]):
+            phash = key if isinstance(key, int) else None
+            cached = None
+            if phash is not None:
+                cached = await asyncio.to_thread(self.fingerprints.lookup, "condition", [phash])
+
+            if cached is None:
+                listing_id, photo_url = members[0]
+                try:
+                    rating = await self._analyze(listing_id, photo_url)
+                except Exception as e:
+                    for member_id, _ in members:
+                        error_msg = f"Listing {member_id}: {e}"
+                        self.stats.errors.append(error_msg)
+                        LOGGER.error(error_msg)
+                    return
+
+                # Update stats
+                self.stats.total_analyzed += 1
+                self.stats.total_cost_usd += rating.cost_usd
+                self.stats.total_time_sec += rating.processing_time_sec
+                self._emit(rating)
+
+                cached = rating.to_dict()
+                members = members[1:]
+                if phash is not None:
+                    await asyncio.to_thread(
+                        self.fingerprints.save,
+                        "condition",
+                        [phash],
+                        cached,
+                        ai_model=rating.ai_model,
+                        cost_usd=rating.cost_usd,
+                    )
+
+            for listing_id, _ in members:
+                self._emit(ConditionRating(
+                    **{**cached, "listing_id": listing_id, "cost_usd": 0.0, "processing_time_sec": 0.0}
+                ))
+                self.stats.cache_hits += 1
+                self.stats.cost_saved_usd += self.analyzer.cost_per_image
+
+        await asyncio.gather(*[analyze_group(key, members) for key, members in groups.items()])
+    
+    async def _analyze(self, listing_id: int, photo_url: str) -> ConditionRating:
+        """One provider call under the shared limiter, retried on 429."""
+        for attempt in range(self.max_retries + 1):
+            async with self.limiter:
+                generation = self.limiter.generation
                 try:
-                    # Run in thread pool (sync API calls)
-                    rating = await asyncio.to_thread(
-                        self.analyzer.analyze_condition,
+                    rating = await self.analyzer.analyze_condition_async(
                         listing_id,
                         photo_url,
+                        client=self._client,
                         detail=self.detail,
                     )
-                    
-                    # Update stats
-                    self.stats.total_analyzed += 1
-                    self.stats.total_cost_usd += rating.cost_usd
-                    self.stats.total_time_sec += rating.processing_time_sec
-                    
-                    return rating
-                    
+                except ProviderThrottled as e:
+                    self.stats.throttled += 1
+                    self.limiter.on_throttle(
+                        e.retry_after if e.retry_after is not None else 2.0 ** attempt,
+                        generation=generation,
+                    )
+                    if attempt == self.max_retries:
+                        raise
+                    continue
+            self.limiter.on_success()
+            return rating
+    
+    def _emit(self, rating: ConditionRating) -> None:
+        self.ratings.append(rating)
+        if self.rating_sink:
+            self._pending.put_nowait(rating)
+    
+    async def _write_ratings(self) -> None:
+        """Hand completed ratings to the sink in groups while analysis runs."""
+        done = False
+        while not done:
+            group: List[ConditionRating] = []
+            try:
+                while len(group) < SINK_FLUSH_SIZE:
+                    item = await asyncio.wait_for(self._pending.get(), timeout=SINK_FLUSH_INTERVAL)
+                    if item is None:
+                        done = True
+                        break
+                    group.append(item)
+            except asyncio.TimeoutError:
+                pass
+            
+            if group and self.rating_sink:
+                try:
+                    await asyncio.to_thread(self.rating_sink, group)
+                    self.stats.ratings_written += len(group)
                 except Exception as e:
-                    error_msg = f"Listing {listing_id}: {e}"
+                    error_msg = f"Failed to write {len(group)} ratings: {e}"
                     self.stats.errors.append(error_msg)
                     LOGGER.error(error_msg)
-                    return None
-        
-        # Process batch in parallel
-        tasks = [analyze_one(lid, url) for lid, url in batch]
-        await asyncio.gather(*tasks)
-
@@ -15,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from etl.ai_evaluator import (
     PhotoAnalyzer,
     BatchProcessor,
+    save_condition_ratings,
     CostOptimizer,
     AnalysisStrategy,
     AIProvider,
@@ -183,17 +184,23 @@ def analyze(strategy: str, limit: int, provider: str, dry_run: bool):
         for row in listings
     ]
     
+    # Ratings are written as they complete, so an interrupted run keeps its results
+    conn = get_db_connection()
     processor = BatchProcessor(
         provider=AIProvider(provider),
         batch_size=50,
         concurrency=10,
         detail="low",
+        rating_sink=lambda ratings: save_condition_ratings(conn, ratings),
     )
     
     click.echo("\n🚀 Starting analysis...\n")
     
     # Run async
-    stats = asyncio.run(processor.process_listings(listings_with_photos))
+    try:
+        stats = asyncio.run(processor.process_listings(listings_with_photos))
+    finally:
+        conn.close()
     
     # Results
     click.echo("\n" + "=" * 80)
@@ -205,6 +212,10 @@ def analyze(strategy: str, limit: int, provider: str, dry_run: bool):
     click.echo(f"Avg cost: ${stats.avg_cost():.4f}")
     click.echo(f"Total time: {stats.total_time_sec / 60:.1f} minutes")
     click.echo(f"Avg time: {stats.avg_time():.1f}s per listing")
+    click.echo(f"From photo cache: {stats.cache_hits} (hit rate {stats.hit_rate():.0%})")
+    click.echo(f"Cost saved: ${stats.cost_saved_usd:.2f}")
+    click.echo(f"Throttled (429, retried): {stats.throttled}")
+    click.echo(f"Ratings saved: {stats.ratings_written}")
     click.echo("=" * 80)
 
 
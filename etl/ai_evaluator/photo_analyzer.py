@@ -1,19 +1,28 @@
 """AI-based photo analysis for apartment condition evaluation."""
 from __future__ import annotations
 
+import base64
 import json
 import logging
 import os
 import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import Literal, Optional
+from typing import Literal, Optional, Tuple
 
 import httpx
 
 LOGGER = logging.getLogger(__name__)
 
 
+class ProviderThrottled(Exception):
+    """Provider answered HTTP 429 (rate limit / quota)."""
+    
+    def __init__(self, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+        super().__init__(f"Provider rate limit (retry after {retry_after}s)")
+
+
 class AIProvider(str, Enum):
     """Supported AI providers."""
     
@@ -62,6 +71,9 @@ class ConditionRating:
 class PhotoAnalyzer:
     """Analyze apartment photos using AI vision models."""
     
+    OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+    ANTHROPIC_URL = "https://api.anthropic.com/v1/messages"
+    
     # Prompt template for condition analysis
     ANALYSIS_PROMPT = """Оцени состояние квартиры по фотографии по шкале от 1 до 5:
 
@@ -144,31 +156,94 @@ class PhotoAnalyzer:
             else:
                 result = self._analyze_claude(photo_url)
             
-            processing_time = time.time() - start_time
-            
-            return ConditionRating(
-                listing_id=listing_id,
-                condition_score=result["condition_score"],
-                condition_label=result["condition_label"],
-                ai_model=self.model,
-                ai_analysis=result["analysis"],
-                confidence=result.get("confidence", 0.8),
-                repair_quality=result.get("repair_quality"),
-                cleanliness=result.get("cleanliness"),
-                modern_design=result.get("modern_design", False),
-                needs_renovation=result.get("needs_renovation", False),
-                cost_usd=self.cost_per_image,
-                processing_time_sec=processing_time,
-            )
+            return self._to_rating(listing_id, result, time.time() - start_time)
             
         except Exception as e:
             LOGGER.error(f"Failed to analyze listing {listing_id}: {e}")
             raise
     
+    async def analyze_condition_async(
+        self,
+        listing_id: int,
+        photo_url: str,
+        *,
+        client: httpx.AsyncClient,
+        detail: str = "low",
+    ) -> ConditionRating:
+        """Async version of analyze_condition on a shared client.
+        
+        Parameters
+        ----------
+        client : httpx.AsyncClient
+            Client whose connection pool is reused across calls
+            
+        Raises
+        ------
+        ProviderThrottled
+            Provider answered 429; the caller decides when to retry
+        """
+        start_time = time.time()
+        
+        if self.provider == AIProvider.OPENAI:
+            url, headers, payload = self._openai_request(photo_url, detail)
+        else:
+            img_response = await client.get(photo_url, timeout=30)
+            img_response.raise_for_status()
+            url, headers, payload = self._claude_request(
+                img_response.content,
+                img_response.headers.get("content-type", "image/jpeg"),
+            )
+        
+        response = await client.post(url, headers=headers, json=payload, timeout=60)
+        if response.status_code == 429:
+            raise ProviderThrottled(_retry_after(response))
+        response.raise_for_status()
+        
+        result = self._parse_response(response.json())
+        return self._to_rating(listing_id, result, time.time() - start_time)
+    
+    def _to_rating(self, listing_id: int, result: dict, processing_time: float) -> ConditionRating:
+        return ConditionRating(
+            listing_id=listing_id,
+            condition_score=result["condition_score"],
+            condition_label=result["condition_label"],
+            ai_model=self.model,
+            ai_analysis=result["analysis"],
+            confidence=result.get("confidence", 0.8),
+            repair_quality=result.get("repair_quality"),
+            cleanliness=result.get("cleanliness"),
+            modern_design=result.get("modern_design", False),
+            needs_renovation=result.get("needs_renovation", False),
+            cost_usd=self.cost_per_image,
+            processing_time_sec=processing_time,
+        )
+    
     def _analyze_openai(self, photo_url: str, detail: str = "low") -> dict:
         """Analyze using OpenAI GPT-4 Vision."""
-        url = "https://api.openai.com/v1/chat/completions"
+        url, headers, payload = self._openai_request(photo_url, detail)
+        
+        response = httpx.post(url, headers=headers, json=payload, timeout=60)
+        response.raise_for_status()
+        
+        return self._parse_response(response.json())
+    
+    def _analyze_claude(self, photo_url: str) -> dict:
+        """Analyze using Anthropic Claude."""
+        # Download image and encode (Claude requires base64)
+        img_response = httpx.get(photo_url, timeout=30)
+        img_response.raise_for_status()
+        
+        url, headers, payload = self._claude_request(
+            img_response.content,
+            img_response.headers.get("content-type", "image/jpeg"),
+        )
+        
+        response = httpx.post(url, headers=headers, json=payload, timeout=60)
+        response.raise_for_status()
         
+        return self._parse_response(response.json())
+    
+    def _openai_request(self, photo_url: str, detail: str) -> Tuple[str, dict, dict]:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -194,43 +269,15 @@ class PhotoAnalyzer:
             "max_tokens": 300,
             "temperature": 0.3,
         }
-        
-        response = httpx.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        
-        data = response.json()
-        content = data["choices"][0]["message"]["content"]
-        
-        # Parse JSON response
-        # Remove markdown if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0]
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0]
-        
-        result = json.loads(content.strip())
-        return result
+        return self.OPENAI_URL, headers, payload
     
-    def _analyze_claude(self, photo_url: str) -> dict:
-        """Analyze using Anthropic Claude."""
-        url = "https://api.anthropic.com/v1/messages"
-        
+    def _claude_request(self, image: bytes, content_type: str) -> Tuple[str, dict, dict]:
         headers = {
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
             "Content-Type": "application/json",
         }
         
-        # Download image and encode (Claude requires base64)
-        img_response = httpx.get(photo_url, timeout=30)
-        img_response.raise_for_status()
-        
-        import base64
-        img_base64 = base64.b64encode(img_response.content).decode()
-        
-        # Determine media type
-        content_type = img_response.headers.get("content-type", "image/jpeg")
-        
         payload = {
             "model": self.model,
             "max_tokens": 300,
@@ -245,26 +292,35 @@ class PhotoAnalyzer:
                             "source": {
                                 "type": "base64",
                                 "media_type": content_type,
-                                "data": img_base64,
+                                "data": base64.b64encode(image).decode(),
                             }
                         }
                     ]
                 }
             ]
         }
-        
-        response = httpx.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        
-        data = response.json()
-        content = data["content"][0]["text"]
+        return self.ANTHROPIC_URL, headers, payload
+    
+    def _parse_response(self, data: dict) -> dict:
+        if self.provider == AIProvider.OPENAI:
+            content = data["choices"][0]["message"]["content"]
+        else:
+            content = data["content"][0]["text"]
         
         # Parse JSON response
+        # Remove markdown if present
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0]
         elif "```" in content:
             content = content.split("```")[1].split("```")[0]
         
-        result = json.loads(content.strip())
-        return result
+        return json.loads(content.strip())
+
 
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds form only)."""
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,301 @@
+"""Perceptual-hash fingerprints of listing photos and a cache of AI results.
+
+The same photos come back under new URLs in reposts and duplicate
+listings. Each photo is downloaded once and fingerprinted with a 64-bit
+difference hash (dHash), which survives re-encoding and resizing. AI vision
+results are cached by fingerprint, so an already rated photo is not sent to
+the paid API again.
+
+Fingerprints are kept in `photo_fingerprints` and results in
+`photo_analysis_cache` (db/migrations/019_photo_fingerprints.sql), with
+in-process caches in front. Near-duplicates (Hamming distance up to
+PHOTO_HASH_MAX_DISTANCE) are found through a band index: the hash is split
+into 4 bands of 16 bits, and two hashes within distance 3 share at least
+one band.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import httpx
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+LOGGER = logging.getLogger(__name__)
+
+PHOTO_CACHE_ENABLED = os.getenv("PHOTO_CACHE", "1") == "1"
+PHOTO_CACHE_SIZE = int(os.getenv("PHOTO_CACHE_SIZE", "20000"))
+# 0 = exact hash only; at most 3 (pigeonhole over 4 bands)
+PHOTO_HASH_MAX_DISTANCE = min(int(os.getenv("PHOTO_HASH_MAX_DISTANCE", "3")), 3)
+PHOTO_DOWNLOAD_TIMEOUT = 30.0
+# After a cache table error, skip it for this long instead of failing every call
+STORE_RETRY_SECONDS = 60.0
+
+_BANDS = 4
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def dhash(image_bytes: bytes) -> int:
+    """64-bit difference hash of an image (9x8 grayscale, left > right)."""
+    if not PIL_AVAILABLE:
+        raise RuntimeError("Pillow is not installed")
+    with Image.open(BytesIO(image_bytes)) as img:
+        small = img.convert("L").resize((9, 8), Image.LANCZOS)
+        pixels = small.tobytes()
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def photo_key(hashes: Sequence[int]) -> str:
+    """Cache key of one photo or of a photo set (order-independent)."""
+    return "-".join(sorted(f"{h:016x}" for h in hashes))
+
+
+class PhotoFingerprintStore:
+    """Photo URL -> fingerprint, and fingerprint -> cached AI result."""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        cache_enabled: bool = PHOTO_CACHE_ENABLED,
+        cache_size: int = PHOTO_CACHE_SIZE,
+        max_distance: int = PHOTO_HASH_MAX_DISTANCE,
+    ):
+        self.dsn = dsn
+        self.cache_enabled = cache_enabled
+        self.cache_size = cache_size
+        self.max_distance = min(max_distance, _BANDS - 1)
+        self._fingerprints: "OrderedDict[str, int]" = OrderedDict()
+        self._results: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        # (kind, band number, band value) -> single-photo hashes with a cached result
+        self._bands: Dict[Tuple[str, int, int], Set[int]] = {}
+        self._indexed_kinds: Set[str] = set()
+        self._lock = threading.Lock()
+        self._store_retry_at = 0.0
+
+    # --- fingerprints ---
+
+    def known_fingerprint(self, url: str) -> Optional[int]:
+        """Fingerprint of an already seen URL (no download)."""
+        with self._lock:
+            if url in self._fingerprints:
+                self._fingerprints.move_to_end(url)
+                return self._fingerprints[url]
+
+        row = self._store_query("SELECT phash FROM photo_fingerprints WHERE url = %s", (url,))
+        if not row:
+            return None
+        value = int(row[0]["phash"], 16)
+        self._remember_fingerprint(url, value)
+        return value
+
+    def fetch_image(self, url: str) -> Tuple[bytes, Optional[int]]:
+        """Download a photo and record its fingerprint; returns (bytes, hash)."""
+        content = self._download(url)
+        try:
+            value = dhash(content)
+        except Exception as e:
+            LOGGER.warning(f"Cannot fingerprint {url}: {e}")
+            return content, None
+
+        self._remember_fingerprint(url, value)
+        self._store_execute(
+            """
+            INSERT INTO photo_fingerprints (url, phash) VALUES (%s, %s)
+            ON CONFLICT (url) DO UPDATE SET phash = EXCLUDED.phash, fetched_at = NOW()
+            """,
+            (url, f"{value:016x}"),
+        )
+        return content, value
+
+    def _download(self, url: str) -> bytes:
+        response = httpx.get(url, timeout=PHOTO_DOWNLOAD_TIMEOUT, follow_redirects=True)
+        response.raise_for_status()
+        return response.content
+
+    def fingerprint(self, url: str) -> Optional[int]:
+        """Fingerprint of a photo; downloads it only the first time."""
+        known = self.known_fingerprint(url)
+        if known is not None:
+            return known
+        try:
+            return self.fetch_image(url)[1]
+        except Exception as e:
+            LOGGER.warning(f"Cannot download {url}: {e}")
+            return None
+
+    # --- cached results ---
+
+    def lookup(self, kind: str, hashes: Sequence[int]) -> Optional[Dict[str, Any]]:
+        """Cached result for a photo (or photo set), near-duplicates included."""
+        if not hashes:
+            return None
+        result = self._get_result(kind, photo_key(hashes))
+        if result is not None or len(hashes) != 1 or not self.max_distance:
+            return result
+
+        near = self._nearest(kind, hashes[0])
+        return self._get_result(kind, photo_key([near])) if near is not None else None
+
+    def save(
+        self,
+        kind: str,
+        hashes: Sequence[int],
+        result: Dict[str, Any],
+        *,
+        ai_model: Optional[str] = None,
+        cost_usd: float = 0.0,
+    ) -> None:
+        if not hashes:
+            return
+        key = photo_key(hashes)
+        self._remember_result(kind, key, result)
+        if len(hashes) == 1:
+            with self._lock:
+                self._index(kind, hashes[0])
+
+        from psycopg2.extras import Json
+        self._store_execute(
+            """
+            INSERT INTO photo_analysis_cache (kind, photo_key, result, ai_model, cost_usd)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (kind, photo_key) DO UPDATE
+            SET result = EXCLUDED.result, ai_model = EXCLUDED.ai_model,
+                cost_usd = EXCLUDED.cost_usd, created_at = NOW()
+            """,
+            (kind, key, Json(result), ai_model, cost_usd),
+        )
+
+    def _get_result(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if (kind, key) in self._results:
+                self._results.move_to_end((kind, key))
+                return self._results[(kind, key)]
+
+        row = self._store_query(
+            "SELECT result FROM photo_analysis_cache WHERE kind = %s AND photo_key = %s", (kind, key)
+        )
+        if not row:
+            return None
+        self._remember_result(kind, key, row[0]["result"])
+        return row[0]["result"]
+
+    def _nearest(self, kind: str, value: int) -> Optional[int]:
+        self._load_index(kind)
+        with self._lock:
+            candidates: Set[int] = set()
+            for band in range(_BANDS):
+                candidates |= self._bands.get((kind, band, (value >> (band * _BAND_BITS)) & _BAND_MASK), set())
+        best = None
+        best_distance = self.max_distance + 1
+        for candidate in candidates:
+            distance = hamming(value, candidate)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    def _index(self, kind: str, value: int):
+        for band in range(_BANDS):
+            self._bands.setdefault((kind, band, (value >> (band * _BAND_BITS)) & _BAND_MASK), set()).add(value)
+
+    def _load_index(self, kind: str):
+        """Index single-photo keys already in the cache table (once per kind)."""
+        with self._lock:
+            if kind in self._indexed_kinds:
+                return
+            self._indexed_kinds.add(kind)
+        rows = self._store_query(
+            "SELECT photo_key FROM photo_analysis_cache WHERE kind = %s AND photo_key NOT LIKE '%%-%%'",
+            (kind,),
+        ) or []
+        with self._lock:
+            for row in rows:
+                self._index(kind, int(row["photo_key"], 16))
+
+    def _remember_fingerprint(self, url: str, value: int):
+        with self._lock:
+            self._fingerprints[url] = value
+            self._fingerprints.move_to_end(url)
+            while len(self._fingerprints) > self.cache_size:
+                self._fingerprints.popitem(last=False)
+
+    def _remember_result(self, kind: str, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._results[(kind, key)] = result
+            self._results.move_to_end((kind, key))
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    # --- cache tables ---
+
+    def _store_available(self) -> bool:
+        return self.cache_enabled and time.monotonic() >= self._store_retry_at
+
+    def _store_failed(self, e: Exception):
+        self._store_retry_at = time.monotonic() + STORE_RETRY_SECONDS
+        LOGGER.warning(f"Photo cache tables unavailable ({e}), memory cache only for {STORE_RETRY_SECONDS:.0f}s")
+
+    def _store_query(self, sql: str, params: tuple) -> Optional[List[Dict[str, Any]]]:
+        if not self._store_available():
+            return None
+        try:
+            from etl.valuation.db_pool import pooled_connection
+
+            with pooled_connection(self.dsn) as conn:
+                cur = conn.cursor()
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+                cur.close()
+            return rows
+        except Exception as e:
+            self._store_failed(e)
+            return None
+
+    def _store_execute(self, sql: str, params: tuple) -> None:
+        if not self._store_available():
+            return
+        try:
+            from etl.valuation.db_pool import pooled_connection
+
+            with pooled_connection(self.dsn) as conn:
+                cur = conn.cursor()
+                cur.execute(sql, params)
+                conn.commit()
+                cur.close()
+        except Exception as e:
+            self._store_failed(e)
+
+
+_store: Optional[PhotoFingerprintStore] = None
+_store_lock = threading.Lock()
+
+
+def get_photo_fingerprints(dsn: Optional[str] = None) -> PhotoFingerprintStore:
+    """Get the process-wide photo fingerprint store (shared caches)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PhotoFingerprintStore(dsn=dsn)
+    return _store
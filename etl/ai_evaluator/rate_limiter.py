@@ -0,0 +1,85 @@
+"""Adaptive concurrency limit for AI provider calls."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AdaptiveLimiter:
+    """Limit on in-flight provider calls (AIMD), shared by all batches of a run.
+
+    Each BatchProcessor owns one limiter for all its batches, so the
+    provider sees a steady load instead of bursts per batch.
+
+    The limit starts at ``max_concurrency``. A 429 halves it and pauses all
+    new calls for Retry-After seconds; every successful call raises it by
+    about one per window of calls, back up to ``max_concurrency``. Calls
+    that were already in flight when the limit was halved belong to the
+    same burst: their 429s extend the pause but do not halve it again.
+    Pass the ``generation`` read when the call started to on_throttle().
+
+    Usage::
+
+        async with limiter:
+            generation = limiter.generation
+            try:
+                response = await call_provider()
+            except Throttled as e:
+                limiter.on_throttle(e.retry_after, generation=generation)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        *,
+        min_concurrency: int = 1,
+        default_backoff: float = 2.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.default_backoff = default_backoff
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.throttled = 0
+        self.generation = 0  # bumped on every decrease
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        while True:
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._condition:
+                while self.in_flight >= int(self.limit):
+                    await self._condition.wait()
+                # A 429 may have arrived while waiting for a slot
+                if self._resume_at <= time.monotonic():
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        if self.limit < self.max_concurrency:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def on_throttle(self, retry_after: Optional[float] = None, *, generation: Optional[int] = None) -> None:
+        """Record a 429 of a call started at ``generation`` (None: always decrease)."""
+        self.throttled += 1
+        pause = retry_after if retry_after is not None else self.default_backoff
+        self._resume_at = max(self._resume_at, time.monotonic() + pause)
+        if generation is not None and generation != self.generation:
+            return  # same burst as an earlier decrease
+        self.generation += 1
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        LOGGER.warning(f"Provider throttled: concurrency -> {int(self.limit)}, pausing {pause:.1f}s")
@@ -16,6 +16,52 @@ from .models import AuctionLot, AuctionSource
 
 logger = logging.getLogger(__name__)
 
+# One Chromium per event loop and launch options, shared by the parsers of a
+# run (collect_sources runs them concurrently); closed with its last user.
+_shared_launches: dict = {}  # (loop, headless, proxy) -> task -> (playwright, browser)
+_shared_users: dict = {}     # browser -> [playwright, users]
+
+
+async def _launch_browser(headless: bool, proxy: Optional[str]) -> tuple:
+    playwright = await async_playwright().start()
+    launch_options = {"headless": headless}
+    if proxy:
+        launch_options["proxy"] = {"server": proxy}
+    return playwright, await playwright.chromium.launch(**launch_options)
+
+
+async def acquire_shared_browser(headless: bool = True, proxy: Optional[str] = None) -> Browser:
+    """Get (launching once) the shared browser; give it back with release_shared_browser."""
+    key = (id(asyncio.get_running_loop()), headless, proxy)
+    launch = _shared_launches.get(key)
+    if launch is not None and launch.done() and (
+        launch.exception() or not launch.result()[1].is_connected()
+    ):
+        launch = None  # failed launch or crashed browser: start a new one
+    if launch is None:
+        launch = _shared_launches[key] = asyncio.ensure_future(_launch_browser(headless, proxy))
+    playwright, browser = await launch
+    _shared_users.setdefault(browser, [playwright, 0])[1] += 1
+    return browser
+
+
+async def release_shared_browser(browser: Browser) -> None:
+    entry = _shared_users.get(browser)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] > 0:
+        return
+    del _shared_users[browser]
+    for key, launch in list(_shared_launches.items()):
+        if launch.done() and not launch.exception() and launch.result()[1] is browser:
+            del _shared_launches[key]
+    try:
+        await browser.close()
+    finally:
+        await entry[0].stop()
+    logger.info("Shared browser closed")
+
 
 class BaseAuctionParser(ABC):
     """
@@ -26,6 +72,10 @@ class BaseAuctionParser(ABC):
     - platform_name: str
     - base_url: str
     - fetch_lots(): AsyncGenerator of AuctionLot
+
+    Paginated parsers start at `start_page`, keep `current_page` up to date
+    and set `last_error` when the crawl stops on an error, so a streaming
+    run can be resumed (see stream_lots).
     """
 
     source_type: AuctionSource
@@ -42,7 +92,11 @@ class BaseAuctionParser(ABC):
         self.proxy = proxy
         self.headless = headless
         self._browser: Optional[Browser] = None
+        self._contexts: list = []
         self._http_client: Optional[httpx.AsyncClient] = None
+        self.start_page = 0                    # first page to parse (resume)
+        self.current_page = 0                  # page the last lot came from
+        self.last_error: Optional[str] = None  # why fetch_lots stopped early
 
     async def __aenter__(self):
         await self.setup()
@@ -54,12 +108,8 @@ class BaseAuctionParser(ABC):
     async def setup(self):
         """Initialize resources."""
         if self.use_browser:
-            playwright = await async_playwright().start()
-            launch_options = {"headless": self.headless}
-            if self.proxy:
-                launch_options["proxy"] = {"server": self.proxy}
-            self._browser = await playwright.chromium.launch(**launch_options)
-            logger.info(f"Browser started for {self.platform_name}")
+            self._browser = await acquire_shared_browser(self.headless, self.proxy)
+            logger.info(f"Browser ready for {self.platform_name}")
         else:
             self._http_client = httpx.AsyncClient(
                 timeout=30.0,
@@ -73,17 +123,25 @@ class BaseAuctionParser(ABC):
     async def cleanup(self):
         """Cleanup resources."""
         if self._browser:
-            await self._browser.close()
-            logger.info(f"Browser closed for {self.platform_name}")
+            for context in self._contexts:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Error closing context: {e}")
+            self._contexts = []
+            browser, self._browser = self._browser, None
+            await release_shared_browser(browser)
+            logger.info(f"Browser released by {self.platform_name}")
         if self._http_client:
             await self._http_client.aclose()
             logger.info(f"HTTP client closed for {self.platform_name}")
 
     async def get_page(self) -> Page:
-        """Get a new browser page."""
+        """Get a new browser page (own context, closed in cleanup())."""
         if not self._browser:
             raise RuntimeError("Browser not initialized. Call setup() first or use use_browser=True")
         context = await self._browser.new_context()
+        self._contexts.append(context)
         return await context.new_page()
 
     async def http_get(self, url: str, **kwargs) -> httpx.Response:
@@ -162,6 +220,34 @@ class BaseAuctionParser(ABC):
         return lots
 
 
+    async def stream_lots(
+        self,
+        city: Optional[str] = None,
+        property_type: Optional[str] = None,
+        max_pages: int = 10,
+    ) -> AsyncGenerator[tuple[int, AuctionLot], None]:
+        """
+        Filtered lots one at a time, without collecting them in memory.
+
+        Yields:
+            (page number, AuctionLot); pages arrive in increasing order
+        """
+        self.last_error = None
+        found = 0
+        skipped = 0
+
+        async for lot in self.fetch_lots(city, property_type, max_pages):
+            if self.filter_lot(lot):
+                found += 1
+                yield self.current_page, lot
+            else:
+                skipped += 1
+
+        logger.info(
+            f"{self.platform_name}: Streamed {found} lots, skipped {skipped}"
+        )
+
+
 class MockAuctionParser(BaseAuctionParser):
     """Mock parser for testing."""
 
@@ -3,6 +3,9 @@ CLI for auction lots collection.
 
 Usage:
     python -m etl.auctions.cli collect --source fssp --city Москва
+    python -m etl.auctions.cli collect --stream --max-pages 200
+    python -m etl.auctions.cli collect --compare
+    python -m etl.auctions.cli compare-market --all
     python -m etl.auctions.cli stats
     python -m etl.auctions.cli list --source bankrupt --limit 20
 """
@@ -15,8 +18,9 @@ from typing import Optional
 
 import click
 
-from .models import AuctionSource
 from . import db
+from .collector import SOURCES, collect_sources
+from .market_comparison import compare_active_lots
 
 # Configure logging
 logging.basicConfig(
@@ -26,33 +30,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def get_parser(source: str):
-    """Get parser instance for source type."""
-    source_map = {
-        'fssp': 'etl.auctions.parsers.fssp_parser',
-        'bankrupt': 'etl.auctions.parsers.fedresurs_parser',
-        'bank_pledge': 'etl.auctions.parsers.bank_parser',
-        'dgi_moscow': 'etl.auctions.parsers.dgi_parser',
-    }
-
-    if source not in source_map:
-        raise ValueError(f"Unknown source: {source}. Available: {list(source_map.keys())}")
-
-    # Try to import parser
-    try:
-        module_name = source_map[source]
-        module = __import__(module_name, fromlist=['Parser'])
-        return module.Parser()
-    except ImportError as e:
-        logger.warning(f"Parser for {source} not implemented yet: {e}")
-        # Return mock parser for testing
-        from .base_parser import MockAuctionParser
-        mock = MockAuctionParser()
-        mock.source_type = AuctionSource(source)
-        mock.platform_name = f"Mock {source}"
-        return mock
-
-
 @click.group()
 def cli():
     """Auction lots collection CLI."""
@@ -65,53 +42,35 @@ def cli():
 @click.option('--city', '-c', default='Москва', help='City to filter')
 @click.option('--max-pages', '-p', default=10, help='Max pages to fetch')
 @click.option('--dry-run', is_flag=True, help='Do not save to database')
-def collect(source: str, city: str, max_pages: int, dry_run: bool):
+@click.option('--sequential', is_flag=True, help='Collect sources one at a time')
+@click.option('--stream', is_flag=True, help='Write lots while crawling; resume interrupted crawls')
+@click.option('--restart', is_flag=True, help='With --stream: ignore saved page cursors')
+@click.option('--compare', is_flag=True, help='Compare active lots with market prices afterwards')
+def collect(source: str, city: str, max_pages: int, dry_run: bool, sequential: bool,
+            stream: bool, restart: bool, compare: bool):
     """Collect auction lots from sources."""
 
     async def _collect():
-        sources = ['fssp', 'bankrupt', 'bank_pledge', 'dgi_moscow'] if source == 'all' else [source]
-
-        total_collected = 0
-        total_skipped = 0
-
-        for src in sources:
-            logger.info(f"Collecting from {src}...")
-
-            try:
-                parser = get_parser(src)
-
-                async with parser:
-                    lots = await parser.collect(city=city, max_pages=max_pages)
-
-                logger.info(f"{src}: Found {len(lots)} valid lots")
-
-                if not dry_run and lots:
-                    conn = await db.get_connection()
-                    try:
-                        for lot in lots:
-                            lot_id = await db.upsert_lot(conn, lot)
-                            logger.debug(f"Saved lot {lot.external_id} -> id={lot_id}")
-
-                            # Record initial price in history
-                            if lot.current_price:
-                                await db.record_price_history(
-                                    conn, lot_id,
-                                    float(lot.current_price),
-                                    "current"
-                                )
-
-                        total_collected += len(lots)
-                    finally:
-                        await conn.close()
-                else:
-                    total_collected += len(lots)
-                    if dry_run:
-                        logger.info(f"[DRY RUN] Would save {len(lots)} lots")
-
-            except Exception as e:
-                logger.error(f"Error collecting from {src}: {e}")
-                continue
+        sources = SOURCES if source == 'all' else [source]
 
+        pool = None if dry_run else await db.get_pool()
+        try:
+            results = await collect_sources(
+                sources, pool, city=city, max_pages=max_pages, concurrent=not sequential,
+                stream=stream, resume=not restart,
+            )
+            if compare and pool:
+                async with pool.acquire() as conn:
+                    await compare_active_lots(conn)
+        finally:
+            if pool:
+                await pool.close()
+
+        for stats in results:
+            logger.info(stats.summary())
+        total_collected = sum(stats.lots_found for stats in results)
+        if dry_run:
+            logger.info(f"[DRY RUN] Would save {total_collected} lots")
         logger.info(f"Total collected: {total_collected} lots")
 
     asyncio.run(_collect())
@@ -200,74 +159,31 @@ def compare_market(lot_id: Optional[int], compare_all: bool):
     """Compare auction prices with market values."""
 
     async def _compare():
-        # Import valuation API
-        try:
-            from api.v1.valuation import estimate_price
-        except ImportError:
-            click.echo("Valuation API not available")
+        if not lot_id and not compare_all:
+            click.echo("Specify --lot-id or --all")
             return
 
         conn = await db.get_connection()
         try:
-            if lot_id:
-                lots = [await db.get_lot_by_id(conn, lot_id)]
-                lots = [l for l in lots if l]
-            elif compare_all:
-                lots = await db.get_active_lots(conn, limit=1000)
-            else:
-                click.echo("Specify --lot-id or --all")
-                return
-
-            if not lots:
-                click.echo("No lots found")
-                return
-
-            click.echo(f"Comparing {len(lots)} lots with market prices...\n")
-
-            for lot in lots:
-                if not lot['lat'] or not lot['lon'] or not lot['area_total']:
-                    click.echo(f"Lot {lot['id']}: Missing coordinates or area, skipping")
-                    continue
-
-                try:
-                    # Get market estimate
-                    result = await estimate_price(
-                        lat=float(lot['lat']),
-                        lon=float(lot['lon']),
-                        area_total=float(lot['area_total']),
-                        rooms=lot['rooms'] or 1,
-                    )
-
-                    market_price = result.get('estimated_price')
-                    if market_price and lot['current_price']:
-                        discount = ((market_price - float(lot['current_price'])) / market_price) * 100
-
-                        # Save comparison
-                        from .models import AuctionMarketComparison
-                        comparison = AuctionMarketComparison(
-                            lot_id=lot['id'],
-                            market_price_estimate=market_price,
-                            market_price_per_sqm=result.get('estimated_price_per_sqm'),
-                            estimation_method=result.get('method_used'),
-                            estimation_confidence=result.get('confidence'),
-                            discount_from_market=discount,
-                            comparables_count=result.get('comparables_count'),
-                        )
-                        await db.update_market_comparison(conn, lot['id'], comparison)
-
-                        click.echo(
-                            f"Lot {lot['id']}: "
-                            f"Auction {lot['current_price']:,.0f} ₽ vs "
-                            f"Market {market_price:,.0f} ₽ = "
-                            f"Discount {discount:.1f}%"
-                        )
-
-                except Exception as e:
-                    click.echo(f"Lot {lot['id']}: Error - {e}")
-
+            report, comparisons = await compare_active_lots(conn, [lot_id] if lot_id else None)
         finally:
             await conn.close()
 
+        if not report.lots:
+            click.echo("No lots found (lots need coordinates, area and price)")
+            return
+
+        for comparison in comparisons:
+            click.echo(
+                f"Lot {comparison.lot_id}: "
+                f"Market {comparison.market_price_estimate:,.0f} ₽ = "
+                f"Discount {comparison.discount_from_market:.1f}%"
+            )
+        click.echo(
+            f"\nCompared {report.compared} of {report.lots} lots in {report.seconds:.1f}s"
+            f" ({report.failed} without estimate)"
+        )
+
     asyncio.run(_compare())
 
 
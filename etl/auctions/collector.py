@@ -0,0 +1,302 @@
+"""
+Collection of auction lots from several sources.
+
+Sources run concurrently (each parser waits on its own site) and share
+one asyncpg pool. Lots are saved in chunks with db.upsert_lots, so a
+source costs a few round trips instead of two queries per lot.
+
+In streaming mode (LotStream) lots are written while the crawl runs:
+fetch_lots -> filter_lot -> bounded queue -> batched writer. Each batch
+is saved together with the source's page cursor, so an interrupted crawl
+resumes at the first page that was not fully written.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from asyncpg import Pool
+
+from .models import AuctionSource
+from . import db
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ['fssp', 'bankrupt', 'bank_pledge', 'dgi_moscow']
+
+# Lots per upsert_lots call
+SAVE_CHUNK_SIZE = 500
+# Streaming: lots per write, and lots buffered before the crawler has to wait
+STREAM_BATCH_SIZE = 100
+STREAM_QUEUE_SIZE = 500
+
+
+def get_parser(source: str):
+    """Get parser instance for source type."""
+    source_map = {
+        'fssp': 'etl.auctions.parsers.fssp_parser',
+        'bankrupt': 'etl.auctions.parsers.fedresurs_parser',
+        'bank_pledge': 'etl.auctions.parsers.bank_parser',
+        'dgi_moscow': 'etl.auctions.parsers.dgi_parser',
+    }
+
+    if source not in source_map:
+        raise ValueError(f"Unknown source: {source}. Available: {list(source_map.keys())}")
+
+    # Try to import parser
+    try:
+        module_name = source_map[source]
+        module = __import__(module_name, fromlist=['Parser'])
+        return module.Parser()
+    except ImportError as e:
+        logger.warning(f"Parser for {source} not implemented yet: {e}")
+        # Return mock parser for testing
+        from .base_parser import MockAuctionParser
+        mock = MockAuctionParser()
+        mock.source_type = AuctionSource(source)
+        mock.platform_name = f"Mock {source}"
+        return mock
+
+
+@dataclass
+class SourceStats:
+    """Per-source collection result."""
+
+    source: str
+    start_page: int = 0
+    lots_found: int = 0
+    lots_new: int = 0
+    lots_updated: int = 0
+    fetch_seconds: float = 0.0
+    save_seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def lots_saved(self) -> int:
+        return self.lots_new + self.lots_updated
+
+    def fetch_rate(self) -> float:
+        return self.lots_found / self.fetch_seconds if self.fetch_seconds > 0 else 0.0
+
+    def save_rate(self) -> float:
+        return self.lots_saved / self.save_seconds if self.save_seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        line = (
+            f"{self.source:12} | found {self.lots_found:5} ({self.fetch_rate():6.1f} lots/s) | "
+            f"saved {self.lots_saved:5} ({self.lots_new} new, {self.lots_updated} updated, "
+            f"{self.save_rate():7.1f} lots/s)"
+        )
+        if self.start_page:
+            line += f" | resumed at page {self.start_page}"
+        if self.errors:
+            line += f" | errors: {len(self.errors)}"
+        return line
+
+
+class LotStream:
+    """Streams one source into the DB in batches (see module docstring)."""
+
+    def __init__(
+        self,
+        source: str,
+        pool: Pool,
+        city: Optional[str] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        queue_size: int = STREAM_QUEUE_SIZE,
+    ):
+        self.source = source
+        self.pool = pool
+        self.city = city
+        self.batch_size = batch_size
+        self.stats = SourceStats(source)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._next_page = 0
+        self._failed = False
+
+    async def run(self, parser, max_pages: int = 10, resume: bool = True) -> SourceStats:
+        started = time.monotonic()
+        parser.start_page = await self._resume_page() if resume else 0
+        self._next_page = self.stats.start_page = parser.start_page
+        if parser.start_page:
+            logger.info(f"{self.source}: resuming from page {parser.start_page}")
+
+        writer = asyncio.create_task(self._write())
+        try:
+            async with parser:
+                async for page, lot in parser.stream_lots(city=self.city, max_pages=max_pages):
+                    if self._failed:
+                        break
+                    self.stats.lots_found += 1
+                    # Waits while the writer is queue_size lots behind
+                    await self._queue.put((page, lot))
+        except Exception as e:
+            logger.error(f"Error collecting from {self.source}: {e}")
+            self.stats.errors.append(str(e))
+        if parser.last_error:
+            self.stats.errors.append(parser.last_error)
+
+        # Pages before the one the crawl stopped on are complete
+        await self._queue.put((None, (not self.stats.errors, parser.current_page)))
+        await writer
+
+        self.stats.fetch_seconds = time.monotonic() - started
+        return self.stats
+
+    async def _write(self):
+        batch: list = []
+        while True:
+            page, lot = await self._queue.get()
+            if page is None:
+                finished, stopped_page = lot
+                if not self._failed:
+                    # Complete: the next run starts over; otherwise resume where the crawl stopped
+                    await self._flush(batch, finished=finished, next_page=stopped_page)
+                return
+            if self._failed:
+                continue  # drain so the crawler never blocks
+            batch.append((page, lot))
+            # Write full batches, and completed pages while the crawler fetches the next one
+            if len(batch) >= self.batch_size or (self._queue.empty() and page > batch[0][0]):
+                await self._flush(batch)
+                batch = []
+
+    async def _flush(self, batch: list, finished: bool = False, next_page: Optional[int] = None):
+        if batch:
+            self._next_page = batch[-1][0]
+        if next_page is not None:
+            self._next_page = max(self._next_page, next_page)
+        started = time.monotonic()
+        try:
+            saved = await self._save([lot for _, lot in batch], 0 if finished else self._next_page, finished)
+        except Exception as e:
+            logger.error(f"Error saving lots from {self.source}: {e}")
+            self.stats.errors.append(str(e))
+            self._failed = True
+            return
+        self.stats.save_seconds += time.monotonic() - started
+        self.stats.lots_new += sum(1 for row in saved if row['inserted'])
+        self.stats.lots_updated += sum(1 for row in saved if not row['inserted'])
+
+    async def _resume_page(self) -> int:
+        async with self.pool.acquire() as conn:
+            return await db.get_collect_cursor(conn, self.source, self.city)
+
+    async def _save(self, lots: list, next_page: int, finished: bool) -> list[dict]:
+        """Save lots and move the cursor in one transaction."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                saved = await db.upsert_lots(conn, lots)
+                prices = {lot.external_id: float(lot.current_price) for lot in lots if lot.current_price}
+                await db.record_price_history_bulk(
+                    conn,
+                    [(row['id'], prices[row['external_id']]) for row in saved if row['external_id'] in prices],
+                    "current",
+                )
+                await db.save_collect_cursor(conn, self.source, self.city, next_page, len(saved), finished)
+        return saved
+
+
+async def _record_scrape_stats(pool: Pool, stats: SourceStats):
+    try:
+        async with pool.acquire() as conn:
+            platform_id = await db.get_platform_id(conn, stats.source)
+            if platform_id:
+                await db.record_scrape_stats(
+                    conn, platform_id,
+                    lots_found=stats.lots_found,
+                    lots_new=stats.lots_new,
+                    lots_updated=stats.lots_updated,
+                    lots_closed=0,
+                    errors=len(stats.errors),
+                    duration_seconds=int(stats.fetch_seconds + stats.save_seconds),
+                )
+    except Exception as e:
+        logger.error(f"Error recording scrape stats for {stats.source}: {e}")
+
+
+async def collect_source(
+    source: str,
+    pool: Optional[Pool],
+    city: Optional[str] = None,
+    max_pages: int = 10,
+    stream: bool = False,
+    resume: bool = True,
+) -> SourceStats:
+    """
+    Collect one source and save its lots (pool=None: dry run).
+
+    stream=True writes lots while crawling and resumes an interrupted
+    crawl unless resume=False.
+    """
+    if stream and pool is not None:
+        try:
+            parser = get_parser(source)
+        except Exception as e:
+            logger.error(f"Error collecting from {source}: {e}")
+            return SourceStats(source, errors=[str(e)])
+        stats = await LotStream(source, pool, city).run(parser, max_pages, resume)
+        logger.info(f"{source}: Streamed {stats.lots_found} valid lots")
+        await _record_scrape_stats(pool, stats)
+        return stats
+
+    stats = SourceStats(source)
+    logger.info(f"Collecting from {source}...")
+
+    started = time.monotonic()
+    try:
+        parser = get_parser(source)
+        async with parser:
+            lots = await parser.collect(city=city, max_pages=max_pages)
+    except Exception as e:
+        logger.error(f"Error collecting from {source}: {e}")
+        stats.errors.append(str(e))
+        lots = []
+    stats.fetch_seconds = time.monotonic() - started
+    stats.lots_found = len(lots)
+    logger.info(f"{source}: Found {len(lots)} valid lots")
+
+    if pool is None or not lots:
+        return stats
+
+    started = time.monotonic()
+    prices = {lot.external_id: float(lot.current_price) for lot in lots if lot.current_price}
+    try:
+        async with pool.acquire() as conn:
+            for i in range(0, len(lots), SAVE_CHUNK_SIZE):
+                saved = await db.upsert_lots(conn, lots[i:i + SAVE_CHUNK_SIZE])
+                stats.lots_new += sum(1 for row in saved if row['inserted'])
+                stats.lots_updated += sum(1 for row in saved if not row['inserted'])
+
+                # Record initial price in history
+                await db.record_price_history_bulk(
+                    conn,
+                    [(row['id'], prices[row['external_id']]) for row in saved if row['external_id'] in prices],
+                    "current",
+                )
+            stats.save_seconds = time.monotonic() - started
+    except Exception as e:
+        logger.error(f"Error saving lots from {source}: {e}")
+        stats.errors.append(str(e))
+
+    await _record_scrape_stats(pool, stats)
+    return stats
+
+
+async def collect_sources(
+    sources: list[str],
+    pool: Optional[Pool],
+    city: Optional[str] = None,
+    max_pages: int = 10,
+    concurrent: bool = True,
+    stream: bool = False,
+    resume: bool = True,
+) -> list[SourceStats]:
+    """Collect several sources, in parallel unless concurrent=False."""
+    if concurrent:
+        return list(await asyncio.gather(
+            *[collect_source(src, pool, city, max_pages, stream, resume) for src in sources]
+        ))
+    return [await collect_source(src, pool, city, max_pages, stream, resume) for src in sources]
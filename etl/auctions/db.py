@@ -33,61 +33,25 @@ async def get_connection() -> Connection:
     return await asyncpg.connect(AUCTIONS_DSN)
 
 
-async def upsert_lot(conn: Connection, lot: AuctionLot) -> int:
-    """
-    Insert or update auction lot.
-
-    Returns:
-        lot_id from database
-    """
-    # Get platform_id if not set
-    platform_id = lot.platform_id
-    if not platform_id:
-        platform_id = await conn.fetchval(
-            """
-            SELECT id FROM auction_platforms
-            WHERE source_type = $1
-            LIMIT 1
-            """,
-            lot.source_type
-        )
-
-    # Prepare data
-    photos_json = json.dumps(lot.photos) if lot.photos else '[]'
-    documents_json = json.dumps(lot.documents) if lot.documents else '[]'
-    raw_data_json = json.dumps(lot.raw_data) if lot.raw_data else None
+# Columns written by upsert_lot / upsert_lots, in record order (last_seen_at = NOW())
+LOT_COLUMNS = (
+    "external_id", "platform_id", "source_type", "source_url",
+    "lot_number", "case_number",
+    "property_type", "title", "description",
+    "region", "city", "district", "address", "address_normalized", "fias_id",
+    "lat", "lon",
+    "area_total", "area_living", "area_kitchen", "rooms", "floor", "total_floors", "building_year",
+    "initial_price", "current_price", "step_price", "deposit_amount",
+    "auction_date", "auction_end_date", "application_deadline",
+    "status", "is_repeat_auction", "repeat_number",
+    "organizer_name", "organizer_inn", "organizer_contact",
+    "debtor_name", "debtor_inn", "bank_name",
+    "photos", "documents", "raw_data",
+    "published_at",
+)
 
-    # Upsert query
-    query = """
-        INSERT INTO auction_lots (
-            external_id, platform_id, source_type, source_url,
-            lot_number, case_number,
-            property_type, title, description,
-            region, city, district, address, address_normalized, fias_id,
-            lat, lon,
-            area_total, area_living, area_kitchen, rooms, floor, total_floors, building_year,
-            initial_price, current_price, step_price, deposit_amount,
-            auction_date, auction_end_date, application_deadline,
-            status, is_repeat_auction, repeat_number,
-            organizer_name, organizer_inn, organizer_contact,
-            debtor_name, debtor_inn, bank_name,
-            photos, documents, raw_data,
-            published_at, last_seen_at
-        ) VALUES (
-            $1, $2, $3, $4,
-            $5, $6,
-            $7, $8, $9,
-            $10, $11, $12, $13, $14, $15,
-            $16, $17,
-            $18, $19, $20, $21, $22, $23, $24,
-            $25, $26, $27, $28,
-            $29, $30, $31,
-            $32, $33, $34,
-            $35, $36, $37,
-            $38, $39, $40,
-            $41::jsonb, $42::jsonb, $43::jsonb,
-            $44, NOW()
-        )
+# Shared by the single-row and the bulk upsert
+_LOT_CONFLICT_UPDATE = """
         ON CONFLICT (platform_id, external_id) DO UPDATE SET
             source_url = EXCLUDED.source_url,
             lot_number = EXCLUDED.lot_number,
@@ -108,11 +72,34 @@ async def upsert_lot(conn: Connection, lot: AuctionLot) -> int:
             raw_data = EXCLUDED.raw_data,
             last_seen_at = NOW(),
             updated_at = NOW()
-        RETURNING id
-    """
+"""
+
+# source_type -> auction_platforms.id (platforms are static reference data)
+_platform_ids: dict[str, Optional[int]] = {}
+
+
+async def get_platform_id(conn: Connection, source_type: str) -> Optional[int]:
+    """Platform id for a source type, looked up once per process."""
+    if source_type not in _platform_ids:
+        _platform_ids[source_type] = await conn.fetchval(
+            """
+            SELECT id FROM auction_platforms
+            WHERE source_type = $1
+            ORDER BY id
+            LIMIT 1
+            """,
+            source_type
+        )
+    return _platform_ids[source_type]
+
 
-    lot_id = await conn.fetchval(
-        query,
+def _num(value) -> Optional[float]:
+    return float(value) if value else None
+
+
+def lot_record(lot: AuctionLot, platform_id: Optional[int]) -> tuple:
+    """Values of a lot in LOT_COLUMNS order."""
+    return (
         lot.external_id,
         platform_id,
         lot.source_type,
@@ -128,19 +115,19 @@ async def upsert_lot(conn: Connection, lot: AuctionLot) -> int:
         lot.address,
         lot.address_normalized,
         lot.fias_id,
-        float(lot.lat) if lot.lat else None,
-        float(lot.lon) if lot.lon else None,
-        float(lot.area_total) if lot.area_total else None,
-        float(lot.area_living) if lot.area_living else None,
-        float(lot.area_kitchen) if lot.area_kitchen else None,
+        _num(lot.lat),
+        _num(lot.lon),
+        _num(lot.area_total),
+        _num(lot.area_living),
+        _num(lot.area_kitchen),
         lot.rooms,
         lot.floor,
         lot.total_floors,
         lot.building_year,
-        float(lot.initial_price) if lot.initial_price else None,
-        float(lot.current_price) if lot.current_price else None,
-        float(lot.step_price) if lot.step_price else None,
-        float(lot.deposit_amount) if lot.deposit_amount else None,
+        _num(lot.initial_price),
+        _num(lot.current_price),
+        _num(lot.step_price),
+        _num(lot.deposit_amount),
         lot.auction_date,
         lot.auction_end_date,
         lot.application_deadline,
@@ -153,13 +140,76 @@ async def upsert_lot(conn: Connection, lot: AuctionLot) -> int:
         lot.debtor_name,
         lot.debtor_inn,
         lot.bank_name,
-        photos_json,
-        documents_json,
-        raw_data_json,
+        json.dumps(lot.photos) if lot.photos else '[]',
+        json.dumps(lot.documents) if lot.documents else '[]',
+        json.dumps(lot.raw_data) if lot.raw_data else None,
         lot.published_at,
     )
 
-    return lot_id
+
+async def upsert_lot(conn: Connection, lot: AuctionLot) -> int:
+    """
+    Insert or update auction lot.
+
+    Returns:
+        lot_id from database
+    """
+    platform_id = lot.platform_id or await get_platform_id(conn, lot.source_type)
+
+    placeholders = ", ".join(
+        f"${i}::jsonb" if column in ("photos", "documents", "raw_data") else f"${i}"
+        for i, column in enumerate(LOT_COLUMNS, start=1)
+    )
+    query = f"""
+        INSERT INTO auction_lots ({", ".join(LOT_COLUMNS)}, last_seen_at)
+        VALUES ({placeholders}, NOW())
+        {_LOT_CONFLICT_UPDATE}
+        RETURNING id
+    """
+
+    return await conn.fetchval(query, *lot_record(lot, platform_id))
+
+
+async def upsert_lots(conn: Connection, lots: list[AuctionLot]) -> list[dict]:
+    """
+    Insert or update many lots in one round trip.
+
+    Lots are COPYed into a temporary staging table and merged into
+    auction_lots with a single INSERT ... SELECT ... ON CONFLICT.
+    Duplicate (platform, external_id) pairs within the batch keep the last one.
+
+    Returns:
+        One dict per distinct lot: id, external_id, platform_id, inserted
+    """
+    if not lots:
+        return []
+
+    records = {}
+    for lot in lots:
+        platform_id = lot.platform_id or await get_platform_id(conn, lot.source_type)
+        records[(platform_id, lot.external_id)] = lot_record(lot, platform_id)
+
+    columns = ", ".join(LOT_COLUMNS)
+    async with conn.transaction():
+        await conn.execute(
+            f"""
+            CREATE TEMP TABLE IF NOT EXISTS auction_lots_staging ON COMMIT DELETE ROWS AS
+            SELECT {columns} FROM auction_lots WITH NO DATA
+            """
+        )
+        await conn.copy_records_to_table(
+            "auction_lots_staging", records=list(records.values()), columns=list(LOT_COLUMNS)
+        )
+        rows = await conn.fetch(
+            f"""
+            INSERT INTO auction_lots ({columns}, last_seen_at)
+            SELECT {columns}, NOW() FROM auction_lots_staging
+            {_LOT_CONFLICT_UPDATE}
+            RETURNING id, external_id, platform_id, (xmax = 0) AS inserted
+            """
+        )
+
+    return [dict(row) for row in rows]
 
 
 async def record_price_history(conn: Connection, lot_id: int, price: float, price_type: str = "current"):
@@ -173,6 +223,18 @@ async def record_price_history(conn: Connection, lot_id: int, price: float, pric
     )
 
 
+async def record_price_history_bulk(conn: Connection, prices: list[tuple[int, float]], price_type: str = "current"):
+    """Record many (lot_id, price) rows in one executemany."""
+    if prices:
+        await conn.executemany(
+            """
+            INSERT INTO auction_price_history (lot_id, price, price_type)
+            VALUES ($1, $2, $3)
+            """,
+            [(lot_id, price, price_type) for lot_id, price in prices]
+        )
+
+
 async def update_market_comparison(
     conn: Connection,
     lot_id: int,
@@ -205,6 +267,58 @@ async def update_market_comparison(
     )
 
 
+async def update_market_comparisons(conn: Connection, comparisons: list[AuctionMarketComparison]):
+    """Upsert many market comparisons in one executemany."""
+    if not comparisons:
+        return
+    await conn.executemany(
+        """
+        INSERT INTO auction_market_comparison (
+            lot_id, market_price_estimate, market_price_per_sqm,
+            estimation_method, estimation_confidence,
+            discount_from_market, comparables_count
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT (lot_id) DO UPDATE SET
+            market_price_estimate = EXCLUDED.market_price_estimate,
+            market_price_per_sqm = EXCLUDED.market_price_per_sqm,
+            estimation_method = EXCLUDED.estimation_method,
+            estimation_confidence = EXCLUDED.estimation_confidence,
+            discount_from_market = EXCLUDED.discount_from_market,
+            comparables_count = EXCLUDED.comparables_count,
+            calculated_at = NOW()
+        """,
+        [
+            (
+                c.lot_id,
+                _num(c.market_price_estimate),
+                _num(c.market_price_per_sqm),
+                c.estimation_method,
+                _num(c.estimation_confidence),
+                _num(c.discount_from_market),
+                c.comparables_count,
+            )
+            for c in comparisons
+        ]
+    )
+
+
+async def get_lots_for_comparison(conn: Connection, lot_ids: Optional[list[int]] = None) -> list[dict]:
+    """Active lots with coordinates, area and price (all, or the given ids)."""
+    rows = await conn.fetch(
+        """
+        SELECT id, lat, lon, area_total, rooms, floor, total_floors, building_year, current_price
+        FROM auction_lots
+        WHERE lat IS NOT NULL AND lon IS NOT NULL
+          AND area_total > 0
+          AND current_price > 0
+          AND ($1::int[] IS NULL AND status IN ('announced', 'active') OR id = ANY($1::int[]))
+        ORDER BY id
+        """,
+        lot_ids
+    )
+    return [dict(row) for row in rows]
+
+
 async def get_active_lots(
     conn: Connection,
     source_type: Optional[str] = None,
@@ -296,6 +410,50 @@ async def get_stats(conn: Connection) -> dict:
     return stats
 
 
+async def get_collect_cursor(conn: Connection, source_type: str, city: Optional[str]) -> int:
+    """Page to resume an interrupted crawl from (0: start over)."""
+    next_page = await conn.fetchval(
+        """
+        SELECT next_page FROM auction_collect_cursors
+        WHERE source_type = $1 AND city = $2 AND finished_at IS NULL
+        """,
+        source_type, city or ''
+    )
+    return next_page or 0
+
+
+async def save_collect_cursor(
+    conn: Connection,
+    source_type: str,
+    city: Optional[str],
+    next_page: int,
+    lots_written: int,
+    finished: bool = False,
+):
+    """Remember how far a crawl got; a finished crawl starts over next time."""
+    await conn.execute(
+        """
+        INSERT INTO auction_collect_cursors (source_type, city, next_page, lots_written, finished_at)
+        VALUES ($1, $2, $3, $4, CASE WHEN $5 THEN NOW() END)
+        ON CONFLICT (source_type, city) DO UPDATE SET
+            next_page = EXCLUDED.next_page,
+            lots_written = CASE
+                WHEN auction_collect_cursors.finished_at IS NULL
+                THEN auction_collect_cursors.lots_written + EXCLUDED.lots_written
+                ELSE EXCLUDED.lots_written
+            END,
+            started_at = CASE
+                WHEN auction_collect_cursors.finished_at IS NULL
+                THEN auction_collect_cursors.started_at
+                ELSE NOW()
+            END,
+            finished_at = EXCLUDED.finished_at,
+            updated_at = NOW()
+        """,
+        source_type, city or '', next_page, lots_written, finished
+    )
+
+
 async def record_scrape_stats(
     conn: Connection,
     platform_id: int,
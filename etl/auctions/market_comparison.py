@@ -0,0 +1,128 @@
+"""
+Bulk comparison of auction prices with market values.
+
+All lots are valued in-process with HybridEngine.estimate_many: grid
+lookups share one connection and nearby lots share one fetch of
+comparable listings. Results are written to auction_market_comparison in
+one batch. Runs after `cli collect --compare` or from `cli compare-market`.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from asyncpg import Connection
+
+from etl.district_resolver import get_district_resolver
+from etl.valuation import BuildingHeight, HybridEngine, PropertyFeatures, ValuationRequest
+
+from .models import AuctionMarketComparison
+from . import db
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional[HybridEngine] = None
+
+
+def get_engine() -> HybridEngine:
+    """Valuation engine shared by comparison runs (main realestate DB, PG_DSN)."""
+    global _engine
+    if _engine is None:
+        _engine = HybridEngine()
+    return _engine
+
+
+@dataclass
+class ComparisonReport:
+    """Result of one comparison run."""
+
+    lots: int = 0
+    compared: int = 0
+    seconds: float = 0.0
+
+    @property
+    def failed(self) -> int:
+        return self.lots - self.compared
+
+
+def _building_height(total_floors: Optional[int]) -> Optional[BuildingHeight]:
+    if not total_floors:
+        return None
+    if total_floors <= 5:
+        return BuildingHeight.LOW
+    if total_floors <= 10:
+        return BuildingHeight.MEDIUM
+    return BuildingHeight.HIGH
+
+
+def compare_lots(lots: list[dict], engine: Optional[HybridEngine] = None) -> list[AuctionMarketComparison]:
+    """
+    Value lots (rows of db.get_lots_for_comparison) against the market.
+
+    Blocking; lots without an estimate are left out.
+    """
+    if not lots:
+        return []
+    engine = engine or get_engine()
+
+    districts = get_district_resolver(engine.grid.dsn).resolve_many(
+        (float(lot['lat']), float(lot['lon'])) for lot in lots
+    )
+    requests = [
+        ValuationRequest(features=PropertyFeatures(
+            lat=float(lot['lat']),
+            lon=float(lot['lon']),
+            district_id=district_id,
+            area_total=float(lot['area_total']),
+            rooms=lot['rooms'] or 1,
+            floor=lot['floor'],
+            total_floors=lot['total_floors'],
+            building_height=_building_height(lot['total_floors']),
+            building_year=lot['building_year'],
+        ))
+        for lot, district_id in zip(lots, districts)
+    ]
+
+    comparisons = []
+    for lot, result in zip(lots, engine.estimate_many(requests)):
+        if result is None or not result.estimated_price:
+            continue
+        market_price = result.estimated_price
+        discount = ((market_price - float(lot['current_price'])) / market_price) * 100
+        comparisons.append(AuctionMarketComparison(
+            lot_id=lot['id'],
+            market_price_estimate=market_price,
+            market_price_per_sqm=result.estimated_price_per_sqm,
+            estimation_method=result.method_used,
+            estimation_confidence=result.confidence,
+            discount_from_market=discount,
+            comparables_count=len(result.knn_estimate.comparables) if result.knn_estimate else 0,
+        ))
+    return comparisons
+
+
+async def compare_active_lots(
+    conn: Connection,
+    lot_ids: Optional[list[int]] = None,
+    engine: Optional[HybridEngine] = None,
+) -> tuple[ComparisonReport, list[AuctionMarketComparison]]:
+    """Compare active lots (or the given ids) and save the comparisons."""
+    started = time.monotonic()
+    lots = await db.get_lots_for_comparison(conn, lot_ids)
+    report = ComparisonReport(lots=len(lots))
+    if not lots:
+        return report, []
+
+    logger.info(f"Comparing {len(lots)} lots with market prices...")
+    comparisons = await asyncio.to_thread(compare_lots, lots, engine)
+    await db.update_market_comparisons(conn, comparisons)
+
+    report.compared = len(comparisons)
+    report.seconds = time.monotonic() - started
+    logger.info(
+        f"Market comparison: {report.compared}/{report.lots} lots valued "
+        f"in {report.seconds:.1f}s ({report.failed} without estimate)"
+    )
+    return report, comparisons
@@ -76,7 +76,8 @@ class BankPledgeParser(BaseAuctionParser):
         """
         base_api = "https://www.sberbank.ru/proxy/services/zalog-services/api/lots"
 
-        for page in range(max_pages):
+        for page in range(self.start_page, max_pages):
+            self.current_page = page
             try:
                 params = {
                     "page": page,
@@ -98,6 +99,7 @@ class BankPledgeParser(BaseAuctionParser):
                 # Sberbank might block, handle gracefully
                 if response.status_code != 200:
                     logger.warning(f"Sberbank API returned {response.status_code}")
+                    self.last_error = f"page {page}: HTTP {response.status_code}"
                     break
 
                 data = response.json()
@@ -124,6 +126,7 @@ class BankPledgeParser(BaseAuctionParser):
 
             except Exception as e:
                 logger.error(f"Error fetching Sberbank page {page}: {e}")
+                self.last_error = f"page {page}: {e}"
                 break
 
     def _parse_sberbank_lot(self, item: dict) -> Optional[AuctionLot]:
@@ -61,7 +61,7 @@ class DGIMoscowParser(BaseAuctionParser):
             await page.wait_for_timeout(3000)
 
             for page_num in range(max_pages):
-                logger.info(f"Parsing page {page_num + 1}")
+                self.current_page = page_num
 
                 # Find tender cards
                 cards = await page.query_selector_all('.tender-card, .lot-item, .auction-item')
@@ -74,7 +74,11 @@ class DGIMoscowParser(BaseAuctionParser):
                     logger.info("No tender cards found")
                     break
 
-                logger.info(f"Found {len(cards)} tender cards")
+                # Pages before start_page were saved by an earlier run: only page through them
+                if page_num < self.start_page:
+                    cards = []
+                else:
+                    logger.info(f"Parsing page {page_num + 1}: {len(cards)} tender cards")
 
                 for card in cards:
                     try:
@@ -100,6 +104,7 @@ class DGIMoscowParser(BaseAuctionParser):
 
         except Exception as e:
             logger.error(f"Error fetching investmoscow: {e}")
+            self.last_error = str(e)
 
         finally:
             await page.close()
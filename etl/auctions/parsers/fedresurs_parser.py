@@ -76,7 +76,7 @@ class FedresursParser(BaseAuctionParser):
 
             # Parse results
             for page_num in range(max_pages):
-                logger.info(f"Parsing page {page_num + 1}")
+                self.current_page = page_num
 
                 # Find lot cards
                 lot_cards = await page.query_selector_all('.lot-card, .trade-item, tr.lot-row')
@@ -85,6 +85,12 @@ class FedresursParser(BaseAuctionParser):
                     logger.info("No more lots found")
                     break
 
+                # Pages before start_page were saved by an earlier run: only page through them
+                if page_num < self.start_page:
+                    lot_cards = []
+                else:
+                    logger.info(f"Parsing page {page_num + 1}")
+
                 for card in lot_cards:
                     try:
                         lot = await self._parse_lot_card(page, card)
@@ -105,6 +111,7 @@ class FedresursParser(BaseAuctionParser):
 
         except Exception as e:
             logger.error(f"Error fetching lots: {e}")
+            self.last_error = str(e)
 
         finally:
             await page.close()
@@ -39,10 +39,11 @@ class FSSPParser(BaseAuctionParser):
         """
         Fetch lots from torgi.gov.ru API.
         """
-        page = 0
+        page = self.start_page
         per_page = 50
 
         while page < max_pages:
+            self.current_page = page
             try:
                 # Build query params
                 params = {
@@ -101,6 +102,7 @@ class FSSPParser(BaseAuctionParser):
 
             except Exception as e:
                 logger.error(f"Error fetching page {page}: {e}")
+                self.last_error = f"page {page}: {e}"
                 break
 
     def _parse_lot(self, item: dict) -> Optional[AuctionLot]:
@@ -0,0 +1,307 @@
+"""
+Precomputed building profiles for valuation-time building detection.
+
+The `building_profiles` table (db/migrations/016_building_profiles.sql)
+holds one row per house (addresses.address_normalized) with the consensus
+total_floors / house_year / building_type of its listings, vote counts and
+a few source listings. It replaces scanning nearby listings and voting in
+Python on every valuation: detection is one KNN lookup on a GiST index,
+with an in-process LRU on top.
+
+Profiles are refreshed per house by update_listing_details() when the
+collector learns building details; scripts/rebuild_building_profiles.py
+does a full rebuild.
+
+Usage:
+    from etl.building_profiles import get_building_profiles
+    profile = get_building_profiles().lookup(55.75, 37.61, radius_m=150)
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+PROFILE_CACHE_SIZE = int(os.getenv("BUILDING_PROFILE_CACHE_SIZE", "4096"))
+PROFILE_CACHE_TTL = float(os.getenv("BUILDING_PROFILE_CACHE_TTL", "600"))
+# Cache key precision: 4 decimals is ~11 m, well inside one building
+COORD_PRECISION = 4
+
+_MISSING = object()
+
+# {house_filter} selects the houses to (re)compute; addresses are aliased `a`
+_PROFILE_SQL = """
+    INSERT INTO building_profiles (
+        house_key, lat, lon, geog,
+        total_floors, total_floors_votes,
+        house_year, house_year_votes,
+        building_type, building_type_votes,
+        sources_count, confidence, type_sources, updated_at
+    )
+    WITH src AS (
+        SELECT
+            a.address_normalized AS house_key,
+            l.id, l.url, l.address, l.lat, l.lon,
+            l.total_floors, l.house_year, l.building_type
+        FROM listings l
+        JOIN addresses a ON a.address = l.address
+        WHERE {house_filter}
+          AND a.address_normalized != ''
+          AND l.lat IS NOT NULL
+          AND l.lon IS NOT NULL
+          AND (l.total_floors IS NOT NULL OR l.house_year IS NOT NULL OR l.building_type IS NOT NULL)
+    ),
+    houses AS (
+        SELECT house_key, AVG(lat) AS lat, AVG(lon) AS lon, COUNT(*) AS sources_count
+        FROM src
+        GROUP BY house_key
+    ),
+    floors AS (
+        SELECT DISTINCT ON (house_key) house_key, total_floors, COUNT(*) AS votes
+        FROM src
+        WHERE total_floors IS NOT NULL
+        GROUP BY house_key, total_floors
+        ORDER BY house_key, COUNT(*) DESC, total_floors DESC
+    ),
+    years AS (
+        SELECT DISTINCT ON (house_key) house_key, house_year, COUNT(*) AS votes
+        FROM src
+        WHERE house_year IS NOT NULL
+        GROUP BY house_key, house_year
+        ORDER BY house_key, COUNT(*) DESC, house_year DESC
+    ),
+    types AS (
+        SELECT DISTINCT ON (house_key) house_key, building_type, COUNT(*) AS votes
+        FROM src
+        WHERE building_type IS NOT NULL
+        GROUP BY house_key, building_type
+        ORDER BY house_key, COUNT(*) DESC, building_type
+    ),
+    type_sources AS (
+        SELECT
+            house_key,
+            jsonb_agg(jsonb_build_object(
+                'id', id, 'url', url, 'address', address, 'lat', lat, 'lon', lon
+            ) ORDER BY id DESC) AS sources
+        FROM (
+            SELECT s.*, ROW_NUMBER() OVER (PARTITION BY s.house_key ORDER BY s.id DESC) AS rn
+            FROM src s
+            JOIN types t ON t.house_key = s.house_key AND t.building_type = s.building_type
+            WHERE s.url IS NOT NULL
+        ) ranked
+        WHERE rn <= 3
+        GROUP BY house_key
+    )
+    SELECT
+        h.house_key, h.lat, h.lon,
+        ST_SetSRID(ST_MakePoint(h.lon, h.lat), 4326)::geography,
+        f.total_floors, COALESCE(f.votes, 0),
+        y.house_year, COALESCE(y.votes, 0),
+        t.building_type, COALESCE(t.votes, 0),
+        h.sources_count,
+        CASE WHEN h.sources_count >= 3 THEN 'high' ELSE 'medium' END,
+        ts.sources,
+        NOW()
+    FROM houses h
+    LEFT JOIN floors f USING (house_key)
+    LEFT JOIN years y USING (house_key)
+    LEFT JOIN types t USING (house_key)
+    LEFT JOIN type_sources ts USING (house_key)
+    ON CONFLICT (house_key) DO UPDATE
+    SET
+        lat = EXCLUDED.lat,
+        lon = EXCLUDED.lon,
+        geog = EXCLUDED.geog,
+        total_floors = EXCLUDED.total_floors,
+        total_floors_votes = EXCLUDED.total_floors_votes,
+        house_year = EXCLUDED.house_year,
+        house_year_votes = EXCLUDED.house_year_votes,
+        building_type = EXCLUDED.building_type,
+        building_type_votes = EXCLUDED.building_type_votes,
+        sources_count = EXCLUDED.sources_count,
+        confidence = EXCLUDED.confidence,
+        type_sources = EXCLUDED.type_sources,
+        updated_at = NOW()
+"""
+
+
+def refresh_building_profile(cur, listing_id: int) -> None:
+    """
+    Recompute the profile of the house a listing belongs to.
+
+    Args:
+        cur: Cursor in the listing update transaction
+        listing_id: Listing whose building details changed
+    """
+    cur.execute(
+        _PROFILE_SQL.format(house_filter="""a.address_normalized = (
+            SELECT a2.address_normalized
+            FROM listings l2
+            JOIN addresses a2 ON a2.address = l2.address
+            WHERE l2.id = %(listing_id)s
+        )"""),
+        {'listing_id': listing_id}
+    )
+
+
+def rebuild_building_profiles(conn) -> int:
+    """
+    Rebuild all building profiles from listings (initial fill / resync).
+
+    Returns:
+        Number of profiles written
+    """
+    with conn.cursor() as cur:
+        cur.execute(_PROFILE_SQL.format(house_filter="TRUE"))
+        written = cur.rowcount
+        # Rows not rewritten by this transaction belong to houses without listings anymore
+        cur.execute("DELETE FROM building_profiles WHERE updated_at < NOW()")
+    conn.commit()
+    return written
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Equirectangular distance in meters (accurate at building scale)."""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6371000.0 * math.hypot(x, y)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Lookup
+# ═══════════════════════════════════════════════════════════════════════════
+
+class BuildingProfiles:
+    """Nearest building profile to a point, with an in-process LRU."""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        cache_size: int = PROFILE_CACHE_SIZE,
+        cache_ttl: float = PROFILE_CACHE_TTL
+    ):
+        self.dsn = dsn
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: "OrderedDict[tuple[float, float, int, bool], tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(
+        self,
+        lat: float,
+        lon: float,
+        radius_m: int = 150,
+        require_type: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Profile of the nearest house within radius_m.
+
+        Args:
+            require_type: Only consider houses with a known building_type
+
+        Returns:
+            Dict with house_key, total_floors, building_year, building_type,
+            sources_count, confidence, distance_m and type sources (each
+            with distance_m), or None
+        """
+        lat = round(lat, COORD_PRECISION)
+        lon = round(lon, COORD_PRECISION)
+        cache_key = (lat, lon, radius_m, require_type)
+        cached = self._cache_get(cache_key)
+        if cached is not _MISSING:
+            return cached
+
+        profile = self._query(lat, lon, radius_m, require_type)
+        self._cache_put(cache_key, profile)
+        return profile
+
+    def _query(self, lat: float, lon: float, radius_m: int, require_type: bool) -> Optional[Dict[str, Any]]:
+        from etl.valuation.db_pool import pooled_connection
+        from etl.valuation.timing import span
+
+        with span("building_profile"), pooled_connection(self.dsn) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                WITH target AS (
+                    SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography AS point
+                )
+                SELECT
+                    bp.house_key, bp.lat, bp.lon,
+                    bp.total_floors, bp.house_year, bp.building_type,
+                    bp.sources_count, bp.confidence, bp.type_sources
+                FROM building_profiles bp, target
+                WHERE ST_DWithin(bp.geog, target.point, %(radius_m)s)
+                  AND (NOT %(require_type)s OR bp.building_type IS NOT NULL)
+                ORDER BY bp.geog <-> target.point
+                LIMIT 1
+            """, {'lat': lat, 'lon': lon, 'radius_m': radius_m, 'require_type': require_type})
+            row = cur.fetchone()
+            cur.close()
+
+        if not row:
+            return None
+        return {
+            'house_key': row['house_key'],
+            'total_floors': row['total_floors'],
+            'building_year': row['house_year'],
+            'building_type': row['building_type'],
+            'sources_count': row['sources_count'],
+            'confidence': row['confidence'],
+            'distance_m': int(distance_m(lat, lon, row['lat'], row['lon'])),
+            'type_sources': [
+                {**s, 'distance_m': int(distance_m(lat, lon, s['lat'], s['lon']))}
+                for s in (row['type_sources'] or [])
+            ],
+        }
+
+    # --- cache ---
+
+    def _cache_get(self, cache_key) -> Any:
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is None or time.monotonic() - entry[0] > self.cache_ttl:
+                self._misses += 1
+                return _MISSING
+            self._cache.move_to_end(cache_key)
+            self._hits += 1
+            return entry[1]
+
+    def _cache_put(self, cache_key, profile: Optional[Dict[str, Any]]):
+        with self._lock:
+            self._cache[cache_key] = (time.monotonic(), profile)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'cached_points': len(self._cache),
+                'cache_hits': self._hits,
+                'cache_misses': self._misses,
+                'hit_rate': round(self._hits / total, 3) if total else 0.0,
+            }
+
+
+_profiles: Optional[BuildingProfiles] = None
+_profiles_lock = threading.Lock()
+
+
+def get_building_profiles(dsn: Optional[str] = None) -> BuildingProfiles:
+    """Get the process-wide building profile lookup (shared LRU)."""
+    global _profiles
+    if _profiles is None:
+        with _profiles_lock:
+            if _profiles is None:
+                _profiles = BuildingProfiles(dsn=dsn)
+    return _profiles
@@ -9,9 +9,16 @@ from http.cookies import SimpleCookie
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
-from playwright.sync_api import BrowserContext, Browser, Playwright, Page, sync_playwright
+from playwright.sync_api import BrowserContext, Browser, Playwright, Page
 from urllib.parse import urlencode
 
+from etl.address_parser import (
+    HOUSE_NUMBER_PATTERN,
+    clean_address_text,
+    filter_address_segments,
+    is_noise_segment,
+)
+
 from .proxy_manager import get_validated_proxy, ProxyConfig, ProxyRotator
 
 LOGGER = logging.getLogger(__name__)
@@ -45,20 +52,6 @@ STREET_PATTERN = re.compile(
     re.IGNORECASE,
 )
 
-HOUSE_NUMBER_PATTERN = re.compile(r"\b\d{1,4}[кК]?\d?(?:[-/]\d+)?\b")
-METRO_SEGMENT_PATTERN = re.compile(
-    r"(?:,\s*)?(?:м\.|метро|станция)\s+[А-ЯЁ0-9][^,\.]*?(?:\d+\s*мин\.?(?:\s+[пп]ешком)?)?",
-    re.IGNORECASE,
-)
-MINUTES_SEGMENT_PATTERN = re.compile(
-    r"\b[А-ЯЁA-Z][^,]*?\d+\s*мин\.?(?:\s+[пп]ешком)?", re.IGNORECASE
-)
-ON_MAP_PATTERN = re.compile(r"\s*На\s+карте.*", re.IGNORECASE)
-KM_FROM_MKAD_PATTERN = re.compile(r"\d+\s*км\s+от\s+МКАД", re.IGNORECASE)
-HOUSE_EXTRA_PATTERN = re.compile(
-    r"(?:дом|д\.|корпус|корп\.?|строение|стр\.?|лит\.?|литера|владение|вл\.?|секция|сек\.?|с\.?|к\.?|зд\.?|строит\.)\s*\d+[А-ЯA-Za-z0-9/-]*",
-    re.IGNORECASE,
-)
 CARD_ADDRESS_FALLBACK_SELECTORS: tuple[str, ...] = (
     "[data-name='SpecialGeo']",
     "[data-name='Breadcrumbs']",
@@ -77,98 +70,6 @@ DETAIL_ADDRESS_SELECTORS: tuple[str, ...] = (
 )
 
 
-def clean_address_text(raw: str | None) -> str:
-    """Remove metro info, 'На карте' fragments and normalize whitespace/commas.
-    
-    More aggressive cleaning to handle various CIAN address formats.
-    """
-    if not raw:
-        return ""
-
-    text = raw.replace("\xa0", " ").replace("\n", " ").replace("\r", " ").strip()
-    if not text:
-        return ""
-
-    # Step 1: Remove "На карте" and everything after (most aggressive)
-    # Split by "На карте" and take only the first part
-    if "На карте" in text or "на карте" in text:
-        parts = re.split(r"[Нн]а\s+[Кк]арте", text, maxsplit=1)
-        text = parts[0].strip() if parts else text
-
-    # Remove explicit "На карте" fragments regardless of position (fallback)
-    text = ON_MAP_PATTERN.sub("", text)
-
-    # Step 2: Remove metro segments (м. ..., метро ...) - VERY aggressive
-    text = METRO_SEGMENT_PATTERN.sub("", text)
-    
-    # Remove patterns like "м. Сокольники, 14 мин."
-    text = re.sub(r"\s*м\.\s*[А-ЯЁ][^,]*?,\s*\d+\s*мин\.?\s*", " ", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s*метро\s+[А-ЯЁ][^,]*?,\s*\d+\s*мин\.?\s*", " ", text, flags=re.IGNORECASE)
-    
-    # Remove standalone metro station names followed by time (e.g., "Сокольники 14 мин.")
-    # This is tricky - we need to not remove district names
-    # Pattern: single capitalized word followed by number and "мин."
-    text = re.sub(r"\s+([А-ЯЁ][а-яё]+)\s+\d+\s*мин\.?(?:\s+пешком)?", lambda m: "" if len(m.group(1)) > 4 and "р-н" not in text[:m.start()] else m.group(0), text, flags=re.IGNORECASE)
-    
-    # Remove patterns like "Сокольники 14 мин. Электрозаводская 15 мин."  
-    text = re.sub(r"\s+[А-ЯЁ][а-яё]+(?:ская|ский|ская|ский|ая|яя|ий)?\s+\d+\s*мин\.?(?:\s+пешком)?(?:\s+[А-ЯЁ][а-яё]+\s+\d+\s*мин\.?)?", "", text, flags=re.IGNORECASE)
-
-    # Remove "[Station] 14 мин." fragments - more patterns
-    text = MINUTES_SEGMENT_PATTERN.sub("", text)
-
-    # Step 3: Remove distance markers like "20 км от МКАД"
-    text = KM_FROM_MKAD_PATTERN.sub("", text)
-
-    # Step 4: Remove "пешком" (on foot) mentions
-    text = re.sub(r"\s+пешком\s*", " ", text, flags=re.IGNORECASE)
-
-    # Step 5: Remove any remaining time patterns (X мин.)
-    text = re.sub(r"\s+\d+\s*мин\.?\s*", " ", text, flags=re.IGNORECASE)
-
-    # Step 6: Normalize whitespace prior to segment filtering
-    text = re.sub(r"\s+", " ", text)
-
-    segments = [segment.strip(" ,;-") for segment in text.split(",") if segment.strip(" .;-")]
-    if segments:
-        filtered = _filter_address_segments(segments)
-        if filtered:
-            segments = filtered
-        text = ", ".join(segments)
-
-    # Collapse whitespace and redundant commas
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"\s*,\s*", ", ", text)
-    text = re.sub(r"(,\s*){2,}", ", ", text)
-    text = text.strip(" ,;.-")
-
-    return text
-
-
-def _is_noise_segment(segment: str) -> bool:
-    """Return True if segment is clearly not part of the postal address."""
-    if not segment:
-        return True
-    lowered = segment.lower()
-    if "на карте" in lowered:
-        return True
-    if lowered.startswith(("посмотреть", "показать")):
-        return True
-    if re.search(r"\b\d+\s*мин", lowered):
-        return True
-    if re.match(r"^(?:м\.|метро|станция)\b", lowered):
-        return True
-    if "пешком" in lowered:
-        return True
-    if "км от мкад" in lowered:
-        return True
-    # Check for metro station names followed by numbers (likely time)
-    if re.search(r"^[А-ЯЁ][а-яё]+\s+\d+", segment):
-        return True
-    if len(segment) <= 2 and not re.search(r"\d", lowered):
-        return True
-    return False
-
-
 def _collect_address_parts(handle) -> List[str]:
     """Collect visible text fragments that could represent address components."""
     try:
@@ -205,59 +106,6 @@ def _collect_address_parts(handle) -> List[str]:
         return []
 
 
-def _normalize_segment_key(segment: str) -> str:
-    return re.sub(r"[^0-9a-zа-яё]+", " ", segment.lower()).strip()
-
-
-def _segment_is_redundant(candidate_key: str, seen_keys: List[str]) -> bool:
-    if not candidate_key:
-        return False
-    for key in seen_keys:
-        if len(candidate_key) >= 4 and candidate_key in key:
-            return True
-        if len(key) >= 4 and key in candidate_key:
-            return True
-    return False
-
-
-def _segment_contains_house(segment: str) -> bool:
-    if HOUSE_NUMBER_PATTERN.search(segment):
-        return True
-    if HOUSE_EXTRA_PATTERN.search(segment):
-        return True
-    return False
-
-
-def _filter_address_segments(segments: List[str]) -> List[str]:
-    filtered: List[str] = []
-    seen_keys: List[str] = []
-    house_found = False
-
-    for raw_segment in segments:
-        segment = raw_segment.strip(" ,;-")
-        if not segment:
-            continue
-        if _is_noise_segment(segment):
-            continue
-
-        key = _normalize_segment_key(segment)
-        if _segment_is_redundant(key, seen_keys):
-            continue
-
-        is_house = _segment_contains_house(segment)
-        if house_found and not is_house:
-            break
-
-        filtered.append(segment)
-        if key:
-            seen_keys.append(key)
-
-        if is_house:
-            house_found = True
-
-    return filtered
-
-
 def _prepare_address_from_parts(parts: Iterable[str]) -> str:
     """Join, deduplicate and clean textual parts of an address."""
     seen = set()
@@ -267,7 +115,7 @@ def _prepare_address_from_parts(parts: Iterable[str]) -> str:
         candidate = re.sub(r"\s+", " ", part.strip(",; \n\t"))
         if not candidate:
             continue
-        if _is_noise_segment(candidate):
+        if is_noise_segment(candidate):
             continue
         key = candidate.lower()
         if key in seen:
@@ -275,7 +123,7 @@ def _prepare_address_from_parts(parts: Iterable[str]) -> str:
         seen.add(key)
         normalized_parts.append(candidate)
 
-    filtered = _filter_address_segments(normalized_parts) if normalized_parts else []
+    filtered = filter_address_segments(normalized_parts) if normalized_parts else []
     parts_to_join = filtered or normalized_parts
     combined = ", ".join(parts_to_join)
     return clean_address_text(combined)
@@ -807,6 +655,9 @@ def parse_listing_detail(
     page: Page,
     listing_url: str,
     max_duration: int | None = None,
+    *,
+    response=None,
+    settle_ms: int = 2000,
 ) -> Optional[Dict[str, Any]]:
     """Parse detailed information from individual listing page.
 
@@ -825,6 +676,11 @@ def parse_listing_detail(
         Playwright page object
     listing_url: str
         Full URL to listing detail page
+    response: Response, optional
+        Main document response when the page was already navigated to
+        listing_url (detail_parser.DetailTabs); navigation is skipped
+    settle_ms: int
+        Render wait after DOMContentLoaded
 
     Returns
     -------
@@ -870,12 +726,13 @@ def parse_listing_detail(
         # Use domcontentloaded instead of networkidle to save proxy traffic (~70-80% less)
         # networkidle waits for ALL resources (images, CSS, JS, fonts) - very heavy on proxy
         # domcontentloaded waits only for HTML + DOM - much faster and lighter
-        goto_timeout = _remaining_timeout_ms(1000) if deadline else 60000
-        response = page.goto(
-            listing_url,
-            wait_until="domcontentloaded",
-            timeout=goto_timeout or 60000,
-        )
+        if response is None:
+            goto_timeout = _remaining_timeout_ms(1000) if deadline else 60000
+            response = page.goto(
+                listing_url,
+                wait_until="domcontentloaded",
+                timeout=goto_timeout or 60000,
+            )
 
         if not response or response.status >= 400:
             status_code = response.status if response else None
@@ -887,8 +744,9 @@ def parse_listing_detail(
 
         # Wait for content to load and render
         # Give DOM time to render after domcontentloaded
-        wait_duration = min(2000, (_remaining_timeout_ms() or 2000))
-        page.wait_for_timeout(wait_duration)
+        if settle_ms:
+            wait_duration = min(settle_ms, (_remaining_timeout_ms() or settle_ms))
+            page.wait_for_timeout(wait_duration)
         _ensure_time_left("post-load wait")
 
         # Then wait for description element (or timeout silently if not present)
@@ -2535,51 +2393,15 @@ def collect_with_playwright(
 
         LOGGER.info("✅ Proxy validated and ready")
 
-    with sync_playwright() as p:
-        # Step 3: First run - authorize with proxy and save cookies
-        if not storage_exists and use_smart_proxy:
-            LOGGER.info("🆕 Step 3: First run - authorizing with proxy and saving cookies...")
-
-            browser = _create_browser_with_proxy(p, proxy_url, headless, slow_mo)
-
-            try:
-                context_kwargs: dict[str, Any] = {
-                    "user_agent": (
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-                    ),
-                }
-
-                context = browser.new_context(**context_kwargs)
-                context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-
-                # CRITICAL: Block all non-cian.ru requests to save proxy traffic
-                setup_route_blocking(context)
-
-                _apply_cookies_from_env(context)
-
-                page = context.new_page()
-                page.set_default_timeout(60000)
-                page.goto(search_url, wait_until="load", timeout=60000)
-
-                # Wait for content to load
-                time.sleep(2)
+    from .browser_pool import get_browser_pool
 
-                # Save cookies
-                storage_path.parent.mkdir(parents=True, exist_ok=True)
-                context.storage_state(path=str(storage_path))
-                LOGGER.info(f"💾 Initial cookies saved to {storage_path}")
+    pool = get_browser_pool(headless, slow_mo)
 
-                context.close()
-            finally:
-                browser.close()
+    # Step 3: First run - authorize with proxy and save cookies
+    if not storage_exists and use_smart_proxy:
+        LOGGER.info("🆕 Step 3: First run - authorizing with proxy and saving cookies...")
 
-        # Step 4: Collect data WITHOUT proxy (using saved cookies)
-        # CRITICAL: Proxy is EXPENSIVE! Only use for getting cookies, then go direct!
-        LOGGER.info(f"📥 Step 4: Collecting {pages} pages WITHOUT proxy (using saved cookies)...")
-        LOGGER.info(f"💰 Proxy saved - all traffic goes DIRECT (cookies provide access)")
-
-        browser = _create_browser_without_proxy(p, headless, slow_mo)
+        browser = _create_browser_with_proxy(pool.playwright, proxy_url, headless, slow_mo)
 
         try:
             context_kwargs: dict[str, Any] = {
@@ -2589,79 +2411,65 @@ def collect_with_playwright(
                 ),
             }
 
-            # Load saved cookies
-            if storage_path.exists():
-                context_kwargs["storage_state"] = str(storage_path)
-
             context = browser.new_context(**context_kwargs)
             context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
 
-            page = context.new_page()
-            page.set_default_timeout(60000)
-
-            consecutive_failures = 0
-            max_consecutive_failures = 3
-            
-            end_page = start_page + pages - 1
-            for page_number in range(start_page, end_page + 1):
-                # Build URL with page number
-                if page_number == 1:
-                    page_url = search_url
-                else:
-                    page_url = f"{search_url}&p={page_number}"
+            # CRITICAL: Block all non-cian.ru requests to save proxy traffic
+            setup_route_blocking(context)
 
-                LOGGER.info(f"📄 Fetching page {page_number}/{end_page}...")
+            _apply_cookies_from_env(context)
 
-                try:
-                    # Navigate to page
-                    response = page.goto(page_url, wait_until="load", timeout=60000)
+            page = context.new_page()
+            page.set_default_timeout(60000)
+            page.goto(search_url, wait_until="load", timeout=60000)
 
-                    if not response or response.status != 200:
-                        consecutive_failures += 1
-                        LOGGER.error(f"❌ Page {page_number}: Bad response {response.status if response else 'None'}")
+            # Wait for content to load
+            time.sleep(2)
 
-                        # If too many failures, maybe cookies expired - try refreshing them
-                        if consecutive_failures >= max_consecutive_failures:
-                            LOGGER.warning(f"⚠️  {consecutive_failures} consecutive failures - cookies may have expired")
-                            LOGGER.info("💡 Try running: python config/get_cookies_with_proxy.py")
-                            break
+            # Save cookies
+            storage_path.parent.mkdir(parents=True, exist_ok=True)
+            context.storage_state(path=str(storage_path))
+            LOGGER.info(f"💾 Initial cookies saved to {storage_path}")
 
-                        continue
+            context.close()
+        finally:
+            browser.close()
 
-                    # Reset failure counter on success
-                    consecutive_failures = 0
+        # Warm contexts were opened without these cookies
+        pool.recycle_idle()
 
-                    # Wait for offers to load
-                    time.sleep(2)
+    # Step 4: Collect data WITHOUT proxy (using saved cookies)
+    # CRITICAL: Proxy is EXPENSIVE! Only use for getting cookies, then go direct!
+    LOGGER.info(f"📥 Step 4: Collecting {pages} pages WITHOUT proxy (using saved cookies)...")
+    LOGGER.info(f"💰 Proxy saved - all traffic goes DIRECT (cookies provide access)")
 
-                    # Parse offers from HTML
-                    offers = _parse_offers_from_html(page)
+    consecutive_failures = 0
+    max_consecutive_failures = 3
 
-                    if offers:
-                        # Wrap in API-like response format for compatibility with mapper
-                        result = {
-                            "data": {
-                                "offersSerialized": offers
-                            },
-                            "page": page_number,
-                            "source": "html_parsing"
-                        }
-                        results.append(result)
-                        LOGGER.info(f"✅ Page {page_number}/{end_page}: {len(offers)} offers extracted")
-                    else:
-                        LOGGER.warning(f"⚠️  Page {page_number}/{end_page}: No offers found")
+    end_page = start_page + pages - 1
+    for page_number in range(start_page, end_page + 1):
+        # Build URL with page number
+        if page_number == 1:
+            page_url = search_url
+        else:
+            page_url = f"{search_url}&p={page_number}"
 
-                    # Save updated cookies
-                    context.storage_state(path=str(storage_path))
+        LOGGER.info(f"📄 Fetching page {page_number}/{end_page}...")
 
-                    # Small delay between pages
-                    time.sleep(0.6)
+        # Warm context from the shared pool; recycled after N pages or on errors
+        with pool.lease() as ctx:
+            page = ctx.page
+            try:
+                # Navigate to page
+                response = page.goto(page_url, wait_until="load", timeout=60000)
+                ctx.count_page()
 
-                except Exception as e:
+                if not response or response.status != 200:
+                    ctx.fail()
                     consecutive_failures += 1
-                    LOGGER.error(f"❌ Error on page {page_number}: {e}")
+                    LOGGER.error(f"❌ Page {page_number}: Bad response {response.status if response else 'None'}")
 
-                    # If too many failures, cookies may have expired
+                    # If too many failures, maybe cookies expired - try refreshing them
                     if consecutive_failures >= max_consecutive_failures:
                         LOGGER.warning(f"⚠️  {consecutive_failures} consecutive failures - cookies may have expired")
                         LOGGER.info("💡 Try running: python config/get_cookies_with_proxy.py")
@@ -2669,9 +2477,107 @@ def collect_with_playwright(
 
                     continue
 
-            context.close()
-        finally:
-            browser.close()
+                # Reset failure counter on success
+                consecutive_failures = 0
+
+                # Wait for offers to load
+                time.sleep(2)
+
+                # Parse offers from HTML
+                offers = _parse_offers_from_html(page)
+
+                if offers:
+                    # Wrap in API-like response format for compatibility with mapper
+                    result = {
+                        "data": {
+                            "offersSerialized": offers
+                        },
+                        "page": page_number,
+                        "source": "html_parsing"
+                    }
+                    results.append(result)
+                    LOGGER.info(f"✅ Page {page_number}/{end_page}: {len(offers)} offers extracted")
+                else:
+                    LOGGER.warning(f"⚠️  Page {page_number}/{end_page}: No offers found")
+
+                # Save updated cookies
+                ctx.save_storage_state(storage_path)
+
+                # Small delay between pages
+                time.sleep(0.6)
 
+            except Exception as e:
+                ctx.fail()
+                consecutive_failures += 1
+                LOGGER.error(f"❌ Error on page {page_number}: {e}")
+
+                # If too many failures, cookies may have expired
+                if consecutive_failures >= max_consecutive_failures:
+                    LOGGER.warning(f"⚠️  {consecutive_failures} consecutive failures - cookies may have expired")
+                    LOGGER.info("💡 Try running: python config/get_cookies_with_proxy.py")
+                    break
+
+                continue
+
+    LOGGER.info(pool.stats.summary())
     LOGGER.info(f"🎉 Successfully collected {len(results)} pages with {sum(len(r.get('data', {}).get('offersSerialized', [])) for r in results)} total offers")
     return results
+
+
+class CianBrowserFetcher:
+    """Search-page fetcher for the monitor (etl/continuous_monitor.py).
+
+    Pages are fetched through the shared browser pool, so repeated scans
+    reuse the warm browser and cookies instead of launching Chromium.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    def fetch_listings(
+        self,
+        base_url: str,
+        max_pages: int = 1,
+        headless: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Fetch search pages and return listings (cian_id, price, address, ...)."""
+        from .browser_pool import get_browser_pool
+
+        pool = self.pool or get_browser_pool(headless)
+        listings: List[Dict[str, Any]] = []
+
+        for page_number in range(1, max_pages + 1):
+            page_url = base_url if page_number == 1 else f"{base_url}&p={page_number}"
+            with pool.lease() as ctx:
+                response = ctx.page.goto(page_url, wait_until="load", timeout=60000)
+                ctx.count_page()
+                if response and response.status == 429:
+                    ctx.fail()
+                    raise RateLimitError(page_url)
+                if not response or response.status != 200:
+                    ctx.fail()
+                    LOGGER.error(f"❌ Page {page_number}: Bad response {response.status if response else 'None'}")
+                    break
+
+                time.sleep(2)
+                offers = _parse_offers_from_html(ctx.page)
+
+            if not offers:
+                break
+            listings.extend(
+                {
+                    "cian_id": offer["offerId"],
+                    "price": int(offer["price"]),
+                    "address": offer.get("address", ""),
+                    "rooms": offer.get("rooms"),
+                    "area_total": offer.get("totalSquare"),
+                    "floor": offer.get("floor"),
+                    "floors_total": offer.get("floorsCount"),
+                    "url": offer.get("url"),
+                }
+                for offer in offers
+            )
+            time.sleep(0.6)
+
+        LOGGER.info(f"✅ Fetched {len(listings)} listings; {pool.stats.summary()}")
+        return listings
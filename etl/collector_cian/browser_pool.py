@@ -0,0 +1,330 @@
+"""Shared Chromium and warm context pool for the CIAN Playwright collectors.
+
+Launching Chromium and loading cookies costs seconds, and every collector
+used to pay it per run. The pool launches one browser and keeps up to
+``size`` contexts warm, with the storage state (cookies) and the webdriver
+init script already applied. Route blocking (setup_route_blocking) is
+meant for proxy traffic and stays off unless CIAN_POOL_BLOCK_ROUTES=1:
+direct pages load their CDN scripts and images as before.
+Callers lease a context, use its page and hand it back. A context is
+recycled after ``max_pages`` pages or when a lease fails; new contexts
+pick up the current storage state, so refreshed cookies are used as soon
+as the old contexts are gone.
+
+Playwright's sync API is bound to the thread that started it, so
+get_browser_pool() keeps one pool per thread. Direct connection only:
+proxy sessions (cookie refresh) still launch their own browser.
+
+Usage::
+
+    pool = get_browser_pool()
+    with pool.lease() as ctx:
+        ctx.page.goto(url)
+        ctx.count_page()
+        if blocked:
+            ctx.fail()  # recycled on release
+    LOGGER.info(pool.stats.summary())
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from playwright.sync_api import Browser, BrowserContext, Page, Playwright, sync_playwright
+
+from .browser_fetcher import (
+    _apply_cookies_from_env,
+    _create_browser_without_proxy,
+    _env_bool,
+    _storage_state_path,
+    setup_route_blocking,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+WEBDRIVER_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+
+# Warm contexts kept between leases, and pages served before a context is recycled
+POOL_SIZE = int(os.getenv("CIAN_POOL_SIZE", "2"))
+POOL_MAX_PAGES = int(os.getenv("CIAN_POOL_MAX_PAGES", "50"))
+
+
+@dataclass
+class PoolStats:
+    """Pool counters; utilization = leased time / (pool size * lifetime)."""
+
+    size: int
+    browsers_launched: int = 0
+    contexts_created: int = 0
+    contexts_recycled: int = 0
+    leases: int = 0
+    warm_leases: int = 0  # served by an already open context
+    pages: int = 0
+    errors: int = 0
+    in_use: int = 0
+    peak_in_use: int = 0
+    busy_seconds: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def utilization(self) -> float:
+        elapsed = (time.monotonic() - self.started_at) * self.size
+        return min(1.0, self.busy_seconds / elapsed) if elapsed > 0 else 0.0
+
+    def warm_rate(self) -> float:
+        return self.warm_leases / self.leases if self.leases else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"🧰 Browser pool: {self.leases} leases ({self.warm_rate():.0%} warm), "
+            f"{self.pages} pages, {self.contexts_created} contexts created, "
+            f"{self.contexts_recycled} recycled, {self.errors} errors, "
+            f"{self.browsers_launched} browser launches, peak {self.peak_in_use}/{self.size} in use, "
+            f"utilization {self.utilization():.0%}"
+        )
+
+
+class PooledContext:
+    """A leased context with one reusable page."""
+
+    def __init__(self, context: BrowserContext, storage_state: Optional[Path]):
+        self.context = context
+        self.storage_state = storage_state
+        self.pages_served = 0
+        self.failed = False
+        self._page: Optional[Page] = None
+        self._leased = False
+        self._leased_at = 0.0
+        self._pages_at_lease = 0
+
+    @property
+    def page(self) -> Page:
+        if self._page is None or self._page.is_closed():
+            self._page = self.context.new_page()
+            self._page.set_default_timeout(60000)
+        return self._page
+
+    def count_page(self, n: int = 1) -> None:
+        self.pages_served += n
+
+    def fail(self) -> None:
+        """Recycle this context when it is released (block, 429, dead page)."""
+        self.failed = True
+
+    def save_storage_state(self, path: Optional[Path] = None) -> None:
+        """Write the context's current cookies back to the state file."""
+        target = path or self.storage_state or _storage_state_path()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.context.storage_state(path=str(target))
+
+
+class BrowserPool:
+    """One Chromium with up to ``size`` warm contexts (see module docstring)."""
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_pages: int = POOL_MAX_PAGES,
+        *,
+        headless: Optional[bool] = None,
+        slow_mo: Optional[int] = None,
+        storage=None,
+        block_routes: Optional[bool] = None,
+        playwright_factory: Optional[Callable[[], Playwright]] = None,
+    ):
+        """
+        Parameters
+        ----------
+        size : int
+            Contexts kept warm between leases
+        max_pages : int
+            Pages served by a context before it is recycled
+        headless, slow_mo :
+            Browser options (default: CIAN_HEADLESS, CIAN_SLOW_MO)
+        storage : StorageStateManager, optional
+            Source of storage states; defaults to the CIAN_STORAGE_STATE file
+        block_routes : bool, optional
+            Allow only *.cian.ru requests (default: CIAN_POOL_BLOCK_ROUTES, off)
+        playwright_factory : callable, optional
+            Returns a started driver (default: the current thread's one)
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.headless = _env_bool("CIAN_HEADLESS", True) if headless is None else headless
+        self.slow_mo = int(os.getenv("CIAN_SLOW_MO", "0") or 0) if slow_mo is None else slow_mo
+        self.storage = storage
+        self.block_routes = _env_bool("CIAN_POOL_BLOCK_ROUTES", False) if block_routes is None else block_routes
+        self.stats = PoolStats(size=size)
+        self._playwright_factory = playwright_factory or _thread_playwright
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._idle: List[PooledContext] = []
+
+    @property
+    def playwright(self) -> Playwright:
+        """Driver of this thread; also used for one-off browsers (proxy sessions)."""
+        if self._playwright is None:
+            self._playwright = self._playwright_factory()
+        return self._playwright
+
+    def _launch(self) -> Browser:
+        if self._browser is None or not self._browser.is_connected():
+            self._browser = _create_browser_without_proxy(self.playwright, self.headless, self.slow_mo)
+            self.stats.browsers_launched += 1
+        return self._browser
+
+    def _storage_state(self) -> Optional[Path]:
+        if self.storage is not None:
+            return self.storage.get_fresh_state()
+        path = _storage_state_path()
+        if not path.is_absolute() and not path.exists():
+            # Relative to the repo root when started from another directory
+            path = Path(__file__).resolve().parents[2] / path
+        return path if path.exists() else None
+
+    def _new_context(self) -> PooledContext:
+        browser = self._launch()
+        storage_state = self._storage_state()
+        kwargs = {"user_agent": USER_AGENT}
+        if storage_state:
+            kwargs["storage_state"] = str(storage_state)
+        context = browser.new_context(**kwargs)
+        context.add_init_script(WEBDRIVER_SCRIPT)
+        if self.block_routes:
+            setup_route_blocking(context)
+        _apply_cookies_from_env(context)
+        self.stats.contexts_created += 1
+        return PooledContext(context, storage_state)
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """Open contexts ahead of the first lease."""
+        while len(self._idle) < min(count or self.size, self.size):
+            self._idle.append(self._new_context())
+
+    def acquire(self) -> PooledContext:
+        """Take a context out of the pool; give it back with release()."""
+        if self._idle:
+            item = self._idle.pop()
+            self.stats.warm_leases += 1
+        else:
+            item = self._new_context()
+        item._leased = True
+        item._leased_at = time.monotonic()
+        item._pages_at_lease = item.pages_served
+        self.stats.leases += 1
+        self.stats.in_use += 1
+        self.stats.peak_in_use = max(self.stats.peak_in_use, self.stats.in_use)
+        return item
+
+    def release(self, item: PooledContext, failed: bool = False) -> None:
+        if not item._leased:
+            return  # already given back
+        item._leased = False
+        self.stats.in_use -= 1
+        self.stats.busy_seconds += time.monotonic() - item._leased_at
+        self.stats.pages += item.pages_served - item._pages_at_lease
+        if failed:
+            item.fail()
+        if item.failed:
+            self.stats.errors += 1
+
+        browser_alive = self._browser is not None and self._browser.is_connected()
+        if not browser_alive:
+            # Crashed browser (EPIPE etc.): its contexts are gone, next lease relaunches
+            self._discard(item)
+            self.recycle_idle()
+            self._browser = None
+        elif item.failed or item.pages_served >= self.max_pages or len(self._idle) >= self.size:
+            self._discard(item)
+        else:
+            self._idle.append(item)
+
+    def renew(self, item: PooledContext, failed: bool = False) -> PooledContext:
+        """release() + acquire(): the same context unless it was due for recycling."""
+        self.release(item, failed=failed)
+        return self.acquire()
+
+    @contextmanager
+    def lease(self) -> Iterator[PooledContext]:
+        item = self.acquire()
+        try:
+            yield item
+        except Exception:
+            item.fail()
+            raise
+        finally:
+            self.release(item)
+
+    def recycle_idle(self) -> None:
+        """Close warm contexts, e.g. after cookies were refreshed."""
+        while self._idle:
+            self._discard(self._idle.pop())
+
+    def _discard(self, item: PooledContext) -> None:
+        self.stats.contexts_recycled += 1
+        try:
+            item.context.close()
+        except Exception as e:
+            LOGGER.debug(f"Error closing context: {e}")
+
+    def close(self) -> None:
+        self.recycle_idle()
+        try:
+            if self._browser is not None:
+                self._browser.close()
+        except Exception as e:
+            # EPIPE is common when the browser is already gone
+            LOGGER.debug(f"Error closing browser pool: {e}")
+        self._browser = None
+        self._playwright = None
+        if self.stats.leases:
+            LOGGER.info(self.stats.summary())
+
+
+_local = threading.local()
+
+
+def _thread_playwright() -> Playwright:
+    """One sync driver per thread, shared by the thread's pools."""
+    driver = getattr(_local, "playwright", None)
+    if driver is None:
+        driver = _local.playwright = sync_playwright().start()
+    return driver
+
+
+def get_browser_pool(headless: Optional[bool] = None, slow_mo: Optional[int] = None) -> BrowserPool:
+    """Pool of the current thread for the given browser options."""
+    pools: Optional[Dict[Tuple, BrowserPool]] = getattr(_local, "pools", None)
+    if pools is None:
+        pools = _local.pools = {}
+        if threading.current_thread() is threading.main_thread():
+            atexit.register(close_browser_pools)
+
+    key = (headless, slow_mo)
+    if key not in pools:
+        pools[key] = BrowserPool(headless=headless, slow_mo=slow_mo)
+    return pools[key]
+
+
+def close_browser_pools() -> None:
+    """Close the current thread's pools (worker threads call this on exit)."""
+    for pool in getattr(_local, "pools", {}).values():
+        pool.close()
+    _local.pools = {}
+    driver = getattr(_local, "playwright", None)
+    if driver is not None:
+        _local.playwright = None
+        try:
+            driver.stop()
+        except Exception as e:
+            LOGGER.debug(f"Error stopping Playwright: {e}")
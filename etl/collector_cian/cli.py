@@ -39,20 +39,18 @@ from typing import Iterable, Optional
 import orjson
 import yaml
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
 
 from etl.collector_cian.fetcher import CianBlockedError, CianFetchError, collect, load_payload
 from etl.collector_cian.browser_fetcher import collect_with_playwright, parse_listing_detail, RateLimitError, setup_route_blocking
+from etl.collector_cian.browser_pool import get_browser_pool
 # ПРОКСИ ИМПОРТ УДАЛЁН! Прокси только для cookies (отдельный скрипт)
 from etl.collector_cian.mapper import extract_offers, to_listing, to_price
 from etl.upsert import (
     get_db_connection,
     upsert_listing,
     upsert_price_if_changed,
-    update_listing_details,
-    insert_listing_photos,
 )
-from etl.encumbrance_analyzer import analyze_description, get_analyzer
+from etl.collector_cian.detail_parser import DETAIL_TABS, parse_details_concurrently, save_listing_details
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_LOCK_PATH = Path("/tmp/cian_parser.lock")
@@ -316,9 +314,12 @@ def _process_offers(offers: Iterable[dict], parse_details: bool = False) -> tupl
     return listings, prices, details_parsed, photos_inserted
 
 
-def _parse_listing_details(conn, listing_urls: list[tuple[int, str]]) -> tuple[int, int]:
+def _parse_listing_details(conn, listing_urls: list[tuple[int, str]], tabs: Optional[int] = None) -> tuple[int, int]:
     """Parse detailed information for each listing URL.
 
+    With tabs > 1 (default: CIAN_DETAIL_TABS) pages load concurrently in
+    tabs of one context and are saved in batches (detail_parser).
+
     ╔══════════════════════════════════════════════════════════════════════════════╗
     ║  ПРОКСИ ЗАПРЕЩЁН! Используем только cookies + exponential backoff           ║
     ╚══════════════════════════════════════════════════════════════════════════════╝
@@ -332,6 +333,7 @@ def _parse_listing_details(conn, listing_urls: list[tuple[int, str]]) -> tuple[i
     Args:
         conn: Database connection
         listing_urls: List of (listing_id, url) tuples
+        tabs: Concurrent detail pages (1 = one listing at a time)
 
     Returns:
         Tuple of (details_parsed_count, photos_inserted_count)
@@ -340,6 +342,11 @@ def _parse_listing_details(conn, listing_urls: list[tuple[int, str]]) -> tuple[i
     photos_count = 0
     detail_timeout = _detail_timeout_seconds()
 
+    tabs = DETAIL_TABS if tabs is None else tabs
+    if tabs > 1:
+        stats = parse_details_concurrently(conn, listing_urls, tabs=tabs, max_duration=detail_timeout)
+        return stats.saved, stats.photos
+
     # Load saved cookies path
     storage_path = Path(os.getenv("CIAN_STORAGE_STATE", "config/cian_browser_state.json"))
 
@@ -359,270 +366,54 @@ def _parse_listing_details(conn, listing_urls: list[tuple[int, str]]) -> tuple[i
     max_rate_limits = 3  # Stop after 3 rate limits - cookies likely expired
     base_delay = 10  # Base delay for exponential backoff
 
-    browser = None
-    page = None
+    # WITHOUT proxy: warm context with saved cookies from the shared pool
+    pool = get_browser_pool(headless=True)
+    ctx = None
 
     try:
-        with sync_playwright() as p:
-            # Start WITHOUT proxy (using saved cookies)
-            browser = p.chromium.launch(headless=True)
-
-            # Create context with saved cookies
-            context_kwargs = {
-                "user_agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-                ),
-            }
-            if storage_path.exists():
-                context_kwargs["storage_state"] = str(storage_path)
-
-            context = browser.new_context(**context_kwargs)
-            context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-            page = context.new_page()
-            
-            for idx, (listing_id, url) in enumerate(listing_urls, 1):
-                try:
-                    LOGGER.info(f"[{idx}/{len(listing_urls)}] Parsing details: {url}")
+        ctx = pool.acquire()
+
+        for idx, (listing_id, url) in enumerate(listing_urls, 1):
+            # Same context until it has served its pages (or failed)
+            ctx = pool.renew(ctx)
+            page = ctx.page
+            ctx.count_page()
+            try:
+                LOGGER.info(f"[{idx}/{len(listing_urls)}] Parsing details: {url}")
                     
-                    # Parse detail page with RateLimitError and EPIPE handling
-                    details = None
+                # Parse detail page with RateLimitError and EPIPE handling
+                details = None
+                try:
+                    details = parse_listing_detail(page, url, max_duration=detail_timeout)
+                except RateLimitError as rate_limit_exc:
+                    # HTTP 429 - Rate limited! NO PROXY - use exponential backoff
+                    rate_limit_count += 1
+                    LOGGER.warning(f"  🚫 Rate limited (HTTP 429)! Count: {rate_limit_count}/{max_rate_limits}")
+
+                    # Check if we've hit too many rate limits - cookies likely expired
+                    if rate_limit_count >= max_rate_limits:
+                        LOGGER.error("❌ Too many rate limits - cookies likely expired!")
+                        LOGGER.error("💡 Run: python config/get_cookies_with_proxy.py --force")
+                        break
+
+                    # Exponential backoff (NO PROXY!)
+                    wait_time = base_delay * (2 ** rate_limit_count)
+                    LOGGER.info(f"  ⏳ Waiting {wait_time} seconds before retry (exponential backoff)...")
+                    time.sleep(wait_time)
+
+                    # Retry once after backoff (still NO PROXY!)
                     try:
                         details = parse_listing_detail(page, url, max_duration=detail_timeout)
-                    except RateLimitError as rate_limit_exc:
-                        # HTTP 429 - Rate limited! NO PROXY - use exponential backoff
-                        rate_limit_count += 1
-                        LOGGER.warning(f"  🚫 Rate limited (HTTP 429)! Count: {rate_limit_count}/{max_rate_limits}")
-
-                        # Check if we've hit too many rate limits - cookies likely expired
-                        if rate_limit_count >= max_rate_limits:
-                            LOGGER.error("❌ Too many rate limits - cookies likely expired!")
-                            LOGGER.error("💡 Run: python config/get_cookies_with_proxy.py --force")
-                            break
-
-                        # Exponential backoff (NO PROXY!)
-                        wait_time = base_delay * (2 ** rate_limit_count)
-                        LOGGER.info(f"  ⏳ Waiting {wait_time} seconds before retry (exponential backoff)...")
-                        time.sleep(wait_time)
-
-                        # Retry once after backoff (still NO PROXY!)
-                        try:
-                            details = parse_listing_detail(page, url, max_duration=detail_timeout)
-                        except RateLimitError:
-                            LOGGER.warning(f"  🚫 Still rate limited after backoff, skipping this listing")
-                            continue
-                    except TimeoutError as timeout_exc:
-                        consecutive_failures += 1
-                        LOGGER.warning(f"  ⏱️ Detail parsing timeout for listing {listing_id}: {timeout_exc}")
+                    except RateLimitError:
+                        LOGGER.warning(f"  🚫 Still rate limited after backoff, skipping this listing")
                         continue
-                    except Exception as parse_error:
-                        error_str = str(parse_error)
-                        # Handle EPIPE error (Playwright pipe closed) - this is non-fatal
-                        is_epipe_error = any(keyword in error_str for keyword in [
-                            "EPIPE",
-                            "write EPIPE",
-                            "Broken pipe",
-                            "Connection reset by peer",
-                            "errno: -32"
-                        ])
-                        
-                        if is_epipe_error:
-                            LOGGER.warning(f"  ⚠️ EPIPE error (browser connection lost): {error_str[:100]}")
-                            LOGGER.info("  🔄 Recreating browser connection (without proxy)...")
-                            try:
-                                if browser:
-                                    browser.close()
-                            except Exception:
-                                pass
-
-                            # Recreate browser WITHOUT proxy (using saved cookies)
-                            try:
-                                browser = p.chromium.launch(headless=True)
-                                new_context = browser.new_context(**context_kwargs)
-                                new_context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-                                page = new_context.new_page()
-                                consecutive_failures = 0
-                                LOGGER.info("  ✅ Browser recreated (no proxy), retrying...")
-                                # Retry parsing
-                                details = parse_listing_detail(page, url, max_duration=detail_timeout)
-                            except TimeoutError as timeout_exc:
-                                consecutive_failures += 1
-                                LOGGER.warning(f"  ⏱️ Detail parsing timeout after reconnect for listing {listing_id}: {timeout_exc}")
-                                continue
-                            except Exception as recreate_error:
-                                LOGGER.error(f"  ❌ Failed to recreate browser: {recreate_error}")
-                                try:
-                                    conn.commit()
-                                except Exception:
-                                    pass
-                                continue
-                        else:
-                            raise  # Re-raise non-EPIPE errors
-                    
-                    if details:
-                        # Reset failure counter on success
-                        consecutive_failures = 0
-                        
-                        try:
-                            # Skip newbuildings and shares detected during detail parsing
-                            property_type = details.get("property_type", "").lower() if details.get("property_type") else ""
-                            if property_type == "newbuilding":
-                                LOGGER.info(f"  ⏭️ Skipping newbuilding (property_type='{property_type}' from 'Тип жилья') for listing {listing_id}")
-                                continue
-                            
-                            if property_type == "share":
-                                LOGGER.info(f"  ⏭️ Skipping share (detected 'Размер доли' or share indicators) for listing {listing_id}")
-                                continue
-
-                            if property_type == "room":
-                                LOGGER.info(f"  ⏭️ Skipping room (detected 'комната' in description or /room/ URL) for listing {listing_id}")
-                                continue
-
-                            # Also check address_full for new construction indicators
-                            address_full = details.get("address_full")
-                            if address_full:
-                                address_lower = address_full.lower()
-                                newbuilding_indicators = ["жилой комплекс", "жилой район", "жк ", "жк.", "новострой"]
-                                if any(indicator in address_lower for indicator in newbuilding_indicators):
-                                    LOGGER.info(f"  ⏭️ Skipping newbuilding (address contains new construction indicators) for listing {listing_id}")
-                                    continue
-                            
-                            # Analyze description for encumbrances
-                            description = details.get("description")
-                            if description:
-                                try:
-                                    enc_analysis = analyze_description(description)
-                                    details["has_encumbrances"] = enc_analysis["has_encumbrances"]
-                                    details["encumbrance_types"] = enc_analysis.get("flags", [])
-                                    details["encumbrance_details"] = enc_analysis
-                                    details["encumbrance_confidence"] = enc_analysis.get("confidence", 0.0)
-                                    
-                                    if enc_analysis["has_encumbrances"]:
-                                        analyzer = get_analyzer()
-                                        summary = analyzer.get_summary(enc_analysis)
-                                        LOGGER.info(f"  ⚠️ Encumbrances detected:\n{summary}")
-                                except Exception as e:
-                                    LOGGER.warning(f"  ⚠️ Failed to analyze encumbrances: {e}")
-                            
-                            # Update listing with details
-                            update_listing_details(conn, listing_id, details)
-                            details_count += 1
-
-                            # Commit after each successful update to ensure data is saved
-                            conn.commit()
-
-                            # Check for duplicates (reposts)
-                            try:
-                                from etl.duplicate_detector import DuplicateDetector
-                                detector = DuplicateDetector(conn)
-                                listing_data = {
-                                    'id': listing_id,
-                                    'address': address_full,
-                                    'address_full': address_full,
-                                    'fias_address': details.get('fias_address'),
-                                    'area_total': details.get('area_total'),
-                                    'rooms': details.get('rooms'),
-                                    'description_hash': details.get('description_hash'),
-                                    'first_seen': details.get('published_at'),
-                                }
-                                original = detector.detect_repost(listing_data)
-                                if original:
-                                    detector.link_duplicates(
-                                        listing_id=listing_id,
-                                        original_id=original['id'],
-                                        similarity=original.get('similarity_score', 1.0),
-                                        reason=original.get('match_reason', 'exact_match')
-                                    )
-                                    LOGGER.info(f"  🔄 Repost detected: original ID {original['id']}")
-                            except Exception as e:
-                                LOGGER.debug(f"  ⚠️ Duplicate check failed: {e}")
-
-                            # Normalize address using FIAS if address_full is available
-                            # FIAS is disabled by default (very slow ~2min/address)
-                            # Set ENABLE_FIAS=1 to enable
-                            if address_full and _env_flag("ENABLE_FIAS"):
-                                try:
-                                    from etl.fias_normalizer import normalize_address
-                                    from etl.upsert import upsert_fias_data
-
-                                    fias_data = normalize_address(address_full)
-                                    if fias_data:
-                                        upsert_fias_data(
-                                            conn, listing_id,
-                                            fias_address=fias_data.get("fias_address"),
-                                            fias_id=fias_data.get("fias_id"),
-                                            postal_code=fias_data.get("postal_code"),
-                                            quality_code=fias_data.get("quality_code"),
-                                        )
-                                        conn.commit()  # Commit FIAS data
-                                        LOGGER.debug(f"  📍 Address normalized: {fias_data.get('quality_code')}")
-                                except Exception as e:
-                                    LOGGER.warning(f"  ⚠️ Failed to normalize address: {e}")
-                                    # Don't fail the whole process if normalization fails
-                            
-                            # Insert photos
-                            if details.get("photos"):
-                                photos = insert_listing_photos(conn, listing_id, details["photos"])
-                                conn.commit()  # Commit photos
-                                photos_count += photos
-                                desc_len = len(details.get("description", "")) if details.get("description") else 0
-                                photo_count = len(details.get("photos", []))
-                                building = details.get("building_type", "N/A")
-                                LOGGER.info(f"  ✅ Saved: desc={desc_len} chars, photos={photo_count}, building_type={building}")
-                            else:
-                                LOGGER.warning(f"  ⚠️ No photos found for listing {listing_id}")
-                        except Exception as save_error:
-                            LOGGER.error(f"  ❌ Error saving details for listing {listing_id}: {save_error}")
-                            # Try to commit partial progress
-                            try:
-                                conn.commit()
-                            except:
-                                conn.rollback()
-                            continue
-                    else:
-                        consecutive_failures += 1
-                        error_msg = "Failed to parse details"
-                        
-                        # Check if it's a network/block error
-                        if "ERR_" in str(error_msg) or "timeout" in str(error_msg).lower():
-                            LOGGER.warning(f"  ⚠️ Network error detected (failures: {consecutive_failures}/{max_consecutive_failures})")
-
-                            # Too many failures - try auto-refresh cookies
-                            if consecutive_failures >= max_consecutive_failures:
-                                LOGGER.warning(f"⚠️  {consecutive_failures} consecutive failures - attempting to refresh cookies...")
-                                try:
-                                    from config.get_cookies_with_proxy import refresh_cookies_if_needed
-                                    if refresh_cookies_if_needed(force=True):
-                                        LOGGER.info("✅ Cookies refreshed! Recreating browser...")
-                                        try:
-                                            browser.close()
-                                        except:
-                                            pass
-                                        browser = p.chromium.launch(headless=True)
-                                        if storage_path.exists():
-                                            context_kwargs["storage_state"] = str(storage_path)
-                                        new_context = browser.new_context(**context_kwargs)
-                                        new_context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-                                        page = new_context.new_page()
-                                        consecutive_failures = 0
-                                        LOGGER.info("✅ Continuing with fresh cookies...")
-                                    else:
-                                        LOGGER.error("❌ Failed to refresh cookies, stopping")
-                                        break
-                                except Exception as refresh_err:
-                                    LOGGER.error(f"❌ Auto-refresh failed: {refresh_err}")
-                                    break
-
-                        LOGGER.warning(f"  ❌ Failed to parse details for listing {listing_id}")
-                    
-                    # Small delay to avoid detection
-                    time.sleep(2)
-                    
-                except Exception as e:
+                except TimeoutError as timeout_exc:
                     consecutive_failures += 1
-                    error_str = str(e)
-                    
-                    # Handle EPIPE error at exception level
+                    LOGGER.warning(f"  ⏱️ Detail parsing timeout for listing {listing_id}: {timeout_exc}")
+                    continue
+                except Exception as parse_error:
+                    error_str = str(parse_error)
+                    # Handle EPIPE error (Playwright pipe closed) - this is non-fatal
                     is_epipe_error = any(keyword in error_str for keyword in [
                         "EPIPE",
                         "write EPIPE",
@@ -630,73 +421,148 @@ def _parse_listing_details(conn, listing_urls: list[tuple[int, str]]) -> tuple[i
                         "Connection reset by peer",
                         "errno: -32"
                     ])
-                    
+                        
                     if is_epipe_error:
-                        LOGGER.warning(f"  ⚠️ EPIPE error: {error_str[:100]} (failures: {consecutive_failures}/{max_consecutive_failures})")
+                        LOGGER.warning(f"  ⚠️ EPIPE error (browser connection lost): {error_str[:100]}")
                         LOGGER.info("  🔄 Recreating browser connection (without proxy)...")
-                        try:
-                            if browser:
-                                browser.close()
-                        except:
-                            pass
 
-                        # Recreate browser WITHOUT proxy
+                        # Fresh context WITHOUT proxy (the pool relaunches a dead browser)
                         try:
-                            browser = p.chromium.launch(headless=True)
-                            new_context = browser.new_context(**context_kwargs)
-                            new_context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-                            page = new_context.new_page()
+                            ctx = pool.renew(ctx, failed=True)
+                            page = ctx.page
                             consecutive_failures = 0
-                            LOGGER.info("  ✅ Browser recreated (no proxy), continuing...")
+                            LOGGER.info("  ✅ Browser recreated (no proxy), retrying...")
+                            # Retry parsing
+                            details = parse_listing_detail(page, url, max_duration=detail_timeout)
+                        except TimeoutError as timeout_exc:
+                            consecutive_failures += 1
+                            LOGGER.warning(f"  ⏱️ Detail parsing timeout after reconnect for listing {listing_id}: {timeout_exc}")
+                            continue
                         except Exception as recreate_error:
                             LOGGER.error(f"  ❌ Failed to recreate browser: {recreate_error}")
                             try:
                                 conn.commit()
-                            except:
+                            except Exception:
                                 pass
+                            continue
+                    else:
+                        raise  # Re-raise non-EPIPE errors
+                    
+                if details:
+                    # Reset failure counter on success
+                    consecutive_failures = 0
+                        
+                    try:
+                        photos = save_listing_details(conn, listing_id, details)
+                        # Commit after each listing to ensure data is saved
+                        conn.commit()
+                        if photos is None:
+                            continue  # newbuilding / share / room
+                        details_count += 1
+                        photos_count += photos
+                    except Exception as save_error:
+                        LOGGER.error(f"  ❌ Error saving details for listing {listing_id}: {save_error}")
+                        # The details themselves failed (photo, repost and FIAS
+                        # errors are isolated in savepoints): nothing to keep
+                        conn.rollback()
                         continue
+                else:
+                    consecutive_failures += 1
+                    error_msg = "Failed to parse details"
+                        
+                    # Check if it's a network/block error
+                    if "ERR_" in str(error_msg) or "timeout" in str(error_msg).lower():
+                        LOGGER.warning(f"  ⚠️ Network error detected (failures: {consecutive_failures}/{max_consecutive_failures})")
 
-                    # Too many failures - try to auto-refresh cookies via proxy
-                    if consecutive_failures >= max_consecutive_failures:
-                        LOGGER.warning(f"⚠️  {consecutive_failures} consecutive failures - attempting to refresh cookies via proxy...")
+                        # Too many failures - try auto-refresh cookies
+                        if consecutive_failures >= max_consecutive_failures:
+                            LOGGER.warning(f"⚠️  {consecutive_failures} consecutive failures - attempting to refresh cookies...")
+                            try:
+                                from config.get_cookies_with_proxy import refresh_cookies_if_needed
+                                if refresh_cookies_if_needed(force=True):
+                                    LOGGER.info("✅ Cookies refreshed! Recreating browser...")
+                                    # New contexts load the refreshed storage state
+                                    pool.recycle_idle()
+                                    ctx = pool.renew(ctx, failed=True)
+                                    page = ctx.page
+                                    consecutive_failures = 0
+                                    LOGGER.info("✅ Continuing with fresh cookies...")
+                                else:
+                                    LOGGER.error("❌ Failed to refresh cookies, stopping")
+                                    break
+                            except Exception as refresh_err:
+                                LOGGER.error(f"❌ Auto-refresh failed: {refresh_err}")
+                                break
 
+                    LOGGER.warning(f"  ❌ Failed to parse details for listing {listing_id}")
+                    
+                # Small delay to avoid detection
+                time.sleep(2)
+                    
+            except Exception as e:
+                consecutive_failures += 1
+                error_str = str(e)
+                    
+                # Handle EPIPE error at exception level
+                is_epipe_error = any(keyword in error_str for keyword in [
+                    "EPIPE",
+                    "write EPIPE",
+                    "Broken pipe",
+                    "Connection reset by peer",
+                    "errno: -32"
+                ])
+                    
+                if is_epipe_error:
+                    LOGGER.warning(f"  ⚠️ EPIPE error: {error_str[:100]} (failures: {consecutive_failures}/{max_consecutive_failures})")
+                    LOGGER.info("  🔄 Recreating browser connection (without proxy)...")
+
+                    # Fresh context WITHOUT proxy (the pool relaunches a dead browser)
+                    try:
+                        ctx = pool.renew(ctx, failed=True)
+                        page = ctx.page
+                        consecutive_failures = 0
+                        LOGGER.info("  ✅ Browser recreated (no proxy), continuing...")
+                    except Exception as recreate_error:
+                        LOGGER.error(f"  ❌ Failed to recreate browser: {recreate_error}")
                         try:
-                            from config.get_cookies_with_proxy import refresh_cookies_if_needed
-                            if refresh_cookies_if_needed(force=True):
-                                LOGGER.info("✅ Cookies refreshed! Recreating browser...")
-                                # Recreate browser with fresh cookies
-                                try:
-                                    browser.close()
-                                except:
-                                    pass
-                                browser = p.chromium.launch(headless=True)
-                                # Reload context with new cookies
-                                if storage_path.exists():
-                                    context_kwargs["storage_state"] = str(storage_path)
-                                new_context = browser.new_context(**context_kwargs)
-                                new_context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-                                page = new_context.new_page()
-                                consecutive_failures = 0
-                                LOGGER.info("✅ Browser recreated with fresh cookies, continuing...")
-                                continue
-                            else:
-                                LOGGER.error("❌ Failed to refresh cookies")
-                                LOGGER.info("💡 Try manually: python config/get_cookies_with_proxy.py")
-                                break
-                        except Exception as refresh_error:
-                            LOGGER.error(f"❌ Auto-refresh failed: {refresh_error}")
+                            conn.commit()
+                        except:
+                            pass
+                    continue
+
+                # Too many failures - try to auto-refresh cookies via proxy
+                if consecutive_failures >= max_consecutive_failures:
+                    LOGGER.warning(f"⚠️  {consecutive_failures} consecutive failures - attempting to refresh cookies via proxy...")
+
+                    try:
+                        from config.get_cookies_with_proxy import refresh_cookies_if_needed
+                        if refresh_cookies_if_needed(force=True):
+                            LOGGER.info("✅ Cookies refreshed! Recreating browser...")
+                            # New contexts load the refreshed storage state
+                            pool.recycle_idle()
+                            ctx = pool.renew(ctx, failed=True)
+                            page = ctx.page
+                            consecutive_failures = 0
+                            LOGGER.info("✅ Browser recreated with fresh cookies, continuing...")
+                            continue
+                        else:
+                            LOGGER.error("❌ Failed to refresh cookies")
                             LOGGER.info("💡 Try manually: python config/get_cookies_with_proxy.py")
                             break
-                    else:
-                        LOGGER.error(f"  ❌ Error parsing {url}: {e}")
+                    except Exception as refresh_error:
+                        LOGGER.error(f"❌ Auto-refresh failed: {refresh_error}")
+                        LOGGER.info("💡 Try manually: python config/get_cookies_with_proxy.py")
+                        break
+                else:
+                    LOGGER.error(f"  ❌ Error parsing {url}: {e}")
                     
-                    # Commit partial progress even on error
-                    try:
-                        conn.commit()
-                    except:
-                        pass
+                # Commit partial progress even on error
+                try:
+                    conn.commit()
+                except:
+                    pass
                     
-                    continue
+                continue
                     
     except Exception as e:
         error_str = str(e)
@@ -715,14 +581,10 @@ def _parse_listing_details(conn, listing_urls: list[tuple[int, str]]) -> tuple[i
         else:
             LOGGER.error(f"❌ Fatal error in _parse_listing_details: {e}")
     finally:
-        # Ensure browser is closed
-        try:
-            if browser:
-                browser.close()
-        except Exception as e:
-            # Ignore errors when closing browser (EPIPE is common here)
-            if "EPIPE" not in str(e):
-                LOGGER.debug(f"Error closing browser: {e}")
+        # Context goes back to the pool; the browser stays warm for the next run
+        if ctx is not None:
+            pool.release(ctx)
+        LOGGER.info(pool.stats.summary())
     
     LOGGER.info("✅ Detailed parsing complete: %d listings, %d photos", details_count, photos_count)
     return details_count, photos_count
@@ -0,0 +1,512 @@
+"""Detail-page parsing across several tabs of one browser context.
+
+Sequential parsing spends most of its time waiting for page loads. Here
+up to N listings load at once in tabs of one pooled context
+(browser_pool). The busy tabs are polled and whichever document is
+ready first is parsed, while the other tabs keep loading. Playwright's
+sync API cannot wait on several pages at once. So navigations start
+without waiting (through window.location), and readiness is tracked
+from page events.
+
+New navigations go through one process-wide polite rate limiter
+(get_detail_rate_limiter): one start per CIAN_DETAIL_INTERVAL seconds.
+HTTP 429 keeps the sequential semantics:
+- every tab pauses with exponential backoff (10s, 20s, 40s);
+- the listing is retried once;
+- the run stops after 3 rate limits (cookies are likely expired).
+
+Parsed details are written in batches: one transaction per batch and a
+savepoint per listing.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from etl.encumbrance_analyzer import analyze_description, get_analyzer
+from etl.upsert import insert_listing_photos, update_listing_details
+
+from .browser_fetcher import _env_bool, parse_listing_detail
+from .browser_pool import BrowserPool, PooledContext, get_browser_pool
+
+LOGGER = logging.getLogger(__name__)
+
+DETAIL_TABS = int(os.getenv("CIAN_DETAIL_TABS", "1"))
+DETAIL_INTERVAL = float(os.getenv("CIAN_DETAIL_INTERVAL", "2.0"))
+DETAIL_BATCH_SIZE = int(os.getenv("CIAN_DETAIL_BATCH_SIZE", "20"))
+
+# 429 handling, as in the sequential parser
+RATE_LIMIT_BASE_DELAY = 10
+MAX_RATE_LIMITS = 3
+
+NEWBUILDING_ADDRESS_INDICATORS = ("жилой комплекс", "жилой район", "жк ", "жк.", "новострой")
+
+_RATE_LIMITED = object()
+
+
+class PoliteRateLimiter:
+    """Spaces navigation starts across all tabs and threads; pauses them on 429."""
+
+    def __init__(
+        self,
+        interval: float = DETAIL_INTERVAL,
+        *,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self._sleep = sleep
+        self._clock = clock
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the caller may start the next navigation."""
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_at)
+            self._next_at = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._next_at = max(self._next_at, self._clock() + seconds)
+
+
+_limiter: Optional[PoliteRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_detail_rate_limiter() -> PoliteRateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = PoliteRateLimiter()
+        return _limiter
+
+
+@dataclass
+class DetailStats:
+    """Counters of one detail run."""
+
+    parsed: int = 0
+    saved: int = 0
+    skipped: int = 0  # newbuildings, shares, rooms found on the detail page
+    failed: int = 0
+    rate_limited: int = 0
+    photos: int = 0
+    batches: int = 0
+    stopped: bool = False  # too many rate limits
+    started_at: float = field(default_factory=time.monotonic)
+
+    def per_minute(self) -> float:
+        minutes = (time.monotonic() - self.started_at) / 60
+        return self.parsed / minutes if minutes > 0 else 0.0
+
+    def summary(self) -> str:
+        line = (
+            f"📊 Details: {self.parsed} parsed ({self.per_minute():.1f}/min), "
+            f"{self.saved} saved in {self.batches} batches, {self.photos} photos, "
+            f"{self.skipped} skipped, {self.failed} failed, {self.rate_limited} rate limited"
+        )
+        if self.stopped:
+            line += " | stopped: too many rate limits"
+        return line
+
+
+@contextmanager
+def _savepoint(conn, name: str):
+    with conn.cursor() as cur:
+        cur.execute(f"SAVEPOINT {name}")
+    try:
+        yield
+    except Exception:
+        with conn.cursor() as cur:
+            cur.execute(f"ROLLBACK TO SAVEPOINT {name}")
+        raise
+    with conn.cursor() as cur:
+        cur.execute(f"RELEASE SAVEPOINT {name}")
+
+
+def save_listing_details(conn, listing_id: int, details: Dict[str, Any]) -> Optional[int]:
+    """
+    Write parsed details of one listing (no commit).
+
+    Skips newbuildings, shares and rooms detected on the detail page;
+    otherwise saves details, encumbrance analysis, repost link, FIAS
+    address (ENABLE_FIAS=1) and photos.
+
+    Returns
+    -------
+    int or None
+        Photos inserted, None if the listing was skipped
+    """
+    property_type = (details.get("property_type") or "").lower()
+    if property_type in ("newbuilding", "share", "room"):
+        LOGGER.info(f"  ⏭️ Skipping {property_type} (detected on detail page) for listing {listing_id}")
+        return None
+
+    address_full = details.get("address_full")
+    if address_full and any(i in address_full.lower() for i in NEWBUILDING_ADDRESS_INDICATORS):
+        LOGGER.info(f"  ⏭️ Skipping newbuilding (address contains new construction indicators) for listing {listing_id}")
+        return None
+
+    # Analyze description for encumbrances
+    description = details.get("description")
+    if description:
+        try:
+            enc_analysis = analyze_description(description)
+            details["has_encumbrances"] = enc_analysis["has_encumbrances"]
+            details["encumbrance_types"] = enc_analysis.get("flags", [])
+            details["encumbrance_details"] = enc_analysis
+            details["encumbrance_confidence"] = enc_analysis.get("confidence", 0.0)
+
+            if enc_analysis["has_encumbrances"]:
+                LOGGER.info(f"  ⚠️ Encumbrances detected:\n{get_analyzer().get_summary(enc_analysis)}")
+        except Exception as e:
+            LOGGER.warning(f"  ⚠️ Failed to analyze encumbrances: {e}")
+
+    update_listing_details(conn, listing_id, details)
+
+    # Check for duplicates (reposts); a failure must not undo the details
+    try:
+        with _savepoint(conn, "duplicate_check"):
+            from etl.duplicate_detector import DuplicateDetector
+            detector = DuplicateDetector(conn)
+            original = detector.detect_repost({
+                'id': listing_id,
+                'address': address_full,
+                'address_full': address_full,
+                'fias_address': details.get('fias_address'),
+                'area_total': details.get('area_total'),
+                'rooms': details.get('rooms'),
+                'description_hash': details.get('description_hash'),
+                'first_seen': details.get('published_at'),
+            })
+            if original:
+                detector.link_duplicates(
+                    listing_id=listing_id,
+                    original_id=original['id'],
+                    similarity=original.get('similarity_score', 1.0),
+                    reason=original.get('match_reason', 'exact_match'),
+                    commit=False,
+                )
+                LOGGER.info(f"  🔄 Repost detected: original ID {original['id']}")
+    except Exception as e:
+        LOGGER.debug(f"  ⚠️ Duplicate check failed: {e}")
+
+    # FIAS is disabled by default (very slow ~2min/address); ENABLE_FIAS=1 enables it
+    if address_full and _env_bool("ENABLE_FIAS", False):
+        try:
+            with _savepoint(conn, "fias"):
+                from etl.fias_normalizer import normalize_address
+                from etl.upsert import upsert_fias_data
+
+                fias_data = normalize_address(address_full)
+                if fias_data:
+                    upsert_fias_data(
+                        conn, listing_id,
+                        fias_address=fias_data.get("fias_address"),
+                        fias_id=fias_data.get("fias_id"),
+                        postal_code=fias_data.get("postal_code"),
+                        quality_code=fias_data.get("quality_code"),
+                    )
+                    LOGGER.debug(f"  📍 Address normalized: {fias_data.get('quality_code')}")
+        except Exception as e:
+            LOGGER.warning(f"  ⚠️ Failed to normalize address: {e}")
+
+    if not details.get("photos"):
+        LOGGER.warning(f"  ⚠️ No photos found for listing {listing_id}")
+        return 0
+    # A failed photo insert must not undo the details either
+    try:
+        with _savepoint(conn, "photos"):
+            photos = insert_listing_photos(conn, listing_id, details["photos"])
+    except Exception as e:
+        LOGGER.warning(f"  ⚠️ Failed to save photos for listing {listing_id}: {e}")
+        photos = 0
+    desc_len = len(description) if description else 0
+    LOGGER.info(
+        f"  ✅ Saved: desc={desc_len} chars, photos={len(details['photos'])}, "
+        f"building_type={details.get('building_type', 'N/A')}"
+    )
+    return photos
+
+
+def write_details_batch(
+    conn,
+    batch: List[Tuple[int, Dict[str, Any]]],
+    stats: DetailStats,
+    on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+) -> None:
+    """
+    Save a batch of parsed details in one transaction.
+
+    on_result(listing_id, None) runs in the listing's savepoint after its
+    details were saved, so both are kept or rolled back together. If the
+    save fails, on_result(listing_id, error) runs after the rollback.
+    """
+    for listing_id, details in batch:
+        try:
+            with _savepoint(conn, "listing_details"):
+                photos = save_listing_details(conn, listing_id, details)
+                if on_result:
+                    on_result(listing_id, None)
+        except Exception as e:
+            stats.failed += 1
+            LOGGER.error(f"  ❌ Error saving details for listing {listing_id}: {e}")
+            if on_result:
+                on_result(listing_id, f"save failed: {e}")
+            continue
+        if photos is None:
+            stats.skipped += 1
+        else:
+            stats.saved += 1
+            stats.photos += photos
+    conn.commit()
+    stats.batches += 1
+
+
+class _Tab:
+    """One page of the context; tracks the navigation it was given."""
+
+    def __init__(self, page):
+        self.page = page
+        self.item: Optional[Tuple[int, str, bool]] = None
+        self._handlers = {
+            "response": self._on_response,
+            "domcontentloaded": self._on_loaded,
+            "requestfailed": self._on_failed,
+        }
+        for event, handler in self._handlers.items():
+            page.on(event, handler)
+        self._reset()
+
+    def detach(self):
+        """Remove the listeners (the lease's page goes back to the pool)."""
+        for event, handler in self._handlers.items():
+            self.page.remove_listener(event, handler)
+
+    def _reset(self):
+        self.response = None
+        self.loaded = False
+        self.error: Optional[str] = None
+        self.started_at = time.monotonic()
+
+    def _is_own_navigation(self, request) -> bool:
+        return self.item is not None and request.is_navigation_request() and request.frame == self.page.main_frame
+
+    def _on_response(self, response):
+        if self._is_own_navigation(response.request):
+            self.response = response  # redirects: the last one wins
+
+    def _on_loaded(self, page):
+        if self.response is not None:
+            self.loaded = True
+
+    def _on_failed(self, request):
+        if self._is_own_navigation(request):
+            self.error = request.failure or "navigation failed"
+
+    def start(self, item: Tuple[int, str, bool]) -> None:
+        self.item = item
+        self._reset()
+        # Returns at once; the page loads while other tabs are parsed
+        self.page.evaluate("url => { window.location.href = url; }", item[1])
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded or self.error is not None or (
+            self.response is not None and self.response.status >= 400
+        )
+
+
+class DetailTabs:
+    """Parses listings across ``tabs`` pages of one context (see module docstring)."""
+
+    def __init__(
+        self,
+        ctx: PooledContext,
+        tabs: int,
+        limiter: PoliteRateLimiter,
+        stats: DetailStats,
+        *,
+        max_duration: Optional[int] = None,
+        load_timeout: float = 60.0,
+        settle_ms: int = 500,
+    ):
+        self.ctx = ctx
+        self.limiter = limiter
+        self.stats = stats
+        self.max_duration = max_duration
+        self.load_timeout = load_timeout
+        self.settle_ms = settle_ms
+        # The lease's own page plus tabs - 1 extra pages, closed after the run
+        self._tabs = [_Tab(ctx.page)]
+        self._extra_pages = [ctx.context.new_page() for _ in range(tabs - 1)]
+        self._tabs += [_Tab(page) for page in self._extra_pages]
+
+    def parse(self, listing_urls: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str, Optional[Dict[str, Any]]]]:
+        """Yield (listing_id, url, details or None) in the order the pages get ready."""
+        pending = deque((listing_id, url, False) for listing_id, url in listing_urls)
+        idle = list(reversed(self._tabs))
+        busy: List[_Tab] = []
+
+        while True:
+            while idle and pending and not self.stats.stopped:
+                self.limiter.wait()
+                tab = idle.pop()
+                tab.start(pending.popleft())
+                busy.append(tab)
+            if not busy:
+                return
+
+            tab = self._next_ready(busy)
+            listing_id, url, retried = tab.item
+            details = self._finish(tab)
+            tab.item = None
+            idle.append(tab)
+            self.ctx.count_page()
+
+            if details is _RATE_LIMITED:
+                if not retried and not self.stats.stopped:
+                    pending.appendleft((listing_id, url, True))
+                    continue
+                if retried:
+                    LOGGER.warning(f"  🚫 Still rate limited after backoff, skipping listing {listing_id}")
+                details = None
+            yield listing_id, url, details
+
+    def _next_ready(self, busy: List[_Tab]) -> _Tab:
+        """Take the first ready (or timed out) tab off ``busy``, oldest first."""
+        while True:
+            now = time.monotonic()
+            for tab in busy:
+                if tab.ready or now - tab.started_at > self.load_timeout:
+                    busy.remove(tab)
+                    return tab
+            # Any page's wait dispatches the events of all of them
+            busy[0].page.wait_for_timeout(100)
+
+    def _finish(self, tab: _Tab):
+        listing_id, url, _ = tab.item
+        while not tab.ready:
+            if time.monotonic() - tab.started_at > self.load_timeout:
+                self.stats.failed += 1
+                LOGGER.warning(f"  ⏱️ Detail page load timeout for listing {listing_id}")
+                return None
+            tab.page.wait_for_timeout(100)
+
+        if tab.error is not None:
+            self.stats.failed += 1
+            LOGGER.warning(f"  ❌ Failed to load {url}: {tab.error}")
+            return None
+
+        if tab.response.status == 429:
+            self.stats.rate_limited += 1
+            if self.stats.stopped:
+                return _RATE_LIMITED
+            if self.stats.rate_limited >= MAX_RATE_LIMITS:
+                self.stats.stopped = True
+                LOGGER.error("❌ Too many rate limits - cookies likely expired!")
+                LOGGER.error("💡 Run: python config/get_cookies_with_proxy.py --force")
+            else:
+                wait_time = RATE_LIMIT_BASE_DELAY * (2 ** self.stats.rate_limited)
+                LOGGER.warning(
+                    f"  🚫 Rate limited (HTTP 429)! Count: {self.stats.rate_limited}/{MAX_RATE_LIMITS}, "
+                    f"pausing all tabs for {wait_time}s"
+                )
+                self.limiter.pause(wait_time)
+            return _RATE_LIMITED
+
+        LOGGER.info(f"Parsing details: {url}")
+        try:
+            details = parse_listing_detail(
+                tab.page, url,
+                max_duration=self.max_duration,
+                response=tab.response,
+                settle_ms=self.settle_ms,
+            )
+        except TimeoutError as e:
+            self.stats.failed += 1
+            LOGGER.warning(f"  ⏱️ Detail parsing timeout for listing {listing_id}: {e}")
+            return None
+        if details is None:
+            self.stats.failed += 1
+            LOGGER.warning(f"  ❌ Failed to parse details for listing {listing_id}")
+            return None
+        self.stats.parsed += 1
+        return details
+
+    def close(self) -> None:
+        self._tabs[0].detach()
+        for page in self._extra_pages:
+            try:
+                page.close()
+            except Exception as e:
+                LOGGER.debug(f"Error closing tab: {e}")
+
+
+def parse_details_concurrently(
+    conn,
+    listing_urls: List[Tuple[int, str]],
+    *,
+    tabs: int = DETAIL_TABS,
+    batch_size: int = DETAIL_BATCH_SIZE,
+    max_duration: Optional[int] = None,
+    pool: Optional[BrowserPool] = None,
+    limiter: Optional[PoliteRateLimiter] = None,
+    on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+) -> DetailStats:
+    """
+    Parse detail pages with ``tabs`` concurrent tabs and save them in batches.
+
+    Works through the listings in chunks of the pool's max_pages, so each
+    chunk gets a fresh context once the previous one is used up.
+    on_result(listing_id, error or None) is called for every listing that
+    was visited: for unparsed pages at once, for parsed ones when their
+    batch is written (see write_details_batch, no commit of its own).
+    """
+    pool = pool or get_browser_pool(headless=True)
+    limiter = limiter or get_detail_rate_limiter()
+    stats = DetailStats()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    chunk_size = max(pool.max_pages, tabs)
+
+    LOGGER.info(f"🔍 Parsing {len(listing_urls)} detail pages in {tabs} tabs (batches of {batch_size})")
+    for start in range(0, len(listing_urls), chunk_size):
+        if stats.stopped:
+            break
+        chunk = listing_urls[start:start + chunk_size]
+        with pool.lease() as ctx:
+            runner = DetailTabs(ctx, tabs, limiter, stats, max_duration=max_duration)
+            try:
+                for listing_id, _, details in runner.parse(chunk):
+                    if details:
+                        batch.append((listing_id, details))
+                    elif on_result:
+                        on_result(listing_id, "detail page not parsed")
+                    if len(batch) >= batch_size:
+                        write_details_batch(conn, batch, stats, on_result)
+                        batch = []
+                        LOGGER.info(stats.summary())
+            except Exception as e:
+                # Dead browser / closed page: the lease is recycled, go on with the next chunk
+                ctx.fail()
+                stats.failed += 1
+                LOGGER.error(f"❌ Detail tabs failed: {e}")
+            finally:
+                runner.close()
+
+    if batch:
+        write_details_batch(conn, batch, stats, on_result)
+    LOGGER.info(stats.summary())
+    LOGGER.info(pool.stats.summary())
+    return stats
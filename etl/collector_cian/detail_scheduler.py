@@ -0,0 +1,314 @@
+"""Priority queue of listings whose detail page is worth (re)parsing.
+
+A detail page costs a rate-limited page load, so the budget should go to
+the listings where it improves valuations most. refresh_detail_queue()
+scores active listings into listing_detail_queue (migration 022):
+
+- need: missing house_year, description or photos, never parsed or parsed
+  long ago, price changed since the last parse. Fields still missing
+  after a recent parse are probably not on the page, so for parsed
+  listings they count in proportion to the parse age.
+- value: listings used as comparables in recent valuations
+  (valuation_comparables) get their need multiplied by up to
+  1 + COMPARABLE_BOOST.
+
+Workers claim the highest priority rows (FOR UPDATE SKIP LOCKED, so
+several can run at once), parse them with parse_details_concurrently and
+drop them from the queue in the same savepoint as the saved details;
+pages that were not parsed or saved are retried with backoff.
+
+Usage::
+
+    refresh_detail_queue(conn)
+    stats = run_detail_queue(conn, budget=200, tabs=3)
+"""
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from .detail_parser import DETAIL_TABS, DetailStats, parse_details_concurrently
+
+LOGGER = logging.getLogger(__name__)
+
+# Need weights
+WEIGHT_HOUSE_YEAR = 30.0
+WEIGHT_DESCRIPTION = 20.0
+WEIGHT_PHOTOS = 15.0
+WEIGHT_NEVER_PARSED = 25.0
+WEIGHT_STALE = 20.0
+WEIGHT_PRICE_CHANGE = 25.0
+
+# A parse counts as fully stale after this many days
+STALE_DAYS = float(os.getenv("CIAN_DETAIL_STALE_DAYS", "30"))
+# Relative price change that earns the full WEIGHT_PRICE_CHANGE
+PRICE_CHANGE_FULL = 0.10
+# Comparable uses in the last COMPARABLE_DAYS: up to COMPARABLE_CAP uses multiply need by 1 + COMPARABLE_BOOST
+COMPARABLE_DAYS = int(os.getenv("CIAN_DETAIL_COMPARABLE_DAYS", "30"))
+COMPARABLE_CAP = 5
+COMPARABLE_BOOST = 2.0
+# Listings below this priority are not queued
+MIN_PRIORITY = float(os.getenv("CIAN_DETAIL_MIN_PRIORITY", "5"))
+
+# Claimed rows are invisible to other workers for this long
+CLAIM_LEASE_SECONDS = 3600
+REFRESH_CHUNK_SIZE = 1000
+
+CANDIDATES_SQL = """
+    SELECT
+        l.id,
+        l.house_year IS NULL,
+        l.description IS NULL,
+        NOT EXISTS (SELECT 1 FROM listing_photos p WHERE p.listing_id = l.id),
+        EXTRACT(EPOCH FROM NOW() - l.details_parsed_at) / 86400,
+        current_price.price,
+        parsed_price.price,
+        COALESCE(comparables.uses, 0)
+    FROM listings l
+    LEFT JOIN LATERAL (
+        SELECT price FROM listing_prices lp
+        WHERE lp.id = l.id
+        ORDER BY lp.seen_at DESC LIMIT 1
+    ) current_price ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT price FROM listing_prices lp
+        WHERE lp.id = l.id AND lp.seen_at <= l.details_parsed_at
+        ORDER BY lp.seen_at DESC LIMIT 1
+    ) parsed_price ON TRUE
+    LEFT JOIN (
+        SELECT listing_id, COUNT(*) AS uses
+        FROM valuation_comparables
+        WHERE created_at >= NOW() - make_interval(days => %s)
+        GROUP BY listing_id
+    ) comparables ON comparables.listing_id = l.id
+    WHERE l.is_active = TRUE AND l.url IS NOT NULL
+"""
+
+
+@dataclass
+class DetailCandidate:
+    """What is known about a listing's detail data."""
+
+    listing_id: int
+    missing_house_year: bool = False
+    missing_description: bool = False
+    missing_photos: bool = False
+    parse_age_days: Optional[float] = None  # None: never parsed
+    current_price: Optional[float] = None
+    parsed_price: Optional[float] = None  # latest price at the last parse
+    comparable_uses: int = 0
+
+
+def score_candidate(candidate: DetailCandidate) -> Tuple[float, List[str]]:
+    """
+    Priority of (re)parsing a listing (see module docstring).
+
+    Returns
+    -------
+    (float, list of str)
+        Priority (0 = nothing to gain) and the reasons behind it
+    """
+    reasons: List[str] = []
+    if candidate.parse_age_days is None:
+        age_factor = 1.0
+        need = WEIGHT_NEVER_PARSED
+        reasons.append("never_parsed")
+    else:
+        age_factor = min(max(candidate.parse_age_days, 0.0) / STALE_DAYS, 1.0)
+        need = WEIGHT_STALE * age_factor
+        if age_factor >= 1.0:
+            reasons.append("stale")
+
+    for missing, weight, reason in (
+        (candidate.missing_house_year, WEIGHT_HOUSE_YEAR, "house_year"),
+        (candidate.missing_description, WEIGHT_DESCRIPTION, "description"),
+        (candidate.missing_photos, WEIGHT_PHOTOS, "photos"),
+    ):
+        if missing:
+            need += weight * age_factor
+            reasons.append(reason)
+
+    if candidate.current_price and candidate.parsed_price:
+        change = abs(float(candidate.current_price) - float(candidate.parsed_price)) / float(candidate.parsed_price)
+        if change > 0:
+            need += WEIGHT_PRICE_CHANGE * min(change / PRICE_CHANGE_FULL, 1.0)
+            reasons.append("price_changed")
+
+    if need <= 0:
+        return 0.0, []
+    uses = min(candidate.comparable_uses, COMPARABLE_CAP)
+    if uses:
+        reasons.append("comparable")
+    return round(need * (1 + COMPARABLE_BOOST * uses / COMPARABLE_CAP), 2), reasons
+
+
+def _write_scores(conn, rows: List[Tuple[int, float, List[str]]]) -> None:
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            """
+            INSERT INTO listing_detail_queue (listing_id, priority, reasons)
+            VALUES %s
+            ON CONFLICT (listing_id) DO UPDATE SET
+                priority = EXCLUDED.priority,
+                reasons = EXCLUDED.reasons,
+                scored_at = NOW()
+            """,
+            rows,
+            template="(%s, %s, %s::text[])",
+            page_size=len(rows),
+        )
+
+
+def refresh_detail_queue(conn, min_priority: float = MIN_PRIORITY) -> int:
+    """
+    Rescore active listings into listing_detail_queue (commits).
+
+    Rows keep their attempts and backoff; listings that no longer reach
+    min_priority (or went inactive) leave the queue.
+
+    Returns
+    -------
+    int
+        Listings queued
+    """
+    queued = 0
+    rows: List[Tuple[int, float, List[str]]] = []
+    with conn.cursor(name="detail_queue_candidates") as candidates:
+        candidates.itersize = REFRESH_CHUNK_SIZE
+        candidates.execute(CANDIDATES_SQL, (COMPARABLE_DAYS,))
+        for row in candidates:
+            priority, reasons = score_candidate(DetailCandidate(*row))
+            if priority < min_priority:
+                continue
+            rows.append((row[0], priority, reasons))
+            if len(rows) >= REFRESH_CHUNK_SIZE:
+                _write_scores(conn, rows)
+                queued += len(rows)
+                rows = []
+    if rows:
+        _write_scores(conn, rows)
+        queued += len(rows)
+
+    with conn.cursor() as cur:
+        # Everything rescored above has scored_at = NOW() (transaction start)
+        cur.execute("DELETE FROM listing_detail_queue WHERE scored_at < NOW()")
+        dropped = cur.rowcount
+    conn.commit()
+    LOGGER.info(f"🗂️ Detail queue refreshed: {queued} listings queued, {dropped} dropped")
+    return queued
+
+
+def claim_detail_batch(conn, limit: int, lease_seconds: int = CLAIM_LEASE_SECONDS) -> List[Tuple[int, str]]:
+    """
+    Claim up to ``limit`` of the highest priority listings (commits).
+
+    Claimed rows are hidden from other workers for lease_seconds; rows
+    that are neither completed nor failed by then are claimed again.
+
+    Returns
+    -------
+    list of (listing_id, url)
+        Highest priority first
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            WITH claimed AS (
+                SELECT listing_id FROM listing_detail_queue
+                WHERE available_at <= NOW()
+                ORDER BY priority DESC
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE listing_detail_queue q
+            SET available_at = NOW() + make_interval(secs => %s)
+            FROM claimed, listings l
+            WHERE q.listing_id = claimed.listing_id AND l.id = q.listing_id
+            RETURNING q.listing_id, l.url, q.priority
+            """,
+            (limit, lease_seconds),
+        )
+        rows = cur.fetchall()
+    conn.commit()
+    return [(listing_id, url) for listing_id, url, _ in sorted(rows, key=lambda r: r[2], reverse=True)]
+
+
+def complete_detail(conn, listing_id: int) -> None:
+    """Drop a parsed listing from the queue (no commit).
+
+    details_parsed_at is set here as well, so listings skipped on the
+    detail page (newbuildings, shares) are not rescheduled at once.
+    """
+    with conn.cursor() as cur:
+        cur.execute("UPDATE listings SET details_parsed_at = NOW() WHERE id = %s", (listing_id,))
+        cur.execute("DELETE FROM listing_detail_queue WHERE listing_id = %s", (listing_id,))
+
+
+def fail_detail(conn, listing_id: int, error: str) -> None:
+    """Retry later: 2, 4, 8 ... 64 hours after each failure (no commit)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE listing_detail_queue
+            SET attempts = attempts + 1,
+                last_error = %s,
+                available_at = NOW() + INTERVAL '1 hour' * power(2, LEAST(attempts + 1, 6))
+            WHERE listing_id = %s
+            """,
+            (error, listing_id),
+        )
+
+
+def run_detail_queue(
+    conn,
+    budget: int,
+    *,
+    tabs: int = DETAIL_TABS,
+    max_duration: Optional[int] = None,
+    refresh: bool = True,
+    **parse_options,
+) -> DetailStats:
+    """
+    Parse the ``budget`` most valuable detail pages.
+
+    Parameters
+    ----------
+    conn : psycopg2 connection
+    budget : int
+        Detail pages to load
+    tabs : int
+        Concurrent tabs (detail_parser)
+    refresh : bool
+        Rescore the queue first
+    **parse_options :
+        Passed to parse_details_concurrently (pool, limiter, batch_size)
+    """
+    if refresh:
+        refresh_detail_queue(conn)
+    listing_urls = claim_detail_batch(conn, budget)
+    if not listing_urls:
+        LOGGER.info("✅ Detail queue is empty")
+        return DetailStats()
+
+    def on_result(listing_id, error):
+        # Saved listings: inside their savepoint, dropped only if the save is kept
+        if error is None:
+            complete_detail(conn, listing_id)
+        else:
+            fail_detail(conn, listing_id, error)
+
+    stats = parse_details_concurrently(
+        conn, listing_urls,
+        tabs=max(tabs, 1),
+        max_duration=max_duration,
+        on_result=on_result,
+        **parse_options,
+    )
+    # Failures after the last written batch
+    conn.commit()
+    return stats
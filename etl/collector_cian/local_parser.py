@@ -31,7 +31,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlencode
 
-from playwright.sync_api import sync_playwright, Page
+from playwright.sync_api import Page
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
@@ -40,6 +40,7 @@ from etl.collector_cian.browser_fetcher import (
     _parse_offers_from_html,
     clean_address_text,
 )
+from etl.collector_cian.browser_pool import get_browser_pool
 from etl.collector_cian.mapper import to_listing, to_price
 from etl.upsert import get_db_connection, upsert_listing, upsert_price_if_changed
 
@@ -313,63 +314,50 @@ def collect_local(
 
     all_offers = []
 
-    with sync_playwright() as p:
-        # ВАЖНО: Запуск БЕЗ ПРОКСИ!
-        LOGGER.info("🔓 Запуск браузера БЕЗ ПРОКСИ (используем cookies)")
-        browser = p.chromium.launch(headless=True)
-
-        context = browser.new_context(
-            storage_state=str(storage_path),
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-            ),
-        )
-        context.add_init_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
-        )
-
-        page = context.new_page()
-
-        for page_num in range(1, pages + 1):
-            # Строим URL
-            if custom_url:
-                url = custom_url + f"&p={page_num}" if "?" in custom_url else custom_url + f"?p={page_num}"
-            else:
-                url = build_local_url(
-                    location_key=location_key,
-                    subdomain=subdomain,
-                    page=page_num,
-                )
-
-            LOGGER.info(f"📄 Страница {page_num}/{pages}")
-
-            offers = parse_page(page, url)
-
-            if not offers:
-                LOGGER.info(f"  ⚠️ Нет объявлений, останавливаемся")
-                break
-
-            # Фильтруем по адресу
-            if address_filters:
-                filtered = filter_by_address(offers, address_filters)
-                LOGGER.info(f"  ✓ Найдено {len(offers)} → отфильтровано {len(filtered)}")
-                all_offers.extend(filtered)
-
-                # Логируем найденные
-                for o in filtered[:3]:
-                    addr = o.get("address", "N/A")[:50]
-                    price = o.get("price", 0)
-                    LOGGER.info(f"    • {addr} - {price:,} ₽")
-            else:
-                all_offers.extend(offers)
-                LOGGER.info(f"  ✓ Найдено {len(offers)} объявлений")
-
-            # Пауза между страницами
-            time.sleep(2)
-
-        browser.close()
-
+    # ВАЖНО: БЕЗ ПРОКСИ! Тёплый браузер с cookies из общего пула
+    LOGGER.info("🔓 Браузер БЕЗ ПРОКСИ (используем cookies, общий пул)")
+    pool = get_browser_pool(headless=True)
+
+    for page_num in range(1, pages + 1):
+        # Строим URL
+        if custom_url:
+            url = custom_url + f"&p={page_num}" if "?" in custom_url else custom_url + f"?p={page_num}"
+        else:
+            url = build_local_url(
+                location_key=location_key,
+                subdomain=subdomain,
+                page=page_num,
+            )
+
+        LOGGER.info(f"📄 Страница {page_num}/{pages}")
+
+        with pool.lease() as ctx:
+            offers = parse_page(ctx.page, url)
+            ctx.count_page()
+
+        if not offers:
+            LOGGER.info(f"  ⚠️ Нет объявлений, останавливаемся")
+            break
+
+        # Фильтруем по адресу
+        if address_filters:
+            filtered = filter_by_address(offers, address_filters)
+            LOGGER.info(f"  ✓ Найдено {len(offers)} → отфильтровано {len(filtered)}")
+            all_offers.extend(filtered)
+
+            # Логируем найденные
+            for o in filtered[:3]:
+                addr = o.get("address", "N/A")[:50]
+                price = o.get("price", 0)
+                LOGGER.info(f"    • {addr} - {price:,} ₽")
+        else:
+            all_offers.extend(offers)
+            LOGGER.info(f"  ✓ Найдено {len(offers)} объявлений")
+
+        # Пауза между страницами
+        time.sleep(2)
+
+    LOGGER.info(pool.stats.summary())
     LOGGER.info("")
     LOGGER.info("=" * 60)
     LOGGER.info(f"📊 ИТОГО: {len(all_offers)} объявлений")
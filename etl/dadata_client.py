@@ -0,0 +1,431 @@
+"""
+Unified DaData client with a persistent response cache.
+
+The API (geocode_helper) and the ETL (fias_normalizer, geocoder) used to
+call DaData independently for the same addresses. All calls now go
+through one client:
+
+- responses are cached in the `dadata_cache` table (db/migrations/017_dadata_cache.sql)
+  keyed by endpoint + normalized query, with an in-process LRU in front;
+- empty answers ("nothing found") are cached with a shorter TTL, errors
+  (timeouts, 403/429/5xx) are never cached;
+- concurrent identical requests are coalesced into one HTTP call
+  (single-flight);
+- hit rates are exported for /metrics.
+
+Usage:
+    from etl.dadata_client import get_dadata_client
+    suggestions = get_dadata_client().suggest_address("Москва, Тверская 1")
+    cleaned = get_dadata_client().clean_address("мск тверская 1")
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+LOGGER = logging.getLogger(__name__)
+
+SUGGEST_ADDRESS_URL = "https://suggestions.dadata.ru/suggestions/api/4_1/rs/suggest/address"
+CLEAN_ADDRESS_URL = "https://cleaner.dadata.ru/api/v1/clean/address"
+
+DADATA_CACHE_ENABLED = os.getenv("DADATA_CACHE", "1") == "1"
+DADATA_CACHE_TTL = float(os.getenv("DADATA_CACHE_TTL_DAYS", "30")) * 86400
+DADATA_NEGATIVE_TTL = float(os.getenv("DADATA_NEGATIVE_TTL_HOURS", "24")) * 3600
+DADATA_MEMORY_CACHE_SIZE = int(os.getenv("DADATA_MEMORY_CACHE_SIZE", "4096"))
+DADATA_REQUESTS_PER_SECOND = float(os.getenv("DADATA_REQUESTS_PER_SECOND", "10"))
+CLEAN_BATCH_SIZE = 10  # DaData clean limit per request
+# After a cache table error, skip it for this long instead of failing every call
+STORE_RETRY_SECONDS = 60.0
+# How long a coalesced request waits for the in-flight one
+SINGLE_FLIGHT_TIMEOUT = 30.0
+
+_MISSING = object()
+_SPACES_RE = re.compile(r'\s+')
+_PUNCT_RE = re.compile(r'\s*([,.])\s*')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key form of a query: case, ё, whitespace and spacing around
+    punctuation don't change DaData's answer.
+
+    "Москва,  ул.Тверская , 1" -> "москва, ул. тверская, 1"
+    """
+    query = _SPACES_RE.sub(' ', query.lower().replace('ё', 'е'))
+    return _PUNCT_RE.sub(r'\1 ', query).strip(' ,.')
+
+
+class DadataClient:
+    """DaData suggest/clean calls behind a two-level cache and single-flight."""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        cache_enabled: bool = DADATA_CACHE_ENABLED,
+        memory_cache_size: int = DADATA_MEMORY_CACHE_SIZE,
+        ttl: float = DADATA_CACHE_TTL,
+        negative_ttl: float = DADATA_NEGATIVE_TTL,
+        api_key: Optional[str] = None,
+        secret_key: Optional[str] = None
+    ):
+        self.dsn = dsn
+        self.cache_enabled = cache_enabled
+        self.memory_cache_size = memory_cache_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._api_key = api_key
+        self._secret_key = secret_key
+        # key -> (expires_at epoch, response)
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._last_request = 0.0
+        self._store_retry_at = 0.0
+        self._counters = {
+            'lookups': 0,
+            'memory_hits': 0,
+            'store_hits': 0,
+            'negative_hits': 0,
+            'coalesced': 0,
+            'api_calls': 0,
+            'errors': 0,
+        }
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self._api_key or os.getenv("DADATA_API_KEY")
+
+    @property
+    def secret_key(self) -> Optional[str]:
+        return self._secret_key or os.getenv("DADATA_SECRET_KEY")
+
+    # --- public API ---
+
+    def suggest_address(self, query: str, timeout: float = 5.0) -> Optional[List[Dict[str, Any]]]:
+        """
+        Top address suggestion (Suggestions API, free tier).
+
+        Returns:
+            List with at most one suggestion ({'value', 'data', ...}), [] if
+            DaData found nothing, None on error or without DADATA_API_KEY
+        """
+        if not query or not query.strip() or not self.api_key:
+            return None
+        return self._get_many(
+            'suggest_address', [query.strip()],
+            lambda queries: [self._post_suggest(q, timeout) for q in queries]
+        )[0]
+
+    def clean_address(self, address: str, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+        """Standardized address (Clean API, paid). None on error or without credentials."""
+        return self.clean_addresses([address], timeout=timeout)[0]
+
+    def clean_addresses(
+        self,
+        addresses: Sequence[str],
+        timeout: float = 30.0,
+        batch_size: int = CLEAN_BATCH_SIZE
+    ) -> List[Optional[Dict[str, Any]]]:
+        """clean_address() for many addresses; cache misses are sent in batches (max 10)."""
+        if not self.api_key or not self.secret_key:
+            return [None] * len(addresses)
+        return self._get_many(
+            'clean_address', [a.strip() if a else "" for a in addresses],
+            lambda queries: self._post_clean(queries, timeout),
+            batch_size=max(1, min(batch_size, CLEAN_BATCH_SIZE))
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['inflight'] = len(self._inflight)
+        hits = stats['memory_hits'] + stats['store_hits'] + stats['coalesced']
+        stats['hit_rate'] = round(hits / stats['lookups'], 3) if stats['lookups'] else 0.0
+        return stats
+
+    def render_prometheus(self) -> str:
+        """Cache hit rate and call counters in Prometheus text format."""
+        stats = self.stats()
+        lines = [
+            "# HELP dadata_cache_hit_rate Share of DaData lookups served without an HTTP call",
+            "# TYPE dadata_cache_hit_rate gauge",
+            f"dadata_cache_hit_rate {stats['hit_rate']}",
+            "# TYPE dadata_cache_hits_total counter",
+            f'dadata_cache_hits_total{{layer="memory"}} {stats["memory_hits"]}',
+            f'dadata_cache_hits_total{{layer="store"}} {stats["store_hits"]}',
+            f'dadata_cache_hits_total{{layer="coalesced"}} {stats["coalesced"]}',
+        ]
+        for key in ('lookups', 'negative_hits', 'api_calls', 'errors'):
+            name = f"dadata_{key}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {stats[key]}")
+        return "\n".join(lines) + "\n"
+
+    def clear_memory_cache(self):
+        with self._lock:
+            self._memory.clear()
+
+    # --- lookup ---
+
+    @staticmethod
+    def _key(endpoint: str, query: str) -> str:
+        return f"{endpoint}:{normalize_query(query)}"
+
+    def _get_many(
+        self,
+        endpoint: str,
+        queries: List[str],
+        fetch: Callable[[List[str]], List[Any]],
+        batch_size: int = 1
+    ) -> List[Any]:
+        """Memory cache -> cache table -> in-flight request -> DaData, per query."""
+        keys = [self._key(endpoint, q) for q in queries]
+        results: List[Any] = [_MISSING] * len(queries)
+
+        for i, key in enumerate(keys):
+            results[i] = self._memory_get(key)
+        memory_hits = sum(1 for r in results if r is not _MISSING)
+
+        missing = {key for key, r in zip(keys, results) if r is _MISSING}
+        stored = self._store_get(missing) if missing else {}
+        for i, key in enumerate(keys):
+            if results[i] is _MISSING and key in stored:
+                expires_at, results[i] = stored[key]
+                self._memory_put(key, results[i], expires_at)
+
+        # Single-flight: one leader per key, everyone else waits for its Future
+        leaders: Dict[str, Tuple[str, Future]] = {}
+        pending: Dict[int, Future] = {}
+        coalesced = 0
+        with self._lock:
+            for i, key in enumerate(keys):
+                if results[i] is not _MISSING:
+                    continue
+                if key in leaders:
+                    pending[i] = leaders[key][1]
+                    continue
+                future = self._inflight.get(key)
+                if future is not None:
+                    coalesced += 1
+                else:
+                    future = Future()
+                    self._inflight[key] = future
+                    leaders[key] = (queries[i], future)
+                pending[i] = future
+
+            self._counters['lookups'] += len(keys)
+            self._counters['memory_hits'] += memory_hits
+            self._counters['store_hits'] += sum(1 for key in keys if key in stored)
+            self._counters['coalesced'] += coalesced
+            self._counters['negative_hits'] += sum(
+                1 for r in results if r is not _MISSING and not r
+            )
+
+        if leaders:
+            self._fetch_leaders(endpoint, list(leaders.items()), fetch, batch_size)
+
+        for i, future in pending.items():
+            try:
+                results[i] = future.result(timeout=SINGLE_FLIGHT_TIMEOUT)
+            except Exception:
+                results[i] = None
+        return [None if r is _MISSING else r for r in results]
+
+    def _fetch_leaders(
+        self,
+        endpoint: str,
+        items: List[Tuple[str, Tuple[str, Future]]],
+        fetch: Callable[[List[str]], List[Any]],
+        batch_size: int
+    ):
+        try:
+            for start in range(0, len(items), batch_size):
+                chunk = items[start:start + batch_size]
+                try:
+                    values = fetch([query for _, (query, _) in chunk])
+                except Exception as e:
+                    LOGGER.warning(f"⚠️ DaData {endpoint} failed: {e}")
+                    self._count('errors', 1)
+                    values = [None] * len(chunk)
+
+                to_store = []
+                for (key, (query, future)), value in zip(chunk, values):
+                    if value is not None:  # None is an error: not cached
+                        ttl = self.ttl if value else self.negative_ttl
+                        self._memory_put(key, value, time.time() + ttl)
+                        to_store.append((key, endpoint, query, value, ttl))
+                    future.set_result(value)
+                self._store_put(to_store)
+        finally:
+            with self._lock:
+                for key, (_, future) in items:
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+                    if not future.done():
+                        future.set_result(None)
+
+    # --- HTTP ---
+
+    def _rate_limit(self):
+        with self._rate_lock:
+            wait = self._last_request + 1.0 / DADATA_REQUESTS_PER_SECOND - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+
+    def _post_suggest(self, query: str, timeout: float) -> Optional[List[Dict[str, Any]]]:
+        self._rate_limit()
+        self._count('api_calls', 1)
+        try:
+            response = requests.post(
+                SUGGEST_ADDRESS_URL,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Token {self.api_key}"
+                },
+                json={"query": query, "count": 1},
+                timeout=timeout
+            )
+        except requests.exceptions.RequestException as e:
+            LOGGER.warning(f"⚠️ DaData suggest error: {e}")
+            self._count('errors', 1)
+            return None
+
+        if response.status_code != 200:
+            hint = " - check API key or daily limit" if response.status_code == 403 else ""
+            LOGGER.warning(f"⚠️ DaData suggest returned {response.status_code}{hint}")
+            self._count('errors', 1)
+            return None
+        return response.json().get('suggestions', [])
+
+    def _post_clean(self, addresses: List[str], timeout: float) -> List[Optional[Dict[str, Any]]]:
+        self._rate_limit()
+        self._count('api_calls', 1)
+        response = requests.post(
+            CLEAN_ADDRESS_URL,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Token {self.api_key}",
+                "X-Secret": self.secret_key,
+            },
+            json=addresses,
+            timeout=timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, list) or len(data) != len(addresses):
+            raise ValueError(f"expected {len(addresses)} results, got {len(data) if isinstance(data, list) else type(data).__name__}")
+        return [item or {} for item in data]
+
+    # --- cache layers ---
+
+    def _memory_get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None or entry[0] <= time.time():
+                return _MISSING
+            self._memory.move_to_end(key)
+            return entry[1]
+
+    def _memory_put(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_cache_size:
+                self._memory.popitem(last=False)
+
+    def _store_available(self) -> bool:
+        return self.cache_enabled and time.monotonic() >= self._store_retry_at
+
+    def _store_failed(self, e: Exception):
+        if _pool_busy(e):
+            # All pooled connections in use: skip the store for this call only
+            LOGGER.warning(f"⚠️ DaData cache skipped: {e}")
+            return
+        self._store_retry_at = time.monotonic() + STORE_RETRY_SECONDS
+        LOGGER.warning(f"⚠️ DaData cache table unavailable ({e}), memory cache only for {STORE_RETRY_SECONDS:.0f}s")
+
+    def _store_get(self, keys) -> Dict[str, Tuple[float, Any]]:
+        if not self._store_available():
+            return {}
+        try:
+            from etl.valuation.db_pool import pooled_connection
+
+            with pooled_connection(self.dsn) as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT cache_key, response, EXTRACT(EPOCH FROM expires_at) AS expires_at
+                    FROM dadata_cache
+                    WHERE cache_key = ANY(%s) AND expires_at > NOW()
+                """, (list(keys),))
+                rows = cur.fetchall()
+                cur.close()
+        except Exception as e:
+            self._store_failed(e)
+            return {}
+        return {r['cache_key']: (float(r['expires_at']), r['response']) for r in rows}
+
+    def _store_put(self, rows: List[Tuple[str, str, str, Any, float]]):
+        if not rows or not self._store_available():
+            return
+        try:
+            from psycopg2.extras import Json, execute_values
+            from etl.valuation.db_pool import pooled_connection
+
+            with pooled_connection(self.dsn) as conn:
+                cur = conn.cursor()
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO dadata_cache (cache_key, endpoint, query, response, is_negative, fetched_at, expires_at)
+                    VALUES %s
+                    ON CONFLICT (cache_key) DO UPDATE
+                    SET
+                        query = EXCLUDED.query,
+                        response = EXCLUDED.response,
+                        is_negative = EXCLUDED.is_negative,
+                        fetched_at = EXCLUDED.fetched_at,
+                        expires_at = EXCLUDED.expires_at
+                    """,
+                    [(key, endpoint, query, Json(value), not value, ttl) for key, endpoint, query, value, ttl in rows],
+                    template="(%s, %s, %s, %s, %s, NOW(), NOW() + make_interval(secs => %s))"
+                )
+                conn.commit()
+                cur.close()
+        except Exception as e:
+            self._store_failed(e)
+
+    def _count(self, key: str, n: int):
+        with self._lock:
+            self._counters[key] += n
+
+
+def _pool_busy(e: Exception) -> bool:
+    try:
+        from etl.valuation.db_pool import PoolTimeout
+    except ImportError:
+        return False
+    return isinstance(e, PoolTimeout)
+
+
+_client: Optional[DadataClient] = None
+_client_lock = threading.Lock()
+
+
+def get_dadata_client(dsn: Optional[str] = None) -> DadataClient:
+    """Get the process-wide DaData client (shared caches and in-flight requests)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = DadataClient(dsn=dsn)
+    return _client
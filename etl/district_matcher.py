@@ -2,10 +2,17 @@
 from __future__ import annotations
 
 import logging
+import re
 from typing import Optional, Tuple
 
+from psycopg2.extensions import cursor as PlainCursor
+
+from etl.address_parser import extract_district_name
+
 LOGGER = logging.getLogger(__name__)
 
+_DISTRICT_SUFFIX_RE = re.compile(r'(ий|ое|ая|ый)$')
+
 
 def find_district_by_coordinates(conn, lat: float, lon: float) -> Optional[int]:
     """
@@ -57,10 +64,114 @@ def update_listing_district(conn, listing_id: int, district_id: int) -> bool:
         return cur.rowcount > 0
 
 
+# Keyset-paginated chunk of listing ids: (last id, chunk size) -> upper id bound
+_CHUNK_BOUND_SQL = """
+    SELECT MAX(id) FROM (
+        SELECT id FROM listings WHERE id > %s ORDER BY id LIMIT %s
+    ) chunk
+"""
+
+
+def _iter_id_chunks(conn, chunk_size: int):
+    """Yield (low, high] listing id ranges of about chunk_size rows."""
+    last_id = -1
+    while True:
+        # Plain tuple cursor even if the connection defaults to RealDictCursor
+        with conn.cursor(cursor_factory=PlainCursor) as cur:
+            cur.execute(_CHUNK_BOUND_SQL, (last_id, chunk_size))
+            upper = cur.fetchone()[0]
+        if upper is None:
+            return
+        yield last_id, upper
+        last_id = upper
+
+
+def assign_districts_bulk(conn, chunk_size: int = 20000, only_missing: bool = True) -> int:
+    """
+    Assign districts with one spatial join per chunk of listings.
+
+    The most granular containing district wins (ORDER BY level DESC), same
+    as find_district_by_coordinates(). Each chunk is committed separately so
+    long runs don't hold locks on the whole table.
+
+    Args:
+        conn: Database connection
+        chunk_size: Listings per UPDATE
+        only_missing: Only listings without district (False: recheck all,
+            e.g. after loading new boundaries)
+
+    Returns:
+        Number of listings updated
+    """
+    missing_filter = "AND l2.district_id IS NULL" if only_missing else ""
+    total = 0
+    for low, high in _iter_id_chunks(conn, chunk_size):
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE listings l
+                SET district_id = m.district_id
+                FROM (
+                    SELECT DISTINCT ON (l2.id) l2.id, d.district_id
+                    FROM listings l2
+                    JOIN districts d
+                      ON ST_Contains(d.geometry, ST_SetSRID(ST_MakePoint(l2.lon, l2.lat), 4326))
+                    WHERE l2.id > %s AND l2.id <= %s
+                      AND l2.lat IS NOT NULL
+                      AND l2.lon IS NOT NULL
+                      {missing_filter}
+                    ORDER BY l2.id, d.level DESC
+                ) m
+                WHERE l.id = m.id
+                  AND l.district_id IS DISTINCT FROM m.district_id;
+                """,
+                (low, high)
+            )
+            total += cur.rowcount
+        conn.commit()
+    return total
+
+
+def assign_property_segments_bulk(conn, chunk_size: int = 20000, only_missing: bool = True) -> int:
+    """
+    Assign property_segment_id (building type × height × rooms) in chunks.
+
+    Returns:
+        Number of listings updated
+    """
+    missing_filter = "AND l.property_segment_id IS NULL" if only_missing else ""
+    total = 0
+    for low, high in _iter_id_chunks(conn, chunk_size):
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE listings l
+                SET property_segment_id = ps.segment_id
+                FROM property_segments ps
+                WHERE l.id > %s AND l.id <= %s
+                  AND l.building_type IS NOT NULL
+                  AND l.total_floors IS NOT NULL
+                  AND l.rooms IS NOT NULL
+                  AND ps.building_type = normalize_building_type(l.building_type)
+                  AND ps.building_height = classify_building_height(l.total_floors)
+                  AND ps.rooms_count = LEAST(l.rooms, 5)
+                  AND l.property_segment_id IS DISTINCT FROM ps.segment_id
+                  {missing_filter};
+                """,
+                (low, high)
+            )
+            total += cur.rowcount
+        conn.commit()
+    return total
+
+
 def assign_districts_to_listings(conn, limit: int = 1000) -> Tuple[int, int]:
     """
     Assign districts to listings that have coordinates but no district.
 
+    One spatial join for the whole batch (see assign_districts_bulk() for
+    the full table).
+
     Args:
         conn: Database connection
         limit: Maximum number of listings to process
@@ -68,40 +179,44 @@ def assign_districts_to_listings(conn, limit: int = 1000) -> Tuple[int, int]:
     Returns:
         Tuple of (success_count, not_found_count)
     """
-    # Get listings with coordinates but no district
-    with conn.cursor() as cur:
+    with conn.cursor(cursor_factory=PlainCursor) as cur:
         cur.execute(
             """
-            SELECT id, lat, lon
-            FROM listings
-            WHERE lat IS NOT NULL
-            AND lon IS NOT NULL
-            AND district_id IS NULL
-            LIMIT %s;
+            WITH batch AS (
+                SELECT id, lat, lon
+                FROM listings
+                WHERE lat IS NOT NULL
+                AND lon IS NOT NULL
+                AND district_id IS NULL
+                ORDER BY id
+                LIMIT %s
+            ),
+            matched AS (
+                SELECT DISTINCT ON (b.id) b.id, d.district_id
+                FROM batch b
+                JOIN districts d
+                  ON ST_Contains(d.geometry, ST_SetSRID(ST_MakePoint(b.lon, b.lat), 4326))
+                ORDER BY b.id, d.level DESC
+            ),
+            updated AS (
+                UPDATE listings l
+                SET district_id = m.district_id
+                FROM matched m
+                WHERE l.id = m.id
+                RETURNING l.id
+            )
+            SELECT (SELECT COUNT(*) FROM batch), (SELECT COUNT(*) FROM updated);
             """,
             (limit,)
         )
-        listings = cur.fetchall()
+        processed, success = cur.fetchone()
+    conn.commit()
 
-    if not listings:
+    if not processed:
         LOGGER.info("No listings need district assignment")
         return 0, 0
 
-    LOGGER.info(f"Assigning districts to {len(listings)} listings...")
-
-    success = 0
-    not_found = 0
-
-    for listing_id, lat, lon in listings:
-        district_id = find_district_by_coordinates(conn, lat, lon)
-        if district_id:
-            if update_listing_district(conn, listing_id, district_id):
-                success += 1
-        else:
-            not_found += 1
-            LOGGER.debug(f"No district found for listing {listing_id} at ({lat}, {lon})")
-
-    conn.commit()
+    not_found = processed - success
     LOGGER.info(f"District assignment complete: {success} assigned, {not_found} not found")
 
     return success, not_found
@@ -121,23 +236,11 @@ def extract_district_from_address(address: str) -> Optional[str]:
     Returns:
         District name if found, None otherwise
     """
-    import re
-
-    # Pattern: "р-н <District Name>" or "район <District Name>"
-    patterns = [
-        r'р-н\s+([А-ЯЁа-яё\-]+(?:\s+[А-ЯЁа-яё\-]+)?)',
-        r'район\s+([А-ЯЁа-яё\-]+(?:\s+[А-ЯЁа-яё\-]+)?)',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, address, re.IGNORECASE)
-        if match:
-            district_name = match.group(1).strip()
-            # Clean up common suffixes
-            district_name = re.sub(r'(ий|ое|ая|ый)$', '', district_name)
-            return district_name
-
-    return None
+    district_name = extract_district_name(address, with_okrug=False)
+    if district_name:
+        # Clean up common suffixes
+        district_name = _DISTRICT_SUFFIX_RE.sub('', district_name)
+    return district_name
 
 
 def find_district_by_name(conn, district_name: str) -> Optional[int]:
@@ -216,19 +319,37 @@ def assign_districts_by_address(conn, limit: int = 1000) -> Tuple[int, int]:
 
     LOGGER.info(f"Assigning districts by address to {len(listings)} listings...")
 
-    success = 0
-    not_found = 0
-
+    # One name lookup per distinct district name, one batched UPDATE
+    district_ids_by_name = {}
+    assignments = []
     for listing_id, address in listings:
         district_name = extract_district_from_address(address)
-        if district_name:
-            district_id = find_district_by_name(conn, district_name)
-            if district_id:
-                if update_listing_district(conn, listing_id, district_id):
-                    success += 1
-                    continue
-
-        not_found += 1
+        if not district_name:
+            continue
+        if district_name not in district_ids_by_name:
+            district_ids_by_name[district_name] = find_district_by_name(conn, district_name)
+        district_id = district_ids_by_name[district_name]
+        if district_id:
+            assignments.append((listing_id, district_id))
+
+    success = 0
+    if assignments:
+        from psycopg2.extras import execute_values
+
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                UPDATE listings l
+                SET district_id = v.district_id
+                FROM (VALUES %s) AS v(id, district_id)
+                WHERE l.id = v.id AND l.district_id IS NULL
+                """,
+                assignments,
+                page_size=len(assignments)
+            )
+            success = cur.rowcount
+    not_found = len(listings) - success
 
     conn.commit()
     LOGGER.info(f"District by address complete: {success} assigned, {not_found} not found")
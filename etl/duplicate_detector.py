@@ -197,8 +197,8 @@ class DuplicateDetector:
         return None
 
     def link_duplicates(self, listing_id: int, original_id: int,
-                        similarity: float, reason: str):
-        """Сохранить связь между дублями в БД."""
+                        similarity: float, reason: str, commit: bool = True):
+        """Сохранить связь между дублями в БД (commit=False - в транзакции вызывающего)."""
         with self.conn.cursor() as cur:
             cur.execute("""
                 INSERT INTO listing_duplicates
@@ -226,7 +226,8 @@ class DuplicateDetector:
                 'duplicate': listing_id,
             })
 
-        self.conn.commit()
+        if commit:
+            self.conn.commit()
 
     def get_price_history_from_duplicates(self, listing_id: int) -> List[Dict]:
         """
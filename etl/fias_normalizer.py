@@ -8,13 +8,18 @@ from __future__ import annotations
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
 
 import re
-import requests
+
+from etl.dadata_client import get_dadata_client, normalize_query
 
 LOGGER = logging.getLogger(__name__)
 
+# Concurrent API requests in batch_normalize_addresses()
+FIAS_NORMALIZE_WORKERS = int(os.getenv("FIAS_NORMALIZE_WORKERS", "8"))
+
 
 def _clean_address_for_dadata(address: str) -> str:
     """Clean address by removing district info that confuses DaData Suggest API.
@@ -63,9 +68,6 @@ def _clean_address_for_dadata(address: str) -> str:
 
     return address
 
-# DaData Suggest API endpoint (FREE, 10k/day)
-DADATA_SUGGEST_URL = "https://suggestions.dadata.ru/suggestions/api/4_1/rs/suggest/address"
-
 # FIAS Public API as fallback (usually blocked from VPS)
 FIAS_PUBLIC_AVAILABLE = False
 FIAS_USE_LIBRARY = False
@@ -112,65 +114,39 @@ def normalize_address_dadata_suggest(address: str) -> Optional[Dict[str, Any]]:
     # Clean address for better DaData recognition
     cleaned_address = _clean_address_for_dadata(address.strip())
 
-    headers = {
-        "Authorization": f"Token {api_key}",
-        "Content-Type": "application/json",
-    }
-
-    try:
-        response = requests.post(
-            DADATA_SUGGEST_URL,
-            headers=headers,
-            json={"query": cleaned_address, "count": 1},
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            suggestions = data.get("suggestions", [])
-
-            if suggestions:
-                s = suggestions[0]
-                d = s.get("data", {})
-
-                fias_address = s.get("value")
-                fias_id = d.get("fias_id")
-
-                # Extract coordinates
-                lat = None
-                lon = None
-                if d.get("geo_lat"):
-                    try:
-                        lat = float(d["geo_lat"])
-                    except (ValueError, TypeError):
-                        pass
-                if d.get("geo_lon"):
-                    try:
-                        lon = float(d["geo_lon"])
-                    except (ValueError, TypeError):
-                        pass
-
-                return {
-                    "fias_address": fias_address,
-                    "fias_id": fias_id,
-                    "postal_code": d.get("postal_code"),
-                    "quality_code": 0 if fias_id else 1,
-                    "lat": lat,
-                    "lon": lon,
-                }
-        elif response.status_code == 403:
-            LOGGER.warning("DaData API returned 403 - check API key or daily limit")
-        else:
-            LOGGER.debug(f"DaData Suggest API returned {response.status_code}")
-
-    except requests.exceptions.Timeout:
-        LOGGER.debug(f"DaData Suggest API timeout for: {address[:50]}")
-    except requests.exceptions.RequestException as e:
-        LOGGER.debug(f"DaData Suggest API error: {e}")
-    except Exception as e:
-        LOGGER.debug(f"DaData Suggest failed: {e}")
+    # Cached and shared with the API (etl/dadata_client.py)
+    suggestions = get_dadata_client().suggest_address(cleaned_address, timeout=10)
+    if not suggestions:
+        return None
 
-    return None
+    s = suggestions[0]
+    d = s.get("data", {})
+
+    fias_address = s.get("value")
+    fias_id = d.get("fias_id")
+
+    # Extract coordinates
+    lat = None
+    lon = None
+    if d.get("geo_lat"):
+        try:
+            lat = float(d["geo_lat"])
+        except (ValueError, TypeError):
+            pass
+    if d.get("geo_lon"):
+        try:
+            lon = float(d["geo_lon"])
+        except (ValueError, TypeError):
+            pass
+
+    return {
+        "fias_address": fias_address,
+        "fias_id": fias_id,
+        "postal_code": d.get("postal_code"),
+        "quality_code": 0 if fias_id else 1,
+        "lat": lat,
+        "lon": lon,
+    }
 
 
 def normalize_address_fias_public(address: str) -> Optional[Dict[str, Any]]:
@@ -297,11 +273,39 @@ def normalize_address(address: str, api_key: Optional[str] = None, secret: Optio
     return None
 
 
-def batch_normalize_addresses(addresses: list[str], api_key: Optional[str] = None, secret: Optional[str] = None) -> list[Optional[Dict[str, Any]]]:
-    """Normalize multiple addresses sequentially using the FIAS Public API."""
+def batch_normalize_addresses(
+    addresses: list[str],
+    api_key: Optional[str] = None,
+    secret: Optional[str] = None,
+    max_workers: int = FIAS_NORMALIZE_WORKERS,
+) -> list[Optional[Dict[str, Any]]]:
+    """Normalize multiple addresses concurrently.
+
+    Identical addresses (same normalized query) are sent to the API once.
+    At most ``max_workers`` requests are in flight; the DaData client adds
+    its own rate limit on top.
+    """
     if not addresses:
         return []
-    results: list[Optional[Dict[str, Any]]] = []
+
+    unique: Dict[str, str] = {}
     for address in addresses:
-        results.append(normalize_address(address))
-    return results
+        if address:
+            unique.setdefault(normalize_query(address), address)
+
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    if unique:
+        workers = max(1, min(max_workers, len(unique)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fias-normalize") as executor:
+            normalized = executor.map(_normalize_safely, unique.values())
+            results = dict(zip(unique.keys(), normalized))
+
+    return [results.get(normalize_query(address)) if address else None for address in addresses]
+
+
+def _normalize_safely(address: str) -> Optional[Dict[str, Any]]:
+    try:
+        return normalize_address(address)
+    except Exception as e:
+        LOGGER.warning(f"❌ Normalization error for '{address[:50]}': {e}")
+        return None
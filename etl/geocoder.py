@@ -3,22 +3,13 @@ from __future__ import annotations
 
 import os
 import logging
-import time
 from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
-import requests
+from etl.dadata_client import get_dadata_client
 
 LOGGER = logging.getLogger(__name__)
 
-# DaData API endpoints
-DADATA_CLEAN_URL = "https://cleaner.dadata.ru/api/v1/clean/address"
-DADATA_SUGGEST_URL = "https://suggestions.dadata.ru/suggestions/api/4_1/rs/suggest/address"
-
-# Rate limiting
-DADATA_REQUESTS_PER_SECOND = 10
-_last_request_time = 0.0
-
 
 @dataclass
 class GeocodingResult:
@@ -45,14 +36,29 @@ def _get_dadata_credentials() -> Tuple[Optional[str], Optional[str]]:
     return api_key, secret_key
 
 
-def _rate_limit():
-    """Simple rate limiting for DaData API."""
-    global _last_request_time
-    min_interval = 1.0 / DADATA_REQUESTS_PER_SECOND
-    elapsed = time.time() - _last_request_time
-    if elapsed < min_interval:
-        time.sleep(min_interval - elapsed)
-    _last_request_time = time.time()
+def _to_result(result_data: Optional[Dict[str, Any]]) -> Optional[GeocodingResult]:
+    """GeocodingResult from one DaData clean response item."""
+    if not result_data:
+        return None
+
+    # Extract coordinates
+    lat = result_data.get("geo_lat")
+    lon = result_data.get("geo_lon")
+
+    # Parse quality code (0 = exact match, higher = worse)
+    qc = result_data.get("qc", 10)
+
+    return GeocodingResult(
+        lat=float(lat) if lat else None,
+        lon=float(lon) if lon else None,
+        fias_id=result_data.get("fias_id"),
+        fias_address=result_data.get("result"),
+        postal_code=result_data.get("postal_code"),
+        quality_code=int(qc) if qc is not None else None,
+        district=result_data.get("city_district"),
+        city_district=result_data.get("city_district_with_type"),
+        region=result_data.get("region_with_type"),
+    )
 
 
 def geocode_address(address: str) -> Optional[GeocodingResult]:
@@ -61,6 +67,7 @@ def geocode_address(address: str) -> Optional[GeocodingResult]:
 
     Uses the "clean" API endpoint which normalizes the address
     and returns coordinates, FIAS data, and quality metrics.
+    Responses are cached (etl/dadata_client.py).
 
     Args:
         address: Address string to geocode (e.g., "Москва, ул. Тверская, 1")
@@ -74,73 +81,32 @@ def geocode_address(address: str) -> Optional[GeocodingResult]:
         LOGGER.warning("DaData credentials not configured. Set DADATA_API_KEY and DADATA_SECRET_KEY")
         return None
 
-    _rate_limit()
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Token {api_key}",
-        "X-Secret": secret_key,
-    }
-
     try:
-        response = requests.post(
-            DADATA_CLEAN_URL,
-            headers=headers,
-            json=[address],
-            timeout=10
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        if not data or len(data) == 0:
-            LOGGER.debug(f"Empty response for address: {address[:50]}...")
-            return None
-
-        result_data = data[0]
-
-        # Extract coordinates
-        lat = result_data.get("geo_lat")
-        lon = result_data.get("geo_lon")
-
-        # Parse quality code (0 = exact match, higher = worse)
-        qc = result_data.get("qc", 10)
-
-        result = GeocodingResult(
-            lat=float(lat) if lat else None,
-            lon=float(lon) if lon else None,
-            fias_id=result_data.get("fias_id"),
-            fias_address=result_data.get("result"),
-            postal_code=result_data.get("postal_code"),
-            quality_code=int(qc) if qc is not None else None,
-            district=result_data.get("city_district"),
-            city_district=result_data.get("city_district_with_type"),
-            region=result_data.get("region_with_type"),
-        )
-
-        if result.has_coordinates:
-            LOGGER.debug(f"✅ Geocoded: {address[:50]}... -> ({result.lat}, {result.lon})")
-        else:
-            LOGGER.debug(f"⚠️ No coordinates for: {address[:50]}...")
-
-        return result
-
-    except requests.exceptions.RequestException as e:
-        LOGGER.warning(f"DaData request failed: {e}")
-        return None
+        result = _to_result(get_dadata_client().clean_address(address))
     except (KeyError, ValueError, TypeError) as e:
         LOGGER.warning(f"DaData response parsing failed: {e}")
         return None
 
+    if result is None:
+        LOGGER.debug(f"Empty response for address: {address[:50]}...")
+    elif result.has_coordinates:
+        LOGGER.debug(f"✅ Geocoded: {address[:50]}... -> ({result.lat}, {result.lon})")
+    else:
+        LOGGER.debug(f"⚠️ No coordinates for: {address[:50]}...")
+
+    return result
+
 
 def geocode_addresses_batch(addresses: list[str], batch_size: int = 10) -> list[Optional[GeocodingResult]]:
     """
     Geocode multiple addresses in batches.
 
-    DaData supports up to 10 addresses per request in batch mode.
+    Cached addresses are answered without a request; the rest are sent to
+    DaData up to 10 addresses per request.
 
     Args:
         addresses: List of address strings
-        batch_size: Number of addresses per batch (max 10)
+        batch_size: Number of addresses per request (max 10)
 
     Returns:
         List of GeocodingResult (same order as input), None for failed addresses
@@ -151,59 +117,15 @@ def geocode_addresses_batch(addresses: list[str], batch_size: int = 10) -> list[
         LOGGER.warning("DaData credentials not configured")
         return [None] * len(addresses)
 
-    batch_size = min(batch_size, 10)  # DaData limit
     results = []
-
-    for i in range(0, len(addresses), batch_size):
-        batch = addresses[i:i + batch_size]
-
-        _rate_limit()
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Token {api_key}",
-            "X-Secret": secret_key,
-        }
-
+    for result_data in get_dadata_client().clean_addresses(addresses, batch_size=batch_size):
         try:
-            response = requests.post(
-                DADATA_CLEAN_URL,
-                headers=headers,
-                json=batch,
-                timeout=30
-            )
-            response.raise_for_status()
-
-            data = response.json()
-
-            for j, result_data in enumerate(data):
-                if not result_data:
-                    results.append(None)
-                    continue
-
-                lat = result_data.get("geo_lat")
-                lon = result_data.get("geo_lon")
-                qc = result_data.get("qc", 10)
-
-                result = GeocodingResult(
-                    lat=float(lat) if lat else None,
-                    lon=float(lon) if lon else None,
-                    fias_id=result_data.get("fias_id"),
-                    fias_address=result_data.get("result"),
-                    postal_code=result_data.get("postal_code"),
-                    quality_code=int(qc) if qc is not None else None,
-                    district=result_data.get("city_district"),
-                    city_district=result_data.get("city_district_with_type"),
-                    region=result_data.get("region_with_type"),
-                )
-                results.append(result)
-
-            LOGGER.info(f"Geocoded batch {i//batch_size + 1}: {len(batch)} addresses")
-
-        except Exception as e:
-            LOGGER.warning(f"Batch geocoding failed: {e}")
-            results.extend([None] * len(batch))
+            results.append(_to_result(result_data))
+        except (KeyError, ValueError, TypeError) as e:
+            LOGGER.warning(f"DaData response parsing failed: {e}")
+            results.append(None)
 
+    LOGGER.info(f"Geocoded {sum(1 for r in results if r)} of {len(addresses)} addresses")
     return results
 
 
@@ -1,109 +1,257 @@
-"""CLI tool to normalize existing addresses using the public FIAS API."""
+"""CLI tool to normalize existing addresses using the public FIAS API.
+
+Listings are read in id order in batches. Each batch is deduplicated and
+normalized concurrently (etl/fias_normalizer.batch_normalize_addresses),
+written with one UPDATE and committed together with a checkpoint in
+normalization_runs (db/migrations/018_normalization_runs.sql). An
+interrupted run resumes after the last committed batch; --restart starts
+over from the first listing.
+"""
 from __future__ import annotations
 
 import argparse
 import logging
-from typing import Optional
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
-from etl.address_normalizer import get_normalizer
-from etl.upsert import get_db_connection, upsert_fias_data
+from etl.fias_normalizer import FIAS_NORMALIZE_WORKERS, batch_normalize_addresses
+from etl.upsert import get_db_connection, upsert_fias_data_bulk
 
 LOGGER = logging.getLogger(__name__)
 
+NORMALIZE_BATCH_SIZE = int(os.getenv("FIAS_NORMALIZE_BATCH_SIZE", "500"))
 
-def normalize_all_addresses(limit: Optional[int] = None, skip_existing: bool = True) -> dict:
-    """Normalize addresses stored in the database using FIAS data only."""
-    normalizer = get_normalizer()
-    conn = get_db_connection()
 
-    with conn.cursor() as cur:
-        query = [
-            "SELECT id, address, lat, lon",
-            "FROM listings",
-            "WHERE 1=1",
-        ]
-        if skip_existing:
-            query.append("AND fias_id IS NULL")
-        if limit:
-            query.append(f"LIMIT {limit}")
-        cur.execute(" ".join(query))
-        rows = cur.fetchall()
-
-    total = len(rows)
-    LOGGER.info("📊 Found %s listings to normalize", total)
-
-    stats = {
-        "total": total,
-        "success": 0,
-        "failed": 0,
-        "with_cadastral": 0,
-        "exact_match": 0,
-        "good_match": 0,
-        "need_review": 0,
-    }
-
-    for idx, (listing_id, address, lat, lon) in enumerate(rows, 1):
-        try:
-            normalized = None
-            if address:
-                LOGGER.debug("[%s/%s] Normalizing address: %s", idx, total, address)
-                normalized = normalizer.normalize(address)
-
-            if normalized:
-                upsert_fias_data(
-                    conn,
-                    listing_id=listing_id,
-                    fias_address=normalized.fias_address,
-                    fias_id=normalized.fias_id,
-                    postal_code=normalized.postal_code,
-                    cadastral_number=normalized.cadastral_number,
-                    quality_code=normalized.qc,
-                )
-                conn.commit()
-
-                stats["success"] += 1
-                if normalized.cadastral_number:
-                    stats["with_cadastral"] += 1
-
-                if normalized.qc == 0:
-                    stats["exact_match"] += 1
-                elif normalized.qc == 1:
-                    stats["good_match"] += 1
-                elif normalized.qc is not None:
-                    stats["need_review"] += 1
-
-                fias_preview = (normalized.fias_address or "")[:50]
-                cadastral_value = normalized.cadastral_number or "N/A"
-                qc_value = normalized.qc if normalized.qc is not None else "N/A"
-                LOGGER.info(
-                    "✅ [%s/%s] ID=%s, FIAS=%s..., Cadastral=%s, QC=%s",
-                    idx,
-                    total,
-                    listing_id,
-                    fias_preview,
-                    cadastral_value,
-                    qc_value,
+@dataclass
+class NormalizationReport:
+    total: int = 0
+    unique_addresses: int = 0
+    success: int = 0
+    failed: int = 0
+    with_cadastral: int = 0
+    exact_match: int = 0
+    good_match: int = 0
+    need_review: int = 0
+    batches: int = 0
+    resumed_from: int = 0
+    duration_s: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.total / self.duration_s if self.duration_s else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "unique_addresses": self.unique_addresses,
+            "success": self.success,
+            "failed": self.failed,
+            "with_cadastral": self.with_cadastral,
+            "exact_match": self.exact_match,
+            "good_match": self.good_match,
+            "need_review": self.need_review,
+            "batches": self.batches,
+            "resumed_from": self.resumed_from,
+            "duration_s": round(self.duration_s, 1),
+            "listings_per_second": round(self.rate, 1),
+        }
+
+
+class NormalizationPipeline:
+    """Batched, concurrent and resumable FIAS normalization of listings."""
+
+    def __init__(
+        self,
+        conn,
+        skip_existing: bool = True,
+        batch_size: int = NORMALIZE_BATCH_SIZE,
+        workers: int = FIAS_NORMALIZE_WORKERS,
+    ):
+        self.conn = conn
+        self.skip_existing = skip_existing
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def run(self, limit: Optional[int] = None, restart: bool = False) -> NormalizationReport:
+        report = NormalizationReport()
+        started = time.time()
+
+        run_id, last_id = self._start_run(restart)
+        report.resumed_from = last_id
+        if last_id:
+            LOGGER.info("↩️ Resuming run %s after listing %s", run_id, last_id)
+
+        while limit is None or report.total < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - report.total)
+            rows = self._fetch_batch(last_id, size)
+            if not rows:
+                self._finish_run(run_id)
+                break
+
+            results = self._normalize_batch([address for _, address in rows])
+            updates = self._collect(rows, results, report)
+            last_id = rows[-1][0]
+            self._write_batch(run_id, last_id, updates, processed=len(rows))
+
+            report.batches += 1
+            report.duration_s = time.time() - started
+            LOGGER.info(
+                "✅ Batch %s: %s listings (%s unique addresses), %s ok / %s failed, %.1f listings/s",
+                report.batches,
+                len(rows),
+                len({address for _, address in rows if address}),
+                len(updates),
+                len(rows) - len(updates),
+                report.rate,
+            )
+
+        report.duration_s = time.time() - started
+        return report
+
+    def _collect(
+        self,
+        rows: List[Tuple[int, Optional[str]]],
+        results: List[Optional[Dict[str, Any]]],
+        report: NormalizationReport,
+    ) -> List[Dict[str, Any]]:
+        updates = []
+        report.total += len(rows)
+        report.unique_addresses += len({address for _, address in rows if address})
+        for (listing_id, _), normalized in zip(rows, results):
+            if not normalized:
+                report.failed += 1
+                continue
+
+            report.success += 1
+            qc = normalized.get("quality_code")
+            if normalized.get("cadastral_number"):
+                report.with_cadastral += 1
+            if qc == 0:
+                report.exact_match += 1
+            elif qc == 1:
+                report.good_match += 1
+            elif qc is not None:
+                report.need_review += 1
+
+            updates.append({
+                "listing_id": listing_id,
+                "fias_address": normalized.get("fias_address"),
+                "fias_id": normalized.get("fias_id"),
+                "postal_code": normalized.get("postal_code"),
+                "cadastral_number": normalized.get("cadastral_number"),
+                "quality_code": qc,
+            })
+        return updates
+
+    def _normalize_batch(self, addresses: List[Optional[str]]) -> List[Optional[Dict[str, Any]]]:
+        return batch_normalize_addresses(addresses, max_workers=self.workers)
+
+    # --- database ---
+
+    def _start_run(self, restart: bool) -> Tuple[int, int]:
+        """Return (run_id, last_listing_id) of the run to continue or a new one."""
+        with self.conn.cursor() as cur:
+            if restart:
+                cur.execute(
+                    "UPDATE normalization_runs SET finished_at = NOW() "
+                    "WHERE finished_at IS NULL AND skip_existing = %s",
+                    (self.skip_existing,),
                 )
             else:
-                stats["failed"] += 1
-                LOGGER.warning("⚠️ [%s/%s] Failed to normalize listing %s", idx, total, listing_id)
-        except Exception as exc:
-            stats["failed"] += 1
-            LOGGER.error("❌ [%s/%s] Error processing listing %s: %s", idx, total, listing_id, exc)
-            conn.rollback()
+                cur.execute(
+                    """
+                    SELECT run_id, last_listing_id
+                    FROM normalization_runs
+                    WHERE finished_at IS NULL AND skip_existing = %s
+                    ORDER BY run_id DESC
+                    LIMIT 1
+                    """,
+                    (self.skip_existing,),
+                )
+                row = cur.fetchone()
+                if row:
+                    return row[0], row[1]
+
+            cur.execute(
+                "INSERT INTO normalization_runs (skip_existing) VALUES (%s) RETURNING run_id",
+                (self.skip_existing,),
+            )
+            run_id = cur.fetchone()[0]
+        self.conn.commit()
+        return run_id, 0
+
+    def _fetch_batch(self, after_id: int, size: int) -> List[Tuple[int, Optional[str]]]:
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT id, address
+                FROM listings
+                WHERE id > %s {"AND fias_id IS NULL" if self.skip_existing else ""}
+                ORDER BY id
+                LIMIT %s
+                """,
+                (after_id, size),
+            )
+            return [(row[0], row[1]) for row in cur.fetchall()]
+
+    def _write_batch(self, run_id: int, last_id: int, updates: List[Dict[str, Any]], processed: int):
+        """Write results and move the checkpoint in one transaction."""
+        try:
+            upsert_fias_data_bulk(self.conn, updates)
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE normalization_runs
+                    SET last_listing_id = %s,
+                        processed = processed + %s,
+                        success = success + %s,
+                        failed = failed + %s,
+                        updated_at = NOW()
+                    WHERE run_id = %s
+                    """,
+                    (last_id, processed, len(updates), processed - len(updates), run_id),
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _finish_run(self, run_id: int):
+        with self.conn.cursor() as cur:
+            cur.execute("UPDATE normalization_runs SET finished_at = NOW() WHERE run_id = %s", (run_id,))
+        self.conn.commit()
+
+
+def normalize_all_addresses(
+    limit: Optional[int] = None,
+    skip_existing: bool = True,
+    batch_size: int = NORMALIZE_BATCH_SIZE,
+    workers: int = FIAS_NORMALIZE_WORKERS,
+    restart: bool = False,
+) -> dict:
+    """Normalize addresses stored in the database using FIAS data only."""
+    conn = get_db_connection()
+    try:
+        pipeline = NormalizationPipeline(conn, skip_existing=skip_existing, batch_size=batch_size, workers=workers)
+        report = pipeline.run(limit=limit, restart=restart)
+    finally:
+        conn.close()
 
-    conn.close()
+    stats = report.as_dict()
 
     LOGGER.info("=" * 60)
     LOGGER.info("📊 Normalization Summary:")
     success_pct = (100 * stats["success"] / stats["total"]) if stats["total"] else 0
-    LOGGER.info("  Total processed: %s", stats["total"])
+    LOGGER.info("  Total processed: %s (%s unique addresses)", stats["total"], stats["unique_addresses"])
     LOGGER.info("  ✅ Success: %s (%.1f%%)", stats["success"], success_pct)
     LOGGER.info("  ❌ Failed: %s", stats["failed"])
     LOGGER.info("  🏠 With cadastral: %s", stats["with_cadastral"])
     LOGGER.info("  🎯 Exact match (QC=0): %s", stats["exact_match"])
     LOGGER.info("  ✓ Good match (QC=1): %s", stats["good_match"])
     LOGGER.info("  ⚠️ Need review (QC>=2): %s", stats["need_review"])
+    LOGGER.info("  ⏱️ %.1fs, %.1f listings/s", stats["duration_s"], stats["listings_per_second"])
     LOGGER.info("=" * 60)
 
     return stats
@@ -122,6 +270,23 @@ def main() -> None:
         action="store_true",
         help="Re-normalize addresses that already have FIAS data",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=NORMALIZE_BATCH_SIZE,
+        help=f"Listings per batch/commit (default: {NORMALIZE_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=FIAS_NORMALIZE_WORKERS,
+        help=f"Concurrent API requests (default: {FIAS_NORMALIZE_WORKERS})",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint of an interrupted run and start from the first listing",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -133,7 +298,13 @@ def main() -> None:
     log_level = logging.DEBUG if args.verbose else logging.INFO
     logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(message)s")
 
-    normalize_all_addresses(limit=args.limit, skip_existing=not args.no_skip_existing)
+    normalize_all_addresses(
+        limit=args.limit,
+        skip_existing=not args.no_skip_existing,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        restart=args.restart,
+    )
 
 
 if __name__ == "__main__":
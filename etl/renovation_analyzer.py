@@ -96,31 +96,54 @@ class RenovationAnalyzer:
         return self._analyze_with_gemini(photo_urls)
 
     def _analyze_with_gemini(self, photo_urls: List[str]) -> Dict:
-        """Реальный анализ через Gemini."""
+        """Реальный анализ через Gemini.
+
+        Результат кэшируется по перцептивным хэшам фото: тот же набор фото
+        (перепост, дубль объявления) повторно в Gemini не отправляется.
+        """
         try:
-            import requests
             from PIL import Image
             from io import BytesIO
-            import json
+            from etl.ai_evaluator.photo_fingerprints import get_photo_fingerprints
+
+            store = get_photo_fingerprints()
+            urls = photo_urls[:5]
+
+            # Все фото уже встречались - результат может быть в кэше без загрузки
+            known = [store.known_fingerprint(url) for url in urls]
+            if all(h is not None for h in known):
+                cached = store.lookup("renovation", known)
+                if cached:
+                    return cached
 
             # Загружаем первые 5 фото
             images = []
-            for url in photo_urls[:5]:
+            hashes = []
+            for url in urls:
                 try:
-                    resp = requests.get(url, timeout=10)
-                    img = Image.open(BytesIO(resp.content))
-                    images.append(img)
+                    content, phash = store.fetch_image(url)
+                    images.append(Image.open(BytesIO(content)))
+                    if phash is not None:
+                        hashes.append(phash)
                 except Exception as e:
                     LOGGER.warning(f"Не удалось загрузить фото {url}: {e}")
 
             if not images:
                 return self._empty_result("Не удалось загрузить фото")
 
+            cacheable = len(hashes) == len(images)
+            if cacheable:
+                cached = store.lookup("renovation", hashes)
+                if cached:
+                    return cached
+
             # Отправляем в Gemini
             response = self.model.generate_content([self.PROMPT, *images])
 
             # Парсим ответ
             result = self._parse_gemini_response(response.text)
+            if cacheable and result["analyzed"]:
+                store.save("renovation", hashes, result, ai_model="gemini-1.5-flash")
             return result
 
         except Exception as e:
@@ -0,0 +1,125 @@
+"""Building class codes shared by all comparable searchers.
+
+A building class is a small integer combining a year band and a floors
+band:
+
+    code = year_band * N_FLOORS_BANDS + floors_band
+
+The same scheme is computed in PostgreSQL by building_class_code()
+(db/migrations/013_building_class.sql) and stored in
+listings.building_class and rosreestr_deals.building_class, so the class
+filter can be pushed into SQL (`building_class = ANY(%s)`) or applied to
+in-memory arrays by code, instead of per-row Python checks.
+
+Class rules (a comparable is kept unless a rule excludes it):
+- target 9+ floors: exclude buildings with <=5 floors
+- target <=5 floors: exclude buildings with 9+ floors
+- target 6-8 floors: exclude <=5 and 17+ floors
+- target built 2000+: exclude buildings before 1990
+- target built before 1990: exclude buildings from 2000
+Unknown year/floors never exclude a comparable.
+"""
+
+from typing import List, Optional
+
+
+# Year bands
+YEAR_UNKNOWN, YEAR_BEFORE_1990, YEAR_1990S, YEAR_2000S, YEAR_2010_PLUS = range(5)
+# Floors bands
+FLOORS_UNKNOWN, FLOORS_LOW, FLOORS_MID, FLOORS_HIGH, FLOORS_TOWER = range(5)
+
+N_YEAR_BANDS = 5
+N_FLOORS_BANDS = 5
+
+
+def year_band(year: Optional[int]) -> int:
+    """Year band: <1990 / 1990-1999 / 2000-2009 / 2010+."""
+    if not year:
+        return YEAR_UNKNOWN
+    if year < 1990:
+        return YEAR_BEFORE_1990
+    if year < 2000:
+        return YEAR_1990S
+    if year < 2010:
+        return YEAR_2000S
+    return YEAR_2010_PLUS
+
+
+def floors_band(floors: Optional[int]) -> int:
+    """Floors band: <=5 / 6-8 / 9-16 / 17+."""
+    if not floors:
+        return FLOORS_UNKNOWN
+    if floors <= 5:
+        return FLOORS_LOW
+    if floors <= 8:
+        return FLOORS_MID
+    if floors <= 16:
+        return FLOORS_HIGH
+    return FLOORS_TOWER
+
+
+def deal_floors(floor: Optional[int]) -> Optional[int]:
+    """
+    Building height known from a Rosreestr deal.
+
+    Deals have no building height; an apartment on floor 9+ proves a 9+
+    floor building, lower floors tell nothing.
+    """
+    if floor and floor >= 9:
+        return floor
+    return None
+
+
+def class_code(year: Optional[int], floors: Optional[int]) -> int:
+    """Building class code for a building year and total floors."""
+    return year_band(year) * N_FLOORS_BANDS + floors_band(floors)
+
+
+def split_code(code: int):
+    """Class code -> (year_band, floors_band)."""
+    return divmod(code, N_FLOORS_BANDS)
+
+
+def allowed_year_bands(target_year: Optional[int]) -> Optional[set]:
+    """Year bands comparable with target_year (None = no restriction)."""
+    if not target_year:
+        return None
+    if target_year >= 2000:
+        # Современный дом - исключаем советскую застройку
+        return {YEAR_UNKNOWN, YEAR_1990S, YEAR_2000S, YEAR_2010_PLUS}
+    if target_year < 1990:
+        # Советский дом - исключаем современные
+        return {YEAR_UNKNOWN, YEAR_BEFORE_1990, YEAR_1990S}
+    return None
+
+
+def allowed_floors_bands(target_floors: Optional[int]) -> Optional[set]:
+    """Floors bands comparable with target_floors (None = no restriction)."""
+    if not target_floors:
+        return None
+    if target_floors >= 9:
+        # Многоэтажный - исключаем хрущёвки
+        return {FLOORS_UNKNOWN, FLOORS_MID, FLOORS_HIGH, FLOORS_TOWER}
+    if target_floors <= 5:
+        # Малоэтажный - исключаем многоэтажки
+        return {FLOORS_UNKNOWN, FLOORS_LOW, FLOORS_MID}
+    # Среднеэтажный (6-8) - исключаем крайности
+    return {FLOORS_UNKNOWN, FLOORS_MID, FLOORS_HIGH}
+
+
+def allowed_class_codes(
+    target_year: Optional[int],
+    target_floors: Optional[int]
+) -> Optional[List[int]]:
+    """
+    Class codes of comparables allowed for the target building.
+
+    Returns None when neither year nor floors restrict the search.
+    """
+    years = allowed_year_bands(target_year)
+    floors = allowed_floors_bands(target_floors)
+    if years is None and floors is None:
+        return None
+    years = years if years is not None else range(N_YEAR_BANDS)
+    floors = floors if floors is not None else range(N_FLOORS_BANDS)
+    return sorted(y * N_FLOORS_BANDS + f for y in years for f in floors)
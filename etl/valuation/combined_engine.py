@@ -1,12 +1,22 @@
 """Combined valuation engine using both Rosreestr and CIAN data."""
 
+import os
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, Dict, List, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from .models import PropertyFeatures, ValuationRequest
 from .knn_searcher import KNNSearcher, Comparable
 from .rosreestr_searcher import RosreestrSearcher, RosreestrComparable
+from .timing import span
+
+
+# Shared by all engines: each estimate runs its Rosreestr and CIAN searches here
+SEARCH_WORKERS = int(os.getenv("COMBINED_SEARCH_WORKERS", "8"))
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="combined-search")
 
 
 @dataclass
@@ -34,6 +44,9 @@ class CombinedEstimate:
     confidence: int
     method_used: str
 
+    # Per-source search time (ms): rosreestr, cian, total
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
 
 class CombinedEngine:
     """
@@ -75,23 +88,10 @@ class CombinedEngine:
         2. Get CIAN comparables (7% bargain applied)
         3. Calculate weighted median based on sample sizes
         4. More weight to Rosreestr (actual deals) when available
-        """
 
-        # Get Rosreestr estimate
-        rosreestr_est = self.rosreestr.search(
-            lat=lat,
-            lon=lon,
-            area_total=area_total,
-            rooms=rooms,
-            floor=floor,
-            total_floors=total_floors,
-            building_year=building_year,
-            k=k,
-            max_distance_km=max_distance_km,
-            max_age_days=rosreestr_max_age_days
-        )
+        Steps 1 and 2 run concurrently on pooled connections.
+        """
 
-        # Get CIAN estimate
         from .models import PropertyFeatures, ValuationRequest, BuildingType, BuildingHeight
 
         # Build features for CIAN
@@ -115,13 +115,38 @@ class CombinedEngine:
             building_year=building_year
         )
 
-        cian_est = self.cian.search(
+        started = time.perf_counter()
+        rosreestr_future = self._submit(
+            "rosreestr_search",
+            self.rosreestr.search,
+            lat=lat,
+            lon=lon,
+            area_total=area_total,
+            rooms=rooms,
+            floor=floor,
+            total_floors=total_floors,
+            building_year=building_year,
+            k=k,
+            max_distance_km=max_distance_km,
+            max_age_days=rosreestr_max_age_days
+        )
+        cian_future = self._submit(
+            "cian_search",
+            self.cian.search,
             features=features,
             k=k,
             max_distance_km=max_distance_km,
             max_age_days=cian_max_age_days
         )
 
+        rosreestr_est, rosreestr_ms = rosreestr_future.result()
+        cian_est, cian_ms = cian_future.result()
+        timings_ms = {
+            'rosreestr': rosreestr_ms,
+            'cian': cian_ms,
+            'total': round((time.perf_counter() - started) * 1000, 1),
+        }
+
         # Extract data
         rosreestr_psm = None
         rosreestr_count = 0
@@ -184,9 +209,23 @@ class CombinedEngine:
             rosreestr_comparables=rosreestr_comps,
             cian_comparables=cian_comps,
             confidence=confidence,
-            method_used=method
+            method_used=method,
+            timings_ms=timings_ms
         )
 
+    @staticmethod
+    def _submit(stage: str, search, **kwargs):
+        """Run a search in the shared executor; result is (estimate, elapsed ms)."""
+        def run():
+            started = time.perf_counter()
+            with span(stage):
+                result = search(**kwargs)
+            return result, round((time.perf_counter() - started) * 1000, 1)
+
+        # Copy the request context so the spans reach the API timing headers
+        context = contextvars.copy_context()
+        return _search_executor.submit(context.run, run)
+
     def _combine_estimates(
         self,
         rosreestr_psm: Optional[float],
@@ -295,6 +334,7 @@ def get_combined_estimate(
 
         'confidence': estimate.confidence,
         'method_used': estimate.method_used,
+        'timings_ms': estimate.timings_ms,
 
         'area_total': area_total
     }
@@ -3,10 +3,11 @@
 import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import Optional
+from typing import List, Optional
 from datetime import date, timedelta
 
 from .models import PropertyFeatures, GridEstimate, BuildingType, BuildingHeight
+from .timing import span
 
 
 class GridEstimator:
@@ -30,23 +31,65 @@ class GridEstimator:
     def estimate(self, features: PropertyFeatures) -> Optional[GridEstimate]:
         """Get grid-based estimate for property."""
         
-        conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        with span("grid_connect"):
+            conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
         
         try:
             # Try strategies in order
-            estimate = (
-                self._exact_match(conn, features) or
-                self._relaxed_height(conn, features) or
-                self._relaxed_type(conn, features) or
-                self._district_level(conn, features) or
-                self._global_average(conn, features)
-            )
+            with span("grid_sql"):
+                estimate = (
+                    self._exact_match(conn, features) or
+                    self._relaxed_height(conn, features) or
+                    self._relaxed_type(conn, features) or
+                    self._district_level(conn, features) or
+                    self._global_average(conn, features)
+                )
             
             return estimate
         
         finally:
             conn.close()
     
+    def estimate_many(self, features_list: List[PropertyFeatures]) -> List[Optional[GridEstimate]]:
+        """
+        estimate() for many properties on one connection.
+
+        Properties with the same district and segment share one lookup,
+        and the global average is computed at most once.
+        """
+        
+        with span("grid_connect"):
+            conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        
+        try:
+            estimates = {}
+            results = []
+            with span("grid_sql"):
+                for features in features_list:
+                    key = (
+                        features.district_id,
+                        features.building_type,
+                        features.building_height,
+                        features.rooms,
+                    )
+                    if key not in estimates:
+                        estimates[key] = (
+                            self._exact_match(conn, features) or
+                            self._relaxed_height(conn, features) or
+                            self._relaxed_type(conn, features) or
+                            self._district_level(conn, features)
+                        )
+                        if estimates[key] is None:
+                            if 'global' not in estimates:
+                                estimates['global'] = self._global_average(conn, features)
+                            estimates[key] = estimates['global']
+                    results.append(estimates[key])
+            
+            return results
+        
+        finally:
+            conn.close()
+    
     def _get_property_segment_id(
         self,
         conn,
@@ -1,7 +1,7 @@
 """Hybrid valuation engine combining Grid and KNN approaches."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from .models import (
     PropertyFeatures, ValuationRequest, ValuationResponse,
@@ -9,6 +9,7 @@ from .models import (
 )
 from .grid_estimator import GridEstimator
 from .knn_searcher import KNNSearcher
+from .timing import span
 
 
 class HybridEngine:
@@ -41,13 +42,64 @@ class HybridEngine:
         """
         
         # Get both estimates
-        grid_est = self.grid.estimate(request.features)
-        knn_est = self.knn.search(
-            request.features,
-            k=request.k,
-            max_distance_km=request.max_distance_km,
-            max_age_days=request.max_age_days
-        )
+        with span("grid_estimate"):
+            grid_est = self.grid.estimate(request.features)
+        with span("knn_search"):
+            knn_est = self.knn.search(
+                request.features,
+                k=request.k,
+                max_distance_km=request.max_distance_km,
+                max_age_days=request.max_age_days
+            )
+        
+        return self._combine(request, grid_est, knn_est)
+    
+    def estimate_many(self, requests: List[ValuationRequest]) -> List[Optional[ValuationResponse]]:
+        """
+        estimate() for many requests at once (bulk jobs, e.g. auction lots).
+        
+        Grid lookups share one connection and KNN candidates are fetched
+        once per area (KNNSearcher.search_many) instead of per request.
+        
+        Returns:
+            One response per request, None where no method succeeded
+        """
+        
+        with span("grid_estimate"):
+            grid_ests = self.grid.estimate_many([r.features for r in requests])
+        
+        # search_many takes one set of search parameters
+        groups: Dict[Tuple[int, float, int], List[int]] = {}
+        for i, request in enumerate(requests):
+            groups.setdefault((request.k, request.max_distance_km, request.max_age_days), []).append(i)
+        
+        knn_ests = [None] * len(requests)
+        with span("knn_search"):
+            for (k, max_distance_km, max_age_days), indexes in groups.items():
+                found = self.knn.search_many(
+                    [requests[i].features for i in indexes],
+                    k=k,
+                    max_distance_km=max_distance_km,
+                    max_age_days=max_age_days
+                )
+                for i, knn_est in zip(indexes, found):
+                    knn_ests[i] = knn_est
+        
+        responses = []
+        for request, grid_est, knn_est in zip(requests, grid_ests, knn_ests):
+            try:
+                responses.append(self._combine(request, grid_est, knn_est))
+            except ValueError:
+                responses.append(None)
+        return responses
+    
+    def _combine(
+        self,
+        request: ValuationRequest,
+        grid_est: Optional[GridEstimate],
+        knn_est: Optional[KNNEstimate]
+    ) -> ValuationResponse:
+        """BOTTOM 3 + 7% bargain estimate from the grid and KNN results."""
         
         # Determine weights and method
         grid_weight, knn_weight, method = self._determine_weights(grid_est, knn_est)
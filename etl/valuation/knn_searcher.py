@@ -2,12 +2,22 @@
 
 import os
 import math
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from .models import PropertyFeatures, Comparable, KNNEstimate
+from .building_class import allowed_class_codes
+from .timing import span
+from .db_pool import pooled_connection
+
+
+def _distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance (the SQL path uses ST_Distance on geography)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
 
 
 class KNNSearcher:
@@ -24,6 +34,10 @@ class KNNSearcher:
     - Recency (fresh listings weighted higher)
     """
     
+    # search_many: properties in one tile share a candidate fetch (degrees)
+    TILE_LAT = 0.02
+    TILE_LON = 0.03
+
     def __init__(self, dsn: Optional[str] = None):
         self.dsn = dsn or os.getenv(
             "PG_DSN",
@@ -42,26 +56,81 @@ class KNNSearcher:
         if not features.lat or not features.lon:
             return None
         
-        conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
-        
-        try:
-            comparables = self._find_comparables(
-                conn, features, k * 3, max_distance_km, max_age_days
+        # Фильтрация по классу дома - в самом запросе
+        class_codes = allowed_class_codes(features.building_year, features.total_floors)
+
+        with span("knn_sql"), pooled_connection(self.dsn) as conn:
+            comparables = self._collect(
+                k, class_codes,
+                lambda limit, codes: self._find_comparables(
+                    conn, features, limit, max_distance_km, max_age_days, codes
+                )
             )
-            
-            if not comparables:
-                return None
-            
+
+        return self._estimate(features, comparables, k)
+
+    def search_many(
+        self,
+        features_list: List[PropertyFeatures],
+        k: int = 10,
+        max_distance_km: float = 5.0,
+        max_age_days: int = 90
+    ) -> List[Optional[KNNEstimate]]:
+        """
+        search() for many properties at once.
+
+        Properties are grouped into tiles of TILE_LAT x TILE_LON degrees; the
+        candidates of a whole tile are fetched with one query and each
+        property picks its comparables from them in Python, with the same
+        filters and ordering as _find_comparables.
+        """
+        results: List[Optional[KNNEstimate]] = [None] * len(features_list)
+
+        tiles: Dict[Tuple[int, int], List[int]] = {}
+        for i, features in enumerate(features_list):
+            if features.lat and features.lon:
+                tile = (math.floor(features.lat / self.TILE_LAT), math.floor(features.lon / self.TILE_LON))
+                tiles.setdefault(tile, []).append(i)
+
+        for indexes in tiles.values():
+            members = [features_list[i] for i in indexes]
+            with span("knn_sql"):
+                candidates = self._fetch_area(members, max_age_days)
+
+            for i, features in zip(indexes, members):
+                class_codes = allowed_class_codes(features.building_year, features.total_floors)
+                comparables = self._collect(
+                    k, class_codes,
+                    lambda limit, codes: self._select_comparables(features, candidates, limit, codes)
+                )
+                results[i] = self._estimate(features, comparables, k)
+
+        return results
+
+    def _collect(self, k, class_codes, find):
+        """Comparables of the allowed building classes, topped up with other classes."""
+        comparables = find(k, class_codes)
+
+        # Если осталось мало - добавить ближайшие другого класса (до 5 всего)
+        if class_codes is not None and len(comparables) < 3:
+            others = find(5, None)
+            seen = {row['id'] for row in comparables}
+            comparables += [row for row in others if row['id'] not in seen][:5 - len(comparables)]
+
+        return comparables
+
+    def _estimate(self, features, comparables, k) -> Optional[KNNEstimate]:
+        if not comparables:
+            return None
+
+        with span("knn_scoring"):
             scored = self._score_comparables(features, comparables)
             top_k = sorted(scored, key=lambda c: c.similarity_score, reverse=True)[:k]
             weighted = self._assign_weights(top_k)
-            
+
             return self._calculate_estimate(weighted)
-        
-        finally:
-            conn.close()
     
-    def _find_comparables(self, conn, features, limit, max_distance_km, max_age_days):
+    def _find_comparables(self, conn, features, limit, max_distance_km, max_age_days, class_codes=None):
         """Query database for candidate comparables."""
         cutoff_date = datetime.now() - timedelta(days=max_age_days)
 
@@ -101,6 +170,7 @@ class KNNSearcher:
                       OR (l.rooms = %s + 1 AND l.area_total <= %s + 10)  -- +1 room, area within +10m²
                       OR (l.rooms = %s - 1 AND l.area_total >= %s - 10)  -- -1 room, area within -10m²
                   )
+                  AND (%s::smallint[] IS NULL OR l.building_class = ANY(%s::smallint[]))
                 ORDER BY distance_km ASC
                 LIMIT %s
             """, (
@@ -110,72 +180,83 @@ class KNNSearcher:
                 features.rooms, features.rooms,
                 features.rooms, features.area_total,
                 features.rooms, features.area_total,
+                class_codes, class_codes,
                 limit
             ))
             return cur.fetchall()
     
-    def _filter_by_building_class(self, features: PropertyFeatures, candidates: list) -> list:
-        """
-        Фильтрация аналогов по классу дома:
-        - 5-этажки не должны попадать если оцениваемый дом многоэтажный (9+)
-        - Многоэтажки не должны попадать если оцениваемый дом малоэтажный (<=5)
-        - Дома до 2000 года не должны попадать если оцениваемый дом 2000+ года
-        """
-        filtered = []
-        target_floors = features.total_floors
-        target_year = features.building_year
-
-        for row in candidates:
-            comp_floors = row.get('total_floors')
-            comp_year = row.get('building_year')
+    def _fetch_area(self, features_list, max_age_days):
+        """All candidates within the search windows of the given properties."""
+        cutoff_date = datetime.now() - timedelta(days=max_age_days)
+        lats = [f.lat for f in features_list]
+        lons = [f.lon for f in features_list]
 
-            # === Фильтрация по высотности ===
-            if target_floors and comp_floors:
-                # Оцениваемый дом многоэтажный (9+ этажей)
-                if target_floors >= 9:
-                    if comp_floors <= 5:  # Исключаем хрущёвки
-                        continue
-                # Оцениваемый дом малоэтажный (<=5 этажей)
-                elif target_floors <= 5:
-                    if comp_floors >= 9:  # Исключаем многоэтажки
-                        continue
-                # Среднеэтажный (6-8) - исключаем крайности
-                else:
-                    if comp_floors <= 5 or comp_floors >= 17:
-                        continue
+        with pooled_connection(self.dsn) as conn, conn.cursor() as cur:
+            cur.execute("""
+                WITH latest_prices AS (
+                    SELECT DISTINCT ON (id) id, price, seen_at
+                    FROM listing_prices
+                    WHERE seen_at >= %s
+                    ORDER BY id, seen_at DESC
+                )
+                SELECT
+                    l.id, l.url, COALESCE(lp.price, l.initial_price) as price,
+                    l.area_total, l.rooms, l.floor, l.total_floors,
+                    l.building_type, l.house_year as building_year, l.lat, l.lon,
+                    l.building_class,
+                    COALESCE(lp.seen_at, l.last_seen) as seen_at
+                FROM listings l
+                LEFT JOIN latest_prices lp ON l.id = lp.id
+                WHERE l.lat IS NOT NULL AND l.lon IS NOT NULL
+                  AND l.area_total > 0
+                  AND COALESCE(lp.price, l.initial_price) > 0
+                  AND l.is_active = TRUE
+                  AND l.last_seen >= %s
+                  AND l.lat BETWEEN %s - 0.05 AND %s + 0.05
+                  AND l.lon BETWEEN %s - 0.07 AND %s + 0.07
+            """, (
+                cutoff_date, cutoff_date,
+                min(lats), max(lats), min(lons), max(lons),
+            ))
+            return cur.fetchall()
 
-            # === Фильтрация по году постройки ===
-            if target_year and comp_year:
-                # Современный дом (2000+)
-                if target_year >= 2000:
-                    if comp_year < 1990:  # Исключаем советскую застройку
-                        continue
-                # Советский дом (до 1990)
-                elif target_year < 1990:
-                    if comp_year >= 2000:  # Исключаем современные
-                        continue
+    def _select_comparables(self, features, candidates, limit, class_codes=None):
+        """In-memory equivalent of _find_comparables over prefetched candidates."""
+        lat, lon = features.lat, features.lon
+        rooms, area = features.rooms, features.area_total
+        exclude_id = features.exclude_listing_id
 
-            filtered.append(row)
+        selected = []
+        for row in candidates:
+            row_lat, row_lon = float(row['lat']), float(row['lon'])
+            if not (lat - 0.05 <= row_lat <= lat + 0.05 and lon - 0.07 <= row_lon <= lon + 0.07):
+                continue
+            if exclude_id is not None and row['id'] == exclude_id:
+                continue
+            if rooms is not None and row['rooms'] is not None:
+                row_area = float(row['area_total'])
+                if not (
+                    row['rooms'] == rooms
+                    or (row['rooms'] == rooms + 1 and row_area <= area + 10)
+                    or (row['rooms'] == rooms - 1 and row_area >= area - 10)
+                ):
+                    continue
+            elif rooms is not None:
+                continue
+            if class_codes is not None and row['building_class'] not in class_codes:
+                continue
+            selected.append(dict(row, distance_km=_distance_km(lat, lon, row_lat, row_lon)))
 
-        # Если осталось мало - добавить ближайшие из неотфильтрованных (до 5 макс)
-        if len(filtered) < 3 and len(candidates) >= 3:
-            # Sort by distance, add closest non-filtered candidates
-            remaining = [c for c in candidates if c not in filtered]
-            remaining_sorted = sorted(remaining, key=lambda x: x.get('distance_km', 999))
-            needed = min(5 - len(filtered), len(remaining_sorted))
-            filtered.extend(remaining_sorted[:needed])
-        return filtered if filtered else candidates[:5]  # Cap at 5 if all else fails
+        selected.sort(key=lambda row: row['distance_km'])
+        return selected[:limit]
 
     def _score_comparables(self, features, candidates):
         """Calculate similarity score for each comparable."""
-        # Фильтруем по классу дома
-        filtered_candidates = self._filter_by_building_class(features, candidates)
-
         scored = []
         from datetime import timezone
         now = datetime.now(timezone.utc)
 
-        for row in filtered_candidates:
+        for row in candidates:
             if row['distance_km'] > 10.0:
                 continue
             
@@ -1,12 +1,19 @@
 """K-Nearest Neighbors searcher for Rosreestr transactions."""
 
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
 from typing import List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 
+from .building_class import allowed_class_codes
+from .db_pool import pooled_connection
+
+try:
+    from .rosreestr_index import get_rosreestr_index
+    ROSREESTR_INDEX_AVAILABLE = os.getenv("ROSREESTR_INDEX", "1") == "1"
+except ImportError:
+    ROSREESTR_INDEX_AVAILABLE = False
+
 
 @dataclass
 class RosreestrComparable:
@@ -70,44 +77,86 @@ class RosreestrSearcher:
         if not lat or not lon:
             return None
 
-        conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        # Filter by building class inside the query
+        class_codes = allowed_class_codes(building_year, total_floors)
+        candidates = self._find_candidates(
+            lat, lon, area_total, k, max_age_days, class_codes
+        )
 
-        try:
+        # Too few of the same class - take nearest regardless of class
+        if class_codes is not None and len(candidates) < 3:
             candidates = self._find_candidates(
-                conn, lat, lon, area_total, rooms,
-                k * 3, max_distance_km, max_age_days
+                lat, lon, area_total, k, max_age_days, None
             )
 
-            if not candidates:
-                return None
-
-            # Filter by building class
-            filtered = self._filter_by_building_class(
-                candidates, total_floors, building_year
-            )
+        if not candidates:
+            return None
 
-            if not filtered:
-                filtered = candidates  # Fallback to unfiltered
+        # Score comparables
+        scored = self._score_comparables(
+            candidates, area_total, rooms, floor, building_year
+        )
 
-            # Score comparables
-            scored = self._score_comparables(
-                filtered, area_total, rooms, floor, building_year
-            )
+        # Take top K
+        top_k = sorted(scored, key=lambda c: c.similarity_score, reverse=True)[:k]
 
-            # Take top K
-            top_k = sorted(scored, key=lambda c: c.similarity_score, reverse=True)[:k]
+        # Assign weights
+        weighted = self._assign_weights(top_k)
 
-            # Assign weights
-            weighted = self._assign_weights(top_k)
+        return self._calculate_estimate(weighted)
 
-            return self._calculate_estimate(weighted)
+    def _find_candidates(
+        self, lat, lon, area_total, limit, max_age_days, class_codes
+    ) -> List[dict]:
+        """Candidate transactions from the in-memory index, or SQL if unavailable."""
+        if ROSREESTR_INDEX_AVAILABLE:
+            try:
+                return self._find_candidates_indexed(
+                    lat, lon, area_total, limit, max_age_days, class_codes
+                )
+            except Exception as e:
+                print(f"Rosreestr index unavailable, using SQL: {e}")
+
+        with pooled_connection(self.dsn) as conn:
+            return self._find_candidates_sql(
+                conn, lat, lon, area_total, limit, max_age_days, class_codes
+            )
 
-        finally:
-            conn.close()
+    def _find_candidates_indexed(
+        self, lat, lon, area_total, limit, max_age_days, class_codes
+    ) -> List[dict]:
+        """Candidate transactions from the in-memory index (same constraints as SQL)."""
+        index = get_rosreestr_index(self.dsn)
+        rows = index.nearby(
+            lat, lon,
+            box=(0.05, 0.07),
+            min_date=datetime.now() - timedelta(days=max_age_days),
+            area_min=area_total * 0.8,
+            area_max=area_total * 1.2,
+            require_price_per_sqm=True,
+            class_codes=class_codes,
+            limit=limit,
+        )
 
-    def _find_candidates(
-        self, conn, lat, lon, area_total, rooms,
-        limit, max_distance_km, max_age_days
+        return [
+            {
+                'deal_id': r['id'],
+                'street': r['street'],
+                'area': r['area'],
+                'price': r['deal_price'],
+                'price_per_sqm': r['price_per_sqm'],
+                'year_build': r['year_build'],
+                'floor': r['floor'],
+                'deal_date': r['deal_date'],
+                'lat': r['lat'],
+                'lon': r['lon'],
+                'distance_km': r['distance_m'] / 1000.0,
+            }
+            for r in rows
+        ]
+
+    def _find_candidates_sql(
+        self, conn, lat, lon, area_total, limit, max_age_days, class_codes
     ) -> List[dict]:
         """Query database for candidate transactions."""
 
@@ -142,55 +191,18 @@ class RosreestrSearcher:
                   AND area BETWEEN %s AND %s
                   AND lat BETWEEN %s - 0.05 AND %s + 0.05
                   AND lon BETWEEN %s - 0.07 AND %s + 0.07
+                  AND (%s::smallint[] IS NULL OR building_class = ANY(%s::smallint[]))
                 ORDER BY distance_km ASC
                 LIMIT %s
             """, (
                 lon, lat, cutoff_date,
                 area_min, area_max,
                 lat, lat, lon, lon,
+                class_codes, class_codes,
                 limit
             ))
             return cur.fetchall()
 
-    def _filter_by_building_class(
-        self,
-        candidates: List[dict],
-        target_floors: Optional[int],
-        target_year: Optional[int]
-    ) -> List[dict]:
-        """Filter candidates by building class."""
-
-        if not target_floors and not target_year:
-            return candidates
-
-        filtered = []
-
-        for row in candidates:
-            # Skip if distance too far
-            if row['distance_km'] > 10.0:
-                continue
-
-            comp_year = row.get('year_build')
-
-            # Filter by year if both known
-            if target_year and comp_year:
-                # Modern building (2000+)
-                if target_year >= 2000:
-                    if comp_year < 1990:  # Exclude Soviet era
-                        continue
-                # Soviet building (before 1990)
-                elif target_year < 1990:
-                    if comp_year >= 2010:  # Exclude modern
-                        continue
-
-            filtered.append(row)
-
-        # If too few remain, return all
-        if len(filtered) < 3 and len(candidates) >= 3:
-            return candidates
-
-        return filtered if filtered else candidates
-
     def _score_comparables(
         self,
         candidates: List[dict],
@@ -0,0 +1,136 @@
+"""Per-stage latency spans for the valuation hot path.
+
+Usage:
+    with span("knn_sql"):
+        cur.execute(...)
+
+    @timed("district_lookup")
+    def find_district_by_coordinates(...): ...
+
+Every span is observed in a process-wide histogram (rendered in Prometheus
+text format by render_prometheus()). When a request collector is active
+(start_request(), set by the API middleware) the spans of the current
+request are also collected, for Server-Timing / X-Timing headers.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+
+# Histogram buckets (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Prometheus-style histogram family with a single label."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series: Dict[str, List] = {}  # label value -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, seconds: float):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for value in sorted(self._series):
+                counts, total, count = self._series[value]
+                label = f'{self.label}="{value}"'
+                for bound, n in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {n}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{label}}} {total:.6f}")
+                lines.append(f"{self.name}_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+STAGE_SECONDS = Histogram(
+    "valuation_stage_duration_seconds",
+    "Duration of valuation pipeline stages",
+    "stage"
+)
+REQUEST_SECONDS = Histogram(
+    "valuation_request_duration_seconds",
+    "Duration of API requests by route",
+    "route"
+)
+
+# Spans of the current request (None outside a request)
+_request_spans: contextvars.ContextVar = contextvars.ContextVar("valuation_request_spans", default=None)
+
+
+def start_request() -> List[Tuple[str, float]]:
+    """Start collecting spans for the current request context."""
+    spans: List[Tuple[str, float]] = []
+    _request_spans.set(spans)
+    return spans
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(stage, elapsed)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def timed(stage: str):
+    """Decorator: time every call of the function as `stage`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize(spans: List[Tuple[str, float]]) -> Dict[str, float]:
+    """Total milliseconds per stage, in order of first appearance."""
+    result: Dict[str, float] = {}
+    for stage, seconds in spans:
+        result[stage] = result.get(stage, 0.0) + seconds * 1000
+    return {stage: round(ms, 1) for stage, ms in result.items()}
+
+
+def server_timing_header(spans: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Format spans as a Server-Timing header value."""
+    parts = [f"{stage};dur={ms}" for stage, ms in summarize(spans).items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render_prometheus() -> str:
+    """All timing histograms in Prometheus text exposition format."""
+    return STAGE_SECONDS.render() + REQUEST_SECONDS.render()
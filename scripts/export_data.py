@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Export listings, prices, valuation history or Rosreestr deals to CSV/Parquet.
+
+Streams rows through a server-side cursor, so any table size fits in memory.
+
+Examples:
+    python scripts/export_data.py listings listings.parquet --from 2026-01-01 --district 12
+    python scripts/export_data.py valuation_history history.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etl.export import EXPORTS, FORMATS, ExportFilters, export_to_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming table export")
+    parser.add_argument("table", choices=sorted(EXPORTS))
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=sorted(FORMATS), help="Default: from file extension")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="From date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="To date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--district", type=int, help="District ID")
+    parser.add_argument("--segment", type=int, help="Property segment ID")
+    args = parser.parse_args()
+
+    filters = ExportFilters(
+        date_from=args.date_from,
+        date_to=args.date_to,
+        district_id=args.district,
+        segment_id=args.segment,
+    )
+
+    started = time.time()
+    written = export_to_file(args.table, args.output, args.format, filters)
+    print(f"✅ {args.table} -> {args.output}: {written / 1024 / 1024:.1f} MB in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
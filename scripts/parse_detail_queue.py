@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Parse the most valuable detail pages first (needs migration 022).
+
+Rescores listing_detail_queue (missing fields, price changes, parse age,
+use as valuation comparables) and parses the --budget highest priority
+listings. Several workers may run at once: claimed rows are skipped by
+the others. Same rules as the collector: no proxy, cookies + backoff.
+
+    python scripts/parse_detail_queue.py --budget 300 --tabs 3
+    python scripts/parse_detail_queue.py --refresh-only
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from etl.collector_cian.detail_parser import DETAIL_TABS
+from etl.collector_cian.detail_scheduler import refresh_detail_queue, run_detail_queue
+from etl.upsert import get_db_connection
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse detail pages by priority")
+    parser.add_argument("--budget", type=int, default=200, help="Detail pages to load (default: 200)")
+    parser.add_argument("--tabs", type=int, default=max(DETAIL_TABS, 1), help="Concurrent tabs")
+    parser.add_argument("--no-refresh", action="store_false", dest="refresh", help="Use the queue as it is")
+    parser.add_argument("--refresh-only", action="store_true", help="Rescore the queue and exit")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        if args.refresh_only:
+            refresh_detail_queue(conn)
+            return
+        stats = run_detail_queue(conn, args.budget, tabs=args.tabs, refresh=args.refresh)
+    finally:
+        conn.close()
+    sys.exit(1 if stats.stopped else 0)
+
+
+if __name__ == "__main__":
+    main()
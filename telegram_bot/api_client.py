@@ -0,0 +1,54 @@
+"""
+Async client for the valuation API.
+
+One httpx.AsyncClient is shared by all handlers, so API calls reuse
+keep-alive connections and never block the bot's event loop.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+API_URL = os.getenv('VALUATION_API_URL', 'http://localhost:8001')
+
+# Connection pool shared by all handlers
+MAX_CONNECTIONS = int(os.getenv('BOT_API_MAX_CONNECTIONS', '20'))
+KEEPALIVE_EXPIRY = 30.0
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get the shared API client (created on first use)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=API_URL,
+            timeout=10.0,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client (on bot shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def api_get(path: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10.0) -> httpx.Response:
+    """GET an API endpoint."""
+    return await get_client().get(path, params=params, timeout=timeout)
+
+
+async def api_post(path: str, json: Optional[Dict[str, Any]] = None, timeout: float = 10.0) -> httpx.Response:
+    """POST JSON to an API endpoint."""
+    return await get_client().post(path, json=json, timeout=timeout)
@@ -11,10 +11,14 @@ Features:
 
 import os
 import sys
+import asyncio
+import functools
 import logging
-import requests
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, Tuple
+
+import httpx
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import (
     Application,
@@ -49,8 +53,9 @@ USER_KEYBOARD = ReplyKeyboardMarkup(
 # Add parent to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api_client import api_get, api_post, close_client
+
 # Configuration
-API_URL = os.getenv('VALUATION_API_URL', 'http://localhost:8001')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 
 # Logging
@@ -60,6 +65,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Blocking calls (systemctl/ps/DB in admin commands, PDF parsing) run here, off the event loop
+BLOCKING_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bot-blocking")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function in the executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BLOCKING_EXECUTOR, functools.partial(func, *args, **kwargs))
+
 
 def estimate_rooms_by_area(
     area: float, 
@@ -108,16 +122,16 @@ def estimate_rooms_by_area(
             return 5, 0.5, "Простая оценка по площади"
 
 
-def get_rooms_from_similar_listings(address: str, area: float) -> Optional[int]:
+async def get_rooms_from_similar_listings(address: str, area: float) -> Optional[int]:
     """Get most common room count from similar listings in the area."""
     try:
-        response = requests.get(
-            f"{API_URL}/search-address",
+        response = await api_get(
+            "/search-address",
             params={'q': address},
             timeout=10
         )
         
-        if response.ok:
+        if response.is_success:
             data = response.json()
             # This would require additional API endpoint
             # For now, return None to fallback to area-based estimation
@@ -243,12 +257,12 @@ async def handle_address(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     # Try to parse property description
     try:
-        response = requests.post(
-            f"{API_URL}/parse-property",
+        response = await api_post(
+            "/parse-property",
             json={'text': text},
             timeout=10
         )
-        if response.ok:
+        if response.is_success:
             parsed = response.json()
 
             # If we got area from parsing, skip area input
@@ -283,7 +297,7 @@ async def handle_address(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 # If rooms not parsed, ask for them
                 if not parsed.get('rooms'):
                     area = parsed['area']
-                    estimated_rooms, confidence, explanation = estimate_rooms_by_area(area)
+                    estimated_rooms, confidence, explanation = await run_blocking(estimate_rooms_by_area, area)
 
                     keyboard = [
                         [
@@ -364,21 +378,23 @@ async def handle_area_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Try to geocode and get building type
     if address:
         try:
-            response = requests.get(
-                f"{API_URL}/search-address",
+            response = await api_get(
+                "/search-address",
                 params={'q': address},
                 timeout=5
             )
-            if response.ok:
+            if response.is_success:
                 data = response.json()
                 if data.get('results'):
                     lat = data['results'][0]['lat']
                     lon = data['results'][0]['lon']
-        except (requests.RequestException, KeyError, TypeError, ValueError):
+        except (httpx.HTTPError, KeyError, TypeError, ValueError):
             pass
     
     # Estimate rooms with smart algorithm
-    estimated_rooms, confidence, explanation = estimate_rooms_by_area(area, building_type, lat, lon)
+    estimated_rooms, confidence, explanation = await run_blocking(
+        estimate_rooms_by_area, area, building_type, lat, lon
+    )
     
     # Create inline keyboard for room selection
     keyboard = [
@@ -530,12 +546,12 @@ async def perform_valuation(
         # First, get coordinates if we don't have them
         if not lat or not lon:
             try:
-                geo_response = requests.get(
-                    f"{API_URL}/search-address",
+                geo_response = await api_get(
+                    "/search-address",
                     params={'q': address},
                     timeout=5
                 )
-                if geo_response.ok:
+                if geo_response.is_success:
                     geo_data = geo_response.json()
                     if geo_data.get('results'):
                         lat = geo_data['results'][0]['lat']
@@ -544,8 +560,8 @@ async def perform_valuation(
                 logger.warning(f"Geocoding failed: {e}")
 
         # Use combined-estimate for Rosreestr + CIAN valuation
-        response = requests.post(
-            f"{API_URL}/combined-estimate",
+        response = await api_post(
+            "/combined-estimate",
             json={
                 'address': address,
                 'lat': lat,
@@ -558,7 +574,7 @@ async def perform_valuation(
             timeout=30
         )
 
-        if not response.ok:
+        if not response.is_success:
             error_detail = response.json().get('detail', 'Unknown error')
             await send_message(
                 update, query,
@@ -609,8 +625,8 @@ async def perform_valuation(
                 if c.get('price_per_sqm'):
                     all_prices.append(c['price_per_sqm'])
 
-            report_response = requests.post(
-                f"{API_URL}/reports/generate",
+            report_response = await api_post(
+                "/reports/generate",
                 json={
                     'address': address,
                     'area_total': area,
@@ -642,7 +658,7 @@ async def perform_valuation(
                 timeout=30
             )
 
-            if report_response.ok:
+            if report_response.is_success:
                 report_data = report_response.json()
                 report_url = report_data.get('full_url') or f"http://localhost:8001{report_data.get('report_url')}"
         except Exception as e:
@@ -709,7 +725,7 @@ async def perform_valuation(
         # Clear context
         context.user_data.clear()
         
-    except requests.Timeout:
+    except httpx.TimeoutException:
         await send_message(
             update, query,
             "⏱️ Превышено время ожидания. Попробуйте еще раз."
@@ -753,7 +769,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         # Parse EGRN
         from egrn_parser import parse_egrn_pdf, format_egrn_summary
         
-        egrn_data = parse_egrn_pdf(file_path)
+        egrn_data = await run_blocking(parse_egrn_pdf, file_path)
         
         # Show extracted data
         summary = format_egrn_summary(egrn_data)
@@ -772,7 +788,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             context.user_data['area'] = egrn_data.area
             
             # Estimate rooms (no building type from EGRN yet)
-            estimated_rooms, confidence, explanation = estimate_rooms_by_area(egrn_data.area)
+            estimated_rooms, confidence, explanation = await run_blocking(estimate_rooms_by_area, egrn_data.area)
             
             # Create keyboard
             keyboard = [
@@ -863,7 +879,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         from admin_commands import SERVICE_DESCRIPTIONS
 
         service = data.replace('parser_', '')
-        status = get_service_status(service)
+        status = await run_blocking(get_service_status, service)
 
         if status['running']:
             icon = "🟢"
@@ -901,13 +917,13 @@ PID: {status.get('pid') or '—'}
 
             if action == 'start':
                 await query.edit_message_text(f"▶️ Запускаю {PARSER_NAMES.get(service, service)}...")
-                result = start_service(service)
+                result = await run_blocking(start_service, service)
             elif action == 'stop':
                 await query.edit_message_text(f"⏹ Останавливаю {PARSER_NAMES.get(service, service)}...")
-                result = stop_service(service)
+                result = await run_blocking(stop_service, service)
             elif action == 'restart':
                 await query.edit_message_text(f"🔄 Перезапускаю {PARSER_NAMES.get(service, service)}...")
-                result = restart_service(service)
+                result = await run_blocking(restart_service, service)
             else:
                 result = "❌ Неизвестное действие"
 
@@ -934,7 +950,7 @@ PID: {status.get('pid') or '—'}
 
             await query.edit_message_text(f"📋 Загружаю логи {PARSER_NAMES.get(service, service)}...")
 
-            logs = get_service_logs(service, lines)
+            logs = await run_blocking(get_service_logs, service, lines)
 
             # Buttons for more logs and back
             keyboard = InlineKeyboardMarkup([
@@ -962,7 +978,7 @@ PID: {status.get('pid') or '—'}
             parse_mode='HTML'
         )
 
-        success, message = refresh_cookies()
+        success, message = await run_blocking(refresh_cookies)
 
         keyboard = InlineKeyboardMarkup([
             [InlineKeyboardButton("⬅️ К управлению", callback_data='mgmt_menu')]
@@ -975,9 +991,9 @@ PID: {status.get('pid') or '—'}
         await query.answer("🔄 Обновляю статус...")
         # Just trigger the proxy command again
         from admin_commands import check_proxy_connections, get_nodemaven_traffic, get_cookies_status as get_cookies
-        proxy = check_proxy_connections()
-        traffic = get_nodemaven_traffic()
-        cookies = get_cookies()
+        proxy = await run_blocking(check_proxy_connections)
+        traffic = await run_blocking(get_nodemaven_traffic)
+        cookies = await run_blocking(get_cookies)
 
         # Rebuild the message (same as proxy_command)
         status_icon = '⚠️' if proxy['proxy_used'] else '✅'
@@ -1035,12 +1051,12 @@ PID: {status.get('pid') or '—'}
 
     # Management menu (back to main)
     elif data == 'mgmt_menu':
-        parsers = get_parser_status()
-        cookies = get_cookies_status()
+        parsers = await run_blocking(get_parser_status)
+        cookies = await run_blocking(get_cookies_status)
 
         parser_lines = []
         for name in ['scraper', 'fastscan', 'enrich', 'alerts', 'geocoding']:
-            status = get_service_status(name)
+            status = await run_blocking(get_service_status, name)
             if status['running']:
                 icon = "🟢"
                 info = f"работает {status['runtime']}" if status['runtime'] else "активен"
@@ -1074,19 +1090,19 @@ PID: {status.get('pid') or '—'}
     # All parsers management
     elif data == 'mgmt_restart':
         await query.edit_message_text("🔄 Перезапускаю все парсеры...")
-        result = restart_parsers()
+        result = await run_blocking(restart_parsers)
         keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Назад", callback_data='mgmt_menu')]])
         await query.edit_message_text(f"<b>Результат:</b>\n{result}", parse_mode='HTML', reply_markup=keyboard)
 
     elif data == 'mgmt_stop':
         await query.edit_message_text("⏹ Останавливаю все парсеры...")
-        result = stop_parsers()
+        result = await run_blocking(stop_parsers)
         keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Назад", callback_data='mgmt_menu')]])
         await query.edit_message_text(f"<b>Результат:</b>\n{result}", parse_mode='HTML', reply_markup=keyboard)
 
     elif data == 'mgmt_start':
         await query.edit_message_text("▶️ Запускаю все парсеры...")
-        result = start_parsers()
+        result = await run_blocking(start_parsers)
         keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Назад", callback_data='mgmt_menu')]])
         await query.edit_message_text(f"<b>Результат:</b>\n{result}", parse_mode='HTML', reply_markup=keyboard)
 
@@ -1233,13 +1249,13 @@ async def show_management_menu(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("⛔ Только для администраторов")
         return
 
-    parsers = get_parser_status()
-    cookies = get_cookies_status()
+    parsers = await run_blocking(get_parser_status)
+    cookies = await run_blocking(get_cookies_status)
 
     # Статус ВСЕХ сервисов
     parser_lines = []
     for name in ['scraper', 'fastscan', 'enrich', 'alerts', 'geocoding']:
-        status = get_service_status(name)
+        status = await run_blocking(get_service_status, name)
         if status['running']:
             icon = "🟢"
             info = f"работает {status['runtime']}" if status['runtime'] else "активен"
@@ -1285,7 +1301,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
 
     try:
-        msg = format_compact_status()
+        msg = await run_blocking(format_compact_status)
         await update.message.reply_text(msg, parse_mode='HTML')
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка: {e}")
@@ -1299,8 +1315,8 @@ async def parsers_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("⛔ Только для администраторов")
         return
 
-    parsers = get_parser_status()
-    timers = get_timer_status()
+    parsers = await run_blocking(get_parser_status)
+    timers = await run_blocking(get_timer_status)
 
     msg = f"<b>🤖 Парсеры ({parsers['total_count']} активных)</b>\n\n"
 
@@ -1329,7 +1345,7 @@ async def restart_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await update.message.reply_text("🔄 Перезапускаю парсеры...")
 
     try:
-        result = restart_parsers()
+        result = await run_blocking(restart_parsers)
         await update.message.reply_text(f"<b>Результат:</b>\n{result}", parse_mode='HTML')
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка: {e}")
@@ -1346,7 +1362,7 @@ async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     await update.message.reply_text("⏹ Останавливаю парсеры...")
 
     try:
-        result = stop_parsers()
+        result = await run_blocking(stop_parsers)
         await update.message.reply_text(f"<b>Результат:</b>\n{result}", parse_mode='HTML')
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка: {e}")
@@ -1363,7 +1379,7 @@ async def start_parsers_command(update: Update, context: ContextTypes.DEFAULT_TY
     await update.message.reply_text("▶️ Запускаю парсеры...")
 
     try:
-        result = start_parsers()
+        result = await run_blocking(start_parsers)
         await update.message.reply_text(f"<b>Результат:</b>\n{result}", parse_mode='HTML')
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка: {e}")
@@ -1377,7 +1393,7 @@ async def db_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         await update.message.reply_text("⛔ Только для администраторов")
         return
 
-    db = get_db_stats()
+    db = await run_blocking(get_db_stats)
 
     msg = f"""<b>📦 База данных</b>
 
@@ -1405,9 +1421,9 @@ async def proxy_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await update.message.reply_text("⛔ Только для администраторов")
         return
 
-    proxy = check_proxy_connections()
-    traffic = get_nodemaven_traffic()
-    cookies = get_cookies_status()
+    proxy = await run_blocking(check_proxy_connections)
+    traffic = await run_blocking(get_nodemaven_traffic)
+    cookies = await run_blocking(get_cookies_status)
 
     status_icon = '⚠️' if proxy['proxy_used'] else '✅'
     status_text = 'ПРОКСИ ИСПОЛЬЗУЕТСЯ!' if proxy['proxy_used'] else 'не используется'
@@ -1515,8 +1531,8 @@ async def send_hourly_status(context: ContextTypes.DEFAULT_TYPE) -> None:
     from datetime import datetime, timedelta
 
     try:
-        db = get_db_stats()
-        parsers = get_parser_status()
+        db = await run_blocking(get_db_stats)
+        parsers = await run_blocking(get_parser_status)
 
         now_msk = datetime.utcnow() + timedelta(hours=3)
 
@@ -1544,7 +1560,7 @@ async def check_and_alert(context: ContextTypes.DEFAULT_TYPE) -> None:
         actions_taken = []   # Выполненные автоматические действия
 
         # ============ 1. ПРОВЕРКА ПРОЦЕССОВ ============
-        parsers = get_parser_status()
+        parsers = await run_blocking(get_parser_status)
 
         for p in parsers.get('running', []):
             runtime = p.get('runtime', '')
@@ -1556,12 +1572,12 @@ async def check_and_alert(context: ContextTypes.DEFAULT_TYPE) -> None:
 
                 # Уровень КРИТИЧЕСКИЙ: процесс работает > 1 дня
                 if 'day' in runtime:
-                    result = auto_fix_stuck_process(pid, cmd)
+                    result = await run_blocking(auto_fix_stuck_process, pid, cmd)
                     actions_taken.append(f"🔴 ЗАВИСШИЙ ({runtime}):\n{result}")
 
                 # Уровень ВЫСОКИЙ: процесс работает > 4 часов - убить
                 elif hours >= 4:
-                    result = auto_fix_stuck_process(pid, cmd)
+                    result = await run_blocking(auto_fix_stuck_process, pid, cmd)
                     actions_taken.append(f"🟠 ДОЛГИЙ ({hours:.0f}ч):\n{result}")
 
                 # Уровень СРЕДНИЙ: процесс работает 3-4 часа - предупреждение
@@ -1569,16 +1585,16 @@ async def check_and_alert(context: ContextTypes.DEFAULT_TYPE) -> None:
                     issues.append(f"⚠️ Долгий процесс: PID {pid} ({hours:.0f}ч)")
 
         # ============ 2. ПРОВЕРКА COOKIES ============
-        cookies_age = get_cookies_age_hours()
+        cookies_age = await run_blocking(get_cookies_age_hours)
 
         if cookies_age is not None:
             # Уровень КРИТИЧЕСКИЙ: cookies > 24 часов
             if cookies_age > 24:
                 actions_taken.append("🔴 Cookies ИСТЕКЛИ! Останавливаю парсеры...")
-                stop_parsers()
-                success, msg = refresh_cookies()
+                await run_blocking(stop_parsers)
+                success, msg = await run_blocking(refresh_cookies)
                 if success:
-                    start_parsers()
+                    await run_blocking(start_parsers)
                     actions_taken.append(f"✅ Cookies обновлены, парсеры запущены")
                 else:
                     actions_taken.append(f"❌ Ошибка обновления cookies: {msg}")
@@ -1588,14 +1604,14 @@ async def check_and_alert(context: ContextTypes.DEFAULT_TYPE) -> None:
                 issues.append(f"🍪 Cookies устаревают ({cookies_age:.0f}ч)")
 
         # ============ 3. ПРОВЕРКА ТРАФИКА ============
-        traffic = get_nodemaven_traffic()
+        traffic = await run_blocking(get_nodemaven_traffic)
 
         if not traffic.get('error'):
             remaining = traffic.get('remaining_gb', 100)
 
             # Уровень КРИТИЧЕСКИЙ: < 0.1 GB
             if remaining < 0.1:
-                stop_parsers()
+                await run_blocking(stop_parsers)
                 actions_taken.append(f"🛑 Парсеры ОСТАНОВЛЕНЫ - трафик {remaining:.2f} GB")
 
             # Уровень ВЫСОКИЙ: < 0.5 GB
@@ -1603,11 +1619,11 @@ async def check_and_alert(context: ContextTypes.DEFAULT_TYPE) -> None:
                 issues.append(f"📊 Критически мало трафика: {remaining:.2f} GB")
 
         # ============ 4. ПРОВЕРКА ПРОКСИ ============
-        proxy = check_proxy_connections()
+        proxy = await run_blocking(check_proxy_connections)
 
         if proxy.get('proxy_used') and proxy.get('proxy_connections', 0) > 2:
             # Автоматически убить процессы использующие прокси
-            killed, report = kill_proxy_using_processes()
+            killed, report = await run_blocking(kill_proxy_using_processes)
             if killed > 0:
                 actions_taken.append(f"🔌 Убито {killed} процессов через прокси:\n{report}")
             else:
@@ -1631,6 +1647,12 @@ async def check_and_alert(context: ContextTypes.DEFAULT_TYPE) -> None:
         logger.error(f"Failed to check and alert: {e}")
 
 
+async def shutdown_api_client(application: Application) -> None:
+    """Close the shared API client and blocking executor."""
+    await close_client()
+    BLOCKING_EXECUTOR.shutdown(wait=False)
+
+
 def main() -> None:
     """Start the bot."""
 
@@ -1640,7 +1662,12 @@ def main() -> None:
         return
 
     # Create application
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .post_shutdown(shutdown_api_client)
+        .build()
+    )
 
     # Add handlers
     application.add_handler(CommandHandler("start", start))
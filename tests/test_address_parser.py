@@ -0,0 +1,62 @@
+from etl.address_parser import (
+    address_cache_info,
+    canonical_address,
+    extract_district_name,
+    is_building_part,
+    normalize_many,
+    parse_address,
+    parse_many,
+    street_name,
+)
+
+
+def test_parse_address_components():
+    parsed = parse_address("Москва, ЮАО, р-н Братеево, Братеевская ул., 8К4")
+    assert parsed.okrug == "ЮАО"
+    assert parsed.district == "Братеево"
+    assert parsed.street == "Братеевская"
+    assert parsed.street_type == "ул"
+    assert (parsed.house, parsed.building) == ("8", "4")
+    assert parsed.house_key() == "братеевская_8к4"
+
+
+def test_okrug_is_not_matched_inside_longer_code():
+    assert parse_address("Москва, ЮВАО, р-н Марьино, Люблинская ул., 1").okrug == "ЮВАО"
+    assert parse_address("Москва, СЗАО, р-н Южное Тушино, Лодочная ул., 27К2").okrug == "СЗАО"
+    assert parse_address("Москва, ЗелАО, мкр. 7-й, к704").okrug == "ЗелАО"
+    assert extract_district_name("Москва, ЮЗАО, Профсоюзная ул., 10") == "ЮЗАО"
+
+
+def test_parse_result_is_a_copy_of_cached_value():
+    address = "Москва, ВАО, р-н Вешняки, Снайперская ул., 11"
+    first = parse_address(address)
+    first.house = "999"
+    assert parse_address(address).house == "11"
+    assert [p.house for p in parse_many([address, address])] == ["11", "11"]
+    assert address_cache_info()["_parse_cached"]["hits"] > 0
+
+
+def test_canonical_address():
+    assert canonical_address("Москва, ул. Тверская, д. 1, корп. 2, кв. 5") == "тверская, 1, к2"
+    assert canonical_address("г. Москва, Ленинский проспект, дом 30 строение 1") == "ленинский, 30 с1"
+    assert canonical_address("") == ""
+    assert normalize_many(["Москва, ул. Тверская, 1", "Тверская ул., 1"]) == ["тверская, 1", "тверская, 1"]
+
+
+def test_canonical_address_keeps_words_starting_with_markers():
+    # "г", "пер", "д" are dropped as whole tokens only
+    assert canonical_address("Гоголевский бульвар, 10") == "гоголевский, 10"
+    assert canonical_address("Москва, Перовская ул., 22") == "перовская, 22"
+    assert canonical_address("Дмитровское ш., 5") == "дмитровское, 5"
+
+
+def test_street_name_and_building_parts():
+    assert street_name("Тверская улица, 12") == "Тверская улица"
+    assert street_name("12") == ""
+    assert is_building_part("к2") and is_building_part("с1")
+    assert not is_building_part("красная")
+
+
+def test_extract_district_name_without_okrug():
+    assert extract_district_name("Москва, СВАО, р-н Алтуфьевский, ул. Лескова, 1") == "Алтуфьевский"
+    assert extract_district_name("Москва, СВАО, ул. Лескова, 1", with_okrug=False) is None
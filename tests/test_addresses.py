@@ -0,0 +1,54 @@
+from etl.addresses import AddressAutocomplete, build_tsquery, normalize_address_key
+
+
+def test_normalize_drops_city_street_type_and_house_marker():
+    assert normalize_address_key("Москва, ул. Тверская, д. 1, корп. 2") == "тверская 1 к2"
+    assert normalize_address_key("г. Москва, Ленинский пр-т, дом 30 стр 1, кв. 15") == "ленинский 30 с1"
+    assert normalize_address_key("улица Академика Королёва, 12") == "академика королева 12"
+
+
+def test_query_is_prefix_of_stored_key():
+    stored = normalize_address_key("Москва, улица Тверская, 12")
+    assert stored.startswith(normalize_address_key("ул Тверская 1"))
+    assert normalize_address_key("") == ""
+    assert normalize_address_key("Москва, ") == ""
+
+
+def test_tsquery_uses_word_prefixes():
+    assert build_tsquery("тверская 1 к2") == "тверская:* & 1:* & к2:*"
+    assert build_tsquery("1-я тверская-ямская") == "1:* & я:* & тверская:* & ямская:*"
+
+
+class _CountingAutocomplete(AddressAutocomplete):
+    def __init__(self, **kwargs):
+        super().__init__(dsn="postgresql://unused", **kwargs)
+        self.queries = []
+
+    def _query(self, key, limit, with_coords):
+        self.queries.append(key)
+        return [{"address": key, "lat": 55.75, "lon": 37.61, "listing_count": 1}]
+
+
+def test_hot_prefixes_served_from_cache():
+    autocomplete = _CountingAutocomplete()
+    autocomplete.search("ул. Тверская", limit=5)
+    autocomplete.search("тверская", limit=5)
+    assert autocomplete.queries == ["тверская"]
+    assert autocomplete.stats()["cache_hits"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    autocomplete = _CountingAutocomplete(cache_size=2)
+    autocomplete.search("арбат")
+    autocomplete.search("тверская")
+    autocomplete.search("арбат")
+    autocomplete.search("покровка")  # evicts "тверская"
+    autocomplete.search("тверская")
+    assert autocomplete.queries == ["арбат", "тверская", "покровка", "тверская"]
+
+
+def test_expired_entries_are_refetched():
+    autocomplete = _CountingAutocomplete(cache_ttl=-1)
+    autocomplete.search("арбат")
+    autocomplete.search("арбат")
+    assert autocomplete.queries == ["арбат", "арбат"]
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from etl.auctions import collector, db
+from etl.auctions.base_parser import MockAuctionParser
+
+
+def test_lot_record_matches_columns():
+    lot = next(iter(asyncio.run(MockAuctionParser().collect())))
+    record = db.lot_record(lot, platform_id=3)
+    assert len(record) == len(db.LOT_COLUMNS)
+    assert record[db.LOT_COLUMNS.index("platform_id")] == 3
+    assert record[db.LOT_COLUMNS.index("photos")] == "[]"
+
+
+def test_sources_are_collected_concurrently(monkeypatch):
+    class SlowParser(MockAuctionParser):
+        async def fetch_lots(self, city=None, property_type=None, max_pages=10):
+            await asyncio.sleep(0.2)
+            async for lot in super().fetch_lots(city, property_type, max_pages):
+                yield lot
+
+    monkeypatch.setattr(collector, "get_parser", lambda source: SlowParser())
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await collector.collect_sources(collector.SOURCES, pool=None)
+        return results, loop.time() - started
+
+    results, elapsed = asyncio.run(run())
+    assert [stats.source for stats in results] == collector.SOURCES
+    assert all(stats.lots_found == 5 and not stats.errors for stats in results)
+    assert elapsed < 0.6
+
+
+class _PagedParser(MockAuctionParser):
+    """Three pages of four lots; fails on page `fail_page`."""
+
+    fail_page = None
+
+    async def fetch_lots(self, city=None, property_type=None, max_pages=10):
+        for page in range(self.start_page, min(3, max_pages)):
+            self.current_page = page
+            if page == self.fail_page:
+                self.last_error = f"page {page}: timeout"
+                return
+            for i in range(4):
+                lot = await super().fetch_lots().__anext__()
+                yield lot.model_copy(update={"external_id": f"p{page}-{i}"})
+
+
+class _MemoryStream(collector.LotStream):
+    """Keeps lots and the cursor in memory instead of the auctions DB."""
+
+    def __init__(self, cursor=0, **kwargs):
+        super().__init__("fssp", pool=None, **kwargs)
+        self.cursor = cursor
+        self.saved = []
+
+    async def _resume_page(self):
+        return self.cursor
+
+    async def _save(self, lots, next_page, finished):
+        await asyncio.sleep(0.01)
+        self.saved += [lot.external_id for lot in lots]
+        self.cursor = next_page
+        return [{"id": 1, "external_id": lot.external_id, "inserted": True} for lot in lots]
+
+
+def test_stream_resumes_after_failed_page():
+    parser = _PagedParser()
+    parser.fail_page = 2
+    stream = _MemoryStream(batch_size=3, queue_size=2)
+    stats = asyncio.run(stream.run(parser))
+
+    assert stream.saved == [f"p{p}-{i}" for p in (0, 1) for i in range(4)]
+    assert stream.cursor == 2
+    assert stats.errors == ["page 2: timeout"]
+
+    parser = _PagedParser()
+    resumed = _MemoryStream(cursor=stream.cursor, batch_size=3)
+    stats = asyncio.run(resumed.run(parser))
+
+    assert stats.start_page == 2 and not stats.errors
+    assert resumed.saved == [f"p2-{i}" for i in range(4)]
+    assert resumed.cursor == 0  # finished: next run starts over
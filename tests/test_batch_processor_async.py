@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from etl.ai_evaluator.batch_processor import BatchProcessor
+from etl.ai_evaluator.rate_limiter import AdaptiveLimiter
+
+
+class _MockProvider(BaseHTTPRequestHandler):
+    """OpenAI-shaped chat completions; the first `throttle` calls get 429."""
+
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    requests = 0
+    active = 0
+    peak = 0
+    throttle = 3
+    client_ports = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            throttled = cls.requests <= cls.throttle
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.client_ports.add(self.client_address[1])
+        try:
+            if throttled:
+                self._reply(429, {"error": "rate limit"}, {"Retry-After": "0.1"})
+                return
+            threading.Event().wait(0.02)
+            content = json.dumps({
+                "condition_score": 4,
+                "condition_label": "good",
+                "analysis": "Свежий ремонт",
+                "confidence": 0.9,
+            })
+            self._reply(200, {"choices": [{"message": {"content": content}}]})
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_batch_processor_against_mock_provider(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockProvider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        written = []
+        processor = BatchProcessor(
+            batch_size=10,
+            concurrency=4,
+            use_photo_cache=False,
+            rating_sink=written.extend,
+        )
+        processor.analyzer.OPENAI_URL = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+
+        listings = [(i, f"https://img.example/{i}.jpg") for i in range(40)]
+        stats = asyncio.run(processor.process_listings(listings))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert not stats.errors
+    assert stats.total_analyzed == 40 and stats.throttled == 3
+    assert _MockProvider.requests == 43
+    assert _MockProvider.peak <= 4 and processor.limiter.peak_in_flight <= 4
+    # Keep-alive: the pool never opens more connections than the concurrency limit
+    assert len(_MockProvider.client_ports) <= 4
+    assert stats.ratings_written == 40
+    assert sorted(r.listing_id for r in written) == list(range(40))
+
+
+def test_limiter_halves_on_throttle_and_recovers():
+    limiter = AdaptiveLimiter(8)
+    limiter.on_throttle(0)
+    limiter.on_throttle(0)
+    assert int(limiter.limit) == 2 and limiter.throttled == 2
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 8
+
+
+def test_burst_of_throttles_halves_once():
+    limiter = AdaptiveLimiter(8)
+    started = limiter.generation  # 8 calls in flight when the provider starts refusing
+    for _ in range(8):
+        limiter.on_throttle(0, generation=started)
+    assert int(limiter.limit) == 4 and limiter.throttled == 8
+
+    # A call started after the decrease may halve again
+    limiter.on_throttle(0, generation=limiter.generation)
+    assert int(limiter.limit) == 2
@@ -0,0 +1,101 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+pytest.importorskip("telegram")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "telegram_bot"))
+
+import api_client  # noqa: E402
+import bot  # noqa: E402
+
+API_LATENCY = 0.3
+N_VALUATIONS = 10
+
+ESTIMATE = {
+    "market_price": 15_000_000,
+    "market_price_per_sqm": 300_000,
+    "price_range_low": 14_250_000,
+    "price_range_high": 15_750_000,
+    "confidence": 80,
+    "method_used": "combined_weighted",
+    "rosreestr_count": 5,
+    "cian_count": 5,
+    "rosreestr_median_psm": 290_000,
+    "cian_median_psm": 310_000,
+    "rosreestr_deals": [],
+    "cian_analogs": [],
+}
+
+
+async def fake_api(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/combined-estimate":
+        await asyncio.sleep(API_LATENCY)
+        return httpx.Response(200, json=ESTIMATE)
+    if request.url.path == "/reports/generate":
+        return httpx.Response(200, json={"full_url": "https://example/r/1"})
+    return httpx.Response(404, json={"detail": "not found"})
+
+
+def _update():
+    return SimpleNamespace(
+        message=SimpleNamespace(reply_text=AsyncMock()),
+        effective_user=SimpleNamespace(id=1),
+        effective_chat=SimpleNamespace(id=1),
+    )
+
+
+def _context():
+    return SimpleNamespace(user_data={
+        "address": "Москва, ул. Тверская, 1",
+        "area": 50.0,
+        "rooms": 2,
+        "lat": 55.75,
+        "lon": 37.61,
+    })
+
+
+def test_simultaneous_valuations_do_not_block_each_other():
+    async def run():
+        api_client._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(fake_api), base_url="http://api"
+        )
+        try:
+            updates = [_update() for _ in range(N_VALUATIONS)]
+            started = time.perf_counter()
+            await asyncio.gather(*(bot.perform_valuation(u, _context()) for u in updates))
+            return time.perf_counter() - started, updates
+        finally:
+            await api_client.close_client()
+
+    elapsed, updates = asyncio.run(run())
+
+    # ~1x a single valuation, not N x
+    assert elapsed < API_LATENCY * 2
+    for update in updates:
+        text = update.message.reply_text.call_args.args[0]
+        assert "Оценка готова" in text
+
+
+def test_run_blocking_keeps_event_loop_free():
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await bot.run_blocking(time.sleep, 0.2)
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 5
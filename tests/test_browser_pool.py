@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+
+from etl.auctions import base_parser
+from etl.collector_cian.browser_fetcher import CianBrowserFetcher, RateLimitError
+from etl.collector_cian.browser_pool import BrowserPool
+
+
+class _FakePage:
+    def __init__(self, status=200):
+        self.status = status
+        self.closed = False
+        self.visited = []
+
+    def is_closed(self):
+        return self.closed
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    def goto(self, url, **kwargs):
+        self.visited.append(url)
+        return type("Response", (), {"status": self.status})()
+
+
+class _FakeContext:
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+        self.init_scripts = []
+        self.routes = []
+        self.pages = []
+        self.closed = False
+
+    def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    def route(self, pattern, handler):
+        self.routes.append(pattern)
+
+    def add_cookies(self, cookies):
+        pass
+
+    def new_page(self):
+        self.pages.append(_FakePage())
+        return self.pages[-1]
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def new_context(self, **kwargs):
+        self.contexts.append(_FakeContext(kwargs))
+        return self.contexts[-1]
+
+    def close(self):
+        self.connected = False
+
+
+class _FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    def launch(self, **kwargs):
+        self.browsers.append(_FakeBrowser())
+        return self.browsers[-1]
+
+
+class _FakePlaywright:
+    def __init__(self):
+        self.chromium = _FakeChromium()
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    state = tmp_path / "state.json"
+    state.write_text("{}")
+    monkeypatch.setenv("CIAN_STORAGE_STATE", str(state))
+    monkeypatch.delenv("CIAN_COOKIES", raising=False)
+    driver = _FakePlaywright()
+    pool = BrowserPool(size=2, max_pages=3, headless=True, slow_mo=0, playwright_factory=lambda: driver)
+    pool.driver = driver
+    return pool
+
+
+def test_leases_reuse_warm_contexts_until_recycled(pool, tmp_path):
+    for _ in range(3):
+        with pool.lease() as ctx:
+            ctx.page.goto("https://www.cian.ru/")
+            ctx.count_page()
+
+    (browser,) = pool.driver.chromium.browsers
+    first = browser.contexts[0]
+    assert first.kwargs["storage_state"] == str(tmp_path / "state.json")
+    assert len(first.init_scripts) == 1
+    assert first.routes == []  # direct traffic is not route-blocked by default
+    assert len(first.pages) == 1  # one page reused across leases
+    # Third page reached max_pages: closed instead of going back to the pool
+    assert first.closed and pool.stats.contexts_recycled == 1
+
+    with pool.lease() as ctx:
+        assert ctx.context is browser.contexts[1]
+    assert pool.stats.leases == 4 and pool.stats.warm_leases == 2
+    assert pool.stats.pages == 3 and pool.stats.in_use == 0
+    assert 0 < pool.stats.utilization() <= 1
+
+
+def test_failed_leases_are_recycled(pool):
+    with pool.lease() as ctx:
+        ctx.fail()
+    with pytest.raises(ValueError):
+        with pool.lease() as ctx:
+            raise ValueError("blocked")
+
+    contexts = pool.driver.chromium.browsers[0].contexts
+    assert len(contexts) == 2 and all(c.closed for c in contexts)
+    assert pool.stats.errors == 2 and pool.stats.warm_leases == 0
+
+    # renew() keeps a healthy context and replaces a failed one
+    ctx = pool.acquire()
+    assert pool.renew(ctx) is ctx
+    replacement = pool.renew(ctx, failed=True)
+    assert replacement is not ctx and ctx.context.closed
+    pool.release(replacement)
+    pool.release(replacement)  # second release is ignored
+    assert pool.stats.in_use == 0
+
+
+def test_crashed_browser_is_relaunched(pool):
+    pool.warm()
+    ctx = pool.acquire()
+    pool.driver.chromium.browsers[0].connected = False
+    pool.release(ctx, failed=True)
+
+    with pool.lease() as ctx:
+        assert ctx.context in pool.driver.chromium.browsers[1].contexts
+    assert pool.stats.browsers_launched == 2
+
+
+def test_fetcher_recycles_context_on_rate_limit(pool):
+    with pool.lease() as ctx:
+        ctx.page.status = 429
+    with pytest.raises(RateLimitError):
+        CianBrowserFetcher(pool).fetch_listings("https://www.cian.ru/cat.php?p=1", max_pages=2)
+    assert pool.driver.chromium.browsers[0].contexts[0].closed
+    assert pool.stats.errors == 1
+
+
+def test_auction_parsers_share_one_browser(monkeypatch):
+    launches = []
+
+    class _Browser:
+        closed = False
+
+        def is_connected(self):
+            return not self.closed
+
+        async def close(self):
+            self.closed = True
+
+    class _Driver:
+        stopped = False
+
+        async def stop(self):
+            self.stopped = True
+
+    async def launch(headless, proxy):
+        await asyncio.sleep(0)
+        launches.append((_Driver(), _Browser()))
+        return launches[-1]
+
+    monkeypatch.setattr(base_parser, "_launch_browser", launch)
+
+    async def run():
+        first, second = await asyncio.gather(
+            base_parser.acquire_shared_browser(), base_parser.acquire_shared_browser()
+        )
+        assert first is second
+        await base_parser.release_shared_browser(first)
+        assert not first.closed
+        await base_parser.release_shared_browser(second)
+        assert first.closed and launches[0][0].stopped
+
+        # Next run launches a new one
+        third = await base_parser.acquire_shared_browser()
+        await base_parser.release_shared_browser(third)
+        return third
+
+    assert asyncio.run(run()) is not launches[0][1]
+    assert len(launches) == 2
+
+
+def test_route_blocking_is_opt_in(pool, monkeypatch):
+    monkeypatch.setenv("CIAN_POOL_BLOCK_ROUTES", "1")
+    blocking = BrowserPool(size=1, headless=True, slow_mo=0, playwright_factory=lambda: pool.driver)
+    with blocking.lease():
+        pass
+    assert pool.driver.chromium.browsers[-1].contexts[0].routes == ["**/*"]
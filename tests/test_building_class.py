@@ -0,0 +1,53 @@
+import pytest
+
+from etl.valuation.building_class import (
+    FLOORS_LOW,
+    FLOORS_TOWER,
+    YEAR_1990S,
+    YEAR_2010_PLUS,
+    YEAR_UNKNOWN,
+    allowed_class_codes,
+    class_code,
+    deal_floors,
+    floors_band,
+    split_code,
+    year_band,
+)
+
+
+def test_bands():
+    assert year_band(None) == YEAR_UNKNOWN
+    assert year_band(1995) == YEAR_1990S
+    assert year_band(2010) == YEAR_2010_PLUS
+    assert floors_band(5) == FLOORS_LOW
+    assert floors_band(25) == FLOORS_TOWER
+    assert split_code(class_code(2015, 25)) == (YEAR_2010_PLUS, FLOORS_TOWER)
+
+
+def test_deal_floors_only_proves_high_buildings():
+    assert deal_floors(3) is None
+    assert deal_floors(12) == 12
+
+
+def test_no_target_means_no_filter():
+    assert allowed_class_codes(None, None) is None
+    assert allowed_class_codes(1995, None) is None
+
+
+@pytest.mark.parametrize(
+    "target_year, target_floors, comp_year, comp_floors, allowed",
+    [
+        (2015, None, 1970, 5, False),   # modern target excludes Soviet
+        (2015, None, 1995, 5, True),
+        (1970, None, 2005, 9, False),   # Soviet target excludes modern
+        (1970, None, 1995, 9, True),
+        (None, 12, 2015, 5, False),     # high-rise target excludes 5-floor
+        (None, 5, 2015, 9, False),      # low-rise target excludes 9+
+        (None, 7, 2015, 17, False),     # mid-rise target excludes towers
+        (None, 7, 2015, 12, True),
+        (2015, 12, None, None, True),   # unknown comparable is never excluded
+    ],
+)
+def test_allowed_class_codes(target_year, target_floors, comp_year, comp_floors, allowed):
+    codes = allowed_class_codes(target_year, target_floors)
+    assert (class_code(comp_year, comp_floors) in codes) is allowed
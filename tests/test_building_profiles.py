@@ -0,0 +1,86 @@
+from etl.building_profiles import BuildingProfiles, distance_m, refresh_building_profile
+
+
+class _CountingProfiles(BuildingProfiles):
+    def __init__(self, profiles, **kwargs):
+        super().__init__(dsn="postgresql://unused", **kwargs)
+        self.profiles = profiles
+        self.queries = []
+
+    def _query(self, lat, lon, radius_m, require_type):
+        self.queries.append((lat, lon, radius_m, require_type))
+        return self.profiles.get((lat, lon))
+
+
+PROFILE = {"house_key": "тверская 1", "total_floors": 9, "building_year": 1965, "building_type": "panel"}
+
+
+def test_nearby_points_share_cache_entry():
+    profiles = _CountingProfiles({(55.7512, 37.6123): PROFILE})
+    assert profiles.lookup(55.75121, 37.61229) == PROFILE
+    assert profiles.lookup(55.75118, 37.61231) == PROFILE
+    assert profiles.queries == [(55.7512, 37.6123, 150, False)]
+    assert profiles.stats()["cache_hits"] == 1
+
+
+def test_misses_are_cached_too():
+    profiles = _CountingProfiles({})
+    assert profiles.lookup(55.8, 37.5) is None
+    assert profiles.lookup(55.8, 37.5) is None
+    assert len(profiles.queries) == 1
+    # Different radius / type requirement is a different lookup
+    profiles.lookup(55.8, 37.5, radius_m=500, require_type=True)
+    assert len(profiles.queries) == 2
+
+
+def test_cache_evicts_least_recently_used():
+    profiles = _CountingProfiles({}, cache_size=2)
+    profiles.lookup(55.1, 37.1)
+    profiles.lookup(55.2, 37.2)
+    profiles.lookup(55.1, 37.1)
+    profiles.lookup(55.3, 37.3)  # evicts 55.2
+    profiles.lookup(55.2, 37.2)
+    assert profiles.queries.count((55.2, 37.2, 150, False)) == 2
+    assert profiles.queries.count((55.1, 37.1, 150, False)) == 1
+
+
+def test_distance_at_building_scale():
+    # 0.001 deg of latitude is ~111 m
+    assert abs(distance_m(55.75, 37.61, 55.751, 37.61) - 111.2) < 0.5
+    assert distance_m(55.75, 37.61, 55.75, 37.61) == 0
+
+
+class _RecordingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+
+def test_refresh_recomputes_only_the_listings_house():
+    cursor = _RecordingCursor()
+    refresh_building_profile(cursor, 42)
+    sql, params = cursor.executed[0]
+    assert params == {"listing_id": 42}
+    assert "WHERE l2.id = %(listing_id)s" in sql
+    assert "{house_filter}" not in sql
+
+
+def test_building_info_falls_back_to_listing_scan_without_profile(monkeypatch):
+    from api.v1 import geocode_helper
+
+    profiles = _CountingProfiles({(55.7512, 37.6123): {**PROFILE, "distance_m": 4, "sources_count": 3, "confidence": 0.9}})
+    scanned = []
+    monkeypatch.setattr(geocode_helper, "BUILDING_PROFILES_AVAILABLE", True)
+    monkeypatch.setattr(geocode_helper, "get_building_profiles", lambda dsn=None: profiles)
+    monkeypatch.setattr(
+        geocode_helper, "_find_building_info_sql",
+        lambda lat, lon, radius_m=50: scanned.append((lat, lon)) or {"total_floors": 5, "sources_count": 1},
+    )
+
+    assert geocode_helper.find_building_info_by_coordinates(55.7512, 37.6123)["total_floors"] == 9
+    assert scanned == []
+    # No profile for this house (or profiles not built yet): scan listings as before
+    assert geocode_helper.find_building_info_by_coordinates(55.9, 37.4)["total_floors"] == 5
+    assert scanned == [(55.9, 37.4)]
@@ -0,0 +1,35 @@
+import time
+from types import SimpleNamespace
+
+from etl.valuation.combined_engine import CombinedEngine
+
+SEARCH_DELAY = 0.2
+
+
+class SlowSearcher:
+    def __init__(self, median_psm, count):
+        self.estimate = SimpleNamespace(
+            median_price_per_sqm=median_psm,
+            comparables=[object()] * count,
+        )
+
+    def search(self, **kwargs):
+        time.sleep(SEARCH_DELAY)
+        return self.estimate
+
+
+def test_sources_are_searched_concurrently():
+    engine = CombinedEngine(dsn="postgresql://unused")
+    engine.rosreestr = SlowSearcher(300000.0, 5)
+    engine.cian = SlowSearcher(400000.0, 5)
+
+    started = time.perf_counter()
+    estimate = engine.estimate(lat=55.75, lon=37.61, area_total=50.0)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < SEARCH_DELAY * 1.75
+    assert estimate.method_used == "combined_weighted"
+    assert estimate.rosreestr_count == 5
+    assert estimate.cian_count == 5
+    assert set(estimate.timings_ms) == {"rosreestr", "cian", "total"}
+    assert estimate.timings_ms["rosreestr"] >= SEARCH_DELAY * 1000
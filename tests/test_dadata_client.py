@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from etl.dadata_client import DadataClient, normalize_query
+
+SUGGESTION = [{"value": "г Москва, ул Тверская, д 1", "data": {"geo_lat": "55.75", "geo_lon": "37.61"}}]
+
+
+class _FakeClient(DadataClient):
+    """No HTTP, no cache table: answers from a dict and records calls."""
+
+    def __init__(self, answers, delay=0.0, **kwargs):
+        super().__init__(cache_enabled=False, api_key="key", secret_key="secret", **kwargs)
+        self.answers = answers
+        self.delay = delay
+        self.calls = []
+
+    def _post_suggest(self, query, timeout):
+        self.calls.append(query)
+        time.sleep(self.delay)
+        return self.answers.get(query)
+
+    def _post_clean(self, addresses, timeout):
+        self.calls.append(list(addresses))
+        return [self.answers.get(a, {}) for a in addresses]
+
+
+def test_normalized_queries_share_cache_entry():
+    assert normalize_query("Москва,  ул.Тверская , 1") == "москва, ул. тверская, 1"
+    client = _FakeClient({"Москва, ул. Тверская, 1": SUGGESTION})
+    assert client.suggest_address("Москва, ул. Тверская, 1") == SUGGESTION
+    assert client.suggest_address("москва,ул.тверская,1 ") == SUGGESTION
+    assert len(client.calls) == 1
+    assert client.stats()["memory_hits"] == 1
+
+
+def test_empty_answers_cached_errors_not():
+    client = _FakeClient({"nowhere": []})
+    assert client.suggest_address("nowhere") == []
+    assert client.suggest_address("nowhere") == []
+    assert client.stats()["negative_hits"] == 1
+
+    assert client.suggest_address("timeout") is None  # error (None) is not cached
+    assert client.suggest_address("timeout") is None
+    assert client.calls == ["nowhere", "timeout", "timeout"]
+
+
+def test_negative_entries_expire_sooner():
+    client = _FakeClient({"nowhere": []}, negative_ttl=-1)
+    client.suggest_address("nowhere")
+    client.suggest_address("nowhere")
+    assert client.calls == ["nowhere", "nowhere"]
+
+
+def test_concurrent_identical_requests_make_one_call():
+    client = _FakeClient({"тверская 1": SUGGESTION}, delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.suggest_address("тверская 1"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [SUGGESTION] * 5
+    assert client.calls == ["тверская 1"]
+    assert client.stats()["coalesced"] == 4
+
+
+def test_clean_sends_only_misses_in_batches():
+    client = _FakeClient({f"addr {i}": {"result": f"r{i}"} for i in range(12)})
+    client.clean_address("addr 0")
+    results = client.clean_addresses([f"addr {i}" for i in range(12)] + ["addr 3"], batch_size=5)
+    assert [r["result"] for r in results] == [f"r{i}" for i in range(12)] + ["r3"]
+    assert client.calls == [["addr 0"], [f"addr {i}" for i in range(1, 6)], [f"addr {i}" for i in range(6, 11)], ["addr 11"]]
+
+
+def test_not_configured_returns_none_without_calls(monkeypatch):
+    monkeypatch.delenv("DADATA_API_KEY", raising=False)
+    client = _FakeClient({})
+    client._api_key = None
+    assert client.suggest_address("тверская 1") is None
+    assert client.calls == []
+    assert "dadata_cache_hit_rate 0.0" in client.render_prometheus()
+
+
+def test_busy_pool_does_not_disable_cache_table():
+    pytest.importorskip("psycopg2")
+    from etl.valuation.db_pool import PoolTimeout
+
+    client = _FakeClient({})
+    client.cache_enabled = True
+    client._store_failed(PoolTimeout("no free connection"))
+    assert client._store_available()
+
+    client._store_failed(RuntimeError("relation dadata_cache does not exist"))
+    assert not client._store_available()
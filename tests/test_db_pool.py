@@ -0,0 +1,75 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from etl.valuation import db_pool
+from etl.valuation.db_pool import BlockingConnectionPool, PoolTimeout, pooled_connection
+
+
+class _FakeConn:
+    closed = 0
+    info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class _FakePool(BlockingConnectionPool):
+    """Hands out fake connections instead of connecting to PostgreSQL."""
+
+    def _connect(self, key=None):
+        conn = _FakeConn()
+        if key is not None:
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        else:
+            self._pool.append(conn)
+        return conn
+
+
+def test_borrowers_beyond_maxconn_wait_for_a_connection(monkeypatch):
+    pool = _FakePool(1, 3, "postgresql://unused", timeout=5)
+    monkeypatch.setitem(db_pool._pools, "postgresql://unused", pool)
+    in_use, peak, errors = [0], [0], []
+    lock = threading.Lock()
+
+    def borrow():
+        try:
+            with pooled_connection("postgresql://unused"):
+                with lock:
+                    in_use[0] += 1
+                    peak[0] = max(peak[0], in_use[0])
+                time.sleep(0.02)
+                with lock:
+                    in_use[0] -= 1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=borrow) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert peak[0] == 3
+    assert len(pool._pool) <= 3 and not pool._used
+
+
+def test_borrower_times_out_when_no_connection_comes_back():
+    pool = _FakePool(1, 2, "postgresql://unused", timeout=0.05)
+    held = [pool.getconn(), pool.getconn()]
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+    pool.putconn(held.pop())
+    assert pool.getconn() is not None
@@ -0,0 +1,239 @@
+from types import SimpleNamespace
+
+import pytest
+
+from etl.collector_cian import detail_parser
+from etl.collector_cian.browser_pool import BrowserPool
+from etl.collector_cian.detail_parser import PoliteRateLimiter, parse_details_concurrently
+
+
+class _Context:
+    """Browser side: navigations started in any tab progress together."""
+
+    def __init__(self, statuses, slow=None):
+        self.statuses = statuses
+        self.slow = dict(slow or {})  # url -> ticks before it responds
+        self.pages = []
+        self.in_flight = []
+        self.peak_in_flight = 0
+        self.started = []
+
+    def add_init_script(self, script):
+        pass
+
+    def route(self, pattern, handler):
+        pass
+
+    def add_cookies(self, cookies):
+        pass
+
+    def new_page(self):
+        self.pages.append(_Page(self))
+        return self.pages[-1]
+
+    def close(self):
+        pass
+
+    def tick(self):
+        waiting = []
+        for page, url in self.in_flight:
+            if self.slow.get(url, 0) > 0:
+                self.slow[url] -= 1
+                waiting.append((page, url))
+                continue
+            status = self.statuses.get(url, [200])
+            request = SimpleNamespace(
+                is_navigation_request=lambda: True, frame=page.main_frame, failure=None
+            )
+            response = SimpleNamespace(status=status.pop(0) if len(status) > 1 else status[0], request=request)
+            page.emit("response", response)
+            page.emit("domcontentloaded", page)
+        self.in_flight = waiting
+
+
+class _Page:
+    def __init__(self, context):
+        self.context = context
+        self.main_frame = object()
+        self.handlers = {}
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.handlers[event].remove(handler)
+
+    def emit(self, event, arg):
+        for handler in self.handlers.get(event, []):
+            handler(arg)
+
+    def evaluate(self, script, url):
+        self.context.in_flight.append((self, url))
+        self.context.started.append(url)
+        self.context.peak_in_flight = max(self.context.peak_in_flight, len(self.context.in_flight))
+
+    def wait_for_timeout(self, ms):
+        self.context.tick()
+
+    def close(self):
+        self.closed = True
+
+
+class _Browser:
+    def __init__(self, statuses, slow=None):
+        self.statuses = statuses
+        self.slow = slow
+        self.contexts = []
+
+    def is_connected(self):
+        return True
+
+    def new_context(self, **kwargs):
+        self.contexts.append(_Context(self.statuses, self.slow))
+        return self.contexts[-1]
+
+
+class _Conn:
+    def __init__(self):
+        self.commits = 0
+        self.statements = []
+
+    def cursor(self):
+        conn = self
+
+        class _Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                conn.statements.append(sql)
+
+        return _Cursor()
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def run(monkeypatch, tmp_path):
+    monkeypatch.setenv("CIAN_STORAGE_STATE", str(tmp_path / "missing.json"))
+    monkeypatch.delenv("CIAN_COOKIES", raising=False)
+    parsed, saved = [], []
+
+    def fake_parse(page, url, max_duration=None, *, response=None, settle_ms=2000):
+        assert response is not None and response.status == 200  # no second navigation
+        parsed.append(url)
+        return None if url.endswith("broken") else {"url": url, "photos": []}
+
+    def fake_save(conn, listing_id, details):
+        if listing_id == 4:
+            raise ValueError("constraint violation")
+        saved.append(listing_id)
+        return 0
+
+    monkeypatch.setattr(detail_parser, "parse_listing_detail", fake_parse)
+    monkeypatch.setattr(detail_parser, "save_listing_details", fake_save)
+
+    def _run(urls, statuses=None, tabs=3, slow=None, **kwargs):
+        browser = _Browser(statuses or {}, slow)
+        chromium = SimpleNamespace(launch=lambda **kw: browser)
+        pool = BrowserPool(size=1, max_pages=50, headless=True, slow_mo=0,
+                           playwright_factory=lambda: SimpleNamespace(chromium=chromium))
+        pauses = []
+        limiter = PoliteRateLimiter(0, sleep=pauses.append)
+        conn = _Conn()
+        stats = parse_details_concurrently(conn, urls, tabs=tabs, pool=pool, limiter=limiter, **kwargs)
+        return SimpleNamespace(stats=stats, conn=conn, browser=browser, pauses=pauses, limiter=limiter,
+                               parsed=parsed, saved=saved, pool=pool)
+
+    return _run
+
+
+def test_tabs_load_concurrently_and_save_in_batches(run):
+    urls = [(i, f"https://www.cian.ru/sale/flat/{i}/") for i in range(1, 8)] + [(8, "https://www.cian.ru/broken")]
+    result = run(urls, batch_size=3)
+
+    (context,) = result.browser.contexts
+    assert len(context.pages) == 3 and context.peak_in_flight == 3
+    assert result.stats.parsed == 7 and result.stats.failed == 2  # broken page + listing 4 save error
+    assert result.saved == [1, 2, 3, 5, 6, 7]
+    # 7 parsed details -> batches of 3, 3 and 1, one commit each
+    assert result.stats.batches == 3 and result.conn.commits == 3
+    assert result.conn.statements.count("ROLLBACK TO SAVEPOINT listing_details") == 1
+    assert result.stats.per_minute() > 0
+    assert result.pool.stats.pages == 8
+    assert all(page.closed for page in context.pages[1:])  # extra tabs closed
+    assert not any(context.pages[0].handlers.values())  # pooled page left clean
+
+
+def test_ready_tabs_are_parsed_before_a_slow_one(run):
+    urls = [(1, "u1"), (2, "u2"), (3, "u3")]
+    result = run(urls, tabs=2, slow={"u1": 3})
+
+    # u1 started first but loads slowly: u2 is parsed, then u3 in the freed tab
+    assert result.parsed == ["u2", "u3", "u1"]
+    assert sorted(result.saved) == [1, 2, 3]
+
+
+def test_photo_failure_keeps_the_details(monkeypatch):
+    monkeypatch.delenv("ENABLE_FIAS", raising=False)
+    updated = []
+    monkeypatch.setattr(detail_parser, "update_listing_details", lambda conn, listing_id, details: updated.append(listing_id))
+
+    def broken_photos(conn, listing_id, photos):
+        raise ValueError("photo constraint violation")
+
+    monkeypatch.setattr(detail_parser, "insert_listing_photos", broken_photos)
+    conn = _Conn()
+
+    assert detail_parser.save_listing_details(conn, 5, {"photos": ["https://img/1.jpg"]}) == 0
+    assert updated == [5]
+    assert conn.statements[-1] == "ROLLBACK TO SAVEPOINT photos"
+
+
+def test_rate_limit_pauses_all_tabs_and_retries_once(run):
+    urls = [(1, "u1"), (2, "u2"), (3, "u3")]
+    result = run(urls, statuses={"u2": [429, 200]}, tabs=2)
+
+    assert result.stats.rate_limited == 1 and not result.stats.stopped
+    assert result.browser.contexts[0].started.count("u2") == 2
+    assert sorted(result.saved) == [1, 2, 3]
+    # Backoff 10 * 2**1 applied through the shared limiter
+    assert max(result.pauses) == pytest.approx(20, abs=1)
+
+
+def test_run_stops_after_too_many_rate_limits(run):
+    urls = [(i, f"u{i}") for i in range(1, 10)]
+    result = run(urls, statuses={f"u{i}": [429] for i in range(1, 10)}, tabs=2)
+
+    assert result.stats.stopped and result.stats.rate_limited >= detail_parser.MAX_RATE_LIMITS
+    assert len(result.browser.contexts[0].started) < 9
+    assert result.saved == []
+
+
+def test_limiter_spaces_navigation_starts():
+    now = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = PoliteRateLimiter(2.0, sleep=sleep, clock=lambda: now[0])
+    for _ in range(3):
+        limiter.wait()
+    assert sleeps == [2.0, 2.0]
+
+    limiter.pause(30)
+    limiter.wait()
+    assert sleeps[-1] == pytest.approx(30)
@@ -0,0 +1,120 @@
+import pytest
+
+from etl.collector_cian import detail_parser, detail_scheduler
+from etl.collector_cian.detail_parser import DetailStats, write_details_batch
+from etl.collector_cian.detail_scheduler import DetailCandidate, run_detail_queue, score_candidate
+
+
+class _Cursor:
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((" ".join(sql.split()), params))
+
+    def __iter__(self):
+        return iter(self.conn.candidates)
+
+
+class _Conn:
+    def __init__(self, candidates=()):
+        self.candidates = list(candidates)
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self, name=None):
+        return _Cursor(self, name)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_scores_rank_missing_data_and_comparables():
+    never_parsed = DetailCandidate(1, missing_house_year=True, missing_photos=True)
+    fresh_complete = DetailCandidate(2, parse_age_days=0.5)
+    fresh_missing = DetailCandidate(3, missing_house_year=True, parse_age_days=1)
+    stale = DetailCandidate(4, parse_age_days=60)
+    repriced = DetailCandidate(5, parse_age_days=1, current_price=9_000_000, parsed_price=10_000_000)
+
+    priority, reasons = score_candidate(never_parsed)
+    assert reasons == ["never_parsed", "house_year", "photos"]
+    assert priority == pytest.approx(25 + 30 + 15)
+
+    # Just parsed: little to gain, and a field still missing is probably not on the page
+    assert score_candidate(fresh_complete)[0] < detail_scheduler.MIN_PRIORITY
+    assert score_candidate(fresh_missing)[0] < score_candidate(stale)[0]
+    assert score_candidate(stale)[1] == ["stale"]
+    assert score_candidate(repriced)[1] == ["price_changed"]
+    assert score_candidate(repriced)[0] > score_candidate(fresh_missing)[0]
+
+    # Comparables multiply the need, never create it
+    used = DetailCandidate(4, parse_age_days=60, comparable_uses=50)
+    assert score_candidate(used)[0] == pytest.approx(score_candidate(stale)[0] * 3)
+    assert "comparable" in score_candidate(used)[1]
+    assert score_candidate(DetailCandidate(2, parse_age_days=0, comparable_uses=5)) == (0.0, [])
+
+
+def test_refresh_queues_listings_above_min_priority(monkeypatch):
+    conn = _Conn([
+        (1, True, True, True, None, 10_000_000, None, 2),
+        (2, False, False, False, 0.1, 10_000_000, 10_000_000, 0),
+        (3, False, False, False, 90.0, 10_000_000, 10_000_000, 0),
+    ])
+    written = []
+    monkeypatch.setattr(detail_scheduler, "_write_scores", lambda conn, rows: written.extend(rows))
+
+    assert detail_scheduler.refresh_detail_queue(conn) == 2
+    assert [row[0] for row in written] == [1, 3]
+    assert written[0][2] == ["never_parsed", "house_year", "description", "photos", "comparable"]
+    assert conn.statements[-1][0] == "DELETE FROM listing_detail_queue WHERE scored_at < NOW()"
+    assert conn.commits == 1
+
+
+def test_worker_parses_claimed_listings_and_updates_queue(monkeypatch):
+    conn = _Conn()
+    claimed = [(7, "https://www.cian.ru/sale/flat/7/"), (3, "https://www.cian.ru/sale/flat/3/"),
+               (9, "https://www.cian.ru/sale/flat/9/")]
+    monkeypatch.setattr(detail_scheduler, "claim_detail_batch", lambda conn, limit: claimed[:limit])
+    calls = {}
+
+    def fake_save(conn, listing_id, details):
+        if listing_id == 3:
+            raise ValueError("constraint violation")
+        return 0
+
+    def fake_parse(conn, listing_urls, *, tabs, max_duration, on_result, **kwargs):
+        calls.update(urls=listing_urls, tabs=tabs)
+        stats = DetailStats(parsed=2)
+        on_result(9, "detail page not parsed")
+        write_details_batch(conn, [(7, {"description": "..."}), (3, {"description": "..."})], stats, on_result)
+        return stats
+
+    monkeypatch.setattr(detail_parser, "save_listing_details", fake_save)
+    monkeypatch.setattr(detail_scheduler, "parse_details_concurrently", fake_parse)
+
+    stats = run_detail_queue(conn, 3, tabs=0, refresh=False)
+
+    assert stats.saved == 1 and stats.failed == 1
+    assert calls == {"urls": claimed, "tabs": 1}
+    sql = [statement for statement, _ in conn.statements]
+    completed = [params for statement, params in conn.statements if statement.startswith("DELETE FROM listing_detail_queue")]
+    failed = [params for statement, params in conn.statements if statement.startswith("UPDATE listing_detail_queue")]
+    assert completed == [(7,)]
+    assert failed == [("detail page not parsed", 9), ("save failed: constraint violation", 3)]
+    # Listing 7 leaves the queue in the savepoint of its save
+    delete = sql.index("DELETE FROM listing_detail_queue WHERE listing_id = %s")
+    assert sql[delete - 2] == "SAVEPOINT listing_details" and sql[delete + 1] == "RELEASE SAVEPOINT listing_details"
+    # Listing 3 is rolled back before it could be marked parsed
+    assert sql.count("UPDATE listings SET details_parsed_at = NOW() WHERE id = %s") == 1
+    assert conn.commits == 2  # the batch and the worker's final commit
+
+    monkeypatch.setattr(detail_scheduler, "claim_detail_batch", lambda conn, limit: [])
+    assert run_detail_queue(conn, 2, refresh=False).parsed == 0
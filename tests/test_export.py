@@ -0,0 +1,60 @@
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from etl.export import ExportFilters, build_export_query, encode_csv, stream_export
+
+COLUMNS = ["id", "price", "seen_at", "meta"]
+TYPES = [20, 1700, 1184, 3802]  # int8, numeric, timestamptz, jsonb
+CHUNKS = [
+    (COLUMNS, TYPES, [(1, Decimal("10.5"), datetime(2026, 1, 1, tzinfo=timezone.utc), {"a": 1})]),
+    (COLUMNS, TYPES, [(2, None, None, None)]),
+]
+
+
+def test_query_applies_filters():
+    sql, params = build_export_query(
+        "listing_prices",
+        ExportFilters(date_from=date(2026, 1, 1), date_to=date(2026, 1, 31), district_id=5, segment_id=7),
+    )
+    assert "lp.seen_at >= %s" in sql and "lp.seen_at < %s::date + 1" in sql
+    assert "l.district_id = %s" in sql and "l.property_segment_id = %s" in sql
+    assert sql.endswith("ORDER BY lp.id, lp.seen_at")
+    assert params == [date(2026, 1, 1), date(2026, 1, 31), 5, 7]
+
+
+def test_unsupported_filters_and_formats_rejected():
+    with pytest.raises(ValueError):
+        build_export_query("rosreestr_deals", ExportFilters(district_id=1))
+    with pytest.raises(ValueError):
+        build_export_query("users")
+    with pytest.raises(ValueError):
+        stream_export("listings", "xlsx")
+
+
+def test_csv_header_once_and_json_values():
+    data = b"".join(encode_csv(iter(CHUNKS))).decode("utf-8")
+    lines = data.splitlines()
+    assert lines[0] == "id,price,seen_at,meta"
+    assert lines[1] == '1,10.5,2026-01-01 00:00:00+00:00,"{""a"": 1}"'
+    assert lines[2] == "2,,,"
+
+
+def test_csv_empty_export_has_header():
+    data = b"".join(encode_csv(iter([(COLUMNS, TYPES, [])])))
+    assert data.decode("utf-8").strip() == "id,price,seen_at,meta"
+
+
+def test_parquet_row_group_per_chunk():
+    pq = pytest.importorskip("pyarrow.parquet")
+    from etl.export import encode_parquet
+
+    parts = list(encode_parquet(iter(CHUNKS)))
+    assert len(parts) == 3  # one block per chunk + footer
+    parquet_file = pq.ParquetFile(io.BytesIO(b"".join(parts)))
+    assert parquet_file.metadata.num_row_groups == 2
+    rows = parquet_file.read().to_pylist()
+    assert rows[0]["price"] == 10.5 and rows[0]["meta"] == '{"a": 1}'
+    assert rows[1] == {"id": 2, "price": None, "seen_at": None, "meta": None}
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from api.v1.history_writer import ValuationHistoryWriter
+
+
+class _FakeWriter(ValuationHistoryWriter):
+    """Records batches instead of writing to PostgreSQL."""
+
+    def __init__(self, fail_address=None, **kwargs):
+        super().__init__(dsn="postgresql://unused", **kwargs)
+        self.batches = []
+        self.fail_address = fail_address
+        self._next_id = 1
+        self.release = threading.Event()
+        self.release.set()
+
+    def _write_batch(self, items):
+        if threading.current_thread().name == "valuation-history-writer":
+            self.release.wait(5)
+        if any(item.record["address"] == self.fail_address for item in items):
+            raise RuntimeError("bad row")
+        self.batches.append([item.record["address"] for item in items])
+        ids = list(range(self._next_id, self._next_id + len(items)))
+        self._next_id += len(items)
+        return ids
+
+
+def test_records_are_batched_and_flushed_on_close():
+    writer = _FakeWriter(batch_size=10, flush_interval=5.0)
+    writer.release.clear()
+    writer.submit({"address": "a"})  # worker picks it up and blocks
+    for address in ("b", "c", "d"):
+        writer.submit({"address": address}, [{"listing_id": 1}])
+    writer.release.set()
+    writer.close()
+    assert sum(writer.batches, []) == ["a", "b", "c", "d"]
+    assert len(writer.batches) <= 2
+    assert writer.stats()["written"] == 4
+    assert writer.queue_depth() == 0
+
+
+def test_save_waits_for_id():
+    writer = _FakeWriter(flush_interval=0.01)
+    assert writer.save({"address": "a"}) == 1
+    assert writer.save({"address": "b"}) == 2
+    writer.close()
+
+
+def test_failed_batch_retries_rows_one_by_one():
+    writer = _FakeWriter(fail_address="bad", batch_size=10, flush_interval=5.0)
+    writer.release.clear()
+    writer.submit({"address": "first"})
+    futures = [writer.submit({"address": a}, want_id=True) for a in ("ok1", "bad", "ok2")]
+    writer.release.set()
+    writer.close()
+    assert futures[0].result() is not None
+    assert futures[2].result() is not None
+    with pytest.raises(RuntimeError):
+        futures[1].result()
+    assert writer.stats()["failed"] == 1
+
+
+def test_full_queue_writes_inline():
+    writer = _FakeWriter(queue_size=1, batch_size=1, flush_interval=0.01)
+    writer.release.clear()
+    writer.submit({"address": "a"})  # taken by the worker, blocked
+    # Wait until the worker has dequeued "a"
+    for _ in range(100):
+        if writer.queue_depth() == 0:
+            break
+        threading.Event().wait(0.01)
+    writer.submit({"address": "b"})  # fills the queue
+    writer.submit({"address": "c"})  # queue full -> written inline
+    assert writer.batches == [["c"]]
+    writer.release.set()
+    writer.close()
+    assert sorted(sum(writer.batches, [])) == ["a", "b", "c"]
+    assert writer.stats()["written_inline"] == 1
+
+
+def test_prometheus_exposes_queue_depth():
+    writer = _FakeWriter()
+    text = writer.render_prometheus()
+    assert "valuation_history_queue_depth 0" in text
+    assert "valuation_history_written_total 0" in text
+
+
+def test_slow_normalizer_does_not_delay_waiting_saves(monkeypatch):
+    from api.v1 import history_writer
+
+    monkeypatch.setattr(history_writer, "HISTORY_SAVE_TIMEOUT", 1.0)
+    normalized = []
+
+    def slow_normalizer(address):
+        time.sleep(0.3)  # DaData round trip
+        normalized.append(address)
+        return address.upper()
+
+    writer = _FakeWriter(address_normalizer=slow_normalizer, flush_interval=0.01, normalize_workers=2)
+    records = [{"address": f"queued {i}"} for i in range(8)]
+    for record in records:
+        writer.submit(record)
+
+    # 8 * 0.3s of normalizations queued ahead; the save only pays its own
+    started = time.monotonic()
+    assert writer.save({"address": "waiting"}) is not None
+    assert time.monotonic() - started < 0.9
+
+    writer.close()
+    assert len(normalized) == 9
+    assert sorted(sum(writer.batches, [])) == sorted([r["address"] for r in records] + ["waiting"])
+    assert all(r["address_normalized"] == r["address"].upper() for r in records)
@@ -0,0 +1,129 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("jinja2")
+
+from api.v1 import html_report_generator as reports
+from api.v1.html_report_generator import HTMLReportGenerator, RenderedReportCache
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._row = None
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((" ".join(sql.split()), params))
+        if "INSERT INTO valuation_reports" in sql:
+            self.conn.next_id += 1
+            self._row = {"id": self.conn.next_id}
+        else:
+            self._row = self.conn.row
+
+    def fetchone(self):
+        return self._row
+
+    def close(self):
+        pass
+
+
+class _FakeConn:
+    """Shared by every get_db_connection() call of a test."""
+
+    def __init__(self, row=None):
+        self.row = row
+        self.statements = []
+        self.connections = 0
+        self.commits = 0
+        self.next_id = 0
+
+    def __call__(self):
+        self.connections += 1
+        return self
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+
+def test_cache_is_lru_with_stable_validators():
+    cache = RenderedReportCache(max_size=2)
+    assert cache.get("A") is None
+
+    first = cache.put("A", "<html>a</html>", datetime(2026, 1, 2, 3, 4, 5, 678))
+    assert cache.get("a") is first  # keys are case-insensitive UUIDs
+    assert first.etag == cache.put("a", "<html>a</html>").etag
+    assert first.etag != cache.put("b", "<html>b</html>").etag
+    assert first.last_modified.microsecond == 0  # HTTP dates have second precision
+
+    cache.get("a")
+    cache.put("c", "<html>c</html>")  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats() == {"size": 2, "hits": 3, "misses": 2}
+
+
+def test_rendered_report_is_loaded_once_then_served_from_cache(monkeypatch):
+    created_at = datetime(2026, 3, 1, 12, 0, 0, tzinfo=timezone.utc)
+    db = _FakeConn({"html_content": "<html>report</html>", "created_at": created_at})
+    monkeypatch.setattr(reports, "get_db_connection", db)
+    generator = HTMLReportGenerator(ensure_table=False)
+
+    rendered = generator.get_rendered_report("11111111-2222-3333-4444-555555555555")
+    assert rendered.html == "<html>report</html>"
+    assert rendered.last_modified == created_at and rendered.etag.startswith('"')
+    assert generator.get_report_html("11111111-2222-3333-4444-555555555555") == rendered.html
+    assert db.connections == 1
+    assert generator.cache.stats()["hits"] == 1
+
+    db.row = None
+    assert generator.get_rendered_report("00000000-0000-0000-0000-000000000000") is None
+
+
+def test_report_endpoint_answers_conditional_requests(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from api.v1 import valuation
+
+    rendered = RenderedReportCache().put("abc", "<html>report</html>", datetime(2026, 3, 1, 12, 0, 0, tzinfo=timezone.utc))
+    monkeypatch.setattr(valuation, "HTML_REPORTS_AVAILABLE", True)
+    monkeypatch.setattr(valuation, "get_rendered_report", lambda report_uuid: rendered if report_uuid == "abc" else None)
+    client = TestClient(valuation.app)
+
+    response = client.get("/r/abc")
+    assert response.status_code == 200 and response.text == "<html>report</html>"
+    assert response.headers["etag"] == rendered.etag
+
+    assert client.get("/r/abc", headers={"If-None-Match": rendered.etag}).status_code == 304
+    assert client.get("/r/abc", headers={"If-None-Match": '"stale"'}).status_code == 200
+    since = format_datetime(rendered.last_modified, usegmt=True)
+    assert client.get("/r/abc", headers={"If-Modified-Since": since}).status_code == 304
+    assert client.get("/r/missing").status_code == 404
+
+
+def test_bulk_reports_are_saved_in_one_transaction(monkeypatch, tmp_path):
+    db = _FakeConn()
+    monkeypatch.setattr(reports, "get_db_connection", db)
+    monkeypatch.setattr(reports, "REPORTS_DIR", str(tmp_path))
+    monkeypatch.setattr(reports, "_generator", HTMLReportGenerator(ensure_table=False))
+
+    params = [{"address": f"Москва, ул. Тестовая, {i}", "area_total": 40 + i} for i in range(5)]
+    saved = reports.generate_reports_bulk(params, max_workers=2, chunksize=2)
+
+    assert [r["report_id"] for r in saved] == [1, 2, 3, 4, 5]
+    assert all("row" not in r for r in saved)
+    assert all(f"ул. Тестовая, {i}" in r["html_content"] for i, r in enumerate(saved))
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{r['report_uuid']}.html" for r in saved)
+    # One connection and one commit for the whole batch
+    assert db.connections == 1 and db.commits == 1
+    assert sum("INSERT INTO valuation_reports" in sql for sql, _ in db.statements) == 5
+    # Saved reports are served from the warm cache
+    assert reports.get_generator().get_rendered_report(saved[0]["report_uuid"]).html == saved[0]["html_content"]
+    assert db.connections == 1
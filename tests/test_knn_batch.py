@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+from etl.valuation.knn_searcher import KNNSearcher
+from etl.valuation.models import PropertyFeatures
+
+
+def _listing(listing_id, lat, lon, rooms=2, area=50.0, building_class=None):
+    return {
+        'id': listing_id, 'url': None, 'price': area * 300000, 'area_total': area,
+        'rooms': rooms, 'floor': 3, 'total_floors': 9, 'building_type': None,
+        'building_year': None, 'lat': lat, 'lon': lon, 'building_class': building_class,
+        'seen_at': datetime.now(timezone.utc),
+    }
+
+
+class _AreaSearcher(KNNSearcher):
+    """Serves candidates from a list instead of the listings table."""
+
+    def __init__(self, listings):
+        super().__init__(dsn="postgresql://unused")
+        self.listings = listings
+        self.fetches = []
+
+    def _fetch_area(self, features_list, max_age_days):
+        self.fetches.append(len(features_list))
+        return self.listings
+
+
+def test_search_many_shares_candidates_within_a_tile():
+    listings = [
+        _listing(1, 55.751, 37.611),
+        _listing(2, 55.760, 37.620),
+        _listing(3, 55.752, 37.612, rooms=4),  # rooms too far from 2
+        _listing(4, 55.780, 37.650),
+        _listing(5, 59.930, 30.310),  # another city
+    ]
+    searcher = _AreaSearcher(listings)
+    targets = [
+        PropertyFeatures(lat=55.7505, lon=37.6105, area_total=50.0, rooms=2),
+        PropertyFeatures(lat=55.7510, lon=37.6110, area_total=50.0, rooms=2, exclude_listing_id=1),
+        PropertyFeatures(lat=59.9300, lon=30.3100, area_total=50.0, rooms=2),
+        PropertyFeatures(area_total=50.0),  # no coordinates
+    ]
+
+    results = searcher.search_many(targets, k=10)
+
+    assert searcher.fetches == [2, 1]
+    assert [c.listing_id for c in sorted(results[0].comparables, key=lambda c: c.distance_km)] == [1, 2, 4]
+    assert {c.listing_id for c in results[1].comparables} == {2, 4}
+    assert [c.listing_id for c in results[2].comparables] == [5]
+    assert results[3] is None
+
+
+def test_select_comparables_orders_by_distance_and_applies_class_filter():
+    searcher = _AreaSearcher([])
+    candidates = [
+        _listing(1, 55.76, 37.62, building_class=3),
+        _listing(2, 55.751, 37.611, building_class=7),
+        _listing(3, 55.755, 37.615, building_class=3),
+    ]
+    target = PropertyFeatures(lat=55.75, lon=37.61, area_total=50.0, rooms=2)
+
+    rows = searcher._select_comparables(target, candidates, limit=2)
+    assert [row['id'] for row in rows] == [2, 3]
+    assert rows[0]['distance_km'] < rows[1]['distance_km'] < 1.0
+
+    rows = searcher._select_comparables(target, candidates, limit=10, class_codes=[3])
+    assert [row['id'] for row in rows] == [3, 1]
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from etl import fias_normalizer
+from etl.normalize_addresses import NormalizationPipeline
+
+
+class _FakeApi:
+    """Stands in for the DaData/FIAS API: slow, thread-safe, counts calls."""
+
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, address):
+        with self._lock:
+            self.calls.append(address)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if address in self.fail:
+            return None
+        return {"fias_address": f"г Москва, {address}", "fias_id": None, "postal_code": None, "quality_code": 1}
+
+
+class _FakePipeline(NormalizationPipeline):
+    """In-memory listings table and checkpoint instead of PostgreSQL."""
+
+    def __init__(self, listings, crash_after_batches=None, **kwargs):
+        super().__init__(conn=None, **kwargs)
+        self.listings = listings
+        self.checkpoint = None
+        self.written = {}
+        self.crash_after_batches = crash_after_batches
+
+    def _start_run(self, restart):
+        if self.checkpoint is None or restart:
+            self.checkpoint = {"run_id": 1, "last_id": 0, "finished": False}
+        return self.checkpoint["run_id"], self.checkpoint["last_id"]
+
+    def _fetch_batch(self, after_id, size):
+        rows = [(i, a) for i, a in sorted(self.listings.items()) if i > after_id and i not in self.written]
+        return rows[:size]
+
+    def _write_batch(self, run_id, last_id, updates, processed):
+        if self.crash_after_batches is not None:
+            if self.crash_after_batches == 0:
+                raise RuntimeError("crash")
+            self.crash_after_batches -= 1
+        for update in updates:
+            self.written[update["listing_id"]] = update["fias_address"]
+        self.checkpoint["last_id"] = last_id
+
+    def _finish_run(self, run_id):
+        self.checkpoint["finished"] = True
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    api = _FakeApi()
+    monkeypatch.setattr(fias_normalizer, "normalize_address", api)
+    return api
+
+
+def test_batch_normalize_dedupes_and_runs_concurrently(fake_api):
+    addresses = ["Тверская 1", "тверская  1", "Арбат 2", None, "Арбат 3", "Арбат 4"]
+    results = fias_normalizer.batch_normalize_addresses(addresses, max_workers=4)
+
+    assert len(fake_api.calls) == 4  # "Тверская 1" once, empty address skipped
+    assert results[0] == results[1]
+    assert results[3] is None
+    assert results[2]["fias_address"] == "г Москва, Арбат 2"
+    assert fake_api.max_active > 1
+
+
+def test_pipeline_writes_batches_and_reports(fake_api):
+    fake_api.fail = {"Нигде 0"}
+    listings = {i: f"Арбат {i % 3}" for i in range(1, 11)}
+    listings[11] = "Нигде 0"
+    pipeline = _FakePipeline(listings, batch_size=4, workers=4)
+
+    report = pipeline.run()
+
+    assert report.total == 11 and report.success == 10 and report.failed == 1
+    assert report.batches == 3
+    assert len(fake_api.calls) <= 3 * 3  # at most 3 unique addresses per batch
+    assert pipeline.checkpoint == {"run_id": 1, "last_id": 11, "finished": True}
+    assert pipeline.written[4] == "г Москва, Арбат 1"
+
+
+def test_pipeline_resumes_after_last_committed_batch(fake_api):
+    listings = {i: f"Арбат {i}" for i in range(1, 11)}
+    pipeline = _FakePipeline(listings, crash_after_batches=2, batch_size=3, workers=2)
+
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+    assert pipeline.checkpoint["last_id"] == 6
+    assert sorted(pipeline.written) == [1, 2, 3, 4, 5, 6]
+
+    fake_api.calls.clear()
+    pipeline.crash_after_batches = None
+    report = pipeline.run()
+
+    assert report.resumed_from == 6
+    assert sorted(fake_api.calls) == ["Арбат 10", "Арбат 7", "Арбат 8", "Арбат 9"]
+    assert sorted(pipeline.written) == list(range(1, 11))
+
+
+def test_pipeline_limit_leaves_run_open(fake_api):
+    pipeline = _FakePipeline({i: f"Арбат {i}" for i in range(1, 6)}, batch_size=10)
+    report = pipeline.run(limit=2)
+    assert report.total == 2
+    assert pipeline.checkpoint == {"run_id": 1, "last_id": 2, "finished": False}
@@ -0,0 +1,98 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+
+from etl.ai_evaluator.batch_processor import BatchProcessor
+from etl.ai_evaluator.photo_analyzer import ConditionRating
+from etl.ai_evaluator.photo_fingerprints import PIL_AVAILABLE, PhotoFingerprintStore, dhash, hamming
+
+pytestmark = pytest.mark.skipif(not PIL_AVAILABLE, reason="Pillow not installed")
+
+
+def _image(seed, size=(240, 180), fmt="PNG", quality=90):
+    """Smooth synthetic "photo": the same picture at any size."""
+    import math
+    from PIL import Image
+
+    w, h = size
+    img = Image.new("L", size)
+    img.putdata([
+        int(128 + 60 * math.sin(seed * x / w * 3) + 60 * math.cos((seed + 2) * y / h * 2))
+        for y in range(h) for x in range(w)
+    ])
+    buf = BytesIO()
+    img.convert("RGB").save(buf, format=fmt, **({"quality": quality} if fmt == "JPEG" else {}))
+    return buf.getvalue()
+
+
+class _FakeStore(PhotoFingerprintStore):
+    """Serves photos from a dict instead of HTTP; no cache tables."""
+
+    def __init__(self, photos, **kwargs):
+        super().__init__(cache_enabled=False, **kwargs)
+        self.photos = photos
+        self.downloads = []
+
+    def _download(self, url):
+        self.downloads.append(url)
+        return self.photos[url]
+
+
+class _FakeAnalyzer:
+    cost_per_image = 0.005
+
+    def __init__(self):
+        self.calls = []
+
+    async def analyze_condition_async(self, listing_id, photo_url, *, client, detail="low"):
+        self.calls.append(photo_url)
+        return ConditionRating(
+            listing_id=listing_id, condition_score=4, condition_label="good",
+            ai_model="fake", ai_analysis="ok", confidence=0.9, cost_usd=self.cost_per_image,
+        )
+
+
+def test_dhash_survives_reencoding_and_resizing():
+    original = dhash(_image(5))
+    assert hamming(original, dhash(_image(5, size=(480, 360), fmt="JPEG", quality=60))) <= 3
+    assert hamming(original, dhash(_image(11))) > 10
+
+
+def test_store_downloads_each_url_once_and_matches_near_duplicates():
+    store = _FakeStore({"a.png": _image(5), "a-repost.jpg": _image(5, size=(300, 225), fmt="JPEG")})
+    h = store.fingerprint("a.png")
+    assert store.fingerprint("a.png") == h
+    assert store.downloads == ["a.png"]
+
+    store.save("condition", [h], {"condition_score": 4})
+    assert store.lookup("condition", [store.fingerprint("a-repost.jpg")]) == {"condition_score": 4}
+    assert store.lookup("condition", [h ^ 0b101]) == {"condition_score": 4}  # distance 2
+    assert store.lookup("condition", [h ^ 0b1111]) is None  # distance 4
+
+    exact_only = _FakeStore({}, max_distance=0)
+    exact_only.save("condition", [h], {"condition_score": 4})
+    assert exact_only.lookup("condition", [h ^ 0b101]) is None
+
+
+def test_batch_processor_reuses_ratings_across_listings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    photos = {
+        "1.png": _image(5),
+        "1-repost.jpg": _image(5, fmt="JPEG"),
+        "2.png": _image(11),
+    }
+    processor = BatchProcessor(fingerprints=_FakeStore(photos), batch_size=10)
+    processor.analyzer = _FakeAnalyzer()
+
+    batch = [(1, "1.png"), (2, "1-repost.jpg"), (3, "2.png"), (4, "2.png")]
+    stats = asyncio.run(processor.process_listings(batch))
+
+    assert len(processor.analyzer.calls) == 2
+    assert stats.total_analyzed == 2 and stats.cache_hits == 2
+    assert stats.cost_saved_usd == pytest.approx(0.01)
+    assert sorted(r.listing_id for r in processor.ratings) == [1, 2, 3, 4]
+
+    stats = asyncio.run(processor.process_listings([(5, "2.png")]))
+    assert len(processor.analyzer.calls) == 2
+    assert stats.cache_hits == 3 and stats.hit_rate() == pytest.approx(0.6)
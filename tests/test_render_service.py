@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+from api.v1 import render_service
+from api.v1.render_service import RenderService
+
+
+def _fake_card(valuation_data):
+    """Runs in the pool worker: returns the worker pid with the data."""
+    if valuation_data.get("broken"):
+        raise ValueError("bad valuation")
+    return json.dumps({"pid": os.getpid(), **valuation_data}).encode()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setitem(render_service._RENDERERS, "card", _fake_card)
+    monkeypatch.setattr(render_service, "_init_worker", lambda: None)
+    service = RenderService(max_workers=1, cache_size=2)
+    yield service
+    service.shutdown()
+
+
+def test_renders_in_pool_and_caches_by_valuation(service):
+    first = service.render_card(1, {"price": 100})
+    assert json.loads(first)["pid"] != os.getpid()  # rendered in a worker process
+    assert service.render_card(1, {"price": 100}) is first
+
+    # Changed valuation data is rendered again
+    second = service.render_card(1, {"price": 120})
+    assert json.loads(second)["price"] == 120
+
+    service.invalidate(1)
+    service.render_card(1, {"price": 120})
+    # Without an id nothing is cached
+    service.render_card(None, {"price": 1})
+    service.render_card(None, {"price": 1})
+
+    metrics = service.metrics()
+    assert metrics["card"]["renders"] == 5 and metrics["card"]["cache_hits"] == 1
+    assert metrics["card"]["latency_ms"]["p95"] is not None
+    assert metrics["cache_size"] == 1
+
+
+def test_render_errors_are_counted_and_raised(service):
+    with pytest.raises(ValueError):
+        service.render_card(2, {"broken": True})
+    assert service.metrics()["card"]["errors"] == 1
+    assert service.metrics()["cache_size"] == 0
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from etl.valuation.building_class import allowed_class_codes
+from etl.valuation.rosreestr_index import RosreestrIndex
+
+
+def _index(deals):
+    index = RosreestrIndex(dsn="postgresql://unused")
+    cols = list(zip(*deals))
+    ids, lat, lon, area, year, floor, deal_date = cols
+    index._build(
+        list(ids),
+        [f"street {i}" for i in ids],
+        list(deal_date),
+        [a * 200000.0 for a in area],
+        [200000.0] * len(ids),
+        list(area),
+        list(floor),
+        list(year),
+        [None] * len(ids),
+        list(lat),
+        list(lon),
+        [d.toordinal() for d in deal_date],
+    )
+    index._last_check = float("inf")  # Never hit the database
+    return index
+
+
+DEALS = [
+    # id, lat, lon, area, year, floor, deal_date
+    (1, 55.7500, 37.6100, 50.0, 1965, 3, date(2026, 5, 1)),
+    (2, 55.7510, 37.6110, 52.0, 2015, 12, date(2026, 6, 1)),
+    (3, 55.7600, 37.6300, 48.0, 2005, 20, date(2026, 7, 1)),
+    (4, 55.9000, 37.9000, 50.0, 2018, 5, date(2026, 7, 1)),   # far away
+    (5, 55.7505, 37.6105, 50.0, 2012, 7, date(2020, 1, 1)),   # too old
+]
+
+
+def test_nearby_sorted_by_distance_within_radius():
+    index = _index(DEALS)
+    rows = index.nearby(55.75, 37.61, radius_m=3000, limit=10)
+    assert [r["id"] for r in rows] == [1, 5, 2, 3]
+    assert rows[0]["distance_m"] < 1
+    assert all(rows[i]["distance_m"] <= rows[i + 1]["distance_m"] for i in range(len(rows) - 1))
+
+
+def test_nearby_filters_date_area_and_class():
+    index = _index(DEALS)
+    rows = index.nearby(
+        55.75, 37.61,
+        radius_m=3000,
+        min_date=date(2026, 1, 1),
+        area_min=49,
+        area_max=60,
+        class_codes=allowed_class_codes(2010, None),
+        limit=10,
+    )
+    assert [r["id"] for r in rows] == [2]
+
+
+def test_nearby_floors_class_uses_deal_floor():
+    index = _index(DEALS)
+    # 5-floor target: deals on floors 12 and 20 prove 9+ floor buildings
+    rows = index.nearby(55.75, 37.61, radius_m=3000, class_codes=allowed_class_codes(None, 5), limit=10)
+    assert [r["id"] for r in rows] == [1, 5]
+
+
+def test_nearby_limit_keeps_closest():
+    index = _index(DEALS)
+    rows = index.nearby(55.75, 37.61, box=(0.05, 0.07), limit=2)
+    assert [r["id"] for r in rows] == [1, 5]
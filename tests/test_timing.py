@@ -0,0 +1,41 @@
+from etl.valuation.timing import (
+    Histogram,
+    server_timing_header,
+    span,
+    start_request,
+    summarize,
+    timed,
+)
+
+
+def test_spans_are_collected_per_request():
+    spans = start_request()
+
+    @timed("lookup")
+    def lookup():
+        return 42
+
+    with span("sql"):
+        pass
+    assert lookup() == 42
+    assert lookup() == 42
+
+    assert [stage for stage, _ in spans] == ["sql", "lookup", "lookup"]
+    assert list(summarize(spans)) == ["sql", "lookup"]
+
+    header = server_timing_header(spans, total=0.5)
+    assert header.startswith("sql;dur=")
+    assert header.endswith("total;dur=500.0")
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("test_seconds", "Test", "stage", buckets=(0.1, 1.0))
+    hist.observe("a", 0.05)
+    hist.observe("a", 0.5)
+    hist.observe("a", 5.0)
+
+    text = hist.render()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="a"} 3' in text
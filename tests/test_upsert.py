@@ -3,7 +3,7 @@ from decimal import Decimal
 import pytest
 
 from etl.models import Listing
-from etl.upsert import get_db_connection, upsert_listing, upsert_price_if_changed
+from etl.upsert import get_db_connection, update_listing_details, upsert_listing, upsert_price_if_changed
 
 
 @pytest.fixture(scope="module")
@@ -97,3 +97,37 @@ def test_upsert_price_inserts_only_on_change(db_conn):
     assert max_price == Decimal("10100000")
 
     db_conn.commit()
+
+
+def _segment_of(conn, listing_id):
+    with conn.cursor() as cur:
+        cur.execute("SELECT property_segment_id FROM listings WHERE id = %s", (listing_id,))
+        return cur.fetchone()[0]
+
+
+def test_update_details_assigns_segment_only_with_known_rooms(db_conn):
+    with db_conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO property_segments (building_type, building_height, rooms_count) "
+            "VALUES ('panel', 'medium', 5), ('panel', 'medium', 2) ON CONFLICT DO NOTHING"
+        )
+    details = {"building_type": "panel", "total_floors": 9}
+    for listing_id, rooms in ((1003, None), (1004, 2)):
+        upsert_listing(db_conn, Listing(
+            id=listing_id,
+            url=f"https://example/{listing_id}",
+            region=77,
+            deal_type="sale",
+            rooms=rooms,
+            area_total=50.0,
+            floor=3,
+            address="Segment test",
+            seller_type="owner",
+        ))
+        update_listing_details(db_conn, listing_id, details)
+
+    # Unknown rooms must not land in the 5-room segment
+    assert _segment_of(db_conn, 1003) is None
+    assert _segment_of(db_conn, 1004) is not None
+
+    db_conn.commit()